@@ -0,0 +1,130 @@
+import argparse
+import logging
+import time
+import tracemalloc
+import traceback
+from pathlib import Path
+
+import numpy as np
+import sys
+
+from janelia_emrp.fibsem.cyx_dat import new_cyx_dat
+from janelia_emrp.fibsem.dat_path import new_dat_path
+from janelia_emrp.fibsem.dat_to_scheffer_8_bit_layer import EightBitLookupTable, LayerIntensityStatistics, \
+    float_convert
+from janelia_emrp.root_logger import init_logger
+
+logger = logging.getLogger(__name__)
+
+
+def lookup_table_convert(pixel_array: np.ndarray,
+                         low: float,
+                         span: float) -> tuple[np.ndarray, int, int]:
+    """
+    Lookup table 16-bit to 8-bit conversion path used by `compress_compute_layer`.
+
+    Returns
+    -------
+    tuple[np.ndarray, int, int]
+        the 8-bit pixels, the number of pixels clipped to black, and the number of pixels clipped to white.
+    """
+    tile_counts = LayerIntensityStatistics().add_tile(pixel_array)
+    lookup_table = EightBitLookupTable(low=low, span=span)
+    too_low_count, too_high_count = lookup_table.clipped_counts(tile_counts)
+    return lookup_table.convert(pixel_array), too_low_count, too_high_count
+
+
+def time_conversion(context: str,
+                    convert_function,
+                    pixel_array: np.ndarray,
+                    low: float,
+                    span: float,
+                    iterations: int) -> tuple[np.ndarray, int, int]:
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = None
+    for _ in range(iterations):
+        result = convert_function(pixel_array, low, span)
+    elapsed_seconds = (time.perf_counter() - start_time) / iterations
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    megapixels_per_second = (pixel_array.size / 1_000_000) / elapsed_seconds
+    logger.info(f"time_conversion: {context} took {elapsed_seconds * 1000:.3f} ms per tile "
+                f"({megapixels_per_second:.1f} megapixels per second), "
+                f"peak allocation was {peak_bytes / pixel_array.size:.2f} bytes per pixel")
+    return result
+
+
+def benchmark_dat(dat_path: Path,
+                  repeat: int,
+                  iterations: int) -> None:
+    cyx_dat = new_cyx_dat(new_dat_path(dat_path))
+
+    # tile the source pixels so that small test dats produce measurable timings
+    pixel_array = np.tile(cyx_dat.pixels[0, :, :], (repeat, repeat))
+
+    layer_statistics = LayerIntensityStatistics()
+    layer_statistics.add_tile(pixel_array)
+    _, mean, std_dev = layer_statistics.mean_and_std_dev(min_intensity=-32765.0, max_intensity=32764.0)
+    low = mean + (4 * std_dev)
+    span = (mean - (4 * std_dev)) - low
+
+    logger.info(f"benchmark_dat: converting {pixel_array.shape} pixels from {dat_path}")
+
+    float_result = time_conversion("float path", float_convert, pixel_array, low, span, iterations)
+    lookup_result = time_conversion("lookup table path", lookup_table_convert, pixel_array, low, span, iterations)
+
+    if not np.array_equal(float_result[0], lookup_result[0]):
+        raise ValueError(f"8-bit pixels differ between conversion paths for {dat_path}")
+    if float_result[1:] != lookup_result[1:]:
+        raise ValueError(f"clip counts differ between conversion paths for {dat_path}, "
+                         f"float path counts are {float_result[1:]} and lookup path counts are {lookup_result[1:]}")
+
+    logger.info(f"benchmark_dat: conversion results match for {dat_path}")
+
+
+def main(arg_list: list[str]):
+    parser = argparse.ArgumentParser(
+        description="Compares the floating point and lookup table 16-bit to 8-bit conversion paths."
+    )
+    parser.add_argument(
+        "--dat_path",
+        help="Path(s) of source dat file(s) (e.g. tests/resources/janelia_emrp/fibsem/small_21-07-31_152727_0-0-1.dat)",
+        required=True,
+        nargs='+'
+    )
+    parser.add_argument(
+        "--repeat",
+        help="Tile each dat this many times in x and y to simulate a larger dat",
+        type=int,
+        default=40
+    )
+    parser.add_argument(
+        "--iterations",
+        help="Number of times to run each conversion path",
+        type=int,
+        default=5
+    )
+
+    args = parser.parse_args(arg_list)
+
+    for dat_path in args.dat_path:
+        benchmark_dat(dat_path=Path(dat_path),
+                      repeat=args.repeat,
+                      iterations=args.iterations)
+
+
+if __name__ == "__main__":
+    # NOTE: to fix module not found errors, export PYTHONPATH="/.../EM_recon_pipeline/src/python"
+
+    # setup logger since this module is the main program
+    init_logger(__file__)
+
+    # noinspection PyBroadException
+    try:
+        main(sys.argv[1:])
+    except Exception as e:
+        # ensure exit code is a non-zero value when Exception occurs
+        traceback.print_exc()
+        sys.exit(1)
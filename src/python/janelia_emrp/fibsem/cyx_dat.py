@@ -1,9 +1,10 @@
 import logging
+import os
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Optional
 
 import numpy as np
-from fibsem_tools.io import read
+from fibsem_tools.io.dat import OFFSET, MAGIC_NUMBER, parse_header
 
 from janelia_emrp.fibsem.dat_path import DatPath
 
@@ -12,9 +13,13 @@ logger = logging.getLogger(__name__)
 
 @dataclass
 class CYXDat:
+    # Pixels are typically a read-only memory-mapped view of the dat file, so they should not be modified in place.
+    # The raw header and footer bytes are only populated when the data was read from an actual dat file.
     dat_path: DatPath
     header: dict[str, Any] = field(compare=False)
     pixels: np.ndarray = field(compare=False)
+    header_bytes: Optional[bytes] = field(default=None, compare=False, repr=False)
+    footer_bytes: Optional[bytes] = field(default=None, compare=False, repr=False)
 
     def __str__(self):
         return str(self.dat_path.file_path)
@@ -26,15 +31,44 @@ def new_cyx_dat(dat_path: DatPath) -> CYXDat:
     -------
     CYXDat
         A new instance read from the specified dat path and with pixels rolled into channel, y, x order.
+        The header is parsed once, pixels are a memory-mapped (not copied) view of the file,
+        and the raw header and footer bytes are retained for archival.
     """
     logger.info(f"new_cyx_dat: reading {dat_path.file_path}")
 
-    dat_record = read(dat_path.file_path)
-    dat_header_dict = dat_record.attrs.__dict__
+    file_size = os.path.getsize(dat_path.file_path)
 
-    # data comes in as y, x, c - we need to change it to c, y, x because dat reader no longer does that
-    cyx_dat_record = np.rollaxis(dat_record, 2)
+    with open(dat_path.file_path, "rb") as dat_file:
+        header_bytes = dat_file.read(OFFSET)
+
+        if np.frombuffer(header_bytes, '>u4', count=1)[0] != MAGIC_NUMBER:
+            raise ValueError(f"{dat_path.file_path} does not start with dat magic number {MAGIC_NUMBER}")
+
+        dat_header_dict = parse_header(header_bytes).__dict__
+
+        # store locations of header values from fibsem_tools.io.dat
+        yxc_shape = (dat_header_dict["YResolution"], dat_header_dict["XResolution"], dat_header_dict["ChanNum"])
+        data_type = ">u1" if dat_header_dict["EightBit"] == 1 else ">i2"
+
+        footer_start = OFFSET + int(np.prod(yxc_shape)) * np.dtype(data_type).itemsize
+        if file_size < footer_start:
+            raise ValueError(f"{dat_path.file_path} is {file_size} bytes "
+                             f"but at least {footer_start} bytes are needed for pixel shape {yxc_shape}")
+
+        dat_file.seek(footer_start)
+        footer_bytes = dat_file.read(file_size - footer_start)
+
+    yxc_pixels = np.memmap(str(dat_path.file_path),
+                           dtype=data_type,
+                           mode="r",
+                           offset=OFFSET,
+                           shape=yxc_shape)
+
+    # data comes in as y, x, c - we need to change it to c, y, x (moveaxis returns a view, not a copy)
+    cyx_pixels = np.moveaxis(yxc_pixels, 2, 0)
 
     return CYXDat(dat_path=dat_path,
                   header=dat_header_dict,
-                  pixels=cyx_dat_record)
+                  pixels=cyx_pixels,
+                  header_bytes=header_bytes,
+                  footer_bytes=footer_bytes)
@@ -6,9 +6,8 @@ import re
 import traceback
 from contextlib import ExitStack
 from pathlib import Path
-from typing import Optional, List
+from typing import Iterator, Optional, List
 
-import dask.bag as dask_bag
 import errno
 import math
 import sys
@@ -17,9 +16,15 @@ from janelia_emrp.cluster import get_cluster
 from distributed import Client
 
 from janelia_emrp.fibsem.cyx_dat import CYXDat, new_cyx_dat
-from janelia_emrp.fibsem.dat_path import DatPathsForLayer, split_into_layers, new_dat_path, DatPath
+from janelia_emrp.fibsem.dat_name_index import DatNameIndex, IndexedH5File
+from janelia_emrp.fibsem.dat_path import DatPathsForLayer, split_into_layers, new_dat_path, DatPath, \
+    group_into_layers
 from janelia_emrp.fibsem.dat_to_h5_writer import DatToH5Writer
 from janelia_emrp.fibsem.h5_to_dat import validate_original_dat_bytes_match
+from janelia_emrp.fibsem.layer_manifest import LayerManifest, DAT_HOUR_DIRECTORY_DEPTH, add_forget_layers_argument
+from janelia_emrp.fibsem.layer_prefetcher import LayerPrefetcher, PrefetchedLayer
+from janelia_emrp.fibsem.layer_task_scheduler import add_layer_task_arguments, convert_layers_with_dask, \
+    get_max_tasks_in_flight, log_layer_task_summary, split_into_batches
 from janelia_emrp.fibsem.volume_transfer_info import VolumeTransferInfo, VolumeTransferTask
 from janelia_emrp.root_logger import init_logger
 
@@ -40,16 +45,26 @@ class DatConverter:
 
     skip_existing : bool, default=True
         indicates whether existing HDF5 data should be left as is (True) or overwritten (False)
+
+    prefetch_layer_count : int, default=0
+        number of layers to read ahead while the current layer is being converted (0 to disable read ahead)
+
+    prefetch_max_bytes : Optional[int], default=None
+        maximum number of dat bytes to hold in memory for read ahead layers or None for no limit
     """
     def __init__(self,
                  volume_transfer_info: VolumeTransferInfo,
                  raw_writer: Optional[DatToH5Writer] = None,
                  align_writer: Optional[DatToH5Writer] = None,
-                 skip_existing: bool = True):
+                 skip_existing: bool = True,
+                 prefetch_layer_count: int = 0,
+                 prefetch_max_bytes: Optional[int] = None):
         self.volume_transfer_info = volume_transfer_info
         self.raw_writer = raw_writer
         self.align_writer = align_writer
         self.skip_existing = skip_existing
+        self.prefetch_layer_count = prefetch_layer_count
+        self.prefetch_max_bytes = prefetch_max_bytes
 
     def __str__(self):
         return f"{self.volume_transfer_info}"
@@ -57,7 +72,8 @@ class DatConverter:
     def convert_layer(self,
                       dat_paths_for_layer: DatPathsForLayer,
                       raw_h5_root_path: Optional[Path],
-                      align_h5_root_path: Optional[Path]):
+                      align_h5_root_path: Optional[Path],
+                      cyx_dat_list: Optional[list[CYXDat]] = None) -> list[IndexedH5File]:
         """
         Converts specified `dat_paths_for_layer` sources into HDF5 artifacts.
 
@@ -69,6 +85,13 @@ class DatConverter:
             root path for raw h5 output or None if raw conversion is not desired
         align_h5_root_path:
             root path for align h5 output or None if align conversion is not desired
+        cyx_dat_list:
+            already read dat data for the layer (in dat_paths order) or None to read the dat files here
+
+        Returns
+        -------
+        list[IndexedH5File]
+            The dat names of each written HDF5 file (for the caller to record in the volume's dat name index).
         """
         start_time = time.time()
 
@@ -86,37 +109,49 @@ class DatConverter:
             align_path = dat_paths_for_layer.get_h5_path(align_h5_root_path, source_type="uint8")
             align_path = self.setup_h5_path("align source", align_path, self.skip_existing)
 
-        with ExitStack() as stack:
-            if raw_path:
-                layer_raw_file = stack.enter_context(self.raw_writer.open_h5_file(output_path=str(raw_path),
-                                                                                  mode=h5_write_mode))
-            if align_path:
-                layer_align_file = stack.enter_context(self.align_writer.open_h5_file(output_path=str(align_path),
+        # remove partially written files if conversion fails so that the layer can be retried
+        new_h5_paths = [p for p in (raw_path, align_path) if p is not None and not p.exists()]
+        try:
+            with ExitStack() as stack:
+                if raw_path:
+                    layer_raw_file = stack.enter_context(self.raw_writer.open_h5_file(output_path=str(raw_path),
                                                                                       mode=h5_write_mode))
-
-            # TODO: clean-up properly if errors occur during conversion
-
-            if raw_path or align_path:
-                align_cyx_dat_record_list: list[CYXDat] = []
-                for dat_path in dat_paths_for_layer.dat_paths:
-
-                    if not dat_path.file_path.exists():
-                        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), dat_path.file_path)
-
-                    cyx_dat: CYXDat = new_cyx_dat(dat_path)
-
-                    if raw_path:
-                        self.raw_writer.create_and_add_raw_data_group(cyx_dat=cyx_dat,
-                                                                      to_h5_file=layer_raw_file)
-                    if align_path:
-                        align_cyx_dat_record_list.append(cyx_dat)
-
-                if len(align_cyx_dat_record_list) > 0:
+                if align_path:
+                    layer_align_file = stack.enter_context(self.align_writer.open_h5_file(output_path=str(align_path),
+                                                                                          mode=h5_write_mode))
+
+                if raw_path or align_path:
+                    align_cyx_dat_record_list: list[CYXDat] = []
+                    for dat_index, dat_path in enumerate(dat_paths_for_layer.dat_paths):
+
+                        if cyx_dat_list is not None:
+                            cyx_dat: CYXDat = cyx_dat_list[dat_index]
+                        elif not dat_path.file_path.exists():
+                            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), dat_path.file_path)
+                        else:
+                            cyx_dat: CYXDat = new_cyx_dat(dat_path)
+
+                        if raw_path:
+                            self.raw_writer.create_and_add_raw_data_group(cyx_dat=cyx_dat,
+                                                                          to_h5_file=layer_raw_file)
+                        if align_path:
+                            align_cyx_dat_record_list.append(cyx_dat)
+
+                    if len(align_cyx_dat_record_list) > 0:
                         self.align_writer.create_and_add_mipmap_data_sets(
                             cyx_dat_list=align_cyx_dat_record_list,
                             max_mipmap_level=self.volume_transfer_info.max_mipmap_level,
                             to_h5_file=layer_align_file,
                             fill_info=self.volume_transfer_info.fill_info)
+        except Exception:
+            for h5_path in new_h5_paths:
+                if h5_path.exists():
+                    logger.warning(f"{self} convert_layer: removing incomplete {h5_path}")
+                    h5_path.unlink()
+            raise
+
+        dat_names = [dat_path.file_path.name for dat_path in dat_paths_for_layer.dat_paths]
+        indexed_h5_files: list[IndexedH5File] = []
 
         if raw_path is not None:
             if self.volume_transfer_info.includes_task(VolumeTransferTask.REMOVE_DAT_AFTER_H5_CONVERSION):
@@ -139,11 +174,42 @@ class DatConverter:
             os.rename(raw_path, ready_for_archival_path)
             logger.info(f"{self} convert_layer: renamed {raw_path.name} to {ready_for_archival_name}")
 
+            indexed_h5_files.append(IndexedH5File(h5_path=ready_for_archival_path,
+                                                  dat_names=dat_names,
+                                                  mtime=os.path.getmtime(ready_for_archival_path),
+                                                  replaced_h5_path=raw_path))
+
+        if align_path is not None:
+            indexed_h5_files.append(IndexedH5File(h5_path=align_path,
+                                                  dat_names=dat_names,
+                                                  mtime=os.path.getmtime(align_path)))
+
         elapsed_seconds = int(time.time() - start_time)
 
         logger.info(f"{self} convert_layer: exit, layer {dat_paths_for_layer.get_layer_id()} conversion "
                     f"took {elapsed_seconds} seconds")
 
+        return indexed_h5_files
+
+    def convert_layer_batch_for_volume(self,
+                                       dat_layer_batch: list[DatPathsForLayer]) -> list[IndexedH5File]:
+        """
+        Converts a batch of consecutive layers into the volume's raw and/or align HDF5 roots,
+        reading upcoming layers ahead (when prefetching is enabled) while the current layer is converted.
+        Every layer in the batch is attempted before an exception is raised for any failed layers.
+
+        Returns
+        -------
+        list[IndexedH5File]
+            The dat names of each written HDF5 file (for the caller to record in the volume's dat name index).
+        """
+        indexed_h5_files, failed_layer_ids = self._convert_layers(dat_layer_batch, "convert_layer_batch_for_volume")
+        if len(failed_layer_ids) > 0:
+            # converted layers are skipped when the batch is retried (unless existing files are being overwritten)
+            raise RuntimeError(f"failed to convert {len(failed_layer_ids)} of {len(dat_layer_batch)} layers "
+                               f"in batch: {failed_layer_ids}")
+        return indexed_h5_files
+
     def convert_layer_list(self,
                            dat_layer_list: List[DatPathsForLayer]):
         """
@@ -158,26 +224,107 @@ class DatConverter:
         number_of_layers = len(dat_layer_list)
         logger.info(f"{self} convert_layer_list: entry, processing {number_of_layers} layers")
 
+        indexed_h5_files, failed_layer_ids = self._convert_layers(dat_layer_list, "convert_layer_list")
+        self.index_dat_names(indexed_h5_files)
+
+        if len(failed_layer_ids) == 0:
+            logger.info(f"{self} convert_layer_list: exit, converted all {number_of_layers} layers")
+        else:
+            logger.info(f"{self} convert_layer_list: exit, failed to convert {len(failed_layer_ids)} layers")
+
+    def _convert_layers(self,
+                        dat_layer_list: List[DatPathsForLayer],
+                        context: str) -> tuple[list[IndexedH5File], list[str]]:
+        """
+        Returns
+        -------
+        tuple[list[IndexedH5File], list[str]]
+            The dat names of each written HDF5 file and the ids of any layers that failed to convert.
+        """
         raw_h5_root = self.volume_transfer_info.get_raw_h5_root_for_conversion() if self.raw_writer else None
         align_h5_root = self.volume_transfer_info.get_align_h5_root_for_conversion() if self.align_writer else None
 
-        number_of_failed_layers = 0
-        for dat_paths_for_layer in dat_layer_list:
+        indexed_h5_files: list[IndexedH5File] = []
+        failed_layer_ids: list[str] = []
+        for layer in self.read_layers_to_convert(dat_layer_list, raw_h5_root, align_h5_root):
+            dat_paths_for_layer = layer.dat_paths_for_layer
             # noinspection PyBroadException
             try:
-                self.convert_layer(dat_paths_for_layer=dat_paths_for_layer,
-                                   raw_h5_root_path=raw_h5_root,
-                                   align_h5_root_path=align_h5_root)
+                if layer.error is not None:
+                    raise layer.error
+                indexed_h5_files.extend(self.convert_layer(dat_paths_for_layer=dat_paths_for_layer,
+                                                           raw_h5_root_path=raw_h5_root,
+                                                           align_h5_root_path=align_h5_root,
+                                                           cyx_dat_list=layer.cyx_dat_list))
             except Exception:
                 traceback.print_exc()
-                logger.error(f"{self} convert_layer_list: failed to convert layer {dat_paths_for_layer.get_layer_id()}")
-                number_of_failed_layers += 1
+                logger.error(f"{self} {context}: failed to convert layer {dat_paths_for_layer.get_layer_id()}")
+                failed_layer_ids.append(dat_paths_for_layer.get_layer_id())
 
-        if number_of_failed_layers == 0:
-            logger.info(f"{self} convert_layer_list: exit, converted all {number_of_layers} layers")
+        return indexed_h5_files, failed_layer_ids
+
+    def read_layers_to_convert(self,
+                               dat_layer_list: List[DatPathsForLayer],
+                               raw_h5_root: Optional[Path],
+                               align_h5_root: Optional[Path]) -> Iterator[PrefetchedLayer]:
+        """
+        Returns
+        -------
+        Iterator[PrefetchedLayer]
+            Each layer in order with its dat data when prefetching is enabled
+            (otherwise cyx_dat_list is None and the dat files are read during conversion).
+        """
+        if self.prefetch_layer_count > 0:
+            def should_read(layer: DatPathsForLayer) -> bool:
+                return self.layer_needs_conversion(layer, raw_h5_root, align_h5_root)
+
+            with LayerPrefetcher(dat_layer_list=dat_layer_list,
+                                 queue_depth=self.prefetch_layer_count,
+                                 max_bytes=self.prefetch_max_bytes,
+                                 should_read=should_read) as prefetcher:
+                yield from prefetcher
         else:
-            logger.info(f"{self} convert_layer_list: exit, failed to convert {number_of_failed_layers} layers")
+            for dat_paths_for_layer in dat_layer_list:
+                yield PrefetchedLayer(dat_paths_for_layer=dat_paths_for_layer)
+
+    def index_dat_names(self,
+                        indexed_h5_files: list[IndexedH5File]):
+        """
+        Records the dat names of converted HDF5 files in the volume's dat name index (if there is one)
+        so that the sweeper and copier do not need to reopen the files.
+        Only the process that coordinates conversion should call this
+        because SQLite locking is not reliable on network file systems.
+        """
+        dat_name_index_path = self.volume_transfer_info.get_dat_name_index_path()
+        if dat_name_index_path is not None and len(indexed_h5_files) > 0:
+            # noinspection PyBroadException
+            try:
+                with DatNameIndex(dat_name_index_path) as dat_name_index:
+                    dat_name_index.record_h5_files(indexed_h5_files)
+            except Exception:
+                # the index is only an optimization, so missing entries will simply be read from the HDF5 files later
+                traceback.print_exc()
+                logger.error(f"{self} index_dat_names: failed to record {len(indexed_h5_files)} HDF5 files "
+                             f"in {dat_name_index_path}")
 
+    def layer_needs_conversion(self,
+                               dat_paths_for_layer: DatPathsForLayer,
+                               raw_h5_root_path: Optional[Path],
+                               align_h5_root_path: Optional[Path]) -> bool:
+        """
+        Returns
+        -------
+        bool
+            False if existing HDF5 data should be left as is and all requested HDF5 files for the layer exist.
+        """
+        needs_conversion = True
+        if self.skip_existing:
+            raw_done = raw_h5_root_path is None or \
+                       dat_paths_for_layer.h5_exists(h5_root_path=raw_h5_root_path, source_type="raw")
+            align_done = align_h5_root_path is None or \
+                         dat_paths_for_layer.h5_exists(h5_root_path=align_h5_root_path, source_type="uint8")
+            needs_conversion = not (raw_done and align_done)
+        return needs_conversion
 
     def setup_h5_path(self,
                       context: str,
@@ -204,6 +351,12 @@ class DatConverter:
         return valid_path
 
 
+def get_layer_batch_id(dat_layer_batch: list[DatPathsForLayer]) -> str:
+    first_layer_id = dat_layer_batch[0].get_layer_id()
+    last_layer_id = dat_layer_batch[-1].get_layer_id()
+    return first_layer_id if len(dat_layer_batch) == 1 else f"{first_layer_id}..{last_layer_id}"
+
+
 def get_layer_index_for_dat(layers: list[DatPathsForLayer],
                             start_index: Optional[int],
                             dat_path: DatPath) -> Optional[int]:
@@ -221,12 +374,33 @@ def get_layers_for_run(dat_root: Path,
                        first_dat: Optional[str],
                        last_dat: Optional[str],
                        skip_existing: bool,
-                       volume_transfer_info: VolumeTransferInfo) -> list[DatPathsForLayer]:
+                       volume_transfer_info: VolumeTransferInfo,
+                       forget_layer_ids: Optional[list[str]] = None) -> list[DatPathsForLayer]:
 
     logger.info(f"get_layers_for_run: entry, dat_root={dat_root}, first_dat={first_dat}, "
                 f"last_dat={last_dat}, skip_existing={skip_existing}")
 
-    layers: list[DatPathsForLayer] = split_into_layers(path_list=[dat_root])
+    raw_h5_root_path = volume_transfer_info.get_raw_h5_root_for_conversion()
+    align_h5_root = volume_transfer_info.get_align_h5_root_for_conversion()
+
+    # the manifest only tracks layers for skip_existing runs, forced runs always list every dat file
+    layer_manifest_path = volume_transfer_info.get_layer_manifest_path() if skip_existing else None
+    manifest_output_key = f"dat:{raw_h5_root_path}:{align_h5_root}"
+    converted_layer_ids: set[str] = set()
+
+    if layer_manifest_path is None:
+        layers: list[DatPathsForLayer] = split_into_layers(path_list=[dat_root])
+    else:
+        with LayerManifest(layer_manifest_path) as layer_manifest:
+            full_scan = layer_manifest.scan(root=dat_root,
+                                            file_pattern="*.dat",
+                                            hour_dir_depth=DAT_HOUR_DIRECTORY_DEPTH)
+            dat_file_paths = layer_manifest.file_paths(root=dat_root, file_pattern="*.dat")
+            # recorded outputs are only checked after full scans so that skipping converted layers costs nothing
+            converted_layer_ids = layer_manifest.converted_layer_ids_for_run(output_key=manifest_output_key,
+                                                                             verify=full_scan,
+                                                                             forget_layer_ids=forget_layer_ids)
+        layers: list[DatPathsForLayer] = group_into_layers(dat_file_paths)
 
     logger.info(f"get_layers_for_run: found {len(layers)} layers to convert")
 
@@ -235,13 +409,27 @@ def get_layers_for_run(dat_root: Path,
         if skip_existing:
             logger.info(f"get_layers_for_run: filtering out existing layers")
             new_layers = []
-            raw_h5_root_path = volume_transfer_info.get_raw_h5_root_for_conversion()
-            align_h5_root = volume_transfer_info.get_align_h5_root_for_conversion()
+            layer_id_to_output_paths: dict[str, list[Path]] = {}
 
             for layer in layers:
+                layer_id = layer.get_layer_id()
+                if layer_id in converted_layer_ids:
+                    continue
+                if layer_manifest_path is not None and not layer.dat_paths[0].file_path.exists():
+                    # dat files removed after conversion remain in the manifest until its next full scan
+                    continue
                 if not layer.h5_exists(h5_root_path=raw_h5_root_path, source_type="raw") or \
                         not layer.h5_exists(h5_root_path=align_h5_root, source_type="uint8"):
                     new_layers.append(layer)
+                else:
+                    layer_id_to_output_paths[layer_id] = [
+                        layer.get_h5_path(h5_root_path=raw_h5_root_path, source_type="raw"),
+                        layer.get_h5_path(h5_root_path=align_h5_root, source_type="uint8")
+                    ]
+
+            if layer_manifest_path is not None and len(layer_id_to_output_paths) > 0:
+                with LayerManifest(layer_manifest_path) as layer_manifest:
+                    layer_manifest.record_converted_layers(manifest_output_key, layer_id_to_output_paths)
 
             if len(new_layers) < len(layers):
                 layers = new_layers
@@ -301,7 +489,13 @@ def convert_volume(volume_transfer_info: VolumeTransferInfo,
                    last_dat: Optional[str],
                    skip_existing: bool,
                    min_layers_per_worker: int,
-                   lsf_runtime_limit: Optional[str]):
+                   lsf_runtime_limit: Optional[str],
+                   prefetch_layer_count: int = 0,
+                   prefetch_max_gb: Optional[float] = None,
+                   max_layers_in_flight: Optional[int] = None,
+                   max_layer_attempts: int = 2,
+                   layers_per_task: int = 1,
+                   forget_layer_ids: Optional[list[str]] = None):
 
     logger.info(f"convert_volume: entry, processing {volume_transfer_info} with {num_workers} worker(s)")
 
@@ -312,16 +506,21 @@ def convert_volume(volume_transfer_info: VolumeTransferInfo,
     if not dat_root.is_dir():
         raise ValueError(f"dat root path {dat_root} is not an accessible directory")
 
-    layers = get_layers_for_run(dat_root, first_dat, last_dat, skip_existing, volume_transfer_info)
+    layers = get_layers_for_run(dat_root, first_dat, last_dat, skip_existing, volume_transfer_info, forget_layer_ids)
 
     if len(layers) > 0:
-        raw_writer = DatToH5Writer(chunk_shape=(512, 512))
+        raw_h5_storage_profile = volume_transfer_info.get_raw_h5_storage_profile()
+        logger.info(f"convert_volume: using {raw_h5_storage_profile} raw HDF5 storage profile")
+        raw_writer = DatToH5Writer(**raw_h5_storage_profile.to_writer_kwargs())
         align_writer = DatToH5Writer(chunk_shape=(1, 512, 512))
 
+        prefetch_max_bytes = None if prefetch_max_gb is None else int(prefetch_max_gb * 1024 * 1024 * 1024)
         converter = DatConverter(volume_transfer_info=volume_transfer_info,
                                  raw_writer=raw_writer,
                                  align_writer=align_writer,
-                                 skip_existing=skip_existing)
+                                 skip_existing=skip_existing,
+                                 prefetch_layer_count=prefetch_layer_count,
+                                 prefetch_max_bytes=prefetch_max_bytes)
 
         if num_workers > 1:
             local_kwargs = {}
@@ -346,15 +545,28 @@ def convert_volume(volume_transfer_info: VolumeTransferInfo,
 
                 adjusted_num_workers = min(math.ceil(len(layers) / min_layers_per_worker), num_workers)
                 dask_client.cluster.scale(n=adjusted_num_workers)
-                number_of_partitions = adjusted_num_workers
+                max_tasks_in_flight = get_max_tasks_in_flight(max_layers_in_flight, adjusted_num_workers)
 
-                logger.info(f"convert_volume: requested {adjusted_num_workers} worker dask cluster, " 
-                            f"scaled count is {len(dask_cluster.worker_spec)}, "
-                            f"number_of_partitions is {number_of_partitions}")
+                # each dask task converts a short run of consecutive layers so that it can read ahead within the run
+                layer_batches = split_into_batches(layers, layers_per_task)
 
-                bag = dask_bag.from_sequence(layers, npartitions=number_of_partitions)
-                bag = bag.map_partitions(converter.convert_layer_list)
-                dask_client.compute(bag, sync=True)
+                logger.info(f"convert_volume: requested {adjusted_num_workers} worker dask cluster, "
+                            f"scaled count is {len(dask_cluster.worker_spec)}, "
+                            f"max_tasks_in_flight is {max_tasks_in_flight}, "
+                            f"submitting {len(layer_batches)} tasks with up to {layers_per_task} layers each")
+
+                results = convert_layers_with_dask(dask_client=dask_client,
+                                                   layers=layer_batches,
+                                                   convert_layer=converter.convert_layer_batch_for_volume,
+                                                   get_layer_id=get_layer_batch_id,
+                                                   max_tasks_in_flight=max_tasks_in_flight,
+                                                   max_attempts=max_layer_attempts)
+                log_layer_task_summary("convert_volume", results)
+
+                # dask tasks only return dat names so that the shared index is written by this process alone
+                converter.index_dat_names([indexed_h5_file
+                                           for result in results if result.value is not None
+                                           for indexed_h5_file in result.value])
 
         else:
             converter.convert_layer_list(layers)
@@ -406,6 +618,27 @@ def main(arg_list: list[str]):
         help="Convert all dat files even if converted result files already exist",
         action=argparse.BooleanOptionalAction
     )
+    parser.add_argument(
+        "--prefetch_layers",
+        help="Number of layers to read ahead while converting the current layer (0 to disable read ahead)",
+        type=int,
+        default=1
+    )
+    parser.add_argument(
+        "--prefetch_max_gb",
+        help="Maximum number of GB of dat data to hold in memory for read ahead layers (per worker)",
+        type=float,
+        default=4.0
+    )
+    parser.add_argument(
+        "--layers_per_task",
+        help="Number of consecutive layers converted by each dask task when num_workers > 1 "
+             "(layers after the first in each task are read ahead as specified by --prefetch_layers)",
+        type=int,
+        default=4
+    )
+    add_layer_task_arguments(parser)
+    add_forget_layers_argument(parser)
 
     args = parser.parse_args(arg_list)
 
@@ -416,7 +649,13 @@ def main(arg_list: list[str]):
                    last_dat=args.last_dat,
                    skip_existing=(not args.force),
                    min_layers_per_worker=args.min_layers_per_worker,
-                   lsf_runtime_limit=args.lsf_runtime_limit)
+                   lsf_runtime_limit=args.lsf_runtime_limit,
+                   prefetch_layer_count=args.prefetch_layers,
+                   prefetch_max_gb=args.prefetch_max_gb,
+                   max_layers_in_flight=args.max_layers_in_flight,
+                   max_layer_attempts=args.max_layer_attempts,
+                   layers_per_task=args.layers_per_task,
+                   forget_layer_ids=args.forget_layers)
 
 
 if __name__ == "__main__":
@@ -3,7 +3,6 @@ import datetime
 import glob
 import logging
 import re
-import subprocess
 import traceback
 from pathlib import Path
 from typing import Dict, Optional
@@ -14,37 +13,23 @@ import time
 from janelia_emrp.fibsem.dat_keep_file import KeepFile, build_keep_file
 from janelia_emrp.fibsem.dat_path import dat_to_target_path, new_dat_path, DAT_TIME_FORMAT
 from janelia_emrp.fibsem.h5_dat_name_helper import H5DatNameHelper
+from janelia_emrp.fibsem.scope_transfer_session import FILES_PER_COMMAND, ScopeTransferSession
 from janelia_emrp.fibsem.volume_transfer_info import VolumeTransferInfo, VolumeTransferTask, build_volume_transfer_list
 from janelia_emrp.root_logger import init_logger
 
 logger = logging.getLogger(__name__)
 
 
-def get_base_ssh_args(host: str):
-    return [
-        "ssh",                             # see https://man.openbsd.org/ssh_config.5 for descriptions of ssh -o args
-        "-o", "ConnectTimeout=10",
-        "-o", "ServerAliveCountMax=2",
-        "-o", "ServerAliveInterval=5",
-        "-o", "StrictHostKeyChecking=no",  # Disable checking to avoid problems when scopes get new IPs
-        host
-    ]
-
-
 def get_keep_file_list(host: str,
                        keep_file_root: Path,
                        data_set_id: str,
                        first_dat_name: str,
-                       last_dat_name: str) -> list[KeepFile]:
+                       last_dat_name: str,
+                       session: Optional[ScopeTransferSession] = None) -> list[KeepFile]:
     keep_file_list = []
-    args = get_base_ssh_args(host)
-    args.append(f'ls "{keep_file_root}"')
+    session = ScopeTransferSession(host) if session is None else session
 
-    completed_process = subprocess.run(args,
-                                       capture_output=True,
-                                       check=True)
-    for name in completed_process.stdout.decode("utf-8").split("\n"):
-        name = name.strip()
+    for name in session.list_directory(keep_file_root):
 
         if name.endswith("^keep"):
             # jrc_celegans_20241007^E^^Images^C_elegans^Y2024^M10^D24^Merlin-6281_24-10-24_100613_0-0-0.dat^keep
@@ -66,82 +51,41 @@ def get_keep_file_list(host: str,
     return keep_file_list
 
 
-def get_scope_day_numbers_with_dats(host: str,
-                                    dat_storage_root: Path,
-                                    for_month_of: datetime.datetime) -> list[int]:
-    # /cygdrive/E/Images/Mouse/Y2022/M07
-    month_path = dat_storage_root / for_month_of.strftime("Y%Y/M%m")
-
-    logger.info(f"get_scope_day_numbers_with_dats: checking {month_path} on {host}")
-
-    day_numbers: list[int] = []
-    args = get_base_ssh_args(host)
-    args.append(f'ls "{month_path}"')
-
-    completed_process = subprocess.run(args,
-                                       capture_output=True,
-                                       check=True)
-    for name in completed_process.stdout.decode("utf-8").split("\n"):
-        name = name.strip()
-        if name.startswith("D"):
-            day_numbers.append(int(name[1:]))
-
-    return day_numbers
-
-
-def get_dats_acquired_on_day(host: str,
-                             dat_storage_root: Path,
-                             acquisition_date: datetime.datetime) -> list[Path]:
-    # /cygdrive/E/Images/Mouse/Y2022/M07/D13
-    day_path = dat_storage_root / acquisition_date.strftime("Y%Y/M%m/D%d")
-
-    logger.info(f"get_dats_acquired_on_day: checking {day_path} on {host}")
-
-    dat_list: list[Path] = []
-    args = get_base_ssh_args(host)
-    args.append(f'ls "{day_path}"')
-
-    completed_process = subprocess.run(args,
-                                       capture_output=True,
-                                       check=True)
-    for name in completed_process.stdout.decode("utf-8").split("\n"):
-        name = name.strip()
-        if name.endswith(".dat"):
-            dat_list.append(day_path / name)
-
-    return dat_list
-
-
-def copy_dat_file(scope_host: str,
-                  scope_dat_path: [Path, str],
-                  dat_storage_root: Path):
-
-    logger.info(f"copy_dat_file: copying {scope_dat_path}")
-
-    target_dir: Path = dat_to_target_path(scope_dat_path, dat_storage_root).parent
-    target_dir.mkdir(parents=True, exist_ok=True)
-
-    host_prefix = "" if scope_host is None or len(scope_host) == 0 else f"{scope_host}:"
-
-    args = [
-        "scp",
-        "-T",                              # needed to avoid protocol error: filename does not match request
-        "-o", "ConnectTimeout=10",
-        "-o", "StrictHostKeyChecking=no",  # Disable checking to avoid problems when scopes get new IPs
-        f'{host_prefix}{scope_dat_path}',
-        str(target_dir)
-    ]
-
-    subprocess.run(args, check=True)
-
+def copy_dat_files_in_batches(session: ScopeTransferSession,
+                              scope_dat_paths: list[Path],
+                              dat_storage_root: Path,
+                              max_transfer_seconds: Optional[int],
+                              start_time: float,
+                              keep_files: Optional[list[KeepFile]] = None) -> int:
+    """
+    Copies scope dat files to cluster storage a batch at a time (with concurrent transfers within each batch),
+    removing the corresponding keep files after each batch is copied.
+
+    Parameters
+    ----------
+    keep_files : Optional[list[KeepFile]]
+        keep files for each of the `scope_dat_paths` (in the same order) or None if there are none to remove.
+
+    Returns
+    -------
+    int
+        The number of copied dat files (copying stops after the first batch that exceeds `max_transfer_seconds`).
+    """
+    copy_count = 0
+    transfer_batch_size = max(1, session.max_concurrent_transfers) * FILES_PER_COMMAND
+    for batch_start in range(0, len(scope_dat_paths), transfer_batch_size):
+        batch_stop = batch_start + transfer_batch_size
+        session.copy_dat_files(scope_dat_paths=scope_dat_paths[batch_start:batch_stop],
+                               dat_storage_root=dat_storage_root)
+        if keep_files is not None:
+            session.remove_files([keep_file.keep_path for keep_file in keep_files[batch_start:batch_stop]])
 
-def remove_keep_file(keep_file: KeepFile):
-    logger.info(f"remove_keep_file: removing {keep_file.keep_path}")
+        copy_count += len(scope_dat_paths[batch_start:batch_stop])
 
-    args = get_base_ssh_args(keep_file.host)
-    args.append(f'rm "{keep_file.keep_path}"')
+        if max_transfer_seconds_exceeded(max_transfer_seconds, start_time):
+            break
 
-    subprocess.run(args, check=True)
+    return copy_count
 
 
 def day_range(start_date: datetime.datetime,
@@ -286,7 +230,8 @@ def find_missing_scope_dats_for_day(scope_dat_paths: list[Path],
 
 def find_missing_scope_dats(keep_file_list: list[KeepFile],
                             nothing_missing_before: datetime.datetime,
-                            transfer_info: VolumeTransferInfo) -> list[Path]:
+                            transfer_info: VolumeTransferInfo,
+                            session: Optional[ScopeTransferSession] = None) -> list[Path]:
 
     missing_scope_dats: list[Path] = []
 
@@ -309,28 +254,25 @@ def find_missing_scope_dats(keep_file_list: list[KeepFile],
         keep_files_for_time.append(keep_file)
 
     h5_dat_name_helper = H5DatNameHelper(num_workers=1, dask_local_dir=None)
-    month = None
-    day_numbers = []
+
+    session = ScopeTransferSession(scope_data_set.host) if session is None else session
+    day_to_scope_dat_paths = session.list_dats_by_day(dat_storage_root=scope_data_set.root_dat_path,
+                                                      first_day=nothing_missing_before,
+                                                      last_day=day_after_last_keep_time)
 
     for day in day_range(nothing_missing_before, day_after_last_keep_time):
 
-        if month is None or day.month != month:
-            day_numbers = get_scope_day_numbers_with_dats(scope_data_set.host,
-                                                          scope_data_set.root_dat_path,
-                                                          day)
-            month = day.month
-            
-        if day.day not in day_numbers:
+        scope_dat_paths = day_to_scope_dat_paths.get(day.date(), [])
+
+        if len(scope_dat_paths) == 0:
             logger.info(f'find_missing_scope_dats: no dats imaged on {day.strftime("%y-%m-%d")}, skipping day')
             continue
 
-        scope_dat_paths = get_dats_acquired_on_day(scope_data_set.host,
-                                                   scope_data_set.root_dat_path,
-                                                   day)
-
-        h5_dat_names_for_day = h5_dat_name_helper.raw_names_for_day(scope_dat_paths=scope_dat_paths,
-                                                                    raw_h5_archive_root=raw_h5_archive_root,
-                                                                    raw_h5_cluster_root=raw_h5_cluster_root)
+        h5_dat_names_for_day = h5_dat_name_helper.raw_names_for_day(
+            scope_dat_paths=scope_dat_paths,
+            raw_h5_archive_root=raw_h5_archive_root,
+            raw_h5_cluster_root=raw_h5_cluster_root,
+            dat_name_index_path=transfer_info.get_dat_name_index_path())
 
         missing_scope_dats.extend(
             find_missing_scope_dats_for_day(scope_dat_paths=scope_dat_paths,
@@ -359,6 +301,12 @@ def add_dat_copy_arguments(parser):
         type=int,
         help="If specified, stop copying after this number of minutes has elapsed",
     )
+    parser.add_argument(
+        "--max_concurrent_transfers",
+        type=int,
+        help="Maximum number of scp commands to run at the same time for each scope",
+        default=4
+    )
 
 
 def main(arg_list: list[str]):
@@ -392,58 +340,58 @@ def main(arg_list: list[str]):
         if not cluster_root_dat_path.is_dir():
             raise ValueError(f"cluster_root_paths.raw_dat {cluster_root_dat_path} is not a directory")
 
-        keep_file_list = get_keep_file_list(host=transfer_info.scope_data_set.host,
-                                            keep_file_root=transfer_info.scope_data_set.root_keep_path,
-                                            data_set_id=transfer_info.scope_data_set.data_set_id,
-                                            first_dat_name=transfer_info.scope_data_set.first_dat_name,
-                                            last_dat_name=transfer_info.scope_data_set.last_dat_name)
-
-        logger.info(f"main: found {len(keep_file_list)} keep files on {transfer_info.scope_data_set.host} for the "
-                    f"{transfer_info.scope_data_set.data_set_id} data set for dat files with names between "
-                    f"{transfer_info.scope_data_set.first_dat_name} and {transfer_info.scope_data_set.last_dat_name}")
-
-        last_dat_time_path: Path = cluster_root_dat_path / "last_dat_time.txt"
-        nothing_missing_before = derive_missing_check_start(last_dat_time_path=last_dat_time_path,
-                                                            transfer_info=transfer_info)
-
-        if len(keep_file_list) > 0:
-            logger.info(f"main: start copying dat files to {cluster_root_dat_path}")
-            logger.info(f"main: first keep file is {keep_file_list[0].keep_path}")
-            logger.info(f"main: last keep file is {keep_file_list[-1].keep_path}")
-
-            missing_scope_dats = find_missing_scope_dats(keep_file_list=keep_file_list,
-                                                         nothing_missing_before=nothing_missing_before,
-                                                         transfer_info=transfer_info)
-            if len(missing_scope_dats) > 0:
-                missing_dat_list_path: Path = cluster_root_dat_path / "missing_dat_list.txt"
-                with open(missing_dat_list_path, 'a', encoding='utf-8') as missing_dat_list_file:
-                    for scope_dat in missing_scope_dats:
-                        missing_dat_list_file.write(f"{str(scope_dat)}\n")
-                logger.info(f"main: added {len(missing_scope_dats)} missing dat file paths to {missing_dat_list_path}")
-
-            # noinspection PyBroadException
-            try:
-                # save last dat time so checks are not repeated by subsequent runs
-                last_dat_time_str = keep_file_list[-1].acquire_time().strftime(DAT_TIME_FORMAT)
-                logger.info(f"main: saving {last_dat_time_str} to {last_dat_time_path}")
-                last_dat_time_path.write_text(last_dat_time_str)
-            except Exception:
-                logger.exception(f"caught exception attempting to write {last_dat_time_path}")
-
-        for keep_file in keep_file_list:
-            copy_dat_file(scope_host=keep_file.host,
-                          scope_dat_path=keep_file.dat_path,
-                          dat_storage_root=cluster_root_dat_path)
-
-            remove_keep_file(keep_file)
-
-            copy_count += 1
-
-            if max_transfer_seconds_exceeded(max_transfer_seconds, start_time):
-                stop_processing = True
-                break
-
-        if stop_processing:
+        with ScopeTransferSession(host=transfer_info.scope_data_set.host,
+                                  max_concurrent_transfers=args.max_concurrent_transfers) as session:
+
+            keep_file_list = get_keep_file_list(host=transfer_info.scope_data_set.host,
+                                                keep_file_root=transfer_info.scope_data_set.root_keep_path,
+                                                data_set_id=transfer_info.scope_data_set.data_set_id,
+                                                first_dat_name=transfer_info.scope_data_set.first_dat_name,
+                                                last_dat_name=transfer_info.scope_data_set.last_dat_name,
+                                                session=session)
+
+            logger.info(f"main: found {len(keep_file_list)} keep files on {transfer_info.scope_data_set.host} for the "
+                        f"{transfer_info.scope_data_set.data_set_id} data set for dat files with names between "
+                        f"{transfer_info.scope_data_set.first_dat_name} and {transfer_info.scope_data_set.last_dat_name}")
+
+            last_dat_time_path: Path = cluster_root_dat_path / "last_dat_time.txt"
+            nothing_missing_before = derive_missing_check_start(last_dat_time_path=last_dat_time_path,
+                                                                transfer_info=transfer_info)
+
+            if len(keep_file_list) > 0:
+                logger.info(f"main: start copying dat files to {cluster_root_dat_path}")
+                logger.info(f"main: first keep file is {keep_file_list[0].keep_path}")
+                logger.info(f"main: last keep file is {keep_file_list[-1].keep_path}")
+
+                missing_scope_dats = find_missing_scope_dats(keep_file_list=keep_file_list,
+                                                             nothing_missing_before=nothing_missing_before,
+                                                             transfer_info=transfer_info,
+                                                             session=session)
+                if len(missing_scope_dats) > 0:
+                    missing_dat_list_path: Path = cluster_root_dat_path / "missing_dat_list.txt"
+                    with open(missing_dat_list_path, 'a', encoding='utf-8') as missing_dat_list_file:
+                        for scope_dat in missing_scope_dats:
+                            missing_dat_list_file.write(f"{str(scope_dat)}\n")
+                    logger.info(f"main: added {len(missing_scope_dats)} missing dat file paths to {missing_dat_list_path}")
+
+                # noinspection PyBroadException
+                try:
+                    # save last dat time so checks are not repeated by subsequent runs
+                    last_dat_time_str = keep_file_list[-1].acquire_time().strftime(DAT_TIME_FORMAT)
+                    logger.info(f"main: saving {last_dat_time_str} to {last_dat_time_path}")
+                    last_dat_time_path.write_text(last_dat_time_str)
+                except Exception:
+                    logger.exception(f"caught exception attempting to write {last_dat_time_path}")
+
+            copy_count += copy_dat_files_in_batches(session=session,
+                                                    scope_dat_paths=[Path(k.dat_path) for k in keep_file_list],
+                                                    dat_storage_root=cluster_root_dat_path,
+                                                    max_transfer_seconds=max_transfer_seconds,
+                                                    start_time=start_time,
+                                                    keep_files=keep_file_list)
+
+        if max_transfer_seconds_exceeded(max_transfer_seconds, start_time):
+            stop_processing = True
             break
 
     if stop_processing:
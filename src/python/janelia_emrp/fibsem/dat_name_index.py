@@ -0,0 +1,210 @@
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Final, Optional
+
+from janelia_emrp.fibsem.sqlite_store import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+
+# files modified more recently than this may still be written, so they are not indexed
+RECENTLY_MODIFIED_SECONDS: Final = 600
+
+SCHEMA: Final = """
+CREATE TABLE IF NOT EXISTS h5_file (
+    h5_path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dat_name (
+    dat_name TEXT NOT NULL,
+    h5_path TEXT NOT NULL REFERENCES h5_file(h5_path) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS dat_name_h5_path_idx ON dat_name(h5_path);
+CREATE INDEX IF NOT EXISTS dat_name_dat_name_idx ON dat_name(dat_name);
+"""
+
+
+@dataclass
+class IndexedH5File:
+    # Dat names stored in a newly written HDF5 file.
+    # Conversion tasks return these so that only the client process writes to the (shared) index.
+    h5_path: Path
+    dat_names: list[str]
+    mtime: float
+    replaced_h5_path: Optional[Path] = None     # path the file had before it was renamed (forgotten when recorded)
+
+
+class DatNameIndex(SqliteStore):
+    """
+    SQLite index of the source dat names stored in each HDF5 file (along with the file's modification time)
+    so that dat names can be looked up without reopening HDF5 files on slow storage.
+    Only HDF5 files that are new or have been modified since they were indexed need to be read.
+
+    Use as a context manager to open (and, if necessary, create) the index.
+    The index file is shared, so only the process that coordinates conversion should write to it.
+    Other processes (e.g. the sweeper and copier) should open the index read only.
+
+    Attributes
+    ----------
+    index_path : Path
+        path of the SQLite index file.
+
+    read_only : bool
+        indicates whether the index should be opened read only (opening fails if the index does not exist).
+    """
+    def __init__(self,
+                 index_path: Path,
+                 read_only: bool = False):
+        super().__init__(store_path=index_path,
+                         schema=SCHEMA,
+                         pragmas=["PRAGMA foreign_keys = ON"],
+                         read_only=read_only)
+        self.index_path = index_path
+
+    def record_h5_file(self,
+                       h5_path: Path,
+                       dat_names: list[str],
+                       mtime: Optional[float] = None) -> None:
+        """
+        Adds (or replaces) the dat names for the specified HDF5 file.
+
+        Parameters
+        ----------
+        h5_path : Path
+            path of the HDF5 file.
+
+        dat_names : list[str]
+            names of the dat files stored in the HDF5 file.
+
+        mtime : Optional[float], default=None
+            modification time of the HDF5 file or None to read it from the file system.
+        """
+        if mtime is None:
+            mtime = os.path.getmtime(h5_path)
+        with self._connection:
+            self._insert_h5_file(h5_path, dat_names, mtime)
+
+    def record_h5_files(self,
+                        indexed_h5_files: list[IndexedH5File]) -> None:
+        """
+        Adds (or replaces) the dat names for each of the specified HDF5 files in a single transaction.
+        """
+        with self._connection:
+            for indexed_h5_file in indexed_h5_files:
+                if indexed_h5_file.replaced_h5_path is not None:
+                    self._delete_h5_file(indexed_h5_file.replaced_h5_path)
+                self._insert_h5_file(indexed_h5_file.h5_path, indexed_h5_file.dat_names, indexed_h5_file.mtime)
+
+    def forget_h5_file(self,
+                       h5_path: Path) -> None:
+        with self._connection:
+            self._delete_h5_file(h5_path)
+
+    def _insert_h5_file(self,
+                        h5_path: Path,
+                        dat_names: list[str],
+                        mtime: float) -> None:
+        self._connection.execute("INSERT OR REPLACE INTO h5_file (h5_path, mtime) VALUES (?, ?)",
+                                 (str(h5_path), mtime))
+        self._connection.execute("DELETE FROM dat_name WHERE h5_path = ?", (str(h5_path),))
+        self._connection.executemany("INSERT INTO dat_name (dat_name, h5_path) VALUES (?, ?)",
+                                     [(dat_name, str(h5_path)) for dat_name in dat_names])
+
+    def _delete_h5_file(self,
+                        h5_path: Path) -> None:
+        self._connection.execute("DELETE FROM h5_file WHERE h5_path = ?", (str(h5_path),))
+
+    def indexed_mtimes(self,
+                       h5_dir: Path) -> dict[str, float]:
+        """
+        Returns
+        -------
+        dict[str, float]
+            Modification times keyed by path for all indexed HDF5 files within the specified directory.
+        """
+        prefix = f"{h5_dir}{os.sep}"
+        cursor = self._connection.execute("SELECT h5_path, mtime FROM h5_file WHERE substr(h5_path, 1, ?) = ?",
+                                          (len(prefix), prefix))
+        return {h5_path: mtime for h5_path, mtime in cursor}
+
+    def indexed_dat_names(self,
+                          h5_dir: Path) -> dict[str, list[str]]:
+        """
+        Returns
+        -------
+        dict[str, list[str]]
+            Dat names keyed by path for all indexed HDF5 files within the specified directory.
+        """
+        prefix = f"{h5_dir}{os.sep}"
+        cursor = self._connection.execute("SELECT h5_path, dat_name FROM dat_name WHERE substr(h5_path, 1, ?) = ? "
+                                          "ORDER BY h5_path, dat_name",
+                                          (len(prefix), prefix))
+        path_to_names: dict[str, list[str]] = {}
+        for h5_path, dat_name in cursor:
+            path_to_names.setdefault(h5_path, []).append(dat_name)
+        return path_to_names
+
+    def names_for_h5_dir(self,
+                         h5_dir: Path,
+                         h5_paths: list[Path],
+                         read_dat_names: Callable[[list[Path]], list[list[str]]]) -> list[str]:
+        """
+        Brings the index up to date for the specified directory and returns the dat names for its HDF5 files.
+        When the index is read only, files that are missing from the index (or have changed since they were indexed)
+        are read but the index itself is not changed.
+
+        Parameters
+        ----------
+        h5_dir : Path
+            directory containing the HDF5 files.
+
+        h5_paths : list[Path]
+            current HDF5 files within the directory (indexed files that are not in this list are forgotten).
+
+        read_dat_names : Callable[[list[Path]], list[list[str]]]
+            function that reads the dat names from each of a list of HDF5 files
+            (only called for files that are not indexed or have been modified since they were indexed).
+
+        Returns
+        -------
+        list[str]
+            Dat names for all of the specified HDF5 files.
+        """
+        indexed_mtimes = self.indexed_mtimes(h5_dir)
+
+        path_to_mtime: dict[str, float] = {}
+        stale_paths: list[Path] = []
+        for h5_path in h5_paths:
+            mtime = os.path.getmtime(h5_path)
+            path_to_mtime[str(h5_path)] = mtime
+            if indexed_mtimes.get(str(h5_path)) != mtime:
+                stale_paths.append(h5_path)
+
+        if not self.read_only:
+            for removed_path in indexed_mtimes.keys() - path_to_mtime.keys():
+                self.forget_h5_file(Path(removed_path))
+
+        logger.info(f"names_for_h5_dir: reading {len(stale_paths)} of {len(h5_paths)} HDF5 files in {h5_dir}")
+
+        stale_path_to_names: dict[str, list[str]] = {}
+        if len(stale_paths) > 0:
+            recently_modified_time = time.time() - RECENTLY_MODIFIED_SECONDS
+            for h5_path, dat_names in zip(stale_paths, read_dat_names(stale_paths)):
+                stale_path_to_names[str(h5_path)] = dat_names
+                mtime = path_to_mtime[str(h5_path)]
+                if mtime < recently_modified_time and not self.read_only:
+                    self.record_h5_file(h5_path=h5_path, dat_names=dat_names, mtime=mtime)
+
+        indexed_path_to_names = self.indexed_dat_names(h5_dir)
+
+        dat_names = []
+        for h5_path in h5_paths:
+            if str(h5_path) in stale_path_to_names:
+                dat_names.extend(stale_path_to_names[str(h5_path)])
+            else:
+                dat_names.extend(indexed_path_to_names.get(str(h5_path), []))
+
+        return dat_names
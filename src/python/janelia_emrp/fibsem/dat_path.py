@@ -5,6 +5,7 @@ import re
 import traceback
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path, PurePath
 from typing import List, Optional, Final
@@ -163,13 +164,24 @@ def split_into_layers(path_list: List[Path]) -> List[DatPathsForLayer]:
     Converts the specified path list into a sorted list of explicit dat file paths
     and then aggregates the dat paths by z layer, returning a list of layers.
 
+    Returns
+    -------
+    List[DatPathsForLayer]
+        A list of layer instances.
+    """
+    return group_into_layers(get_sorted_dat_file_paths(path_list))
+
+
+def group_into_layers(sorted_dat_file_paths: List[Path]) -> List[DatPathsForLayer]:
+    """
+    Aggregates the specified sorted dat file paths by z layer without accessing the file system.
+
     Returns
     -------
     List[DatPathsForLayer]
         A list of layer instances.
     """
     layers = []
-    sorted_dat_file_paths = get_sorted_dat_file_paths(path_list)
     if len(sorted_dat_file_paths) > 0:
         dat_path = new_dat_path(sorted_dat_file_paths[0])
         paths_for_layer = new_dat_layer(dat_path)
@@ -188,8 +200,23 @@ def split_into_layers(path_list: List[Path]) -> List[DatPathsForLayer]:
 
 
 def rename_dat_files(source_dir: Path,
-                     target_dir: Path):
+                     target_dir: Path,
+                     num_workers: int = 1):
+    """
+    Renames (moves) all dat files within `source_dir` to hourly subdirectories of `target_dir`.
+    Files that have already been moved are no longer in `source_dir`, so an interrupted run can simply be repeated.
+
+    Parameters
+    ----------
+    source_dir : Path
+        root source directory containing dat files to move.
+
+    target_dir : Path
+        root target directory for dat files with hourly relative paths.
 
+    num_workers : int, default=1
+        number of threads to use for renaming (renames on network file systems are mostly latency bound).
+    """
     if not source_dir.is_dir():
         raise ValueError(f"source {source_dir} is not a directory")
 
@@ -202,8 +229,7 @@ def rename_dat_files(source_dir: Path,
         target_dir.mkdir(parents=True, exist_ok=True)
 
         created_target_dirs = set()
-
-        rename_count = 0
+        source_and_target_paths = []
         for dat_file_path in sorted_dat_file_paths:
             dat_target_path = dat_to_target_path(from_dat_path=dat_file_path,
                                                  to_root_path=target_dir)
@@ -211,12 +237,17 @@ def rename_dat_files(source_dir: Path,
             if dat_target_parent_path not in created_target_dirs:
                 dat_target_parent_path.mkdir(parents=True, exist_ok=True)
                 created_target_dirs.add(dat_target_parent_path)
+            source_and_target_paths.append((dat_file_path, dat_target_path))
 
-            dat_file_path.rename(dat_target_path)
-            rename_count += 1
+        def rename(source_and_target_path: tuple[Path, Path]):
+            source_and_target_path[0].rename(source_and_target_path[1])
 
-            if rename_count % 1000 == 0:
-                logger.info(f"rename_dat_files: renamed {rename_count} out of {number_to_rename} dat files")
+        with ThreadPoolExecutor(max_workers=max(1, num_workers), thread_name_prefix="rename") as executor:
+            rename_count = 0
+            for _ in executor.map(rename, source_and_target_paths):
+                rename_count += 1
+                if rename_count % 1000 == 0:
+                    logger.info(f"rename_dat_files: renamed {rename_count} out of {number_to_rename} dat files")
 
     logger.info(f"rename_dat_files: renamed {number_to_rename} dat files")
 
@@ -239,10 +270,17 @@ def main(arg_list: list[str]):
         help="Path of root target directory to contain dat files with hourly relative paths.",
         required=True,
     )
+    parser.add_argument(
+        "--num_workers",
+        help="Number of threads to use for renaming files",
+        type=int,
+        default=1
+    )
     args = parser.parse_args(args=arg_list)
 
     rename_dat_files(source_dir=Path(args.source),
-                     target_dir=Path(args.target))
+                     target_dir=Path(args.target),
+                     num_workers=args.num_workers)
 
     return 0
 
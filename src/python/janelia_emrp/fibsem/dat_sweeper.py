@@ -6,10 +6,11 @@ import time
 import traceback
 from pathlib import Path
 
-from janelia_emrp.fibsem.dat_copier import add_dat_copy_arguments, copy_dat_file, day_range, \
-    get_dats_acquired_on_day, get_scope_day_numbers_with_dats, max_transfer_seconds_exceeded
+from janelia_emrp.fibsem.dat_copier import add_dat_copy_arguments, copy_dat_files_in_batches, day_range, \
+    max_transfer_seconds_exceeded
 from janelia_emrp.fibsem.dat_path import dat_to_target_path, new_dat_path, new_dat_layer
 from janelia_emrp.fibsem.h5_dat_name_helper import H5DatNameHelper
+from janelia_emrp.fibsem.scope_transfer_session import ScopeTransferSession
 from janelia_emrp.fibsem.volume_transfer_info import build_volume_transfer_list, VolumeTransferInfo, VolumeTransferTask
 from janelia_emrp.root_logger import init_logger
 
@@ -71,11 +72,14 @@ def main(arg_list: list[str]):
     with h5_dat_name_helper:
 
         for transfer_info in volume_transfer_list:
-            copy_count, missing_count = check_volume(args,
-                                                     max_transfer_seconds,
-                                                     start_time,
-                                                     transfer_info,
-                                                     h5_dat_name_helper)
+            with ScopeTransferSession(host=transfer_info.scope_data_set.host,
+                                      max_concurrent_transfers=args.max_concurrent_transfers) as session:
+                copy_count, missing_count = check_volume(args,
+                                                         max_transfer_seconds,
+                                                         start_time,
+                                                         transfer_info,
+                                                         h5_dat_name_helper,
+                                                         session)
             total_copy_count += copy_count
             total_missing_count += missing_count
 
@@ -96,7 +100,8 @@ def check_volume(args: argparse.Namespace,
                  max_transfer_seconds: int,
                  start_time: float,
                  transfer_info: VolumeTransferInfo,
-                 h5_dat_name_helper: H5DatNameHelper) -> (int, int):
+                 h5_dat_name_helper: H5DatNameHelper,
+                 session: ScopeTransferSession) -> (int, int):
 
     logger.info(f"check_volume: start processing for {transfer_info}")
 
@@ -108,27 +113,22 @@ def check_volume(args: argparse.Namespace,
         raise ValueError(f"cluster_root_paths.raw_dat {cluster_root_dat_path} is not a directory")
     
     end_date, first_dat_acquire_time, last_dat_acquire_time = build_dates_and_times(args, transfer_info)
-    month = None
-    day_numbers = []
 
     logger.info(f"check_volume: checking dats imaged between {first_dat_acquire_time} and {end_date}")
+    day_to_dat_list = session.list_dats_by_day(dat_storage_root=transfer_info.scope_data_set.root_dat_path,
+                                               first_day=first_dat_acquire_time,
+                                               last_day=end_date)
+
     for day in day_range(first_dat_acquire_time, end_date):
 
         logger.info(f'check_volume: checking day {day.strftime("%y-%m-%d")}')
-        if month is None or day.month != month:
-            day_numbers = get_scope_day_numbers_with_dats(transfer_info.scope_data_set.host,
-                                                          transfer_info.scope_data_set.root_dat_path,
-                                                          day)
-            month = day.month
 
-        if day.day not in day_numbers:
+        dat_list = day_to_dat_list.get(day.date(), [])
+
+        if len(dat_list) == 0:
             logger.info(f'check_volume: no dats imaged on {day.strftime("%y-%m-%d")}, skipping day')
             continue
 
-        dat_list = get_dats_acquired_on_day(transfer_info.scope_data_set.host,
-                                            transfer_info.scope_data_set.root_dat_path,
-                                            day)
-
         if len(dat_list) > 0:
             if args.dat_path_output_file is not None:
                 with open(args.dat_path_output_file, mode='a', encoding='utf-8') as dat_path_output_file:
@@ -150,13 +150,11 @@ def check_volume(args: argparse.Namespace,
             missing_count += len(missing_scope_dat_paths)
 
             if args.copy_missing:
-                for scope_dat_path in missing_scope_dat_paths:
-                    copy_dat_file(scope_host=transfer_info.scope_data_set.host,
-                                  scope_dat_path=str(scope_dat_path),
-                                  dat_storage_root=cluster_root_dat_path)
-                    copy_count += 1
-                    if max_transfer_seconds_exceeded(max_transfer_seconds, start_time):
-                        break
+                copy_count += copy_dat_files_in_batches(session=session,
+                                                        scope_dat_paths=missing_scope_dat_paths,
+                                                        dat_storage_root=cluster_root_dat_path,
+                                                        max_transfer_seconds=max_transfer_seconds,
+                                                        start_time=start_time)
 
         if max_transfer_seconds_exceeded(max_transfer_seconds, start_time):
             break
@@ -193,9 +191,12 @@ def get_h5_dat_names(dat_list: list[Path],
     raw_h5_archive_root = transfer_info.get_raw_h5_archive_root()
     align_h5_cluster_root = transfer_info.get_align_h5_cluster_root()
 
+    dat_name_index_path = transfer_info.get_dat_name_index_path()
+
     raw_h5_dat_names = h5_dat_name_helper.raw_names_for_day(scope_dat_paths=dat_list,
                                                             raw_h5_archive_root=raw_h5_archive_root,
-                                                            raw_h5_cluster_root=raw_h5_cluster_root)
+                                                            raw_h5_cluster_root=raw_h5_cluster_root,
+                                                            dat_name_index_path=dat_name_index_path)
     raw_h5_dat_names_set = set(raw_h5_dat_names)
     if transfer_info.get_align_h5_root_for_conversion() is not None:
         first_dat_path = new_dat_path(dat_list[0])
@@ -203,7 +204,8 @@ def get_h5_dat_names(dat_list: list[Path],
 
         align_h5_dat_names = h5_dat_name_helper.names_for_day(layer_for_day=first_dat_layer,
                                                               h5_root_path=align_h5_cluster_root,
-                                                              source_type="uint8")
+                                                              source_type="uint8",
+                                                              dat_name_index_path=dat_name_index_path)
         align_h5_dat_names_set = set(align_h5_dat_names)
 
         raw_v_align_diff = raw_h5_dat_names_set.difference(align_h5_dat_names_set)
@@ -1,4 +1,5 @@
 import argparse
+import hashlib
 import logging
 import os
 import time
@@ -11,12 +12,11 @@ import numpy as np
 import sys
 from fibsem_tools.io.dat import OFFSET, MAGIC_NUMBER
 from h5py import Dataset, Group
-from xarray_multiscale import multiscale
-from xarray_multiscale.reducers import windowed_mean
 
 from janelia_emrp.fibsem.cyx_dat import CYXDat, new_cyx_dat
 from janelia_emrp.fibsem.dat_path import split_into_layers
 from janelia_emrp.fibsem.dat_to_scheffer_8_bit_layer import compress_compute_layer, FillInfo
+from janelia_emrp.fibsem.mipmap_pyramid import build_mipmap_pyramids
 from janelia_emrp.root_logger import init_logger
 
 logger = logging.getLogger(__name__)
@@ -27,6 +27,12 @@ DAT_FILE_NAME_KEY: Final = "dat_file_name"
 ELEMENT_SIZE_UM_KEY: Final = "element_size_um"
 RAW_HEADER_DATASET_NAME: Final = "header"
 RAW_FOOTER_DATASET_NAME: Final = "footer"
+DAT_CHECKSUM_KEY: Final = "dat_checksum"
+DAT_CHECKSUM_ALGORITHM_KEY: Final = "dat_checksum_algorithm"
+DEFAULT_CHECKSUM_ALGORITHM: Final = "sha256"
+
+# approximate number of pixel bytes hashed (or compared) at a time
+CHECKSUM_BLOCK_BYTES: Final = 64 * 1024 * 1024
 
 
 class DatToH5Writer:
@@ -51,16 +57,28 @@ class DatToH5Writer:
     driver : Optional[str]
         Name of the driver to use.
         Legal values are None (default, recommended), 'core', 'sec2', 'stdio', 'mpio', 'ros3'.
+
+    mipmap_workers : Optional[int]
+        Maximum number of threads used to build tile mipmap pyramids for a layer
+        or None to use one thread per tile (up to the number of CPUs).
+
+    checksum_algorithm : Optional[str], default="sha256"
+        hashlib algorithm used to record a checksum of each source dat file in its raw data group
+        or None to skip the checksum.
     """
     def __init__(self,
                  chunk_shape: Union[Tuple[int, ...], bool, None],
                  compression: Union[str, int, None] = "gzip",
                  compression_opts: Optional[Any] = None,
-                 driver: Optional[str] = None):
+                 driver: Optional[str] = None,
+                 mipmap_workers: Optional[int] = None,
+                 checksum_algorithm: Optional[str] = DEFAULT_CHECKSUM_ALGORITHM):
         self.chunk_shape = chunk_shape
         self.compression = compression
         self.compression_opts = compression_opts
         self.driver = driver
+        self.mipmap_workers = mipmap_workers
+        self.checksum_algorithm = checksum_algorithm
 
     def open_h5_file(self,
                      output_path: str,
@@ -147,26 +165,28 @@ class DatToH5Writer:
         data_set_names = f"{RAW_HEADER_DATASET_NAME} and {RAW_FOOTER_DATASET_NAME}"
         logger.info(f"create_and_add_raw_data_group: adding {data_set_names} to {group_context}")
 
-        source_size = os.path.getsize(cyx_dat.dat_path.file_path)
-        with open(cyx_dat.dat_path.file_path, "rb") as raw_file:
-            raw_header_bytes = raw_file.read(OFFSET)
+        raw_header_bytes, raw_footer_bytes = get_raw_header_and_footer_bytes(cyx_dat)
+
+        assert np.frombuffer(raw_header_bytes, '>u4', count=1)[0] == MAGIC_NUMBER
 
-            assert np.frombuffer(raw_header_bytes, '>u4', count=1)[0] == MAGIC_NUMBER
+        raw_data_group.create_dataset(name=RAW_HEADER_DATASET_NAME,
+                                      data=np.frombuffer(raw_header_bytes, dtype='u1'),
+                                      chunks=None,
+                                      compression=self.compression,
+                                      compression_opts=self.compression_opts)
 
-            raw_data_group.create_dataset(name=RAW_HEADER_DATASET_NAME,
-                                          data=np.frombuffer(raw_header_bytes, dtype='u1'),
-                                          chunks=None,
-                                          compression=self.compression,
-                                          compression_opts=self.compression_opts)
+        raw_data_group.create_dataset(name=RAW_FOOTER_DATASET_NAME,
+                                      data=bytearray(raw_footer_bytes),
+                                      chunks=None,
+                                      compression=self.compression,
+                                      compression_opts=self.compression_opts)
 
-            footer_start = OFFSET + cyx_dat.pixels.nbytes
-            raw_file.seek(footer_start)
-            footer_size = source_size - footer_start
-            raw_data_group.create_dataset(name=RAW_FOOTER_DATASET_NAME,
-                                          data=bytearray(raw_file.read(footer_size)),
-                                          chunks=None,
-                                          compression=self.compression,
-                                          compression_opts=self.compression_opts)
+        if self.checksum_algorithm is not None:
+            raw_data_group.attrs[DAT_CHECKSUM_KEY] = compute_dat_checksum(cyx_dat=cyx_dat,
+                                                                          raw_header_bytes=raw_header_bytes,
+                                                                          raw_footer_bytes=raw_footer_bytes,
+                                                                          checksum_algorithm=self.checksum_algorithm)
+            raw_data_group.attrs[DAT_CHECKSUM_ALGORITHM_KEY] = self.checksum_algorithm
 
     def create_and_add_mipmap_data_sets(self,
                                         cyx_dat_list: list[CYXDat],
@@ -175,6 +195,7 @@ class DatToH5Writer:
                                         fill_info: Optional[FillInfo]):
         """
         Compresses the specified dat into an 8 bit level 0 mipmap and down-samples that for subsequent levels.
+        Down-sampled pyramids for all tiles in the layer are built concurrently (see `build_mipmap_pyramids`).
         The `align_writer` is used to save each mipmap as a data set within the specified `layer_align_file`.
         Data sets are named as <section>-<row>-<column>.mipmap.<level> (e.g. 0-0-1.mipmap.3).
         """
@@ -194,6 +215,13 @@ class DatToH5Writer:
                                                         channel_num=0,
                                                         fill_info=fill_info)
 
+        pyramid_list: list[list[np.ndarray]] = [[] for _ in cyx_dat_list]
+        if max_mipmap_level is not None:
+            logger.info(f"{func_name} create levels 1 to {max_mipmap_level}")
+            pyramid_list = build_mipmap_pyramids(level_zero_pixels_list=compressed_record_list,
+                                                 max_mipmap_level=max_mipmap_level,
+                                                 max_workers=self.mipmap_workers)
+
         for index, cyx_dat in enumerate(cyx_dat_list):
             compressed_record = compressed_record_list[index]
 
@@ -211,26 +239,20 @@ class DatToH5Writer:
                                                                  z_nm_per_pixel=None,
                                                                  to_dataset=level_zero_data_set)
 
-            if max_mipmap_level is not None:
-                layer_and_tile = cyx_dat.dat_path.layer_and_tile()
-                lazy_mipmaps = multiscale(compressed_record, windowed_mean, (1, 2, 2))
-                actual_max_mipmap_level = len(lazy_mipmaps) - 1
-                derived_max_mipmap_level = min(max_mipmap_level, actual_max_mipmap_level)
-
-                for mipmap_level in range(1, derived_max_mipmap_level + 1):
+            layer_and_tile = cyx_dat.dat_path.layer_and_tile()
+            for mipmap_level, scaled_bytes in enumerate(pyramid_list[index], start=1):
 
-                    logger.info(f"{func_name} create level {mipmap_level} for {layer_and_tile}")
+                logger.info(f"{func_name} add level {mipmap_level} for {layer_and_tile}")
 
-                    scaled_bytes = lazy_mipmaps[mipmap_level].to_numpy()
-                    level_data_set = self.create_and_add_data_set(group_name=tile_key,
-                                                                  data_set_name=f"mipmap.{mipmap_level}",
-                                                                  pixel_array=scaled_bytes,
-                                                                  to_h5_file=to_h5_file)
+                level_data_set = self.create_and_add_data_set(group_name=tile_key,
+                                                              data_set_name=f"mipmap.{mipmap_level}",
+                                                              pixel_array=scaled_bytes,
+                                                              to_h5_file=to_h5_file)
 
-                    scaled_element_size = [
-                        scaled_element_size[0], scaled_element_size[1] * 2.0, scaled_element_size[2] * 2.0
-                    ]
-                    level_data_set.attrs["element_size_um"] = scaled_element_size
+                scaled_element_size = [
+                    scaled_element_size[0], scaled_element_size[1] * 2.0, scaled_element_size[2] * 2.0
+                ]
+                level_data_set.attrs["element_size_um"] = scaled_element_size
 
         logger.info(f"{func_name} exit for layer {cyx_dat_list[0].dat_path.layer_id}")
 
@@ -258,6 +280,55 @@ def add_dat_header_attributes(cyx_dat: CYXDat,
     to_group_or_dataset.attrs[DAT_FILE_NAME_KEY] = cyx_dat.dat_path.file_path.name
 
 
+def get_raw_header_and_footer_bytes(cyx_dat: CYXDat) -> Tuple[bytes, bytes]:
+    """
+    Returns
+    -------
+    Tuple[bytes, bytes]
+        the raw header and footer bytes for the specified dat,
+        reading them from the dat file only if they were not retained when the dat was loaded.
+    """
+    if cyx_dat.header_bytes is not None and cyx_dat.footer_bytes is not None:
+        return cyx_dat.header_bytes, cyx_dat.footer_bytes
+
+    source_size = os.path.getsize(cyx_dat.dat_path.file_path)
+    with open(cyx_dat.dat_path.file_path, "rb") as raw_file:
+        raw_header_bytes = raw_file.read(OFFSET)
+        footer_start = OFFSET + cyx_dat.pixels.nbytes
+        raw_file.seek(footer_start)
+        raw_footer_bytes = raw_file.read(source_size - footer_start)
+
+    return raw_header_bytes, raw_footer_bytes
+
+
+def compute_dat_checksum(cyx_dat: CYXDat,
+                         raw_header_bytes: bytes,
+                         raw_footer_bytes: bytes,
+                         checksum_algorithm: str) -> str:
+    """
+    Hashes the original dat bytes (header, then pixels in the dat file's big endian y, x, c order, then footer)
+    a block of rows at a time so that the dat is never reassembled in memory.
+
+    Returns
+    -------
+    str
+        The hex digest of the dat bytes.
+    """
+    checksum = hashlib.new(checksum_algorithm)
+    checksum.update(raw_header_bytes)
+
+    yxc_pixels = np.moveaxis(cyx_dat.pixels, 0, -1)
+    dat_data_type = yxc_pixels.dtype.newbyteorder(">")
+    rows_per_block = max(1, CHECKSUM_BLOCK_BYTES // max(1, yxc_pixels[0].nbytes))
+    for first_row in range(0, yxc_pixels.shape[0], rows_per_block):
+        yxc_block = yxc_pixels[first_row:first_row + rows_per_block]
+        checksum.update(np.ascontiguousarray(yxc_block, dtype=dat_data_type))
+
+    checksum.update(raw_footer_bytes)
+
+    return checksum.hexdigest()
+
+
 def build_safe_chunk_shape(hdf5_writer_chunks: Union[Tuple[int, ...], bool, None],
                            data_shape: Tuple[int, ...]) -> Union[Tuple[int, ...], bool, None]:
     """
@@ -1,6 +1,6 @@
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Final
 
 import numpy as np
 from PIL import Image
@@ -12,6 +12,186 @@ from janelia_emrp.root_logger import init_logger
 logger = logging.getLogger(__name__)
 
 
+# intensity bounds for signed 16-bit dat pixels
+SATURATED: Final = 3  # how close to the boundary do you need to be considered 'saturated'
+LOW_BOUND: Final = -32768.0
+HIGH_BOUND: Final = 32767.0
+
+# number of pixels to histogram or convert at once, bounds the size of temporary index arrays
+PIXELS_PER_BLOCK: Final = 4 * 1024 * 1024
+
+
+def row_blocks(pixel_array: np.ndarray) -> list[slice]:
+    """
+    Returns
+    -------
+    list[slice]
+        row slices that divide the specified 2D pixel array into blocks of roughly `PIXELS_PER_BLOCK` pixels.
+    """
+    rows_per_block = max(1, PIXELS_PER_BLOCK // max(1, pixel_array.shape[1]))
+    return [slice(start, start + rows_per_block) for start in range(0, pixel_array.shape[0], rows_per_block)]
+
+
+def to_bin_indexes(pixel_block: np.ndarray) -> np.ndarray:
+    """
+    Returns
+    -------
+    np.ndarray
+        uint16 histogram (or lookup table) indexes for the specified signed 16-bit pixels.
+        Flipping the sign bit maps intensities -32768 .. 32767 to indexes 0 .. 65535.
+    """
+    return np.ascontiguousarray(pixel_block, dtype=np.int16).view(np.uint16) ^ np.uint16(0x8000)
+
+
+class LayerIntensityStatistics:
+    """
+    Accumulates a 16-bit intensity histogram for the tiles in a layer one tile at a time
+    so that the unsaturated mean and standard deviation for the layer can be derived
+    without stacking (and holding) all of the layer's pixels in memory.
+
+    Attributes
+    ----------
+    counts : np.ndarray
+        number of pixels with each 16-bit intensity, indexed by intensity + 32768.
+    """
+    def __init__(self):
+        self.counts = np.zeros(65536, dtype=np.int64)
+
+    def add_tile(self,
+                 pixel_array: np.ndarray) -> np.ndarray:
+        """
+        Adds the intensities of the specified 16-bit (signed) 2D tile pixels to this histogram.
+
+        Returns
+        -------
+        np.ndarray
+            histogram for just the specified tile.
+        """
+        tile_counts = np.zeros(65536, dtype=np.int64)
+        for rows in row_blocks(pixel_array):
+            tile_counts += np.bincount(to_bin_indexes(pixel_array[rows]).ravel(), minlength=65536)
+        self.counts += tile_counts
+        return tile_counts
+
+    def total_count(self) -> int:
+        return int(self.counts.sum())
+
+    def mean_and_std_dev(self,
+                         min_intensity: float,
+                         max_intensity: float) -> tuple[int, float, float]:
+        """
+        Returns
+        -------
+        tuple[int, float, float]
+            number of pixels with intensities >= min_intensity and < max_intensity along with
+            the mean and (population) standard deviation of those pixel intensities.
+        """
+        intensities = np.arange(-32768, 32768, dtype=np.int64)
+        in_range = np.logical_and(intensities >= min_intensity, intensities < max_intensity)
+        intensities = intensities[in_range]
+        counts = self.counts[in_range]
+
+        count = int(counts.sum())
+        if count == 0:
+            return 0, float("nan"), float("nan")
+
+        # integer weighted sum is exact, so mean is correctly rounded
+        mean = int(np.dot(intensities, counts)) / count
+        deviations = intensities - mean
+        std_dev = float(np.sqrt(np.dot(deviations * deviations, counts) / count))
+
+        return count, mean, std_dev
+
+
+def float_convert(pixel_array: np.ndarray,
+                  low: float,
+                  span: float) -> tuple[np.ndarray, int, int]:
+    """
+    Original per-pixel floating point 16-bit to 8-bit conversion path,
+    kept as the reference that `EightBitLookupTable` must reproduce.
+
+    Returns
+    -------
+    tuple[np.ndarray, int, int]
+        the 8-bit pixels, the number of pixels clipped to black, and the number of pixels clipped to white.
+    """
+    compressed_data = 255.0 * ((pixel_array - low) / span) + 0.5
+
+    too_low_bool_array = compressed_data <= -1.0
+    too_low_count = too_low_bool_array.sum()
+    compressed_data[too_low_bool_array] = 0
+
+    too_high_bool_array = compressed_data >= 256.0
+    too_high_count = too_high_bool_array.sum()
+    compressed_data[too_high_bool_array] = 255
+
+    return compressed_data.astype(dtype=np.uint8), int(too_low_count), int(too_high_count)
+
+
+class EightBitLookupTable:
+    """
+    Maps every possible signed 16-bit intensity to its 8-bit "compressed" value for a layer.
+    Since the input domain is only 65536 values, the floating point conversion is done once per
+    intensity instead of once per pixel.
+
+    Attributes
+    ----------
+    values : np.ndarray
+        8-bit value for each 16-bit intensity, indexed by intensity + 32768.
+
+    too_low : np.ndarray
+        boolean flag for each 16-bit intensity indicating whether it is clipped to black.
+
+    too_high : np.ndarray
+        boolean flag for each 16-bit intensity indicating whether it is clipped to white.
+    """
+    def __init__(self,
+                 low: float,
+                 span: float):
+        intensities = np.arange(-32768, 32768, dtype=np.int16)
+
+        # create a float array of round-able converted values using the derived low-to-high 8-bit range
+        compressed_data = 255.0 * ((intensities - low) / span) + 0.5
+
+        # Lou's code converted values between -1.0 and 0.0 to 0 with an int(...) conversion.
+        # This is covered by the compressed_data.astype(dtype=np.uint8 ... call,
+        # so we only count values <= -1.0 as "too low".
+        self.too_low = compressed_data <= -1.0
+        compressed_data[self.too_low] = 0
+
+        # Lou's code converted values between 255.0 and 256.0 to 255 with an int(...) conversion.
+        # This is covered by the compressed_data.astype(dtype=np.uint8 ... call,
+        # so we only count values >= 256.0 as "too high".
+        self.too_high = compressed_data >= 256.0
+        compressed_data[self.too_high] = 255
+
+        self.values = compressed_data.astype(dtype=np.uint8)
+
+    def convert(self,
+                pixel_array: np.ndarray) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            8-bit version of the specified signed 16-bit 2D pixel array.
+        """
+        compressed_data = np.empty(pixel_array.shape, dtype=np.uint8)
+        for rows in row_blocks(pixel_array):
+            compressed_data[rows] = self.values[to_bin_indexes(pixel_array[rows])]
+        return compressed_data
+
+    def clipped_counts(self,
+                       tile_counts: np.ndarray) -> tuple[int, int]:
+        """
+        Returns
+        -------
+        tuple[int, int]
+            number of pixels clipped to black and number of pixels clipped to white for a tile with
+            the specified histogram (see `LayerIntensityStatistics.add_tile`).
+        """
+        return int(tile_counts[self.too_low].sum()), int(tile_counts[self.too_high].sum())
+
+
 def compress_compute_layer(cyx_dat_record_list: list[np.ndarray],
                            channel_num: int = 0,
                            fill_info: Optional[FillInfo] = None) -> list[np.ndarray]:
@@ -20,6 +200,11 @@ def compress_compute_layer(cyx_dat_record_list: list[np.ndarray],
     /groups/flyem/home/flyem/bin/compress_dats/build2/Compress.cpp
     that normalizes min and max intensities across all tiles in a layer instead of just a single tile.
 
+    Layer statistics are accumulated one tile at a time (see `LayerIntensityStatistics`)
+    so tile pixels are never stacked or copied unless a fill is applied.
+    Tiles are then converted through a 65536 entry lookup table (see `EightBitLookupTable`)
+    and clipped pixels are counted from each tile's histogram.
+
     Parameters
     ----------
     cyx_dat_record_list: list[np.ndarray]
@@ -38,6 +223,8 @@ def compress_compute_layer(cyx_dat_record_list: list[np.ndarray],
     """
     compressed_data_list: list[np.ndarray] = []
     pixel_array_list = []
+    tile_counts_list = []
+    layer_statistics = LayerIntensityStatistics()
     for tile_index in range(len(cyx_dat_record_list)):
         cyx_dat_record = cyx_dat_record_list[tile_index]
         logger.info(f"compress_compute_layer: processing channel {channel_num} from dat with shape {cyx_dat_record.shape}")
@@ -45,27 +232,22 @@ def compress_compute_layer(cyx_dat_record_list: list[np.ndarray],
         if fill_info is not None and tile_index in fill_info.tile_indexes:
            pixel_array = fill_info.fill_region(pixel_array)
         pixel_array_list.append(pixel_array)
-
-    stacked_pixel_array = np.stack(pixel_array_list, axis=0)
+        tile_counts_list.append(layer_statistics.add_tile(pixel_array))
 
     # First, find the mean and standard deviation of the 'real' non-saturated pixels.
     # Ignore any that are too close to saturated light or dark.
-    saturated = 3  # how close to the boundary do you need to be considered 'saturated'
-    low_bound = -32768.0
-    high_bound = 32767.0
+    low_bound = LOW_BOUND
+    high_bound = HIGH_BOUND
 
-    min_intensity = low_bound + saturated
-    max_intensity = high_bound - saturated
+    min_intensity = low_bound + SATURATED
+    max_intensity = high_bound - SATURATED
 
-    unsaturated_pixel_array = stacked_pixel_array[np.logical_and(stacked_pixel_array >= min_intensity, stacked_pixel_array < max_intensity)]
+    unsaturated_count, mean, std_dev = layer_statistics.mean_and_std_dev(min_intensity=min_intensity,
+                                                                         max_intensity=max_intensity)
 
-    unsaturated_count = unsaturated_pixel_array.size
-    unsaturated_pct = (unsaturated_count * 100.0) / stacked_pixel_array.size
+    unsaturated_pct = (unsaturated_count * 100.0) / layer_statistics.total_count()
     logger.info(f"compress_compute: {unsaturated_count} real pixels, {unsaturated_pct} percent")
 
-    mean = np.mean(unsaturated_pixel_array).item()
-    std_dev = np.std(unsaturated_pixel_array).item()
-
     logger.info(f"compress_compute: Of the above image points, mean= {mean} and std dev = {std_dev}")
 
     # Convert mean-4*sigma -> 0, mean +4 sigma to 255.
@@ -87,34 +269,19 @@ def compress_compute_layer(cyx_dat_record_list: list[np.ndarray],
     span = high - low
     logger.info(f"compress_compute: low {low:.2f}  -> 0, high {high:.2f} -> 255")
 
-    for pixel_array in pixel_array_list:
+    lookup_table = EightBitLookupTable(low=low, span=span)
 
-        # create a float array of round-able converted values using the derived low-to-high 8-bit range
-        compressed_data = 255.0 * ((pixel_array - low) / span) + 0.5
+    for pixel_array, tile_counts in zip(pixel_array_list, tile_counts_list):
 
-        # Lou's code converted values between -1.0 and 0.0 to 0 with an int(...) conversion.
-        # This is covered by the compressed_data.astype(dtype=np.uint8 ... call,
-        # so we only count values <= -1.0 as "too low".
-        too_low_bool_array = compressed_data <= -1.0
-        too_low_count = too_low_bool_array.sum()  # works because True = 1 and False = 0
-        too_low_pct = (float(too_low_count) / compressed_data.size) * 100.0
+        compressed_data_2d_np = lookup_table.convert(pixel_array)
 
-        compressed_data[too_low_bool_array] = 0
-
-        # Lou's code converted values between 255.0 and 256.0 to 255 with an int(...) conversion.
-        # This is covered by the compressed_data.astype(dtype=np.uint8 ... call,
-        # so we only count values >= 256.0 as "too high".
-        too_high_bool_array = compressed_data >= 256.0
-        too_high_count = too_high_bool_array.sum()  # works because True = 1 and False = 0
-        too_high_pct = (float(too_high_count) / compressed_data.size) * 100.0
-
-        compressed_data[too_high_bool_array] = 255
+        too_low_count, too_high_count = lookup_table.clipped_counts(tile_counts)
+        too_low_pct = (float(too_low_count) / compressed_data_2d_np.size) * 100.0
+        too_high_pct = (float(too_high_count) / compressed_data_2d_np.size) * 100.0
 
         logger.info(f"compress_compute: {too_low_count} ({too_low_pct:.5f}%) clipped to black, "
                     f"{too_high_count} ({too_high_pct:.5f}%) clipped to white")
 
-        compressed_data_2d_np = compressed_data.astype(dtype=np.uint8)
-
         # return 2D compressed result as a 3D array (z, y, x)
         z_y_x_shape = (1, compressed_data_2d_np.shape[0], compressed_data_2d_np.shape[1])
 
@@ -0,0 +1,129 @@
+import itertools
+import logging
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Final, Optional
+
+import numpy as np
+from h5py import Dataset
+
+logger = logging.getLogger(__name__)
+
+
+# default maximum number of threads used to decompress chunks
+DEFAULT_MAX_READ_THREADS: Final = 4
+
+
+def get_default_read_threads() -> int:
+    return min(DEFAULT_MAX_READ_THREADS, os.cpu_count() or 1)
+
+
+def can_decode_chunks(data_set: Dataset) -> bool:
+    """
+    Returns
+    -------
+    bool
+        True if the data set's stored chunks can be decoded here (uncompressed or gzip compressed without
+        other filters) so that decompression can be spread across threads.
+    """
+    return data_set.chunks is not None and \
+        data_set.compression in (None, "gzip") and \
+        not data_set.shuffle and \
+        not data_set.fletcher32 and \
+        data_set.scaleoffset is None
+
+
+def all_chunks_allocated(data_set: Dataset,
+                         chunk_offsets: list[tuple[int, ...]]) -> bool:
+    """
+    Returns
+    -------
+    bool
+        True if storage has been allocated (written) for every chunk at the specified offsets.
+    """
+    data_set_id = data_set.id
+    total_chunk_count = int(np.prod([-(-size // chunk_size) for size, chunk_size in zip(data_set.shape,
+                                                                                         data_set.chunks)]))
+    if data_set_id.get_num_chunks() == total_chunk_count:
+        return True
+    return all(data_set_id.get_chunk_info_by_coord(chunk_offset).byte_offset is not None
+               for chunk_offset in chunk_offsets)
+
+
+def read_rows(data_set: Dataset,
+              first_row: int = 0,
+              stop_row: Optional[int] = None,
+              max_workers: Optional[int] = None) -> np.ndarray:
+    """
+    Reads rows (indexes along the first dimension) of the specified data set.
+
+    When the data set's chunks can be decoded here, each chunk's stored bytes are read with h5py
+    and then decompressed on a thread pool (zlib releases the GIL) directly into a preallocated array.
+    Otherwise, the rows are read with h5py, which decompresses chunks one at a time.
+
+    Parameters
+    ----------
+    data_set : Dataset
+        data set to read.
+
+    first_row : int, default=0
+        index of first row to read, should be aligned with the start of a chunk for the fastest reads.
+
+    stop_row : Optional[int], default=None
+        index after the last row to read or None to read to the end of the data set.
+
+    max_workers : Optional[int], default=None
+        maximum number of decompression threads or None to use up to DEFAULT_MAX_READ_THREADS (4) threads.
+
+    Returns
+    -------
+    np.ndarray
+        The rows in the data set's data type.
+    """
+    shape = data_set.shape
+    stop_row = shape[0] if stop_row is None else min(stop_row, shape[0])
+
+    if max_workers is None:
+        max_workers = get_default_read_threads()
+
+    if max_workers < 2 or len(shape) == 0 or not can_decode_chunks(data_set):
+        return data_set[first_row:stop_row]
+
+    chunk_shape = data_set.chunks
+    pixels = np.empty((stop_row - first_row,) + shape[1:], dtype=data_set.dtype)
+
+    first_chunk_row = (first_row // chunk_shape[0]) * chunk_shape[0]
+    offset_ranges = [range(first_chunk_row, stop_row, chunk_shape[0])] + \
+                    [range(0, shape[d], chunk_shape[d]) for d in range(1, len(shape))]
+    chunk_offsets = list(itertools.product(*offset_ranges))
+
+    is_gzip = data_set.compression == "gzip"
+    data_set_id = data_set.id
+
+    if not all_chunks_allocated(data_set, chunk_offsets):
+        # some needed chunks were never written, let h5py fill them in
+        return data_set[first_row:stop_row]
+
+    def decode_chunk(chunk_offset: tuple[int, ...]):
+        filter_mask, chunk_bytes = data_set_id.read_direct_chunk(chunk_offset)
+        if is_gzip and (filter_mask & 1) == 0:
+            chunk_bytes = zlib.decompress(chunk_bytes)
+        chunk = np.frombuffer(chunk_bytes, dtype=data_set.dtype).reshape(chunk_shape)
+
+        # copy the part of the (possibly partial edge) chunk that is within the requested rows
+        chunk_first_row = max(chunk_offset[0], first_row)
+        chunk_stop_row = min(chunk_offset[0] + chunk_shape[0], stop_row)
+        target_slices = [slice(chunk_first_row - first_row, chunk_stop_row - first_row)]
+        source_slices = [slice(chunk_first_row - chunk_offset[0], chunk_stop_row - chunk_offset[0])]
+        for d in range(1, len(shape)):
+            stop = min(chunk_offset[d] + chunk_shape[d], shape[d])
+            target_slices.append(slice(chunk_offset[d], stop))
+            source_slices.append(slice(0, stop - chunk_offset[d]))
+        pixels[tuple(target_slices)] = chunk[tuple(source_slices)]
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="h5-chunk") as executor:
+        for _ in executor.map(decode_chunk, chunk_offsets):
+            pass
+
+    return pixels
@@ -5,6 +5,7 @@ from typing import Optional
 import dask.bag as dask_bag
 from distributed import Client, LocalCluster
 
+from janelia_emrp.fibsem.dat_name_index import DatNameIndex
 from janelia_emrp.fibsem.dat_path import new_dat_path, new_dat_layer, DatPathsForLayer
 from janelia_emrp.fibsem.dat_to_h5_writer import get_dat_file_names_for_h5
 
@@ -16,6 +17,9 @@ class H5DatNameHelper:
     Helper for retrieving/parsing source dat names from HDF5 attributes.
     Optionally wraps a local dask cluster that can be used to speed up
     reads from slow filesystems by executing the reads in parallel.
+    When a dat name index is specified, only HDF5 files that are missing from the index
+    (or have changed since they were indexed) are read.  The index is opened read only
+    because it is written by the conversion client alone (SQLite locking is unreliable on network file systems).
 
     Attributes
     ----------
@@ -43,10 +47,27 @@ class H5DatNameHelper:
         if self.dask_client is not None:
             self.dask_client.shutdown()
 
+    def read_dat_names(self,
+                       h5_list: list[Path]) -> list[list[str]]:
+        """
+        Returns
+        -------
+        list[list[str]]
+            The dat names stored in each of the specified HDF5 files.
+        """
+        if self.dask_client is None or len(h5_list) < 2:
+            dat_name_lists = [get_dat_file_names_for_h5(h5_path) for h5_path in h5_list]
+        else:
+            h5_path_bag = dask_bag.from_sequence(h5_list)
+            list_of_dat_name_lists_bag = h5_path_bag.map(get_dat_file_names_for_h5)
+            dat_name_lists = self.dask_client.compute(list_of_dat_name_lists_bag, sync=True)
+        return dat_name_lists
+
     def names_for_day(self,
                       layer_for_day: DatPathsForLayer,
                       h5_root_path: Path,
-                      source_type: str) -> list[str]:
+                      source_type: str,
+                      dat_name_index_path: Optional[Path] = None) -> list[str]:
 
         # /groups/.../raw/Merlin-6282/2022/10/17/04/Merlin-6282_22-10-17_040352.raw.h5
         # /nearline/.../raw/Merlin-6282/2022/10/17/04/Merlin-6282_22-10-17_040352.raw-archive.h5
@@ -59,24 +80,23 @@ class H5DatNameHelper:
 
         logger.info(f"names_for_day: checking {h5_day_dir}")
 
-        dat_list = []
-        h5_list = h5_day_dir.glob("**/*.h5")
-        
-        if self.dask_client is None:
-            for h5_path in h5_list:
-                dat_list.extend(get_dat_file_names_for_h5(h5_path))
+        h5_list = sorted(h5_day_dir.glob("**/*.h5"))
+
+        if dat_name_index_path is None or not dat_name_index_path.exists():
+            dat_list = [dat_name for dat_names in self.read_dat_names(h5_list) for dat_name in dat_names]
         else:
-            h5_path_bag = dask_bag.from_sequence(h5_list)
-            list_of_dat_name_lists_bag = h5_path_bag.map(get_dat_file_names_for_h5)
-            dat_name_list_bag = list_of_dat_name_lists_bag.flatten()
-            dat_list = self.dask_client.compute(dat_name_list_bag, sync=True)
+            with DatNameIndex(dat_name_index_path, read_only=True) as dat_name_index:
+                dat_list = dat_name_index.names_for_h5_dir(h5_dir=h5_day_dir,
+                                                           h5_paths=h5_list,
+                                                           read_dat_names=self.read_dat_names)
 
         return dat_list
 
     def raw_names_for_day(self,
                           scope_dat_paths: list[Path],
                           raw_h5_archive_root: Path,
-                          raw_h5_cluster_root: Path) -> list[str]:
+                          raw_h5_cluster_root: Path,
+                          dat_name_index_path: Optional[Path] = None) -> list[str]:
         h5_dat_names_for_day = []
         if len(scope_dat_paths) > 0:
             first_dat_path = new_dat_path(scope_dat_paths[0])
@@ -84,9 +104,11 @@ class H5DatNameHelper:
             if raw_h5_archive_root is not None:
                 h5_dat_names_for_day.extend(self.names_for_day(layer_for_day=first_dat_layer,
                                                                h5_root_path=raw_h5_archive_root,
-                                                               source_type="raw"))
+                                                               source_type="raw",
+                                                               dat_name_index_path=dat_name_index_path))
             if raw_h5_cluster_root is not None:
                 h5_dat_names_for_day.extend(self.names_for_day(layer_for_day=first_dat_layer,
                                                                h5_root_path=raw_h5_cluster_root,
-                                                               source_type="raw"))
+                                                               source_type="raw",
+                                                               dat_name_index_path=dat_name_index_path))
         return h5_dat_names_for_day
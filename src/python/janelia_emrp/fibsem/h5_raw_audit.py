@@ -0,0 +1,188 @@
+import argparse
+import logging
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import dask.bag as dask_bag
+import h5py
+import sys
+from distributed import Client, LocalCluster
+
+from janelia_emrp.fibsem.dat_to_h5_writer import DAT_CHECKSUM_ALGORITHM_KEY, DAT_CHECKSUM_KEY, DAT_FILE_NAME_KEY
+from janelia_emrp.fibsem.h5_to_dat import compute_restored_dat_checksum
+from janelia_emrp.root_logger import init_logger
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DatChecksumAudit:
+    # Result of auditing one raw data group against the dat checksum recorded at conversion time.
+    h5_path: str
+    group_name: str
+    dat_file_name: Optional[str] = None
+    recorded_checksum: Optional[str] = None
+    computed_checksum: Optional[str] = None
+    error: Optional[str] = None
+
+    def status(self) -> str:
+        if self.error is not None:
+            return "error"
+        elif self.recorded_checksum is None:
+            return "unrecorded"
+        elif self.recorded_checksum == self.computed_checksum:
+            return "match"
+        else:
+            return "mismatch"
+
+
+def find_raw_h5_paths(path_list: list[Path]) -> list[Path]:
+    """
+    Returns
+    -------
+    list[Path]
+        Sorted list of the specified HDF5 files and all raw HDF5 files within the specified directories.
+    """
+    h5_paths = []
+    for path in path_list:
+        if path.is_dir():
+            h5_paths.extend(path.glob("**/*.raw-archive.h5"))
+            h5_paths.extend(path.glob("**/*.raw.h5"))
+        else:
+            h5_paths.append(path)
+    return sorted(h5_paths)
+
+
+def audit_h5_file(h5_path: Path) -> list[DatChecksumAudit]:
+    """
+    Recomputes the checksum of each dat stored in the specified HDF5 file from its data sets
+    and compares it with the checksum recorded when the dat was converted.
+
+    Returns
+    -------
+    list[DatChecksumAudit]
+        Audit results for each raw data group in the file.
+    """
+    audit_list: list[DatChecksumAudit] = []
+
+    # noinspection PyBroadException
+    try:
+        with h5py.File(name=str(h5_path), mode="r") as h5_file:
+            for group_name in sorted(h5_file.keys()):
+                group = h5_file.get(group_name)
+                audit = DatChecksumAudit(h5_path=str(h5_path),
+                                         group_name=group_name,
+                                         dat_file_name=group.attrs.get(DAT_FILE_NAME_KEY))
+                # noinspection PyBroadException
+                try:
+                    if DAT_CHECKSUM_KEY in group.attrs:
+                        audit.recorded_checksum = group.attrs[DAT_CHECKSUM_KEY]
+                        audit.computed_checksum = compute_restored_dat_checksum(
+                            h5_path=h5_path,
+                            raw_data_group=group,
+                            checksum_algorithm=group.attrs[DAT_CHECKSUM_ALGORITHM_KEY])
+                except Exception as e:
+                    audit.error = f"{type(e).__name__}: {e}"
+                audit_list.append(audit)
+
+    except Exception as e:
+        audit_list.append(DatChecksumAudit(h5_path=str(h5_path), group_name="", error=f"{type(e).__name__}: {e}"))
+
+    return audit_list
+
+
+def audit_h5_files(h5_paths: list[Path],
+                   num_workers: int,
+                   dask_local_dir: Optional[str]) -> list[DatChecksumAudit]:
+    """
+    Audits the specified HDF5 files, distributing files across a local dask cluster when `num_workers` > 1.
+
+    Returns
+    -------
+    list[DatChecksumAudit]
+        Audit results for every raw data group in the files.
+    """
+    logger.info(f"audit_h5_files: entry, auditing {len(h5_paths)} files with {num_workers} worker(s)")
+
+    if num_workers > 1:
+        with LocalCluster(n_workers=num_workers,
+                          threads_per_worker=1,
+                          local_directory=dask_local_dir) as dask_cluster, Client(dask_cluster) as dask_client:
+            logger.info(f'observe dask cluster information at {dask_cluster.dashboard_link}')
+            h5_path_bag = dask_bag.from_sequence(h5_paths, npartitions=min(len(h5_paths), num_workers * 4))
+            audit_list = dask_client.compute(h5_path_bag.map(audit_h5_file).flatten(), sync=True)
+    else:
+        audit_list = []
+        for h5_path in h5_paths:
+            audit_list.extend(audit_h5_file(h5_path))
+
+    return audit_list
+
+
+def main(arg_list: list[str]):
+    parser = argparse.ArgumentParser(
+        description="Verifies that raw HDF5 data still reproduces the source dat files by comparing "
+                    "checksums recomputed from the HDF5 data sets with the checksums recorded at conversion time."
+    )
+    parser.add_argument(
+        "--h5_path",
+        help="Path(s) of raw HDF5 file(s) or directories containing raw HDF5 files",
+        required=True,
+        nargs='+'
+    )
+    parser.add_argument(
+        "--num_workers",
+        help="Number of local dask workers to use for auditing files in parallel",
+        type=int,
+        default=1
+    )
+    parser.add_argument(
+        "--dask_local_dir",
+        help="Parent directory for dask work area",
+    )
+
+    args = parser.parse_args(arg_list)
+
+    h5_paths = find_raw_h5_paths([Path(p) for p in args.h5_path])
+    if len(h5_paths) == 0:
+        raise ValueError(f"no raw HDF5 files found in {args.h5_path}")
+
+    audit_list = audit_h5_files(h5_paths=h5_paths,
+                                num_workers=args.num_workers,
+                                dask_local_dir=args.dask_local_dir)
+
+    status_counts: dict[str, int] = {}
+    for audit in audit_list:
+        status = audit.status()
+        status_counts[status] = status_counts.get(status, 0) + 1
+        if status == "mismatch":
+            logger.error(f"main: {audit.dat_file_name} checksum {audit.computed_checksum} for group "
+                         f"{audit.group_name} in {audit.h5_path} differs from recorded checksum "
+                         f"{audit.recorded_checksum}")
+        elif status == "error":
+            logger.error(f"main: failed to audit group {audit.group_name} in {audit.h5_path}, {audit.error}")
+        elif status == "unrecorded":
+            logger.warning(f"main: no checksum recorded for group {audit.group_name} in {audit.h5_path}")
+
+    logger.info(f"main: audited {len(audit_list)} groups in {len(h5_paths)} files, status counts are {status_counts}")
+
+    failed_count = status_counts.get("mismatch", 0) + status_counts.get("error", 0)
+    if failed_count > 0:
+        raise ValueError(f"{failed_count} of {len(audit_list)} groups failed audit")
+
+
+if __name__ == "__main__":
+    # NOTE: to fix module not found errors, export PYTHONPATH="/.../EM_recon_pipeline/src/python"
+
+    # setup logger since this module is the main program
+    init_logger(__file__)
+
+    # noinspection PyBroadException
+    try:
+        main(sys.argv[1:])
+    except Exception as e:
+        # ensure exit code is a non-zero value when Exception occurs
+        traceback.print_exc()
+        sys.exit(1)
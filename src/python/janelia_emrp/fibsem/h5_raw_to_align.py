@@ -6,7 +6,6 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
-import dask.bag as dask_bag
 import h5py
 import math
 import numpy as np
@@ -18,6 +17,10 @@ from distributed import Client
 from janelia_emrp.fibsem.cyx_dat import CYXDat
 from janelia_emrp.fibsem.dat_path import new_dat_path
 from janelia_emrp.fibsem.dat_to_h5_writer import DatToH5Writer, DAT_FILE_NAME_KEY, CHANNEL_DATA_SET_NAMES_KEY
+from janelia_emrp.fibsem.h5_chunk_reader import read_rows, DEFAULT_MAX_READ_THREADS
+from janelia_emrp.fibsem.layer_manifest import LayerManifest, H5_HOUR_DIRECTORY_DEPTH, add_forget_layers_argument
+from janelia_emrp.fibsem.layer_task_scheduler import add_layer_task_arguments, convert_layers_with_dask, \
+    get_max_tasks_in_flight, log_layer_task_summary
 from janelia_emrp.fibsem.volume_transfer_info import VolumeTransferInfo
 from janelia_emrp.root_logger import init_logger
 
@@ -29,6 +32,9 @@ class H5PathsForLayer:
     raw_path: Path
     align_path: Path
 
+    def get_layer_id(self) -> str:
+        return self.raw_path.name
+
 
 class H5RawToAlign:
     """
@@ -41,16 +47,21 @@ class H5RawToAlign:
 
     skip_existing : bool, default=True
         indicates whether existing HDF5 data should be left as is (True) or overwritten (False)
+
+    read_threads : Optional[int], default=None
+        number of threads used to decompress raw chunks or None to use up to DEFAULT_MAX_READ_THREADS (4) threads
     """
     def __init__(self,
                  volume_transfer_info: VolumeTransferInfo,
                  align_writer: DatToH5Writer,
                  channel_index: int,
-                 skip_existing: bool = True):
+                 skip_existing: bool = True,
+                 read_threads: Optional[int] = None):
         self.volume_transfer_info = volume_transfer_info
         self.align_writer = align_writer
         self.channel_index = channel_index
         self.skip_existing = skip_existing
+        self.read_threads = read_threads
 
     def __str__(self):
         return f"{self.volume_transfer_info}"
@@ -78,7 +89,8 @@ class H5RawToAlign:
                 raw_data_group = h5_raw_file.get(group_name)
                 dat_path = new_dat_path(Path(raw_data_group.attrs[DAT_FILE_NAME_KEY]))
                 channel_data_set_names = raw_data_group.attrs[CHANNEL_DATA_SET_NAMES_KEY]
-                channel_pixels = np.array(raw_data_group.get(channel_data_set_names[self.channel_index]))
+                channel_pixels = read_rows(raw_data_group.get(channel_data_set_names[self.channel_index]),
+                                           max_workers=self.read_threads)
                 cyx_channel_pixels = np.expand_dims(channel_pixels, axis=0)
                 cyx_dat_list.append(CYXDat(dat_path=dat_path,
                                            header=dict(raw_data_group.attrs.items()),
@@ -86,15 +98,24 @@ class H5RawToAlign:
 
         logger.info(f"convert_layer: writing {len(cyx_dat_list)} groups to {h5_paths_for_layer.align_path}")
 
-        h5_paths_for_layer.align_path.parent.mkdir(parents=True, exist_ok=True)
-
-        with self.align_writer.open_h5_file(output_path=str(h5_paths_for_layer.align_path),
-                                            mode=h5_write_mode) as layer_align_file:
-            self.align_writer.create_and_add_mipmap_data_sets(
-                cyx_dat_list=cyx_dat_list,
-                max_mipmap_level=self.volume_transfer_info.max_mipmap_level,
-                to_h5_file=layer_align_file,
-                fill_info=self.volume_transfer_info.fill_info)
+        align_path = h5_paths_for_layer.align_path
+        align_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # remove partially written file if conversion fails so that the layer can be retried
+        is_new_align_path = not align_path.exists()
+        try:
+            with self.align_writer.open_h5_file(output_path=str(align_path),
+                                                mode=h5_write_mode) as layer_align_file:
+                self.align_writer.create_and_add_mipmap_data_sets(
+                    cyx_dat_list=cyx_dat_list,
+                    max_mipmap_level=self.volume_transfer_info.max_mipmap_level,
+                    to_h5_file=layer_align_file,
+                    fill_info=self.volume_transfer_info.fill_info)
+        except Exception:
+            if is_new_align_path and align_path.exists():
+                logger.warning(f"{self} convert_layer: removing incomplete {align_path}")
+                align_path.unlink()
+            raise
 
         elapsed_seconds = int(time.time() - start_time)
 
@@ -135,12 +156,31 @@ def get_layers_for_run(h5_raw_root: Path,
                        first_h5_path: Optional[Path],
                        last_h5_path: Optional[Path],
                        skip_existing: bool,
-                       volume_transfer_info: VolumeTransferInfo) -> list[H5PathsForLayer]:
+                       volume_transfer_info: VolumeTransferInfo,
+                       forget_layer_ids: Optional[list[str]] = None) -> list[H5PathsForLayer]:
 
     logger.info(f"get_layers_for_run: entry, h5_raw_root={h5_raw_root}, first_h5={first_h5_path}, "
                 f"last_h5={last_h5_path}, skip_existing={skip_existing}")
 
-    raw_paths: list[Path] = sorted([p for p in h5_raw_root.glob("**/*.raw*.h5")])
+    align_h5_root = volume_transfer_info.get_align_h5_root_for_conversion()
+
+    # the manifest only tracks layers for skip_existing runs, forced runs always list every raw h5 file
+    layer_manifest_path = volume_transfer_info.get_layer_manifest_path() if skip_existing else None
+    manifest_output_key = f"align:{align_h5_root}"
+    converted_layer_ids: set[str] = set()
+
+    if layer_manifest_path is None:
+        raw_paths: list[Path] = sorted([p for p in h5_raw_root.glob("**/*.raw*.h5")])
+    else:
+        with LayerManifest(layer_manifest_path) as layer_manifest:
+            full_scan = layer_manifest.scan(root=h5_raw_root,
+                                            file_pattern="*.raw*.h5",
+                                            hour_dir_depth=H5_HOUR_DIRECTORY_DEPTH)
+            raw_paths: list[Path] = layer_manifest.file_paths(root=h5_raw_root, file_pattern="*.raw*.h5")
+            # recorded align paths are only checked after full scans so that skipping converted layers costs nothing
+            converted_layer_ids = layer_manifest.converted_layer_ids_for_run(output_key=manifest_output_key,
+                                                                             verify=full_scan,
+                                                                             forget_layer_ids=forget_layer_ids)
 
     logger.info(f"get_layers_for_run: found {len(raw_paths)} raw h5 files to convert")
 
@@ -148,8 +188,8 @@ def get_layers_for_run(h5_raw_root: Path,
 
     if len(raw_paths) > 0:
 
-        align_h5_root = volume_transfer_info.get_align_h5_root_for_conversion()
         match = re.compile(r"\.raw[^.]*\.")
+        layer_id_to_align_paths: dict[str, list[Path]] = {}
 
         for raw_path in raw_paths:
 
@@ -161,8 +201,18 @@ def get_layers_for_run(h5_raw_root: Path,
             relative_parent_dir = raw_path.parent.relative_to(h5_raw_root)
             align_file_name = match.sub(".uint8.", raw_path.name)
             align_path = align_h5_root / relative_parent_dir / align_file_name
+            h5_paths_for_layer = H5PathsForLayer(raw_path, align_path)
+            layer_id = h5_paths_for_layer.get_layer_id()
+            if layer_id in converted_layer_ids:
+                continue
             if not skip_existing or not align_path.exists():
-                layers_to_convert.append(H5PathsForLayer(raw_path, align_path))
+                layers_to_convert.append(h5_paths_for_layer)
+            else:
+                layer_id_to_align_paths[layer_id] = [align_path]
+
+        if layer_manifest_path is not None and len(layer_id_to_align_paths) > 0:
+            with LayerManifest(layer_manifest_path) as layer_manifest:
+                layer_manifest.record_converted_layers(manifest_output_key, layer_id_to_align_paths)
 
         logger.info(f"get_layers_for_run: after filtering, {len(layers_to_convert)} remain to be converted")
 
@@ -177,7 +227,11 @@ def convert_volume(volume_transfer_info: VolumeTransferInfo,
                    channel_index: int,
                    skip_existing: bool,
                    min_layers_per_worker: int,
-                   lsf_runtime_limit: Optional[str]):
+                   lsf_runtime_limit: Optional[str],
+                   max_layers_in_flight: Optional[int] = None,
+                   max_layer_attempts: int = 2,
+                   read_threads: Optional[int] = None,
+                   forget_layer_ids: Optional[list[str]] = None):
 
     logger.info(f"convert_volume: entry, processing {volume_transfer_info} with {num_workers} worker(s)")
 
@@ -195,13 +249,15 @@ def convert_volume(volume_transfer_info: VolumeTransferInfo,
                                                               first_h5_path=first_h5_path,
                                                               last_h5_path=last_h5_path,
                                                               skip_existing=skip_existing,
-                                                              volume_transfer_info=volume_transfer_info)
+                                                              volume_transfer_info=volume_transfer_info,
+                                                              forget_layer_ids=forget_layer_ids)
 
     if len(h5_layer_list) > 0:
         converter = H5RawToAlign(volume_transfer_info=volume_transfer_info,
                                  align_writer=DatToH5Writer(chunk_shape=(1, 512, 512)),
                                  channel_index=channel_index,
-                                 skip_existing=skip_existing)
+                                 skip_existing=skip_existing,
+                                 read_threads=read_threads)
 
         if num_workers > 1:
             local_kwargs = {
@@ -228,15 +284,19 @@ def convert_volume(volume_transfer_info: VolumeTransferInfo,
 
                 adjusted_num_workers = min(math.ceil(len(h5_layer_list) / min_layers_per_worker), num_workers)
                 dask_client.cluster.scale(n=adjusted_num_workers)
-                number_of_partitions = adjusted_num_workers
+                max_tasks_in_flight = get_max_tasks_in_flight(max_layers_in_flight, adjusted_num_workers)
 
-                logger.info(f"convert_volume: requested {adjusted_num_workers} worker dask cluster, " 
+                logger.info(f"convert_volume: requested {adjusted_num_workers} worker dask cluster, "
                             f"scaled count is {len(dask_cluster.worker_spec)}, "
-                            f"number_of_partitions is {number_of_partitions}")
+                            f"max_tasks_in_flight is {max_tasks_in_flight}")
 
-                bag = dask_bag.from_sequence(h5_layer_list, npartitions=number_of_partitions)
-                bag = bag.map_partitions(converter.convert_layer_list)
-                dask_client.compute(bag, sync=True)
+                results = convert_layers_with_dask(dask_client=dask_client,
+                                                   layers=h5_layer_list,
+                                                   convert_layer=converter.convert_layer,
+                                                   get_layer_id=H5PathsForLayer.get_layer_id,
+                                                   max_tasks_in_flight=max_tasks_in_flight,
+                                                   max_attempts=max_layer_attempts)
+                log_layer_task_summary("convert_volume", results)
 
         else:
             converter.convert_layer_list(h5_layer_list)
@@ -295,6 +355,14 @@ def main(arg_list: list[str]):
         type=int,
         default=0
     )
+    parser.add_argument(
+        "--read_threads",
+        help="Number of threads each worker uses to decompress raw HDF5 chunks",
+        type=int,
+        default=DEFAULT_MAX_READ_THREADS
+    )
+    add_layer_task_arguments(parser)
+    add_forget_layers_argument(parser)
 
     args = parser.parse_args(arg_list)
 
@@ -306,7 +374,11 @@ def main(arg_list: list[str]):
                    channel_index=args.channel_index,
                    skip_existing=(not args.force),
                    min_layers_per_worker=args.min_layers_per_worker,
-                   lsf_runtime_limit=args.lsf_runtime_limit)
+                   lsf_runtime_limit=args.lsf_runtime_limit,
+                   max_layers_in_flight=args.max_layers_in_flight,
+                   max_layer_attempts=args.max_layer_attempts,
+                   read_threads=args.read_threads,
+                   forget_layer_ids=args.forget_layers)
 
 
 if __name__ == "__main__":
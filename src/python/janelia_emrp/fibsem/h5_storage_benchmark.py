@@ -0,0 +1,170 @@
+import argparse
+import logging
+import sys
+import tempfile
+import time
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final, Optional
+
+import h5py
+
+from janelia_emrp.fibsem.cyx_dat import CYXDat, new_cyx_dat
+from janelia_emrp.fibsem.dat_path import new_dat_path
+from janelia_emrp.fibsem.dat_to_h5_writer import DatToH5Writer, CHANNEL_DATA_SET_NAMES_KEY
+from janelia_emrp.fibsem.h5_chunk_reader import read_rows, get_default_read_threads
+from janelia_emrp.fibsem.volume_transfer_info import H5StorageProfile
+from janelia_emrp.root_logger import init_logger
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PROFILES: Final = [
+    H5StorageProfile(chunk_shape=(512, 512), compression="gzip"),
+    H5StorageProfile(chunk_shape=(512, 512), compression="gzip", compression_level=1),
+    H5StorageProfile(chunk_shape=(128, 65536), compression="gzip", compression_level=1),
+    H5StorageProfile(chunk_shape=(512, 512), compression="lzf"),
+    H5StorageProfile(chunk_shape=(512, 512), compression=None),
+]
+
+BYTES_PER_MB: Final = 1024 * 1024
+
+
+@dataclass
+class ProfileBenchmark:
+    # Timings for writing and reading one layer's raw data with a storage profile.
+    profile: H5StorageProfile
+    pixel_bytes: int
+    file_bytes: int
+    write_seconds: float
+    read_seconds: float
+    threaded_read_seconds: float
+
+    def __str__(self):
+        def mb_per_second(seconds: float) -> float:
+            return self.pixel_bytes / BYTES_PER_MB / seconds if seconds > 0 else float("inf")
+
+        return (f"{str(self.profile):>24}  write {mb_per_second(self.write_seconds):8.1f} MB/s  "
+                f"read {mb_per_second(self.read_seconds):8.1f} MB/s  "
+                f"threaded read {mb_per_second(self.threaded_read_seconds):8.1f} MB/s  "
+                f"size {100 * self.file_bytes / self.pixel_bytes:5.1f}%")
+
+
+def read_all_channels(h5_path: Path,
+                      max_workers: int) -> None:
+    with h5py.File(name=str(h5_path), mode="r") as h5_file:
+        for group_name in sorted(h5_file.keys()):
+            group = h5_file.get(group_name)
+            for channel_data_set_name in group.attrs[CHANNEL_DATA_SET_NAMES_KEY]:
+                read_rows(group.get(channel_data_set_name), max_workers=max_workers)
+
+
+def benchmark_profile(profile: H5StorageProfile,
+                      cyx_dat_list: list[CYXDat],
+                      work_dir: Path,
+                      read_threads: int) -> ProfileBenchmark:
+    """
+    Writes the layer's raw data with the specified profile and then reads it back
+    with h5py (one chunk at a time) and with threaded chunk decompression.
+    Reads immediately follow the write, so they may be served from the file system cache.
+    """
+    writer = DatToH5Writer(checksum_algorithm=None, **profile.to_writer_kwargs())
+    h5_path = work_dir / f"benchmark-{profile}.raw.h5"
+
+    start_time = time.time()
+    with writer.open_h5_file(output_path=str(h5_path), mode="w") as h5_file:
+        for cyx_dat in cyx_dat_list:
+            writer.create_and_add_raw_data_group(cyx_dat=cyx_dat, to_h5_file=h5_file)
+    write_seconds = time.time() - start_time
+
+    start_time = time.time()
+    read_all_channels(h5_path, max_workers=1)
+    read_seconds = time.time() - start_time
+
+    start_time = time.time()
+    read_all_channels(h5_path, max_workers=read_threads)
+    threaded_read_seconds = time.time() - start_time
+
+    file_bytes = h5_path.stat().st_size
+    h5_path.unlink()
+
+    return ProfileBenchmark(profile=profile,
+                            pixel_bytes=sum([cyx_dat.pixels.nbytes for cyx_dat in cyx_dat_list]),
+                            file_bytes=file_bytes,
+                            write_seconds=write_seconds,
+                            read_seconds=read_seconds,
+                            threaded_read_seconds=threaded_read_seconds)
+
+
+def benchmark_profiles(dat_paths: list[Path],
+                       profiles: list[H5StorageProfile],
+                       work_parent_dir: Optional[Path],
+                       read_threads: int) -> list[ProfileBenchmark]:
+
+    cyx_dat_list = [new_cyx_dat(new_dat_path(dat_path)) for dat_path in dat_paths]
+
+    logger.info(f"benchmark_profiles: loaded {len(cyx_dat_list)} dat files, "
+                f"benchmarking {len(profiles)} profiles with {read_threads} read threads")
+
+    # benchmarks should be run on the file system that will hold the raw HDF5 files
+    with tempfile.TemporaryDirectory(prefix="h5-benchmark-", dir=work_parent_dir) as work_dir:
+        return [benchmark_profile(profile, cyx_dat_list, Path(work_dir), read_threads) for profile in profiles]
+
+
+def main(arg_list: list[str]):
+    parser = argparse.ArgumentParser(
+        description="Report raw HDF5 write and read throughput for storage profiles using a sample layer."
+    )
+    parser.add_argument(
+        "--dat_path",
+        help="Path(s) of dat files for the sample layer",
+        required=True,
+        nargs='+'
+    )
+    parser.add_argument(
+        "--work_dir",
+        help="Parent directory for benchmark HDF5 files (should be on the raw HDF5 file system)",
+    )
+    parser.add_argument(
+        "--profile",
+        help="JSON storage profile to benchmark, can be repeated "
+             "(e.g. '{\"chunk_shape\": [512, 512], \"compression\": \"gzip\", \"compression_level\": 1}'), "
+             "omit to benchmark a default set of profiles",
+        action="append"
+    )
+    parser.add_argument(
+        "--read_threads",
+        help="Number of threads for threaded chunk decompression",
+        type=int,
+        default=get_default_read_threads()
+    )
+
+    args = parser.parse_args(arg_list)
+
+    profiles = DEFAULT_PROFILES if args.profile is None else \
+        [H5StorageProfile.model_validate_json(profile) for profile in args.profile]
+
+    benchmarks = benchmark_profiles(dat_paths=[Path(p) for p in args.dat_path],
+                                    profiles=profiles,
+                                    work_parent_dir=None if args.work_dir is None else Path(args.work_dir),
+                                    read_threads=args.read_threads)
+
+    logger.info("storage profile benchmark results:")
+    for benchmark in benchmarks:
+        logger.info(f"  {benchmark}")
+
+
+if __name__ == "__main__":
+    # NOTE: to fix module not found errors, export PYTHONPATH="/.../EM_recon_pipeline/src/python"
+
+    # setup logger since this module is the main program
+    init_logger(__file__)
+
+    # noinspection PyBroadException
+    try:
+        main(sys.argv[1:])
+    except Exception as e:
+        # ensure exit code is a non-zero value when Exception occurs
+        traceback.print_exc()
+        sys.exit(1)
@@ -1,20 +1,32 @@
 import argparse
+import hashlib
 import logging
+import os
 import traceback
 from pathlib import Path
+from typing import Final, Iterator, Optional
 
 import h5py
 import numpy as np
 import sys
-from h5py import Group
+from distributed import Client, LocalCluster, as_completed
+from h5py import Dataset, Group
 
 from janelia_emrp.fibsem.dat_to_h5_writer import DAT_FILE_NAME_KEY, RAW_HEADER_DATASET_NAME, RAW_FOOTER_DATASET_NAME, \
-    CHANNEL_DATA_SET_NAMES_KEY
+    CHANNEL_DATA_SET_NAMES_KEY, CHECKSUM_BLOCK_BYTES, DEFAULT_CHECKSUM_ALGORITHM
+from janelia_emrp.fibsem.h5_chunk_reader import read_rows
 from janelia_emrp.root_logger import init_logger
 
 logger = logging.getLogger(__name__)
 
 
+# size of the write buffer for restored dat files
+RESTORE_BUFFER_BYTES: Final = 16 * 1024 * 1024
+
+# suffix for dat files that are still being restored
+RESTORING_SUFFIX: Final = ".restoring"
+
+
 def validate_key_exists(h5_path: Path,
                         raw_data_group: Group,
                         key: str):
@@ -22,82 +34,370 @@ def validate_key_exists(h5_path: Path,
         raise ValueError(f"group {raw_data_group.name} in {str(h5_path)} is missing required attribute '{key}'")
 
 
-def restore_dat_bytes(h5_path: Path,
-                      raw_data_group: Group) -> bytes:
+def get_dat_pixel_data_type(raw_data_group: Group) -> np.dtype:
+    """
+    Returns
+    -------
+    np.dtype
+        The big endian data type of pixels in the dat file for the specified group.
+    """
+    eight_bit_key = "EightBit"
+    is_eight_bit = eight_bit_key in raw_data_group.attrs and raw_data_group.attrs[eight_bit_key] == 1
+    data_type = ">u1" if is_eight_bit else ">i2"  # from https://github.com/janelia-cosem/fibsem-tools/blob/f4bedbfc4ff81ec1b83282908ba6702baf98c734/src/fibsem_tools/io/fibsem.py#L619-L622
+    return np.dtype(data_type)
+
 
+def get_channel_data_sets(h5_path: Path,
+                          raw_data_group: Group) -> list[Dataset]:
     validate_key_exists(h5_path, raw_data_group, CHANNEL_DATA_SET_NAMES_KEY)
+    return [raw_data_group.get(name) for name in raw_data_group.attrs[CHANNEL_DATA_SET_NAMES_KEY]]
 
-    dat_bytes = bytearray(raw_data_group.get(RAW_HEADER_DATASET_NAME))
 
-    channel_data_set_names = raw_data_group.attrs[CHANNEL_DATA_SET_NAMES_KEY]
-    channels = []
-    for channel_data_set_name in channel_data_set_names:
-        channels.append(np.array(raw_data_group.get(channel_data_set_name)))
+def restore_pixel_blocks(h5_path: Path,
+                         raw_data_group: Group) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    Reads the specified group's channel data sets a block of rows at a time.
 
-    cyx_pixel_data_in_machine_order = np.stack(channels)
-    yxc_pixel_data_in_machine_order = np.moveaxis(cyx_pixel_data_in_machine_order, 0, -1)
+    Returns
+    -------
+    Iterator[tuple[int, np.ndarray]]
+        The index of each block's first row and its contiguous (y, x, c) pixels in dat file byte order.
+    """
+    channel_data_sets = get_channel_data_sets(h5_path, raw_data_group)
+    data_type = get_dat_pixel_data_type(raw_data_group)
 
-    # numpy stack and concatenate functions ignore dtype byte order and always use machine order,
-    # so need to fix byte order after concatenating channels
-    # see https://github.com/numpy/numpy/issues/20767
-    eight_bit_key = "EightBit"
-    is_eight_bit = eight_bit_key in raw_data_group.attrs and raw_data_group.attrs[eight_bit_key] == 1
-    data_type = ">u1" if is_eight_bit else ">i2"  # from https://github.com/janelia-cosem/fibsem-tools/blob/f4bedbfc4ff81ec1b83282908ba6702baf98c734/src/fibsem_tools/io/fibsem.py#L619-L622
-    yxc_pixel_data = yxc_pixel_data_in_machine_order.astype(data_type)
+    height, width = channel_data_sets[0].shape
+    row_bytes = width * len(channel_data_sets) * data_type.itemsize
+    rows_per_block = max(1, CHECKSUM_BLOCK_BYTES // row_bytes)
 
-    dat_bytes += bytearray(yxc_pixel_data)
-    dat_bytes += bytearray(raw_data_group.get(RAW_FOOTER_DATASET_NAME))
+    # read whole chunks to avoid decompressing the same chunk more than once
+    chunk_rows = channel_data_sets[0].chunks[0] if channel_data_sets[0].chunks else 1
+    rows_per_block = max(chunk_rows, (rows_per_block // chunk_rows) * chunk_rows)
 
-    return dat_bytes
+    for first_row in range(0, height, rows_per_block):
+        stop_row = min(first_row + rows_per_block, height)
+        yxc_block = np.empty((stop_row - first_row, width, len(channel_data_sets)), dtype=data_type)
+        for channel_index, channel_data_set in enumerate(channel_data_sets):
+            yxc_block[:, :, channel_index] = read_rows(channel_data_set, first_row, stop_row)
+        yield first_row, yxc_block
 
 
 def restore_dat_file(h5_path: Path,
                      raw_data_group: Group,
-                     to_path: Path) -> None:
+                     to_path: Path,
+                     skip_existing: bool = False) -> Optional[Path]:
+    """
+    Writes the dat file for the specified group into `to_path` a block of rows at a time.
+    Data is written to a temporary file that is renamed once it is complete,
+    so an existing dat file is always a completely restored file.
+
+    Returns
+    -------
+    Optional[Path]
+        Path of the restored dat file or None if the file already existed and was skipped.
+    """
     validate_key_exists(h5_path, raw_data_group, DAT_FILE_NAME_KEY)
     dat_file_path = Path(to_path, raw_data_group.attrs[DAT_FILE_NAME_KEY])
 
     if dat_file_path.exists():
+        if skip_existing:
+            logger.info(f"restore_dat_file: skipping existing {str(dat_file_path)}")
+            return None
         raise ValueError(f"{dat_file_path} for group {raw_data_group.name} in {str(h5_path)} already exists")
 
-    dat_bytes = restore_dat_bytes(h5_path, raw_data_group)
+    restoring_path = dat_file_path.with_name(dat_file_path.name + RESTORING_SUFFIX)
 
-    with open(dat_file_path, "wb") as dat_file:
-        dat_file.write(dat_bytes)
+    with open(restoring_path, "wb", buffering=RESTORE_BUFFER_BYTES) as dat_file:
+        dat_file.write(np.asarray(raw_data_group.get(RAW_HEADER_DATASET_NAME)).tobytes())
+        for _, yxc_block in restore_pixel_blocks(h5_path, raw_data_group):
+            dat_file.write(yxc_block.tobytes())
+        dat_file.write(np.asarray(raw_data_group.get(RAW_FOOTER_DATASET_NAME)).tobytes())
+
+    os.replace(restoring_path, dat_file_path)
 
     logger.info(f"restore_dat_file: saved {str(dat_file_path)}")
 
+    return dat_file_path
+
+
+def restore_h5_file(h5_path: Path,
+                    to_path: Path,
+                    skip_existing: bool = False) -> list[Path]:
+    """
+    Restores the dat files for every group in the specified HDF5 file.
+
+    Returns
+    -------
+    list[Path]
+        Paths of the restored dat files (excluding skipped existing files).
+    """
+    restored_paths = []
+    with h5py.File(name=str(h5_path), mode="r") as h5_file:
+        group_names = sorted(h5_file.keys())
+        logger.info(f"restore_h5_file: found {len(group_names)} group(s) in {h5_path}")
+        for group_name in group_names:
+            dat_file_path = restore_dat_file(h5_path, h5_file.get(group_name), to_path, skip_existing)
+            if dat_file_path is not None:
+                restored_paths.append(dat_file_path)
+    return restored_paths
+
+
+def read_completed_h5_paths(completed_file_path: Path) -> set[str]:
+    """
+    Returns
+    -------
+    set[str]
+        The HDF5 paths listed (one per line) in the specified restore record or an empty set if it does not exist.
+    """
+    completed_h5_paths = set()
+    if completed_file_path.exists():
+        with open(completed_file_path, "r") as completed_file:
+            completed_h5_paths = {line.strip() for line in completed_file if len(line.strip()) > 0}
+    return completed_h5_paths
+
 
 def restore_dat_files(h5_path_list: list[Path],
-                      to_path: Path) -> None:
-    for h5_path in h5_path_list:
-        with h5py.File(name=str(h5_path), mode="r") as h5_file:
-            group_names = sorted(h5_file.keys())
-            logger.info(f"restore_dat_files: found {len(group_names)} group(s) in {h5_path}")
-            for group_name in group_names:
-                group = h5_file.get(group_name)
-                restore_dat_file(h5_path, group, to_path)
+                      to_path: Path,
+                      num_workers: int = 1,
+                      dask_local_dir: Optional[str] = None,
+                      completed_file_path: Optional[Path] = None) -> None:
+    """
+    Restores the dat files for every group in the specified HDF5 files.
+
+    Parameters
+    ----------
+    h5_path_list : list[Path]
+        HDF5 files to restore.
+
+    to_path : Path
+        directory for restored dat files.
+
+    num_workers : int, default=1
+        number of worker processes to use (each worker restores whole HDF5 files).
+
+    dask_local_dir : Optional[str], default=None
+        parent directory for dask work area.
+
+    completed_file_path : Optional[Path], default=None
+        path of a record of restored HDF5 files or None to skip recording.
+        When specified, HDF5 files listed in the record are skipped, existing dat files from partially restored
+        HDF5 files are kept, and each HDF5 file is appended to the record once all of its dat files are restored.
+    """
+    skip_existing = completed_file_path is not None
+    if skip_existing:
+        completed_h5_paths = read_completed_h5_paths(completed_file_path)
+        h5_path_list = [h5_path for h5_path in h5_path_list if str(h5_path) not in completed_h5_paths]
+        logger.info(f"restore_dat_files: skipping {len(completed_h5_paths)} HDF5 files "
+                    f"listed in {completed_file_path}")
+
+    logger.info(f"restore_dat_files: restoring {len(h5_path_list)} HDF5 files with {num_workers} worker(s)")
+
+    def record_completed(h5_path: Path):
+        if completed_file_path is not None:
+            with open(completed_file_path, "a") as completed_file:
+                completed_file.write(f"{h5_path}\n")
+
+    if num_workers > 1 and len(h5_path_list) > 1:
+        with LocalCluster(n_workers=min(num_workers, len(h5_path_list)),
+                          threads_per_worker=1,
+                          local_directory=dask_local_dir) as dask_cluster, Client(dask_cluster) as dask_client:
+            logger.info(f'restore_dat_files: observe dask cluster information at {dask_cluster.dashboard_link}')
+            futures = dask_client.map(restore_h5_file,
+                                      h5_path_list,
+                                      to_path=to_path,
+                                      skip_existing=skip_existing,
+                                      pure=False)
+            future_to_h5_path = dict(zip(futures, h5_path_list))
+            failed_h5_paths = []
+            for future in as_completed(futures):
+                h5_path = future_to_h5_path[future]
+                if future.status == "error":
+                    logger.error(f"restore_dat_files: failed to restore {h5_path}, error was {future.exception()!r}")
+                    failed_h5_paths.append(h5_path)
+                else:
+                    record_completed(h5_path)
+
+            if len(failed_h5_paths) > 0:
+                raise ValueError(f"failed to restore {len(failed_h5_paths)} HDF5 files: "
+                                 f"{[str(h5_path) for h5_path in failed_h5_paths]}")
+    else:
+        for h5_path in h5_path_list:
+            restore_h5_file(h5_path, to_path, skip_existing)
+            record_completed(h5_path)
 
 
 def validate_bytes_match(original_context: str,
                          original_bytes: bytes,
                          restored_context: str,
-                         restored_bytes: bytes) -> None:
+                         restored_bytes: bytes,
+                         first_byte_offset: int = 0) -> None:
+    """
+    Raises a ValueError identifying the first differing byte if the specified bytes do not match.
+
+    Parameters
+    ----------
+    first_byte_offset : int, default=0
+        dat file offset of the first specified byte (used to report differences for part of a file).
+    """
     if len(original_bytes) != len(restored_bytes):
         raise ValueError(f"{original_context} has {len(original_bytes)} bytes but "
                          f"{restored_context} has {len(restored_bytes)} bytes")
 
-    for i in range(0, len(original_bytes)):
-        if original_bytes[i] != restored_bytes[i]:
-            debug_info = ""
-            if len(original_bytes) > (i + 4):
-                debug_info = f", expected {original_bytes[i:i+4]} but found {bytes(restored_bytes[i:i+4])}"
-
-            raise ValueError(f"byte {i} differs between {original_context} and {restored_context}{debug_info}")
+    original_array = np.frombuffer(original_bytes, dtype=np.uint8)
+    restored_array = np.frombuffer(restored_bytes, dtype=np.uint8)
+    differing_indexes = np.flatnonzero(original_array != restored_array)
+
+    if len(differing_indexes) > 0:
+        i = int(differing_indexes[0])
+        debug_info = ""
+        if len(original_bytes) > (i + 4):
+            debug_info = f", expected {bytes(original_bytes[i:i+4])} but found {bytes(restored_bytes[i:i+4])}"
+
+        raise ValueError(f"byte {first_byte_offset + i} differs between "
+                         f"{original_context} and {restored_context}{debug_info}")
+
+
+def validate_dat_file_matches_group(original_dat_file_path: Path,
+                                    h5_path: Path,
+                                    raw_data_group: Group,
+                                    checksum_algorithm: Optional[str] = None) -> Optional[str]:
+    """
+    Verifies that the specified dat file matches the dat bytes stored in `raw_data_group` without
+    rebuilding either file in memory.  The header and footer are compared directly and pixels are
+    compared a block of rows at a time against a memory-mapped view of the dat file.
+
+    Parameters
+    ----------
+    original_dat_file_path : Path
+        path of the original dat file.
+
+    h5_path : Path
+        path of the HDF5 file containing `raw_data_group` (for error messages).
+
+    raw_data_group : Group
+        HDF5 group containing the raw header, footer, and channel data sets for the dat.
+
+    checksum_algorithm : Optional[str], default=None
+        hashlib algorithm name for a checksum computed while comparing or None to skip the checksum.
+
+    Returns
+    -------
+    Optional[str]
+        The hex digest of the verified dat bytes or None if no checksum algorithm was specified.
+
+    Raises
+    ------
+    ValueError
+        If the dat file and HDF5 data differ.
+    """
+    original_context = str(original_dat_file_path)
+    restored_context = f"data set {raw_data_group.name} in {str(h5_path)}"
+
+    header_bytes = np.asarray(raw_data_group.get(RAW_HEADER_DATASET_NAME)).tobytes()
+    footer_bytes = np.asarray(raw_data_group.get(RAW_FOOTER_DATASET_NAME)).tobytes()
+
+    channel_data_sets = get_channel_data_sets(h5_path, raw_data_group)
+    data_type = get_dat_pixel_data_type(raw_data_group)
+    yxc_shape = channel_data_sets[0].shape + (len(channel_data_sets),)
+    pixel_byte_count = int(np.prod(yxc_shape)) * data_type.itemsize
+
+    original_size = os.path.getsize(original_dat_file_path)
+    restored_size = len(header_bytes) + pixel_byte_count + len(footer_bytes)
+    if original_size != restored_size:
+        raise ValueError(f"{original_context} has {original_size} bytes but "
+                         f"{restored_context} has {restored_size} bytes")
+
+    checksum = None if checksum_algorithm is None else hashlib.new(checksum_algorithm)
+
+    with open(original_dat_file_path, "rb") as original_file:
+        original_header_bytes = original_file.read(len(header_bytes))
+        original_file.seek(len(header_bytes) + pixel_byte_count)
+        original_footer_bytes = original_file.read()
+
+    validate_bytes_match(original_context=original_context,
+                         original_bytes=original_header_bytes,
+                         restored_context=restored_context,
+                         restored_bytes=header_bytes)
+    if checksum is not None:
+        checksum.update(header_bytes)
+
+    original_pixels = np.memmap(original_dat_file_path,
+                                dtype=data_type,
+                                mode="r",
+                                offset=len(header_bytes),
+                                shape=yxc_shape)
+
+    for first_row, restored_block in restore_pixel_blocks(h5_path, raw_data_group):
+        original_block = original_pixels[first_row:first_row + restored_block.shape[0]]
+        if not np.array_equal(original_block, restored_block):
+            # only locate the differing byte when there is a mismatch
+            validate_bytes_match(original_context=original_context,
+                                 original_bytes=original_block.tobytes(),
+                                 restored_context=restored_context,
+                                 restored_bytes=restored_block.tobytes(),
+                                 first_byte_offset=len(header_bytes) + original_block[0].nbytes * first_row)
+        if checksum is not None:
+            checksum.update(restored_block)
+
+    del original_pixels
+
+    validate_bytes_match(original_context=original_context,
+                         original_bytes=original_footer_bytes,
+                         restored_context=restored_context,
+                         restored_bytes=footer_bytes,
+                         first_byte_offset=len(header_bytes) + pixel_byte_count)
+    if checksum is not None:
+        checksum.update(footer_bytes)
+
+    return None if checksum is None else checksum.hexdigest()
+
+
+def compute_restored_dat_checksum(h5_path: Path,
+                                  raw_data_group: Group,
+                                  checksum_algorithm: str = DEFAULT_CHECKSUM_ALGORITHM) -> str:
+    """
+    Computes the checksum of the dat file stored in `raw_data_group` without restoring the dat file
+    (so that HDF5 data can be checked against a previously recorded dat checksum after the dat is gone).
+
+    Returns
+    -------
+    str
+        The hex digest of the restored dat bytes.
+    """
+    checksum = hashlib.new(checksum_algorithm)
+    checksum.update(np.asarray(raw_data_group.get(RAW_HEADER_DATASET_NAME)).tobytes())
+    for _, restored_block in restore_pixel_blocks(h5_path, raw_data_group):
+        checksum.update(restored_block)
+    checksum.update(np.asarray(raw_data_group.get(RAW_FOOTER_DATASET_NAME)).tobytes())
+    return checksum.hexdigest()
 
 
 def validate_original_dat_bytes_match(h5_path: Path,
-                                      dat_parent_path: Path) -> list[Path]:
+                                      dat_parent_path: Path,
+                                      checksums: Optional[dict[str, str]] = None,
+                                      checksum_algorithm: str = DEFAULT_CHECKSUM_ALGORITHM) -> list[Path]:
+    """
+    Verifies that each dat file stored in the specified HDF5 file matches the original dat file in `dat_parent_path`.
+
+    Parameters
+    ----------
+    h5_path : Path
+        path of the HDF5 file to verify.
+
+    dat_parent_path : Path
+        parent directory of the original dat files.
+
+    checksums : Optional[dict[str, str]], default=None
+        if specified, the checksum of each verified dat is added to this dictionary keyed by dat file name.
+
+    checksum_algorithm : str, default="sha256"
+        hashlib algorithm name used for `checksums`.
+
+    Returns
+    -------
+    list[Path]
+        Paths of the verified original dat files.
+    """
     matched_dat_file_paths = []
 
     with h5py.File(name=str(h5_path), mode="r") as h5_file:
@@ -112,18 +412,81 @@ def validate_original_dat_bytes_match(h5_path: Path,
             if not original_dat_file_path.exists():
                 raise ValueError(f"{original_dat_file_path} not found for {restored_context}")
 
-            with open(original_dat_file_path, "rb") as original_file:
-                original_bytes = original_file.read()
-            restored_bytes = restore_dat_bytes(h5_path, data_set)
-            validate_bytes_match(original_context=str(original_dat_file_path),
-                                 original_bytes=original_bytes,
-                                 restored_context=restored_context,
-                                 restored_bytes=restored_bytes)
+            checksum = validate_dat_file_matches_group(
+                original_dat_file_path=original_dat_file_path,
+                h5_path=h5_path,
+                raw_data_group=data_set,
+                checksum_algorithm=None if checksums is None else checksum_algorithm)
+            if checksums is not None:
+                checksums[original_dat_file_path.name] = checksum
+
             matched_dat_file_paths.append(original_dat_file_path)
 
     return matched_dat_file_paths
 
 
+def read_checksum_file(checksum_file_path: Path) -> dict[str, str]:
+    """
+    Returns
+    -------
+    dict[str, str]
+        Checksums keyed by dat file name from a file in sha256sum (checksum, two spaces, file name) format.
+    """
+    checksums = {}
+    with open(checksum_file_path, "r") as checksum_file:
+        for line in checksum_file:
+            if len(line.strip()) > 0:
+                checksum, dat_file_name = line.rstrip("\n").split("  ", 1)
+                checksums[dat_file_name] = checksum
+    return checksums
+
+
+def write_checksum_file(checksums: dict[str, str],
+                        checksum_file_path: Path) -> None:
+    with open(checksum_file_path, "w") as checksum_file:
+        for dat_file_name in sorted(checksums.keys()):
+            checksum_file.write(f"{checksums[dat_file_name]}  {dat_file_name}\n")
+    logger.info(f"write_checksum_file: saved {len(checksums)} checksums to {checksum_file_path}")
+
+
+def validate_restored_dat_checksums(h5_path: Path,
+                                    checksums: dict[str, str],
+                                    checksum_algorithm: str = DEFAULT_CHECKSUM_ALGORITHM) -> list[str]:
+    """
+    Verifies the dat files stored in the specified HDF5 file against previously recorded checksums.
+
+    Returns
+    -------
+    list[str]
+        Names of the verified dat files.
+
+    Raises
+    ------
+    ValueError
+        If a dat file has no recorded checksum or its checksum differs.
+    """
+    matched_dat_file_names = []
+
+    with h5py.File(name=str(h5_path), mode="r") as h5_file:
+        for data_set_name in sorted(h5_file.keys()):
+            data_set = h5_file.get(data_set_name)
+            validate_key_exists(h5_path, data_set, DAT_FILE_NAME_KEY)
+            dat_file_name = data_set.attrs[DAT_FILE_NAME_KEY]
+            restored_context = f"data set {data_set.name} in {str(h5_path)}"
+
+            if dat_file_name not in checksums:
+                raise ValueError(f"no checksum recorded for {dat_file_name} in {restored_context}")
+
+            checksum = compute_restored_dat_checksum(h5_path, data_set, checksum_algorithm)
+            if checksum != checksums[dat_file_name]:
+                raise ValueError(f"{checksum_algorithm} checksum {checksum} for {restored_context} differs from "
+                                 f"recorded checksum {checksums[dat_file_name]} for {dat_file_name}")
+
+            matched_dat_file_names.append(dat_file_name)
+
+    return matched_dat_file_names
+
+
 def main(arg_list: list[str]):
     parser = argparse.ArgumentParser(
         description="Validate that byte contents of HDF5 and dat files match or restore dat files to disk."
@@ -136,31 +499,82 @@ def main(arg_list: list[str]):
     )
     parser.add_argument(
         "--dat_parent_path",
-        help="Path of parent directory for dat files",
-        required=True,
+        help="Path of parent directory for dat files (required unless --verify_checksum_file is specified)",
     )
     parser.add_argument(
         "--restore_dat_files",
         help="Indicates that restored dat files should be saved within the dat_parent_path",
         action="store_true",
     )
+    parser.add_argument(
+        "--restored_h5_record",
+        help="Path of file that records restored HDF5 files so that an interrupted restore can be resumed",
+    )
+    parser.add_argument(
+        "--num_workers",
+        help="Number of worker processes to use for restoring dat files",
+        type=int,
+        default=1
+    )
+    parser.add_argument(
+        "--dask_local_dir",
+        help="Parent directory for dask work area",
+    )
+    parser.add_argument(
+        "--write_checksum_file",
+        help="Save checksums of validated dat files to this path (in sha256sum format)",
+    )
+    parser.add_argument(
+        "--verify_checksum_file",
+        help="Validate HDF5 contents against checksums previously saved to this path (dat files are not needed)",
+    )
+    parser.add_argument(
+        "--checksum_algorithm",
+        help="hashlib algorithm for checksums",
+        default=DEFAULT_CHECKSUM_ALGORITHM
+    )
 
     args = parser.parse_args(arg_list)
 
     h5_path_list = [Path(p) for p in args.h5_path]
+
+    if args.verify_checksum_file is not None:
+        checksums = read_checksum_file(Path(args.verify_checksum_file))
+        matched_dat_file_names = []
+        for h5_path in h5_path_list:
+            matched_dat_file_names.extend(validate_restored_dat_checksums(h5_path, checksums, args.checksum_algorithm))
+
+        logger.info("The following dat checksums were validated:")
+        for dat_file_name in matched_dat_file_names:
+            logger.info(f"  {dat_file_name}")
+        return
+
+    if args.dat_parent_path is None:
+        raise ValueError("--dat_parent_path must be specified")
     dat_parent_path = Path(args.dat_parent_path)
 
     if args.restore_dat_files:
-        restore_dat_files(h5_path_list, dat_parent_path)
+        restore_dat_files(h5_path_list=h5_path_list,
+                          to_path=dat_parent_path,
+                          num_workers=args.num_workers,
+                          dask_local_dir=args.dask_local_dir,
+                          completed_file_path=None if args.restored_h5_record is None else Path(args.restored_h5_record))
     else:
+        checksums = None if args.write_checksum_file is None else {}
         matched_original_path_list = []
         for h5_path in h5_path_list:
-            matched_original_path_list.extend(validate_original_dat_bytes_match(h5_path, dat_parent_path))
+            matched_original_path_list.extend(validate_original_dat_bytes_match(h5_path=h5_path,
+                                                                                dat_parent_path=dat_parent_path,
+                                                                                checksums=checksums,
+                                                                                checksum_algorithm=args.checksum_algorithm))
 
         logger.info("The following dat paths were validated:")
         for matched_original_path in matched_original_path_list:
             logger.info(f"  {matched_original_path}")
 
+        if checksums is not None:
+            write_checksum_file(checksums, Path(args.write_checksum_file))
+
 
 if __name__ == "__main__":
     # NOTE: to fix module not found errors, export PYTHONPATH="/.../EM_recon_pipeline/src/python"
@@ -1,20 +1,26 @@
 import argparse
 import logging
-import math
+import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 from typing import List, Optional, Dict, Any, Tuple, Final
 
-import dask.bag as db
 import h5py
+import numpy as np
 import renderapi
+from distributed import Client, as_completed
+from pydantic import BaseModel
+
 from janelia_emrp.cluster import get_cluster
 
 from janelia_emrp.fibsem.dat_path import DatPath, new_dat_path
 from janelia_emrp.fibsem.dat_to_h5_writer import DAT_FILE_NAME_KEY
 from janelia_emrp.fibsem.mask_builder import MaskBuilder
 from janelia_emrp.fibsem.render_api import RenderApi
+from janelia_emrp.fibsem.tile_header_cache import TileHeaderCache, get_mtimes
 from janelia_emrp.fibsem.volume_transfer_info import VolumeTransferInfo, RenderDataSet, ScopeDataSet, \
     VolumeTransferTask
 from janelia_emrp.root_logger import init_logger, console_handler
@@ -28,6 +34,13 @@ COMMON_TILE_HEADER_KEYS: Final = [
 UNIQUE_TILE_HEADER_KEYS: Final = ["WD", "Restart", "StageMove", "FirstX", "FirstY"]
 RETAINED_TILE_HEADER_KEYS: Final = COMMON_TILE_HEADER_KEYS + UNIQUE_TILE_HEADER_KEYS
 CHECKED_TILE_HEADER_KEYS: Final = COMMON_TILE_HEADER_KEYS + ["SampleID"]
+HARVESTED_TILE_HEADER_KEYS: Final = [DAT_FILE_NAME_KEY, "SampleID"] + RETAINED_TILE_HEADER_KEYS
+
+# number of HDF5 files read by each header harvesting task
+HARVEST_BATCH_SIZE: Final = 50
+
+# number of threads used to read headers when there is no dask cluster (reads mostly wait on network storage)
+LOCAL_HARVEST_THREADS: Final = 8
 
 FIBSEM_CORRECTION_TRANSFORM_ID: Final = "FIBSEM_correct"
 FIBSEM_CORRECTION_TRANSFORM: Final = {
@@ -37,8 +50,63 @@ FIBSEM_CORRECTION_TRANSFORM: Final = {
 }
 
 
+def to_json_value(value: Any) -> Any:
+    """
+    Returns
+    -------
+    Any
+        The specified HDF5 attribute value converted to a plain python (JSON serializable) value.
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    elif isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, bytes):
+        value = value.decode("utf-8")
+    return value
+
+
+def read_tile_headers(h5_path: Path) -> List[Dict[str, Any]]:
+    """
+    Reads only the header values needed to build tile specs from each group in an align HDF5 file.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        The dat file name and harvested header values for each tile (group) in sorted group order.
+    """
+    tile_headers = []
+    with h5py.File(name=str(h5_path), mode="r") as h5_file:
+
+        sorted_group_names = sorted(h5_file.keys())
+        if len(sorted_group_names) < 1:
+            raise RuntimeError(f"possible corrupt file {h5_path}, no group names found")
+
+        for group_name in sorted_group_names:
+            attrs = h5_file.get(group_name).attrs
+            if DAT_FILE_NAME_KEY in attrs:
+                tile_header = {}
+                for key in HARVESTED_TILE_HEADER_KEYS:
+                    if key in attrs:
+                        tile_header[key] = to_json_value(attrs[key])
+                if "SampleID" not in tile_header and "Notes" in attrs:
+                    tile_header["Notes"] = to_json_value(attrs["Notes"])
+                tile_headers.append(tile_header)
+            else:
+                logger.warning(f"skipping group {group_name} in {h5_path} "
+                               f"because it does not have '{DAT_FILE_NAME_KEY}' attribute")
+
+    if len(tile_headers) == 0:
+        raise RuntimeError(f"possible corrupt file {h5_path}, "
+                           f"no dat file names found in groups {sorted_group_names}")
+
+    return tile_headers
+
+
 class LayerInfo:
-    def __init__(self, h5_path: Path) -> None:
+    def __init__(self,
+                 h5_path: Path,
+                 tile_headers: Optional[List[Dict[str, Any]]] = None) -> None:
         self.h5_path = h5_path
         self.dat_paths: List[DatPath] = []
         self.retained_headers: List[Dict[str, Any]] = []
@@ -46,26 +114,13 @@ class LayerInfo:
         self.restart_condition_label: Optional[str] = None
 
         try:
-            with h5py.File(name=str(h5_path), mode="r") as h5_file:
-
-                sorted_group_names = sorted(h5_file.keys())
-                if len(sorted_group_names) < 1:
-                    raise RuntimeError(f"possible corrupt file {h5_path}, no group names found")
-
-                for group_name in sorted(sorted_group_names):
-                    group = h5_file.get(group_name)
-                    if DAT_FILE_NAME_KEY in group.attrs:
-                        self.append_tile(group.attrs)
-                    else:
-                        logger.warning(f"skipping group {group_name} in {h5_path} "
-                                       f"because it does not have '{DAT_FILE_NAME_KEY}' attribute")
+            if tile_headers is None:
+                tile_headers = read_tile_headers(h5_path)
+            for tile_header in tile_headers:
+                self.append_tile(tile_header)
         except Exception as e:
             raise Exception(f"failed to pull tile metadata from {h5_path}") from e
 
-        if len(self.dat_paths) == 0:
-            raise RuntimeError(f"possible corrupt file {h5_path}, "
-                               f"no dat file names found in groups {sorted_group_names}")
-
     def append_tile(self,
                     full_header: Dict[str, Any]) -> None:
 
@@ -93,6 +148,16 @@ class LayerInfo:
     def tile_count(self):
         return len(self.dat_paths)
 
+    def tile_headers(self) -> List[Dict[str, Any]]:
+        """
+        Returns
+        -------
+        List[Dict[str, Any]]
+            Headers that can be used to rebuild this layer without reading its HDF5 file.
+        """
+        return [{DAT_FILE_NAME_KEY: str(dat_path.file_path), **retained_header}
+                for dat_path, retained_header in zip(self.dat_paths, self.retained_headers)]
+
     def tile_index_for_column(self, column: int):
         tile_index = None
         for i in range(0, len(self.dat_paths)):
@@ -114,13 +179,182 @@ def build_layers(split_h5_paths: List[Path]) -> List[LayerInfo]:
     return [LayerInfo(h5_path) for h5_path in split_h5_paths]
 
 
-def split_list_for_workers(full_list, num_workers):
-    items_per_worker = math.ceil(len(full_list) / num_workers)
-    return [full_list[i:i + items_per_worker] for i in range(0, len(full_list), items_per_worker)]
+def read_tile_headers_for_batch(h5_paths: List[Path]) -> List[Tuple[Path, Optional[List[Dict[str, Any]]], Optional[str]]]:
+    """
+    Returns
+    -------
+    List[Tuple[Path, Optional[List[Dict[str, Any]]], Optional[str]]]
+        The path, tile headers (or None if reading failed), and error description (or None) for each HDF5 file.
+    """
+    results = []
+    for h5_path in h5_paths:
+        try:
+            results.append((h5_path, read_tile_headers(h5_path), None))
+        except Exception as e:
+            results.append((h5_path, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def harvest_tile_headers(h5_paths: List[Path],
+                         dask_client: Optional[Client],
+                         tile_header_cache_path: Optional[Path]) -> Dict[Path, List[Dict[str, Any]]]:
+    """
+    Reads tile headers from the specified align HDF5 files in batches, using the dask cluster if one is specified.
+    Each task reads one file at a time, so the number of open files is bounded by the cluster's thread count.
+    Without a cluster, files are read one at a time on LOCAL_HARVEST_THREADS threads.
+
+    When a cache path is specified, files whose modification times match the cache are not read,
+    and headers are added to the cache as each batch completes so that a failed import can be
+    rerun without reading the same files again.
+
+    Returns
+    -------
+    Dict[Path, List[Dict[str, Any]]]
+        Tile headers keyed by HDF5 path.
+
+    Raises
+    ------
+    RuntimeError
+        If headers could not be read from any of the files.
+    """
+    path_to_headers: Dict[Path, List[Dict[str, Any]]] = {}
+    path_to_mtime: Dict[Path, Optional[float]] = {}
+
+    if tile_header_cache_path is not None:
+        mtimes = get_mtimes(h5_paths)
+        path_to_mtime = dict(zip(h5_paths, mtimes))
+        with TileHeaderCache(tile_header_cache_path) as tile_header_cache:
+            path_to_headers = tile_header_cache.get_headers(h5_paths, mtimes)
+
+    uncached_h5_paths = [h5_path for h5_path in h5_paths if h5_path not in path_to_headers]
+    batches = [uncached_h5_paths[i:i + HARVEST_BATCH_SIZE]
+               for i in range(0, len(uncached_h5_paths), HARVEST_BATCH_SIZE)]
+
+    logger.info(f"harvest_tile_headers: found cached headers for {len(path_to_headers)} of {len(h5_paths)} files, "
+                f"reading {len(uncached_h5_paths)} files in {len(batches)} batches")
+
+    failed_paths_and_errors = []
+
+    def save_batch_results(batch_results: List[Tuple[Path, Optional[List[Dict[str, Any]]], Optional[str]]]):
+        for h5_path, tile_headers, error in batch_results:
+            if tile_headers is None:
+                failed_paths_and_errors.append((h5_path, error))
+            else:
+                path_to_headers[h5_path] = tile_headers
+                mtime = path_to_mtime.get(h5_path)
+                if tile_header_cache is not None and mtime is not None:
+                    tile_header_cache.put_headers(h5_path, mtime, tile_headers)
+
+    with TileHeaderCache(tile_header_cache_path) if tile_header_cache_path is not None else nullcontext() \
+            as tile_header_cache:
+        if dask_client is None or len(batches) < 2:
+            # results are saved by this thread so that only it uses the cache connection
+            with ThreadPoolExecutor(max_workers=LOCAL_HARVEST_THREADS,
+                                    thread_name_prefix="harvest") as executor:
+                for batch_results in executor.map(read_tile_headers_for_batch,
+                                                  [[h5_path] for h5_path in uncached_h5_paths]):
+                    save_batch_results(batch_results)
+        else:
+            futures = dask_client.map(read_tile_headers_for_batch, batches, pure=False)
+            for future in as_completed(futures):
+                save_batch_results(future.result())
+                future.release()
+
+    if len(failed_paths_and_errors) > 0:
+        for h5_path, error in failed_paths_and_errors:
+            logger.error(f"harvest_tile_headers: failed to read {h5_path}, error was {error}")
+        raise RuntimeError(f"failed to pull tile metadata from {len(failed_paths_and_errors)} files, "
+                           f"first failure was {failed_paths_and_errors[0][0]}")
+
+    return path_to_headers
+
+
+class ImportedLayer(BaseModel):
+    """Restart context for a layer that has been imported into render.
+    #
+    # Attributes:
+    #     h5_path:                 path of the layer's align HDF5 file
+    #     z:                       z value of the layer in the stack
+    #     tile_headers:            headers needed to rebuild the layer's LayerInfo
+    #     group_id:                groupId assigned to the layer's tiles (if any)
+    #     restart_condition_label: restart condition label assigned to the layer's tiles (if any)
+    """
+    h5_path: Path
+    z: int
+    tile_headers: List[Dict[str, Any]]
+    group_id: Optional[str] = None
+    restart_condition_label: Optional[str] = None
+
+    def to_layer_info(self) -> LayerInfo:
+        layer_info = LayerInfo(self.h5_path, self.tile_headers)
+        layer_info.group_id = self.group_id
+        layer_info.restart_condition_label = self.restart_condition_label
+        return layer_info
+
+
+class RenderImportState(BaseModel):
+    """State saved after each incremental import so that the next import only needs to process new layers.
+    #
+    # Attributes:
+    #     stack:           name of the stack the layers were imported into
+    #     recent_layers:   the most recently imported layers (enough to provide restart context for new layers)
+    """
+    stack: str
+    recent_layers: List[ImportedLayer]
 
+    def last_layer(self) -> ImportedLayer:
+        return self.recent_layers[-1]
 
-def flatten_list_of_lists(list_of_lists):
-    return [item for sublist in list_of_lists for item in sublist]
+
+def load_import_state(import_state_path: Path,
+                      stack: str) -> Optional[RenderImportState]:
+    """
+    Returns
+    -------
+    Optional[RenderImportState]
+        The saved import state or None if no layers have been imported yet.
+
+    Raises
+    ------
+    ValueError
+        If the saved state is for a different stack.
+    """
+    if not import_state_path.exists():
+        return None
+
+    import_state = RenderImportState.model_validate_json(import_state_path.read_text())
+    if import_state.stack != stack:
+        raise ValueError(f"import state {import_state_path} is for stack {import_state.stack} instead of {stack}")
+
+    return import_state
+
+
+def save_import_state(import_state_path: Path,
+                      stack: str,
+                      all_layers: List[LayerInfo],
+                      first_z: int,
+                      restart_context_layer_count: int) -> None:
+    """
+    Saves state for the last `restart_context_layer_count + 2` layers so that restarts
+    found in the next import can pull these layers (each with its prior layer) into the restart stack.
+    """
+    recent_layer_count = min(len(all_layers), restart_context_layer_count + 2)
+    recent_layers = [
+        ImportedLayer(h5_path=layer_info.h5_path,
+                      z=first_z + i,
+                      tile_headers=layer_info.tile_headers(),
+                      group_id=layer_info.group_id,
+                      restart_condition_label=layer_info.restart_condition_label)
+        for i, layer_info in enumerate(all_layers) if i >= len(all_layers) - recent_layer_count
+    ]
+    import_state = RenderImportState(stack=stack, recent_layers=recent_layers)
+
+    import_state_path.parent.mkdir(parents=True, exist_ok=True)
+    saving_path = import_state_path.with_name(f"{import_state_path.name}.saving")
+    saving_path.write_text(import_state.model_dump_json(indent=2))
+    os.replace(saving_path, import_state_path)
+
+    logger.info(f"save_import_state: saved state for layers through z {recent_layers[-1].z} to {import_state_path}")
 
 
 def build_all_layers(align_storage_root: Path,
@@ -130,7 +364,9 @@ def build_all_layers(align_storage_root: Path,
                      bill_project: Optional[str],
                      last_dat_name: Optional[str],
                      min_index: Optional[int],
-                     max_index: Optional[int]) -> List[LayerInfo]:
+                     max_index: Optional[int],
+                     tile_header_cache_path: Optional[Path] = None,
+                     last_imported_h5_path: Optional[Path] = None) -> List[LayerInfo]:
 
     if not align_storage_root.is_dir():
         raise ValueError(f"missing align storage root directory {align_storage_root}")
@@ -171,29 +407,37 @@ def build_all_layers(align_storage_root: Path,
         logger.info(f"build_all_layers: processing {len(layer_h5_paths)} .h5 files "
                     f"in filtered range [{min_index}, {slice_max}]")
 
-    if num_workers > 1:
-        dask_cluster = get_cluster(threads_per_worker=threads_per_worker,
-                                   local_kwargs={
-                                       "local_directory": dask_worker_space
-                                   },
-                                   lsf_kwargs={
-                                       "local_directory": dask_worker_space,
-                                       "project": bill_project
-                                   })
-
-        logger.info(f"build_all_layers: observe dask cluster information at {dask_cluster.dashboard_link}")
-
-        dask_cluster.scale(num_workers)
-        logger.info(f"build_all_layers: scaled dask cluster to {num_workers} workers")
-
-        split_h5_paths = split_list_for_workers(layer_h5_paths, num_workers)
-        bag = db.from_sequence(split_h5_paths, npartitions=num_workers).map(build_layers)
-        all_layers = flatten_list_of_lists(bag.compute())
+    if last_imported_h5_path is not None:
+        layer_h5_paths = [h5_path for h5_path in layer_h5_paths if h5_path > last_imported_h5_path]
+        logger.info(f"build_all_layers: processing {len(layer_h5_paths)} .h5 files "
+                    f"after last imported file {last_imported_h5_path}")
+        if len(layer_h5_paths) == 0:
+            return []
 
+    if num_workers > 1:
+        with get_cluster(threads_per_worker=threads_per_worker,
+                         local_kwargs={
+                             "local_directory": dask_worker_space
+                         },
+                         lsf_kwargs={
+                             "local_directory": dask_worker_space,
+                             "project": bill_project
+                         }) as dask_cluster, Client(dask_cluster) as dask_client:
+
+            logger.info(f"build_all_layers: observe dask cluster information at {dask_cluster.dashboard_link}")
+
+            dask_cluster.scale(num_workers)
+            logger.info(f"build_all_layers: scaled dask cluster to {num_workers} workers")
+
+            path_to_headers = harvest_tile_headers(h5_paths=layer_h5_paths,
+                                                   dask_client=dask_client,
+                                                   tile_header_cache_path=tile_header_cache_path)
     else:
-        all_layers = build_layers(layer_h5_paths)
+        path_to_headers = harvest_tile_headers(h5_paths=layer_h5_paths,
+                                               dask_client=None,
+                                               tile_header_cache_path=tile_header_cache_path)
 
-    return all_layers
+    return [LayerInfo(h5_path, path_to_headers[h5_path]) for h5_path in layer_h5_paths]
 
 
 def set_layer_restart_condition(layer_info: LayerInfo,
@@ -373,12 +617,52 @@ def build_all_tile_specs(all_layers: List[LayerInfo],
                          restart_context_layer_count: int,
                          mask_builder: Optional[MaskBuilder],
                          tile_overlap_in_microns: int,
-                         pre_stage_transform_ids: list[str]) -> Tuple[list[Any], list[Any]]:
+                         pre_stage_transform_ids: list[str],
+                         first_z: int = 1,
+                         imported_layer_count: int = 0) -> Tuple[list[Any], list[Any]]:
+    """
+    Builds tile specs for all layers (and for the restart stack) with sequential z values.
+
+    For incremental imports, the first `imported_layer_count` layers are the most recently imported layers
+    (with restart state from the prior import) and are only included to provide context for the new layers.
+    Tile specs for imported layers (other than the first, which has no prior layer) are only returned
+    if they are within the context of a new restart or if their groupId changed because the first new layer
+    is a restart.
+
+    Parameters
+    ----------
+    all_layers : List[LayerInfo]
+        sorted layers, starting with any imported context layers.
+
+    restart_context_layer_count : int
+        number of layers to include in the restart stack before and after each restart.
+
+    mask_builder : Optional[MaskBuilder]
+        builder for dynamic mask URIs or None to skip masking.
+
+    tile_overlap_in_microns : int
+        tile overlap used to derive stage positions for older scopes.
+
+    pre_stage_transform_ids : list[str]
+        ids of transforms to apply before the stage transform.
+
+    first_z : int, default=1
+        z value for the first layer.
+
+    imported_layer_count : int, default=0
+        number of layers at the start of `all_layers` that have already been imported.
+
+    Returns
+    -------
+    Tuple[list[Any], list[Any]]
+        Tile specs for the stack and tile specs for the restart stack.
+    """
     layer_count = len(all_layers)
 
-    logger.info(f"build_all_tile_specs: entry, processing {layer_count} layers")
+    logger.info(f"build_all_tile_specs: entry, processing {layer_count} layers "
+                f"({imported_layer_count} previously imported) starting with z {first_z}")
 
-    if layer_count == 0:
+    if layer_count <= imported_layer_count:
         raise ValueError("no layers specified")
 
     pre_stage_transform_spec_list = []
@@ -388,21 +672,16 @@ def build_all_tile_specs(all_layers: List[LayerInfo],
     all_tile_specs = []
     all_restart_tile_specs = []
 
-    all_tile_specs.extend(
-        build_tile_specs_for_layer(layer_info=all_layers[0],
-                                   z=1,
-                                   prior_layer_info=None,
-                                   mask_builder=mask_builder,
-                                   tile_overlap_in_microns=tile_overlap_in_microns,
-                                   pre_stage_transform_spec_list=pre_stage_transform_spec_list))
-
     # flag restart if more than 15 minutes elapses between layer acquisitions
     restart_seconds_threshold = 15 * 60
-    restart_z_values = []
+    restart_z_values = [first_z + i for i in range(0, imported_layer_count)
+                        if all_layers[i].group_id is not None]
+    regrouped_layer_indexes = set()
 
-    prior_layer_info = all_layers[0]
-    for z in range(2, layer_count + 1):
-        layer_info = all_layers[z-1]
+    for i in range(max(1, imported_layer_count), layer_count):
+        layer_info = all_layers[i]
+        prior_layer_info = all_layers[i-1]
+        z = first_z + i
 
         set_layer_restart_condition(layer_info,
                                     prior_layer_info,
@@ -412,35 +691,46 @@ def build_all_tile_specs(all_layers: List[LayerInfo],
 
             # set groupId for layer prior to restart, but exclude labels
             if prior_layer_info.restart_condition_label is None:
+                if prior_layer_info.group_id is None and i - 1 < imported_layer_count:
+                    regrouped_layer_indexes.add(i - 1)
                 prior_layer_info.group_id = "restart"
                 restart_z_values.append(z-1)
 
             restart_z_values.append(z)
 
-        prior_layer_info = layer_info
-
     logger.info(f"build_all_tile_specs: restart layer z values are {restart_z_values}")
 
     # build tile specs
-    prior_layer_info = all_layers[0]
-    for z in range(2, layer_count + 1):
-        layer_info = all_layers[z-1]
-
-        layer_tile_specs = build_tile_specs_for_layer(layer_info=layer_info,
-                                                      z=z,
-                                                      prior_layer_info=prior_layer_info,
-                                                      mask_builder=mask_builder,
-                                                      tile_overlap_in_microns=tile_overlap_in_microns,
-                                                      pre_stage_transform_spec_list=pre_stage_transform_spec_list)
-
-        all_tile_specs.extend(layer_tile_specs)
-
-        for restart_z in restart_z_values:
-            context_min_z = restart_z - restart_context_layer_count
-            context_max_z = restart_z + restart_context_layer_count
-            if context_min_z <= z <= context_max_z:
+    prior_layer_info = None
+    for i in range(0, layer_count):
+        layer_info = all_layers[i]
+        z = first_z + i
+
+        in_restart_context = False
+        if z > 1:
+            for restart_z in restart_z_values:
+                context_min_z = restart_z - restart_context_layer_count
+                context_max_z = restart_z + restart_context_layer_count
+                if context_min_z <= z <= context_max_z:
+                    in_restart_context = True
+                    break
+
+        is_new_or_regrouped = i >= imported_layer_count or i in regrouped_layer_indexes
+
+        # the first imported layer only provides the prior layer (working distance) for the second
+        if i == 0 and imported_layer_count > 0:
+            pass
+        elif is_new_or_regrouped or in_restart_context:
+            layer_tile_specs = build_tile_specs_for_layer(layer_info=layer_info,
+                                                          z=z,
+                                                          prior_layer_info=prior_layer_info,
+                                                          mask_builder=mask_builder,
+                                                          tile_overlap_in_microns=tile_overlap_in_microns,
+                                                          pre_stage_transform_spec_list=pre_stage_transform_spec_list)
+            if is_new_or_regrouped:
+                all_tile_specs.extend(layer_tile_specs)
+            if in_restart_context:
                 all_restart_tile_specs.extend(layer_tile_specs)
-                break
 
         prior_layer_info = layer_info
 
@@ -488,22 +778,27 @@ def save_stack(stack_name: str,
                render_data_set: RenderDataSet,
                max_mipmap_level: Optional[int],
                tile_specs: list[Dict],
-               transform_specs: list[Dict]):
+               transform_specs: list[Dict],
+               append: bool = False):
 
     render_connect_params = render_data_set.get_render_connect_params()
 
     render = renderapi.connect(**render_connect_params)
 
-    # explicitly set createTimestamp until render-python bug is fixed
-    # see https://github.com/AllenInstitute/render-python/pull/158
-    create_timestamp = time.strftime('%Y-%m-%dT%H:%M:%S.00Z')
+    if append and stack_name in renderapi.render.get_stacks_by_owner_project(render=render):
+        logger.info(f"save_stack: appending {len(tile_specs)} tile specs to existing stack {stack_name}")
+        renderapi.stack.set_stack_state(stack_name, 'LOADING', render=render)
+    else:
+        # explicitly set createTimestamp until render-python bug is fixed
+        # see https://github.com/AllenInstitute/render-python/pull/158
+        create_timestamp = time.strftime('%Y-%m-%dT%H:%M:%S.00Z')
 
-    renderapi.stack.create_stack(stack=stack_name,
-                                 render=render,
-                                 createTimestamp=create_timestamp,
-                                 stackResolutionX=scope_data_set.dat_x_and_y_nm_per_pixel,
-                                 stackResolutionY=scope_data_set.dat_x_and_y_nm_per_pixel,
-                                 stackResolutionZ=scope_data_set.dat_z_nm_per_pixel)
+        renderapi.stack.create_stack(stack=stack_name,
+                                     render=render,
+                                     createTimestamp=create_timestamp,
+                                     stackResolutionX=scope_data_set.dat_x_and_y_nm_per_pixel,
+                                     stackResolutionY=scope_data_set.dat_x_and_y_nm_per_pixel,
+                                     stackResolutionZ=scope_data_set.dat_z_nm_per_pixel)
 
     # api_tile_specs = [renderapi.tilespec.TileSpec(json=tile_spec) for tile_spec in tile_specs]
     #
@@ -518,14 +813,12 @@ def save_stack(stack_name: str,
     render_api = RenderApi(render_owner=render_data_set.owner,
                            render_project=render_data_set.project,
                            render_connect=render_data_set.connect)
-    tile_count = len(tile_specs)
-    tiles_per_batch = 5000
-    for index in range(0, tile_count, tiles_per_batch):
-        stop_index = min(index + tiles_per_batch, tile_count)
-        import_tile_specs(tile_specs=tile_specs[index:stop_index],
-                          transform_specs=transform_specs,
-                          stack=stack_name,
-                          render_api=render_api)
+
+    # render_api saves tile specs in concurrent batches
+    import_tile_specs(tile_specs=tile_specs,
+                      transform_specs=transform_specs,
+                      stack=stack_name,
+                      render_api=render_api)
 
     if max_mipmap_level is not None:
         mipmap_path_builder = {
@@ -586,6 +879,16 @@ def main(arg_list):
         type=int,
         default=1
     )
+    parser.add_argument(
+        "--tile_header_cache",
+        help="Path of SQLite cache for tile headers read from align HDF5 files "
+             "(omit to read headers from every file)",
+    )
+    parser.add_argument(
+        "--import_state",
+        help="Path of JSON state file for incremental imports that append only new layers to an existing stack "
+             "(omit to rebuild the stack from scratch)",
+    )
 
     args = parser.parse_args(args=arg_list)
 
@@ -606,16 +909,36 @@ def main(arg_list):
     if render_data_set is None:
         raise ValueError(f"render_data_set not defined in {args.volume_transfer_info}")
 
-    all_layers = build_all_layers(align_storage_root=align_h5_root,
+    import_state_path = None if args.import_state is None else Path(args.import_state)
+    import_state = None
+    if import_state_path is not None:
+        import_state = load_import_state(import_state_path, render_data_set.stack)
+
+    new_layers = build_all_layers(align_storage_root=align_h5_root,
                                   num_workers=args.num_workers,
                                   threads_per_worker=args.num_threads_per_worker,
                                   dask_worker_space=args.dask_worker_space,
                                   bill_project=volume_transfer_info.cluster_job_project_for_billing,
                                   last_dat_name=volume_transfer_info.scope_data_set.last_dat_name,
                                   min_index=args.min_layer_index,
-                                  max_index=args.max_layer_index)
+                                  max_index=args.max_layer_index,
+                                  tile_header_cache_path=None if args.tile_header_cache is None else Path(args.tile_header_cache),
+                                  last_imported_h5_path=None if import_state is None else import_state.last_layer().h5_path)
+
+    if len(new_layers) == 0:
+        logger.info(f"main: no new layers to import, processing completed in {time.time() - start_time} s")
+        return 0
+
+    if import_state is None:
+        imported_layers = []
+        first_z = 1
+    else:
+        imported_layers = [imported_layer.to_layer_info() for imported_layer in import_state.recent_layers]
+        first_z = import_state.recent_layers[0].z
+
+    all_layers = imported_layers + new_layers
 
-    logger.info(f"main: generating tile specs and masks for {len(all_layers)} layers")
+    logger.info(f"main: generating tile specs and masks for {len(new_layers)} new layers")
 
     mask_builder: Optional[MaskBuilder] = None
     if render_data_set.mask_width is not None or render_data_set.mask_height is not None:
@@ -636,7 +959,11 @@ def main(arg_list):
                              restart_context_layer_count=render_data_set.restart_context_layer_count,
                              mask_builder=mask_builder,
                              tile_overlap_in_microns=scope_data_set.dat_tile_overlap_microns,
-                             pre_stage_transform_ids=pre_stage_transform_ids)
+                             pre_stage_transform_ids=pre_stage_transform_ids,
+                             first_z=first_z,
+                             imported_layer_count=len(imported_layers))
+
+    append = import_state is not None
 
     if render_data_set.connect is not None:
         if len(all_restart_tile_specs) > 0:
@@ -645,14 +972,23 @@ def main(arg_list):
                        render_data_set=render_data_set,
                        max_mipmap_level=volume_transfer_info.max_mipmap_level,
                        tile_specs=all_restart_tile_specs,
-                       transform_specs=transform_specs)
+                       transform_specs=transform_specs,
+                       append=append)
 
         save_stack(stack_name=render_data_set.stack,
                    scope_data_set=scope_data_set,
                    render_data_set=render_data_set,
                    max_mipmap_level=volume_transfer_info.max_mipmap_level,
                    tile_specs=all_tile_specs,
-                   transform_specs=transform_specs)
+                   transform_specs=transform_specs,
+                   append=append)
+
+        if import_state_path is not None:
+            save_import_state(import_state_path=import_state_path,
+                              stack=render_data_set.stack,
+                              all_layers=all_layers,
+                              first_z=first_z,
+                              restart_context_layer_count=render_data_set.restart_context_layer_count)
 
         if mask_builder is not None and len(mask_builder.mask_errors) > 0:
             logger.error(f"mask errors are: {mask_builder.mask_errors}")
@@ -0,0 +1,295 @@
+import argparse
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Final, Optional
+
+from janelia_emrp.fibsem.sqlite_store import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+
+# hourly subdirectories end with <year>/<month>/<day>/<hour> (e.g. 2022/07/21/15)
+HOUR_DIRECTORY_TIME_PARTS: Final = 4
+
+# depth of hourly subdirectories below dat roots (e.g. 2022/07/21/15)
+DAT_HOUR_DIRECTORY_DEPTH: Final = 4
+
+# depth of hourly subdirectories below HDF5 roots (e.g. Merlin-6282/2022/07/21/15)
+H5_HOUR_DIRECTORY_DEPTH: Final = 5
+
+# the whole root is rescanned this often to pick up files added to (or removed from) hours before the checkpoint
+FULL_SCAN_INTERVAL_SECONDS: Final = 24 * 60 * 60
+
+SCHEMA: Final = """
+CREATE TABLE IF NOT EXISTS scanned_root (
+    root TEXT NOT NULL,
+    file_pattern TEXT NOT NULL,
+    checkpoint TEXT,
+    full_scan_time REAL NOT NULL,
+    PRIMARY KEY (root, file_pattern)
+);
+CREATE TABLE IF NOT EXISTS manifest_file (
+    root TEXT NOT NULL,
+    file_pattern TEXT NOT NULL,
+    hour_dir TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    PRIMARY KEY (root, file_pattern, hour_dir, file_name)
+);
+CREATE TABLE IF NOT EXISTS converted_layer_output (
+    output_key TEXT NOT NULL,
+    layer_id TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    PRIMARY KEY (output_key, layer_id, output_path)
+);
+"""
+
+
+def get_hour_time_parts(relative_hour_dir: str) -> list[str]:
+    return relative_hour_dir.split("/")[-HOUR_DIRECTORY_TIME_PARTS:]
+
+
+def find_hour_dirs(root: Path,
+                   hour_dir_depth: int,
+                   checkpoint: Optional[str]) -> list[str]:
+    """
+    Walks down to the hourly subdirectories of `root`, skipping any year, month, day, or hour directory
+    that is before the checkpoint so that only the checkpoint hour and newer hours are listed.
+
+    Parameters
+    ----------
+    root : Path
+        root directory to walk.
+
+    hour_dir_depth : int
+        number of directory levels between `root` and the hourly directories.
+
+    checkpoint : Optional[str]
+        time part of the oldest hourly directory to include (e.g. 2022/07/21/15) or None to include all directories.
+
+    Returns
+    -------
+    list[str]
+        Sorted paths of the included hourly directories relative to `root` (e.g. Merlin-6282/2022/07/21/15).
+    """
+    checkpoint_parts = [] if checkpoint is None else checkpoint.split("/")
+    first_time_level = hour_dir_depth - HOUR_DIRECTORY_TIME_PARTS
+
+    relative_dirs = [""]
+    for level in range(hour_dir_depth):
+        child_dirs = []
+        for relative_dir in relative_dirs:
+            with os.scandir(root / relative_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        child_dirs.append(entry.name if relative_dir == "" else f"{relative_dir}/{entry.name}")
+
+        if len(checkpoint_parts) > 0 and level >= first_time_level:
+            time_part_count = level - first_time_level + 1
+            checkpoint_prefix = checkpoint_parts[:time_part_count]
+            child_dirs = [child_dir for child_dir in child_dirs
+                          if child_dir.split("/")[-time_part_count:] >= checkpoint_prefix]
+
+        relative_dirs = child_dirs
+
+    return sorted(relative_dirs)
+
+
+def add_forget_layers_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--forget_layers",
+        help="Ids of layers recorded as converted in the layer manifest that should be checked "
+             "(and converted again if their output is missing) even though a full scan is not due",
+        nargs="+"
+    )
+
+
+class LayerManifest(SqliteStore):
+    """
+    SQLite manifest of the files in a volume's hourly acquisition directories
+    (along with the layers already known to be converted) so that finding layers to convert
+    does not require walking every directory in the volume.
+
+    Each scan lists only the hourly directories at or after the newest hour seen by the previous scan
+    (the checkpoint), so the cost of a scan depends upon how much data arrived since the last scan
+    rather than upon the size of the volume.  The whole root is rescanned every FULL_SCAN_INTERVAL_SECONDS
+    to pick up any files that were added to or removed from older hours.
+
+    Converted layers are recorded along with the paths of their output files so that they can be skipped
+    without checking the file system.  Callers should verify the recorded outputs (see `verify_converted_layers`)
+    after each full scan so that layers whose outputs were removed (or moved) are converted again.
+
+    Use as a context manager to open (and, if necessary, create) the manifest.
+
+    Attributes
+    ----------
+    manifest_path : Path
+        path of the SQLite manifest file.
+    """
+    def __init__(self,
+                 manifest_path: Path):
+        super().__init__(store_path=manifest_path, schema=SCHEMA)
+        self.manifest_path = manifest_path
+
+    def scan(self,
+             root: Path,
+             file_pattern: str,
+             hour_dir_depth: int,
+             force_full_scan: bool = False) -> bool:
+        """
+        Brings the manifest for `root` up to date by listing files in hourly directories
+        at or after the checkpoint (or in all hourly directories when a full scan is due).
+
+        Parameters
+        ----------
+        root : Path
+            root directory containing hourly subdirectories.
+
+        file_pattern : str
+            glob pattern for files to include (e.g. *.dat).
+
+        hour_dir_depth : int
+            number of directory levels between `root` and the hourly directories.
+
+        force_full_scan : bool, default=False
+            indicates whether all hourly directories should be scanned even if a full scan is not yet due.
+
+        Returns
+        -------
+        bool
+            True if all hourly directories were scanned.
+        """
+        now = time.time()
+        row = self._connection.execute("SELECT checkpoint, full_scan_time FROM scanned_root "
+                                       "WHERE root = ? AND file_pattern = ?",
+                                       (str(root), file_pattern)).fetchone()
+
+        full_scan = force_full_scan or row is None or (now - row[1]) > FULL_SCAN_INTERVAL_SECONDS
+        checkpoint = None if full_scan else row[0]
+        full_scan_time = now if full_scan else row[1]
+
+        hour_dirs = find_hour_dirs(root=root, hour_dir_depth=hour_dir_depth, checkpoint=checkpoint)
+
+        with self._connection:
+            if full_scan:
+                self._connection.execute("DELETE FROM manifest_file WHERE root = ? AND file_pattern = ?",
+                                         (str(root), file_pattern))
+            file_count = 0
+            for hour_dir in hour_dirs:
+                file_names = [p.name for p in (root / hour_dir).glob(file_pattern)]
+                file_count += len(file_names)
+                self._connection.execute("DELETE FROM manifest_file "
+                                         "WHERE root = ? AND file_pattern = ? AND hour_dir = ?",
+                                         (str(root), file_pattern, hour_dir))
+                self._connection.executemany("INSERT INTO manifest_file (root, file_pattern, hour_dir, file_name) "
+                                             "VALUES (?, ?, ?, ?)",
+                                             [(str(root), file_pattern, hour_dir, name) for name in file_names])
+
+            if len(hour_dirs) > 0:
+                checkpoint = max(["/".join(get_hour_time_parts(hour_dir)) for hour_dir in hour_dirs])
+
+            self._connection.execute("INSERT OR REPLACE INTO scanned_root "
+                                     "(root, file_pattern, checkpoint, full_scan_time) VALUES (?, ?, ?, ?)",
+                                     (str(root), file_pattern, checkpoint, full_scan_time))
+
+        scan_type = "full scan" if full_scan else "incremental scan"
+        logger.info(f"scan: {scan_type} found {file_count} {file_pattern} files in {len(hour_dirs)} "
+                    f"hourly directories of {root}, checkpoint is now {checkpoint}")
+
+        return full_scan
+
+    def file_paths(self,
+                   root: Path,
+                   file_pattern: str) -> list[Path]:
+        """
+        Returns
+        -------
+        list[Path]
+            Sorted paths of all files in the manifest for `root` and `file_pattern`.
+        """
+        cursor = self._connection.execute("SELECT hour_dir, file_name FROM manifest_file "
+                                          "WHERE root = ? AND file_pattern = ? ORDER BY hour_dir, file_name",
+                                          (str(root), file_pattern))
+        return [root / hour_dir / file_name for hour_dir, file_name in cursor]
+
+    def scan_file_paths(self,
+                        root: Path,
+                        file_pattern: str,
+                        hour_dir_depth: int) -> list[Path]:
+        """
+        Scans `root` and then returns sorted paths of all files in the manifest for `root` and `file_pattern`.
+        """
+        self.scan(root=root, file_pattern=file_pattern, hour_dir_depth=hour_dir_depth)
+        return self.file_paths(root=root, file_pattern=file_pattern)
+
+    def converted_layer_ids(self,
+                            output_key: str) -> set[str]:
+        """
+        Returns
+        -------
+        set[str]
+            Ids of layers that were previously found to be converted for the specified output.
+        """
+        cursor = self._connection.execute("SELECT DISTINCT layer_id FROM converted_layer_output WHERE output_key = ?",
+                                          (output_key,))
+        return {layer_id for (layer_id,) in cursor}
+
+    def record_converted_layers(self,
+                                output_key: str,
+                                layer_id_to_output_paths: dict[str, list[Path]]) -> None:
+        """
+        Records layers that have been converted for the specified output along with the paths of their output files.
+        """
+        with self._connection:
+            self._connection.executemany("INSERT OR IGNORE INTO converted_layer_output "
+                                         "(output_key, layer_id, output_path) VALUES (?, ?, ?)",
+                                         [(output_key, layer_id, str(output_path))
+                                          for layer_id, output_paths in layer_id_to_output_paths.items()
+                                          for output_path in output_paths])
+
+    def forget_converted_layers(self,
+                                output_key: str,
+                                layer_ids: list[str]) -> None:
+        with self._connection:
+            self._connection.executemany("DELETE FROM converted_layer_output WHERE output_key = ? AND layer_id = ?",
+                                         [(output_key, layer_id) for layer_id in layer_ids])
+
+    def verify_converted_layers(self,
+                                output_key: str) -> list[str]:
+        """
+        Forgets converted layers for the specified output that are missing any of their recorded output files
+        so that they will be checked (and, if necessary, converted) again.
+        This checks every recorded output file, so it should only be run occasionally (e.g. after each full scan).
+
+        Returns
+        -------
+        list[str]
+            Sorted ids of the forgotten layers.
+        """
+        cursor = self._connection.execute("SELECT layer_id, output_path FROM converted_layer_output "
+                                          "WHERE output_key = ?",
+                                          (output_key,))
+        missing_output_layer_ids = sorted({layer_id for layer_id, output_path in cursor.fetchall()
+                                           if not Path(output_path).exists()})
+        self.forget_converted_layers(output_key, missing_output_layer_ids)
+
+        logger.info(f"verify_converted_layers: forgot {len(missing_output_layer_ids)} layers "
+                    f"with missing {output_key} output")
+
+        return missing_output_layer_ids
+
+    def converted_layer_ids_for_run(self,
+                                    output_key: str,
+                                    verify: bool,
+                                    forget_layer_ids: Optional[list[str]] = None) -> set[str]:
+        """
+        Forgets the specified layers, verifies recorded outputs if requested (e.g. after a full scan),
+        and then returns the ids of the layers that can be skipped without checking the file system.
+        """
+        if forget_layer_ids is not None and len(forget_layer_ids) > 0:
+            self.forget_converted_layers(output_key, forget_layer_ids)
+            logger.info(f"converted_layer_ids_for_run: forgot {len(forget_layer_ids)} requested layers")
+        if verify:
+            self.verify_converted_layers(output_key)
+        return self.converted_layer_ids(output_key)
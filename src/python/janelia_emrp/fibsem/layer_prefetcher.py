@@ -0,0 +1,160 @@
+import dataclasses
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+from janelia_emrp.fibsem.cyx_dat import CYXDat, new_cyx_dat
+from janelia_emrp.fibsem.dat_path import DatPathsForLayer, DatPath
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PrefetchedLayer:
+    # Dat data read ahead of time for one layer.
+    dat_paths_for_layer: DatPathsForLayer
+    cyx_dat_list: Optional[list[CYXDat]] = None  # None if the layer was not read (e.g. because it can be skipped)
+    nbytes: int = 0
+    error: Optional[Exception] = None
+
+
+def read_cyx_dat_into_memory(dat_path: DatPath) -> CYXDat:
+    """
+    Returns
+    -------
+    CYXDat
+        A new instance with pixels copied from the memory-mapped dat file into memory
+        (copy keeps the file's y, x, c layout so the file is read sequentially).
+    """
+    cyx_dat = new_cyx_dat(dat_path)
+    return dataclasses.replace(cyx_dat, pixels=np.array(cyx_dat.pixels))
+
+
+class LayerPrefetcher:
+    """
+    Reads the dat files for upcoming layers on a background thread so that disk (or NFS) reads
+    for the next layer overlap with compression and HDF5 writes for the current layer.
+
+    Use as a context manager and iterate to get a `PrefetchedLayer` for each layer in order.
+    A layer's bytes count against the memory ceiling until the consumer asks for the next layer.
+
+    Attributes
+    ----------
+    queue_depth : int
+        maximum number of read layers waiting to be consumed.
+
+    max_bytes : Optional[int]
+        maximum number of dat bytes held by read layers that have not been fully consumed
+        or None for no limit (a single layer larger than this limit is still read when nothing else is held).
+
+    should_read : Callable[[DatPathsForLayer], bool]
+        returns False for layers that do not need to be read (e.g. because converted results already exist).
+    """
+    def __init__(self,
+                 dat_layer_list: list[DatPathsForLayer],
+                 queue_depth: int,
+                 max_bytes: Optional[int] = None,
+                 should_read: Callable[[DatPathsForLayer], bool] = lambda layer: True):
+        if queue_depth < 1:
+            raise ValueError(f"queue_depth must be at least 1 but is {queue_depth}")
+
+        self.dat_layer_list = dat_layer_list
+        self.queue_depth = queue_depth
+        self.max_bytes = max_bytes
+        self.should_read = should_read
+
+        self._queue: queue.Queue[PrefetchedLayer] = queue.Queue(maxsize=queue_depth)
+        self._condition = threading.Condition()
+        self._held_bytes = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._read_layers, name="dat-prefetch", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+        # drain queue so that a blocked reader can finish
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self._thread.join()
+
+    def __iter__(self) -> Iterator[PrefetchedLayer]:
+        for _ in self.dat_layer_list:
+            prefetched_layer = self._get()
+            try:
+                yield prefetched_layer
+            finally:
+                self._release(prefetched_layer.nbytes)
+
+    def _get(self) -> PrefetchedLayer:
+        while True:
+            try:
+                return self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if not self._thread.is_alive() and self._queue.empty():
+                    raise RuntimeError("dat prefetch thread stopped before reading all layers")
+
+    def _release(self,
+                 nbytes: int):
+        with self._condition:
+            self._held_bytes -= nbytes
+            self._condition.notify_all()
+
+    def _reserve(self,
+                 nbytes: int) -> bool:
+        with self._condition:
+            while not self._stopped and self.max_bytes is not None and \
+                    self._held_bytes > 0 and (self._held_bytes + nbytes) > self.max_bytes:
+                self._condition.wait()
+            if not self._stopped:
+                self._held_bytes += nbytes
+            return not self._stopped
+
+    def _put(self,
+             prefetched_layer: PrefetchedLayer) -> bool:
+        while not self._stopped:
+            try:
+                self._queue.put(prefetched_layer, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _read_layers(self):
+        for dat_paths_for_layer in self.dat_layer_list:
+            prefetched_layer = PrefetchedLayer(dat_paths_for_layer=dat_paths_for_layer)
+
+            # noinspection PyBroadException
+            try:
+                if self.should_read(dat_paths_for_layer):
+                    nbytes = sum([os.path.getsize(dat_path.file_path) for dat_path in dat_paths_for_layer.dat_paths])
+                    if not self._reserve(nbytes):
+                        break
+                    prefetched_layer.nbytes = nbytes
+
+                    start_time = time.time()
+                    prefetched_layer.cyx_dat_list = [
+                        read_cyx_dat_into_memory(dat_path) for dat_path in dat_paths_for_layer.dat_paths
+                    ]
+                    logger.info(f"_read_layers: read {nbytes} bytes for layer {dat_paths_for_layer.get_layer_id()} "
+                                f"in {time.time() - start_time:.1f} seconds")
+            except Exception as e:
+                prefetched_layer.cyx_dat_list = None
+                prefetched_layer.error = e
+
+            if not self._put(prefetched_layer):
+                break
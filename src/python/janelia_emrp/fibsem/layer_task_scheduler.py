@@ -0,0 +1,216 @@
+import argparse
+import logging
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, TypeVar
+
+from distributed import Client, Future, as_completed, get_worker
+
+logger = logging.getLogger(__name__)
+
+LayerType = TypeVar("LayerType")
+
+
+@dataclass
+class LayerTaskResult:
+    # Outcome of converting one layer as a dask task.
+    layer_id: str
+    attempts: int = 0
+    elapsed_seconds: Optional[float] = None     # elapsed time of the successful attempt
+    worker: Optional[str] = None                # address of the worker that completed the layer
+    failed_workers: list[str] = field(default_factory=list)
+    error: Optional[str] = None                 # error from the last attempt if all attempts failed
+    value: Any = None                           # value returned by the successful attempt
+
+
+def run_layer_task(convert_layer: Callable[[Any], Any],
+                   layer: Any) -> tuple[Optional[str], float, Optional[str], Any]:
+    """
+    Converts one layer on a dask worker.
+
+    Returns
+    -------
+    tuple[Optional[str], float, Optional[str], Any]
+        The worker address, the elapsed seconds, a description of the error (None if conversion succeeded),
+        and the value returned by `convert_layer` (None if conversion failed).
+    """
+    start_time = time.time()
+    try:
+        worker_address = get_worker().address
+    except ValueError:
+        worker_address = None
+
+    error = None
+    value = None
+    # noinspection PyBroadException
+    try:
+        value = convert_layer(layer)
+    except Exception as e:
+        traceback.print_exc()
+        error = f"{type(e).__name__}: {e}"
+
+    return worker_address, time.time() - start_time, error, value
+
+
+def convert_layers_with_dask(dask_client: Client,
+                             layers: list[LayerType],
+                             convert_layer: Callable[[LayerType], Any],
+                             get_layer_id: Callable[[LayerType], str],
+                             max_tasks_in_flight: int,
+                             max_attempts: int = 2) -> list[LayerTaskResult]:
+    """
+    Submits each layer as its own dask task so that whichever worker finishes first gets the next layer
+    (instead of each worker being bound to a fixed partition of layers).
+    Failed layers are resubmitted, preferring workers that have not already failed to convert them.
+
+    Parameters
+    ----------
+    dask_client : Client
+        client for the dask cluster.
+
+    layers : list[LayerType]
+        layers to convert.
+
+    convert_layer : Callable[[LayerType], Any]
+        picklable function that converts one layer, raising an exception if conversion fails.
+        Any value it returns (e.g. details that only the client process should persist) is kept in the layer's result.
+
+    get_layer_id : Callable[[LayerType], str]
+        function that returns an identifier for a layer (used for task keys and logging).
+
+    max_tasks_in_flight : int
+        maximum number of layer tasks submitted to the cluster at one time.
+
+    max_attempts : int, default=2
+        maximum number of times to try converting each layer.
+
+    Returns
+    -------
+    list[LayerTaskResult]
+        Result for each layer in the same order as `layers`.
+    """
+    results = [LayerTaskResult(layer_id=get_layer_id(layer)) for layer in layers]
+    future_to_index: dict[Future, int] = {}
+    completed_futures = as_completed()
+
+    def submit(layer_index: int) -> None:
+        result = results[layer_index]
+        placement_kwargs = {}
+        if len(result.failed_workers) > 0:
+            other_workers = [address for address in dask_client.scheduler_info()["workers"].keys()
+                             if address not in result.failed_workers]
+            if len(other_workers) > 0:
+                # prefer other workers but fall back to any worker if the other workers go away
+                placement_kwargs = {"workers": other_workers, "allow_other_workers": True}
+        future = dask_client.submit(run_layer_task,
+                                    convert_layer,
+                                    layers[layer_index],
+                                    key=f"convert-layer-{result.layer_id}-attempt-{result.attempts + 1}",
+                                    pure=False,
+                                    **placement_kwargs)
+        future_to_index[future] = layer_index
+        completed_futures.add(future)
+
+    next_layer_index = 0
+    while next_layer_index < min(max(1, max_tasks_in_flight), len(layers)):
+        submit(next_layer_index)
+        next_layer_index += 1
+
+    for future in completed_futures:
+        layer_index = future_to_index.pop(future)
+        result = results[layer_index]
+        result.attempts += 1
+
+        if future.status == "error":
+            # task did not run to completion (e.g. because its worker died)
+            worker_address, elapsed_seconds, error, value = None, None, f"{future.exception()!r}", None
+        else:
+            worker_address, elapsed_seconds, error, value = future.result()
+        future.release()
+
+        if error is None:
+            result.elapsed_seconds = elapsed_seconds
+            result.worker = worker_address
+            result.value = value
+            logger.info(f"convert_layers_with_dask: converted layer {result.layer_id} on {worker_address} "
+                        f"in {elapsed_seconds:.1f} seconds (attempt {result.attempts})")
+        else:
+            if worker_address is not None:
+                result.failed_workers.append(worker_address)
+            if result.attempts < max_attempts:
+                logger.warning(f"convert_layers_with_dask: attempt {result.attempts} to convert layer "
+                               f"{result.layer_id} failed on {worker_address}, retrying, error was {error}")
+                submit(layer_index)
+                continue
+            result.error = error
+            logger.error(f"convert_layers_with_dask: failed to convert layer {result.layer_id} "
+                         f"after {result.attempts} attempts, last error was {error}")
+
+        if next_layer_index < len(layers):
+            submit(next_layer_index)
+            next_layer_index += 1
+
+    return results
+
+
+def split_into_batches(layers: list[LayerType],
+                       layers_per_batch: int) -> list[list[LayerType]]:
+    """
+    Returns
+    -------
+    list[list[LayerType]]
+        Consecutive runs of at most `layers_per_batch` layers (e.g. so that a task can read ahead within its run).
+    """
+    layers_per_batch = max(1, layers_per_batch)
+    return [layers[i:i + layers_per_batch] for i in range(0, len(layers), layers_per_batch)]
+
+
+def add_layer_task_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--max_layers_in_flight",
+        help="Maximum number of layer tasks to submit to the dask cluster at one time "
+             "(omit to use twice the number of workers)",
+        type=int
+    )
+    parser.add_argument(
+        "--max_layer_attempts",
+        help="Maximum number of times to try converting each layer, "
+             "retries prefer workers that have not already failed to convert the layer",
+        type=int,
+        default=2
+    )
+
+
+def get_max_tasks_in_flight(max_layers_in_flight: Optional[int],
+                            num_workers: int) -> int:
+    if max_layers_in_flight is None:
+        max_layers_in_flight = 2 * num_workers
+    return max(1, max_layers_in_flight)
+
+
+def log_layer_task_summary(context: str,
+                           results: list[LayerTaskResult],
+                           slowest_count: int = 5) -> None:
+    """
+    Logs failure counts, the distribution of layer conversion times, and the slowest layers.
+    """
+    failed_results = [result for result in results if result.error is not None]
+    retried_count = len([result for result in results if result.attempts > 1])
+    timed_results = sorted([result for result in results if result.elapsed_seconds is not None],
+                           key=lambda result: result.elapsed_seconds)
+
+    logger.info(f"{context}: converted {len(timed_results)} of {len(results)} layers, "
+                f"{len(failed_results)} failed, {retried_count} needed more than one attempt")
+
+    if len(timed_results) > 0:
+        seconds = [result.elapsed_seconds for result in timed_results]
+        percentiles = {p: seconds[min(len(seconds) - 1, int(len(seconds) * p / 100))] for p in (50, 90, 99)}
+        logger.info(f"{context}: layer conversion seconds min={seconds[0]:.1f}, p50={percentiles[50]:.1f}, "
+                    f"p90={percentiles[90]:.1f}, p99={percentiles[99]:.1f}, max={seconds[-1]:.1f}")
+        for result in reversed(timed_results[-slowest_count:]):
+            logger.info(f"{context}: slow layer {result.layer_id} took {result.elapsed_seconds:.1f} seconds "
+                        f"on {result.worker}")
+
+    for result in failed_results:
+        logger.error(f"{context}: failed layer {result.layer_id}, last error was {result.error}")
@@ -0,0 +1,101 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Final
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# uint32 window sums cannot overflow until level 13 (255 * 4^13 > 2^32)
+MAX_UINT32_SUM_LEVEL: Final = 12
+
+
+def sum_2x2_windows(zyx_sums: np.ndarray,
+                    sum_dtype: np.dtype) -> np.ndarray:
+    """
+    Sums each 2x2 window in y and x of the specified (z, y, x) array.
+    Odd trailing rows and columns are dropped.
+
+    Returns
+    -------
+    np.ndarray
+        (z, y/2, x/2) window sums with the specified data type.
+    """
+    even_height = zyx_sums.shape[1] - (zyx_sums.shape[1] % 2)
+    even_width = zyx_sums.shape[2] - (zyx_sums.shape[2] % 2)
+    cropped = zyx_sums[:, :even_height, :even_width]
+
+    window_sums = cropped[:, 0::2, 0::2].astype(sum_dtype)
+    window_sums += cropped[:, 1::2, 0::2]
+    window_sums += cropped[:, 0::2, 1::2]
+    window_sums += cropped[:, 1::2, 1::2]
+
+    return window_sums
+
+
+def build_mipmap_pyramid(level_zero_pixels: np.ndarray,
+                         max_mipmap_level: int) -> list[np.ndarray]:
+    """
+    Builds down-sampled mipmap levels for the specified 8-bit (z, y, x) level zero pixels.
+
+    Each level n pixel is the truncated mean of the corresponding 2^n x 2^n window of level zero pixels,
+    matching the archived align data produced by xarray_multiscale.multiscale(..., windowed_mean, (1, 2, 2))
+    with chained=False.  To avoid re-reading level zero for every level, unrounded window sums are carried
+    from each level to the next and the 8-bit means are derived from them with a shift.
+
+    Returns
+    -------
+    list[np.ndarray]
+        pixels for levels 1 through `max_mipmap_level` (level zero is not included),
+        stopping early once a level has fewer than 2 pixels in y or x.
+    """
+    sum_dtype = np.uint32 if max_mipmap_level <= MAX_UINT32_SUM_LEVEL else np.uint64
+
+    pyramid: list[np.ndarray] = []
+    window_sums = level_zero_pixels
+    for mipmap_level in range(1, max_mipmap_level + 1):
+        if window_sums.shape[1] < 2 or window_sums.shape[2] < 2:
+            break
+        window_sums = sum_2x2_windows(window_sums, sum_dtype)
+        pyramid.append((window_sums >> (2 * mipmap_level)).astype(np.uint8))
+
+    return pyramid
+
+
+def build_mipmap_pyramids(level_zero_pixels_list: list[np.ndarray],
+                          max_mipmap_level: int,
+                          max_workers: Optional[int] = None) -> list[list[np.ndarray]]:
+    """
+    Builds mipmap pyramids for several tiles at once.
+    NumPy releases the GIL for the down-sampling work, so a thread pool keeps all cores busy.
+
+    Parameters
+    ----------
+    level_zero_pixels_list : list[np.ndarray]
+        8-bit (z, y, x) level zero pixels for each tile.
+
+    max_mipmap_level : int
+        maximum mipmap level to build.
+
+    max_workers : Optional[int], default=None
+        maximum number of threads to use or None to use one thread per tile (up to the number of CPUs).
+
+    Returns
+    -------
+    list[list[np.ndarray]]
+        pyramid (see `build_mipmap_pyramid`) for each tile in the same order as the level zero list.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(level_zero_pixels_list)))
+
+    if max_workers == 1:
+        return [build_mipmap_pyramid(pixels, max_mipmap_level) for pixels in level_zero_pixels_list]
+
+    logger.info(f"build_mipmap_pyramids: building {len(level_zero_pixels_list)} pyramids with {max_workers} threads")
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mipmap") as executor:
+        return list(executor.map(lambda pixels: build_mipmap_pyramid(pixels, max_mipmap_level),
+                                 level_zero_pixels_list))
@@ -1,7 +1,9 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 import requests
 
+from janelia_emrp.fibsem.render_bulk_uploader import RenderBulkUploader, DEFAULT_MAX_CONCURRENT_BATCHES, \
+    DEFAULT_TILES_PER_BATCH, DEFAULT_GZIP_LEVEL
 from janelia_emrp.fibsem.volume_transfer_info import RenderConnect
 
 
@@ -17,10 +19,21 @@ class RenderApi:
     def __init__(self,
                  render_owner: str,
                  render_project: str,
-                 render_connect: RenderConnect):
+                 render_connect: RenderConnect,
+                 max_concurrent_batches: int = DEFAULT_MAX_CONCURRENT_BATCHES,
+                 gzip_level: Optional[int] = DEFAULT_GZIP_LEVEL):
+        """
+        Parameters
+        ----------
+        gzip_level : Optional[int]
+            gzip compression level for resolved tile request bodies or None (the default) to send uncompressed bodies
+            (only specify a level for render web service deployments that decompress request bodies).
+        """
         self.render_owner = render_owner
         self.render_project = render_project
         self.render_connect = render_connect
+        self.max_concurrent_batches = max_concurrent_batches
+        self.gzip_level = gzip_level
 
     def get_ws_url(self):
         # noinspection HttpUrlsUsage
@@ -36,12 +49,18 @@ class RenderApi:
     def save_resolved_tiles(self,
                             stack: str,
                             resolved_tiles: Dict[str, Any],
-                            derive_data: bool = False):
-        url = f"{self.get_stack_url(stack)}/resolvedTiles?deriveData={derive_data}"
-        print(f'submitting PUT {url} for {len(resolved_tiles["tileIdToSpecMap"])} tile specs')
-
-        response = requests.put(url, json=resolved_tiles)
-        response.raise_for_status()
+                            derive_data: bool = False,
+                            tiles_per_batch: int = DEFAULT_TILES_PER_BATCH):
+        """
+        Saves the resolved tiles in concurrent (retried and, unless gzip_level is None, gzip compressed) batches
+        of at most `tiles_per_batch` tile specs.
+        """
+        with RenderBulkUploader(max_concurrent_batches=self.max_concurrent_batches,
+                                gzip_level=self.gzip_level) as uploader:
+            uploader.save_resolved_tiles(stack_url=self.get_stack_url(stack),
+                                         resolved_tiles=resolved_tiles,
+                                         derive_data=derive_data,
+                                         tiles_per_batch=tiles_per_batch)
 
     def save_tile_specs(self,
                         stack: str,
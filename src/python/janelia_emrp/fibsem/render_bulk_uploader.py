@@ -0,0 +1,257 @@
+import gzip
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Final, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_TILES_PER_BATCH: Final = 5000
+DEFAULT_MAX_CONCURRENT_BATCHES: Final = 4
+DEFAULT_MAX_ATTEMPTS: Final = 5
+DEFAULT_BACKOFF_SECONDS: Final = 2.0
+MAX_BACKOFF_SECONDS: Final = 60.0
+
+# request bodies are sent uncompressed unless a caller asks for compression since not every render web service
+# deployment decompresses request bodies (level 1 compresses tile spec JSON about 10x and is fast)
+DEFAULT_GZIP_LEVEL: Final[Optional[int]] = None
+
+# (connect, read) timeouts, reads are long because the server may derive bounding boxes for large batches
+REQUEST_TIMEOUT_SECONDS: Final = (30, 900)
+
+# responses that indicate a transient server or proxy problem
+RETRY_STATUS_CODES: Final = {429, 500, 502, 503, 504}
+
+
+def new_pooled_session(pool_size: int) -> requests.Session:
+    """
+    Returns
+    -------
+    requests.Session
+        A session that keeps up to `pool_size` connections open to each host for reuse across requests.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def split_resolved_tiles(resolved_tiles: dict[str, Any],
+                         tiles_per_batch: int) -> list[dict[str, Any]]:
+    """
+    Returns
+    -------
+    list[dict[str, Any]]
+        Resolved tiles split into batches of at most `tiles_per_batch` tile specs,
+        each batch including all of the shared transforms.
+    """
+    tile_specs = list(resolved_tiles["tileIdToSpecMap"].values())
+    transform_id_to_spec_map = resolved_tiles.get("transformIdToSpecMap")
+
+    batches = []
+    for index in range(0, len(tile_specs), tiles_per_batch):
+        batch = {}
+        if transform_id_to_spec_map is not None:
+            batch["transformIdToSpecMap"] = transform_id_to_spec_map
+        batch["tileIdToSpecMap"] = {tile_spec["tileId"]: tile_spec
+                                    for tile_spec in tile_specs[index:index + tiles_per_batch]}
+        batches.append(batch)
+    return batches
+
+
+class RenderBulkUploader:
+    """
+    Uploads resolved tile batches to render web services using a pooled session,
+    with a bounded number of batches in flight at once.
+
+    Request bodies are gzip compressed when a gzip_level is specified and failed requests are retried with
+    exponential backoff when the failure looks transient (connection errors, timeouts, and 429 or 5xx responses).
+    Resolved tile PUT requests replace tiles with the same ids, so retrying a partially applied batch is safe.
+
+    Use as a context manager: `submit` returns as soon as a batch is queued (blocking only when the maximum number
+    of batches is already in flight) and leaving the context waits for all batches and raises if any batch failed.
+
+    Attributes
+    ----------
+    max_concurrent_batches : int
+        maximum number of batches being uploaded (or waiting for a retry) at once.
+
+    max_attempts : int
+        maximum number of attempts for each batch.
+
+    backoff_seconds : float
+        delay before the first retry, doubled for each subsequent retry (up to MAX_BACKOFF_SECONDS).
+
+    gzip_level : Optional[int]
+        gzip compression level for request bodies or None (the default) to send uncompressed bodies.
+    """
+    def __init__(self,
+                 max_concurrent_batches: int = DEFAULT_MAX_CONCURRENT_BATCHES,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+                 gzip_level: Optional[int] = DEFAULT_GZIP_LEVEL):
+        if max_concurrent_batches < 1:
+            raise ValueError("max_concurrent_batches must be at least 1")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self.max_concurrent_batches = max_concurrent_batches
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.gzip_level = gzip_level
+
+        self._session = new_pooled_session(max_concurrent_batches)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = threading.BoundedSemaphore(max_concurrent_batches)
+        self._futures: list[Future] = []
+        self._lock = threading.Lock()
+        self._tile_count = 0
+        self._start_time: Optional[float] = None
+
+    def __enter__(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent_batches,
+                                            thread_name_prefix="render-upload")
+        self._start_time = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                self.wait()
+            else:
+                for future in self._futures:
+                    future.cancel()
+        finally:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._session.close()
+
+    def put_json(self,
+                 url: str,
+                 payload: Any,
+                 context: str = "") -> None:
+        """
+        Submits a PUT request with the JSON payload to the specified URL, retrying transient failures.
+
+        Raises
+        ------
+        requests.HTTPError
+            If the request fails with a non-transient status or the last attempt fails.
+        """
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.gzip_level is not None:
+            body = gzip.compress(body, compresslevel=self.gzip_level)
+            headers["Content-Encoding"] = "gzip"
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = self._session.put(url, data=body, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_attempts:
+                    response.raise_for_status()
+                    return
+                failure = f"status {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_attempts:
+                    raise
+                failure = f"{type(e).__name__}: {e}"
+
+            delay = min(self.backoff_seconds * (2 ** (attempt - 1)), MAX_BACKOFF_SECONDS)
+            logger.warning(f"put_json: attempt {attempt} of PUT {url} {context} failed with {failure}, "
+                           f"retrying in {delay:.1f} seconds")
+            time.sleep(delay)
+
+    def _upload_batch(self,
+                      stack_url: str,
+                      resolved_tiles: dict[str, Any],
+                      derive_data: bool) -> None:
+        tile_count = len(resolved_tiles["tileIdToSpecMap"])
+        url = f"{stack_url}/resolvedTiles?deriveData={str(derive_data).lower()}"
+
+        start_time = time.time()
+        self.put_json(url=url, payload=resolved_tiles, context=f"for {tile_count} tile specs")
+        elapsed = time.time() - start_time
+
+        with self._lock:
+            self._tile_count += tile_count
+            total_tile_count = self._tile_count
+            total_elapsed = time.time() - self._start_time
+
+        logger.info(f"_upload_batch: saved {tile_count} tile specs to {stack_url} in {elapsed:.1f} seconds "
+                    f"({tile_count / max(elapsed, 0.001):.0f} tiles/s), {total_tile_count} tile specs saved "
+                    f"so far ({total_tile_count / max(total_elapsed, 0.001):.0f} tiles/s overall)")
+
+    def submit(self,
+               stack_url: str,
+               resolved_tiles: dict[str, Any],
+               derive_data: bool = False) -> Future:
+        """
+        Queues one batch of resolved tiles for upload, blocking while the maximum number of batches are in flight.
+
+        Returns
+        -------
+        Future
+            Future that completes when the batch has been uploaded.
+
+        Raises
+        ------
+        RuntimeError
+            If the uploader is not open or a previously submitted batch has already failed.
+        """
+        if self._executor is None:
+            raise RuntimeError("uploader must be opened (with a with statement) before submitting batches")
+
+        self._in_flight.acquire()
+        self._raise_first_failure()
+
+        future = self._executor.submit(self._upload_batch, stack_url, resolved_tiles, derive_data)
+        future.add_done_callback(lambda _: self._in_flight.release())
+        self._futures.append(future)
+        return future
+
+    def save_resolved_tiles(self,
+                            stack_url: str,
+                            resolved_tiles: dict[str, Any],
+                            derive_data: bool = False,
+                            tiles_per_batch: int = DEFAULT_TILES_PER_BATCH) -> list[Future]:
+        """
+        Queues the resolved tiles for upload in batches of at most `tiles_per_batch` tile specs.
+
+        Returns
+        -------
+        list[Future]
+            Futures for each queued batch.
+        """
+        return [self.submit(stack_url=stack_url, resolved_tiles=batch, derive_data=derive_data)
+                for batch in split_resolved_tiles(resolved_tiles, tiles_per_batch)]
+
+    def wait(self) -> None:
+        """
+        Waits for all submitted batches to finish.
+
+        Raises
+        ------
+        RuntimeError
+            If any batch failed.
+        """
+        for future in self._futures:
+            future.exception()
+        self._raise_first_failure()
+
+        elapsed = 0.0 if self._start_time is None else time.time() - self._start_time
+        logger.info(f"wait: saved {self._tile_count} tile specs in {len(self._futures)} batches "
+                    f"in {elapsed:.1f} seconds")
+
+    def _raise_first_failure(self):
+        failed_futures = [future for future in self._futures
+                          if future.done() and not future.cancelled() and future.exception() is not None]
+        if len(failed_futures) > 0:
+            raise RuntimeError(f"{len(failed_futures)} tile spec batches failed to upload") \
+                from failed_futures[0].exception()
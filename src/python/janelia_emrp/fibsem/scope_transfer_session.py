@@ -0,0 +1,251 @@
+import datetime
+import logging
+import shlex
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Final, Optional
+
+from janelia_emrp.fibsem.dat_path import dat_to_target_path
+
+logger = logging.getLogger(__name__)
+
+
+# ssh keeps the shared connection open for this long after the last command that used it
+CONTROL_PERSIST_SECONDS: Final = 120
+
+# maximum number of paths included in one remote scp or rm command
+FILES_PER_COMMAND: Final = 20
+
+
+def get_month_starts(first_day: datetime.datetime,
+                     last_day: datetime.datetime) -> list[datetime.datetime]:
+    month_starts = []
+    month_start = first_day.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while month_start <= last_day:
+        month_starts.append(month_start)
+        month_start = (month_start + datetime.timedelta(days=32)).replace(day=1)
+    return month_starts
+
+
+def parse_scope_dat_day(scope_dat_path: Path) -> Optional[datetime.date]:
+    """
+    Returns
+    -------
+    Optional[datetime.date]
+        The acquisition day for a scope dat path like /cygdrive/E/Images/Mouse/Y2022/M07/D13/...dat
+        or None if the path does not include year, month, and day directories.
+    """
+    day_name = scope_dat_path.parent.name
+    month_name = scope_dat_path.parent.parent.name
+    year_name = scope_dat_path.parent.parent.parent.name
+    try:
+        return datetime.date(int(year_name[1:]), int(month_name[1:]), int(day_name[1:]))
+    except ValueError:
+        return None
+
+
+def batch_list(items: list,
+               batch_size: int) -> list[list]:
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+
+class ScopeTransferSession:
+    """
+    Runs listing, copy, and removal commands for one scope host.
+
+    When used as a context manager, every ssh and scp command shares one multiplexed ssh connection
+    (see ControlMaster in https://man.openbsd.org/ssh_config.5) instead of setting up a new connection each time.
+    A session can also be used without entering it, in which case each command opens its own connection.
+
+    Attributes
+    ----------
+    host : Optional[str]
+        scope host name or None (or empty) to treat scope paths as local paths (e.g. for testing without a scope).
+
+    max_concurrent_transfers : int, default=4
+        maximum number of scp commands to run at the same time.
+    """
+    def __init__(self,
+                 host: Optional[str],
+                 max_concurrent_transfers: int = 4):
+        self.host = host
+        self.max_concurrent_transfers = max_concurrent_transfers
+        self._control_dir: Optional[tempfile.TemporaryDirectory] = None
+
+    def __str__(self):
+        return self.host if not self.is_local() else "local"
+
+    def __enter__(self):
+        if not self.is_local():
+            # keep socket path short since unix socket paths are limited to about 100 characters
+            self._control_dir = tempfile.TemporaryDirectory(prefix="scp-", dir="/tmp")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._control_dir is not None:
+            args = ["ssh"] + self.get_control_args() + ["-O", "exit", self.host]
+            subprocess.run(args, capture_output=True, check=False)
+            self._control_dir.cleanup()
+            self._control_dir = None
+
+    def is_local(self) -> bool:
+        return self.host is None or len(self.host) == 0
+
+    def get_control_args(self) -> list[str]:
+        control_args = []
+        if self._control_dir is not None:
+            control_args = [
+                "-o", "ControlMaster=auto",
+                "-o", f"ControlPath={self._control_dir.name}/%C",
+                "-o", f"ControlPersist={CONTROL_PERSIST_SECONDS}",
+            ]
+        return control_args
+
+    def get_ssh_args(self) -> list[str]:
+        return [
+            "ssh",                             # see https://man.openbsd.org/ssh_config.5 for descriptions of ssh -o args
+            "-o", "ConnectTimeout=10",
+            "-o", "ServerAliveCountMax=2",
+            "-o", "ServerAliveInterval=5",
+            "-o", "StrictHostKeyChecking=no",  # Disable checking to avoid problems when scopes get new IPs
+        ] + self.get_control_args() + [self.host]
+
+    def run_command(self,
+                    command: str) -> str:
+        """
+        Runs the specified shell command on the scope (or locally for a local session).
+
+        Returns
+        -------
+        str
+            The command's standard output.
+        """
+        if self.is_local():
+            args = ["sh", "-c", command]
+        else:
+            args = self.get_ssh_args() + [command]
+
+        completed_process = subprocess.run(args,
+                                           capture_output=True,
+                                           check=True)
+        return completed_process.stdout.decode("utf-8")
+
+    def list_directory(self,
+                       directory_path: Path) -> list[str]:
+        output = self.run_command(f"ls {shlex.quote(str(directory_path))}")
+        return [name.strip() for name in output.split("\n") if len(name.strip()) > 0]
+
+    def list_dats_by_day(self,
+                         dat_storage_root: Path,
+                         first_day: datetime.datetime,
+                         last_day: datetime.datetime) -> dict[datetime.date, list[Path]]:
+        """
+        Lists all dat files acquired between the specified days (inclusive) with one remote command.
+
+        Parameters
+        ----------
+        dat_storage_root : Path
+            scope root directory containing Y<year>/M<month>/D<day> dat subdirectories.
+
+        first_day : datetime.datetime
+            first acquisition day to list.
+
+        last_day : datetime.datetime
+            last acquisition day to list.
+
+        Returns
+        -------
+        dict[datetime.date, list[Path]]
+            Sorted dat paths keyed by acquisition day (days without dats are omitted).
+        """
+        # /cygdrive/E/Images/Mouse/Y2022/M07
+        month_paths = [dat_storage_root / month_start.strftime("Y%Y/M%m")
+                       for month_start in get_month_starts(first_day, last_day)]
+
+        logger.info(f"list_dats_by_day: listing dats in {len(month_paths)} month directories "
+                    f"from {month_paths[0]} to {month_paths[-1]} on {self}")
+
+        quoted_month_paths = " ".join([shlex.quote(str(month_path)) for month_path in month_paths])
+
+        # missing month directories are expected, so ignore find errors and exit status
+        output = self.run_command(f'find {quoted_month_paths} -mindepth 2 -maxdepth 2 -name "*.dat" '
+                                  f'2>/dev/null; true')
+
+        first_date = first_day.date()
+        last_date = last_day.date()
+        day_to_dat_paths: dict[datetime.date, list[Path]] = {}
+        for line in output.split("\n"):
+            line = line.strip()
+            if line.endswith(".dat"):
+                dat_path = Path(line)
+                day = parse_scope_dat_day(dat_path)
+                if day is not None and first_date <= day <= last_date:
+                    day_to_dat_paths.setdefault(day, []).append(dat_path)
+
+        for dat_paths in day_to_dat_paths.values():
+            dat_paths.sort(key=lambda p: p.name)
+
+        return day_to_dat_paths
+
+    def copy_files(self,
+                   scope_paths: list[Path],
+                   target_dir: Path) -> None:
+        """
+        Copies the specified scope files into `target_dir` with a single scp command.
+        """
+        target_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.is_local():
+            for scope_path in scope_paths:
+                shutil.copy2(scope_path, target_dir)
+        else:
+            args = [
+                "scp",
+                "-T",                              # needed to avoid protocol error: filename does not match request
+                "-o", "ConnectTimeout=10",
+                "-o", "StrictHostKeyChecking=no",  # Disable checking to avoid problems when scopes get new IPs
+            ] + self.get_control_args() + [
+                f"{self.host}:{scope_path}" for scope_path in scope_paths
+            ] + [
+                str(target_dir)
+            ]
+            subprocess.run(args, check=True)
+
+    def copy_dat_files(self,
+                       scope_dat_paths: list[Path],
+                       dat_storage_root: Path) -> None:
+        """
+        Copies the specified scope dat files into their hourly subdirectories of `dat_storage_root`,
+        grouping files by target directory and running up to `max_concurrent_transfers` scp commands at once.
+        """
+        target_dir_to_paths: dict[Path, list[Path]] = {}
+        for scope_dat_path in scope_dat_paths:
+            target_dir = dat_to_target_path(scope_dat_path, dat_storage_root).parent
+            target_dir_to_paths.setdefault(target_dir, []).append(Path(scope_dat_path))
+
+        batches = []
+        for target_dir, paths in target_dir_to_paths.items():
+            for batch in batch_list(paths, FILES_PER_COMMAND):
+                batches.append((batch, target_dir))
+
+        logger.info(f"copy_dat_files: copying {len(scope_dat_paths)} dat files from {self} "
+                    f"in {len(batches)} batches")
+
+        if len(batches) == 1 or self.max_concurrent_transfers < 2:
+            for batch, target_dir in batches:
+                self.copy_files(batch, target_dir)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_concurrent_transfers,
+                                    thread_name_prefix="scp") as executor:
+                futures = [executor.submit(self.copy_files, batch, target_dir) for batch, target_dir in batches]
+                for future in futures:
+                    future.result()
+
+    def remove_files(self,
+                     scope_paths: list[str]) -> None:
+        for batch in batch_list(scope_paths, FILES_PER_COMMAND):
+            logger.info(f"remove_files: removing {len(batch)} files from {self}, first is {batch[0]}")
+            self.run_command("rm " + " ".join([shlex.quote(str(scope_path)) for scope_path in batch]))
@@ -0,0 +1,64 @@
+import sqlite3
+from pathlib import Path
+from typing import Final, Optional
+
+
+# seconds to wait for another process to release a lock on the database
+LOCK_TIMEOUT_SECONDS: Final = 120
+
+
+class SqliteStore:
+    """
+    Base for the small SQLite files used to avoid rescanning slow storage (indexes, manifests, and caches).
+
+    Use as a context manager to open (and, if necessary, create) the store.
+    Changes are committed when the context exits normally and rolled back when it exits with an exception.
+    Read only stores are never created or modified, so processes that should not write a shared store
+    (e.g. because SQLite locking is unreliable on network file systems) can still look things up in it.
+
+    Attributes
+    ----------
+    store_path : Path
+        path of the SQLite file.
+
+    schema : str
+        script that creates any missing tables and indexes.
+
+    pragmas : list[str]
+        pragma statements run each time the store is opened (e.g. PRAGMA foreign_keys = ON).
+
+    read_only : bool
+        indicates whether the store should be opened read only (opening fails if the store does not exist).
+    """
+    def __init__(self,
+                 store_path: Path,
+                 schema: str,
+                 pragmas: Optional[list[str]] = None,
+                 read_only: bool = False):
+        self.store_path = store_path
+        self.schema = schema
+        self.pragmas = [] if pragmas is None else pragmas
+        self.read_only = read_only
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def __enter__(self):
+        if self.read_only:
+            self._connection = sqlite3.connect(f"{self.store_path.resolve().as_uri()}?mode=ro",
+                                               uri=True,
+                                               timeout=LOCK_TIMEOUT_SECONDS)
+        else:
+            self.store_path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.store_path), timeout=LOCK_TIMEOUT_SECONDS)
+        for pragma in self.pragmas:
+            self._connection.execute(pragma)
+        if not self.read_only:
+            self._connection.executescript(self.schema)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self._connection.commit()
+        else:
+            self._connection.rollback()
+        self._connection.close()
+        self._connection = None
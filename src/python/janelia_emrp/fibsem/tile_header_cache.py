@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Final, Optional
+
+from janelia_emrp.fibsem.sqlite_store import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+
+# number of threads used to look up file modification times (stat calls are mostly network latency)
+STAT_THREADS: Final = 32
+
+# maximum number of paths bound to one lookup query (older SQLite versions allow at most 999 variables)
+PATHS_PER_QUERY: Final = 500
+
+SCHEMA: Final = """
+CREATE TABLE IF NOT EXISTS tile_headers (
+    h5_path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    headers_json TEXT NOT NULL
+);
+"""
+
+
+def get_mtimes(paths: list[Path]) -> list[Optional[float]]:
+    """
+    Returns
+    -------
+    list[Optional[float]]
+        The modification time of each path (or None if the path does not exist).
+    """
+    def get_mtime(path: Path) -> Optional[float]:
+        try:
+            return os.path.getmtime(path)
+        except FileNotFoundError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=STAT_THREADS, thread_name_prefix="stat") as executor:
+        return list(executor.map(get_mtime, paths))
+
+
+class TileHeaderCache(SqliteStore):
+    """
+    SQLite cache of the tile headers harvested from each align HDF5 file, keyed by file path and modification time,
+    so that repeated render imports of a volume do not need to reopen unchanged HDF5 files.
+
+    Use as a context manager to open (and, if necessary, create) the cache.
+
+    Attributes
+    ----------
+    cache_path : Path
+        path of the SQLite cache file.
+    """
+    def __init__(self,
+                 cache_path: Path):
+        super().__init__(store_path=cache_path, schema=SCHEMA)
+        self.cache_path = cache_path
+
+    def get_headers(self,
+                    h5_paths: list[Path],
+                    mtimes: list[Optional[float]]) -> dict[Path, list[dict[str, Any]]]:
+        """
+        Returns
+        -------
+        dict[Path, list[dict[str, Any]]]
+            Cached tile headers keyed by path for the specified files whose modification times match the cache.
+        """
+        path_to_mtime = {str(h5_path): mtime for h5_path, mtime in zip(h5_paths, mtimes) if mtime is not None}
+        paths = list(path_to_mtime.keys())
+        path_to_headers = {}
+        for batch_start in range(0, len(paths), PATHS_PER_QUERY):
+            batch_paths = paths[batch_start:batch_start + PATHS_PER_QUERY]
+            placeholders = ", ".join("?" * len(batch_paths))
+            cursor = self._connection.execute(f"SELECT h5_path, mtime, headers_json FROM tile_headers "
+                                              f"WHERE h5_path IN ({placeholders})",
+                                              batch_paths)
+            for h5_path, mtime, headers_json in cursor:
+                if path_to_mtime[h5_path] == mtime:
+                    path_to_headers[Path(h5_path)] = json.loads(headers_json)
+        return path_to_headers
+
+    def put_headers(self,
+                    h5_path: Path,
+                    mtime: float,
+                    headers: list[dict[str, Any]]) -> None:
+        with self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO tile_headers (h5_path, mtime, headers_json) "
+                                     "VALUES (?, ?, ?)",
+                                     (str(h5_path), mtime, json.dumps(headers)))
@@ -1,11 +1,13 @@
 import datetime
+import functools
 import logging
 from enum import Enum
 from pathlib import Path
 from typing import Optional, Any
 
 import numpy as np
-from pydantic import BaseModel
+from PIL import Image
+from pydantic import BaseModel, model_validator
 
 from janelia_emrp.fibsem.dat_path import new_dat_path
 
@@ -100,6 +102,8 @@ class ClusterRootDirectoryPaths(BaseModel):
     raw_h5: Optional[Path] = None
     align_h5: Optional[Path] = None
     export_n5: Optional[Path] = None
+    dat_name_index: Optional[Path] = None  # SQLite index of dat names stored in raw and align HDF5 files
+    layer_manifest: Optional[Path] = None  # SQLite manifest of dat and raw HDF5 files used to find layers to convert
 
 
 class ArchiveRootDirectoryPaths(BaseModel):
@@ -166,6 +170,37 @@ class RenderDataSet(BaseModel):
         }
 
 
+@functools.lru_cache(maxsize=4)
+def load_fill_mask(mask_path: Path) -> np.ndarray:
+    """
+    Returns
+    -------
+    np.ndarray
+        read-only boolean mask with True values for the non-zero pixels in the specified image
+        (cached since the same mask is applied to every filled tile).
+    """
+    with Image.open(mask_path) as mask_image:
+        mask = np.asarray(mask_image) != 0
+    mask.flags.writeable = False
+    logger.info(f"load_fill_mask: loaded {mask.shape} mask from {mask_path}")
+    return mask
+
+
+class FillRegion(BaseModel):
+    """Rectangular region within a tile.
+    #
+    # Attributes:
+    #     x:      upper left x coordinate of the region
+    #     y:      upper left y coordinate of the region
+    #     width:  width of the region
+    #     height: height of the region
+    """
+    x: int
+    y: int
+    width: int
+    height: int
+
+
 class FillInfo(BaseModel):
     """Information about a region to fill with a specific intensity.
     #
@@ -173,41 +208,137 @@ class FillInfo(BaseModel):
     #     tile_indexes:
     #         list of tile indexes to fill (for a 2x2 grid, 0_0 = 0, 0_1 = 1, 1_0 = 2, 1_1 = 3)
     #     x:
-    #         upper left x coordinate of the fill region
+    #         upper left x coordinate of the fill region (omit if only additional regions or a mask are used)
     #     y:
-    #         upper left y coordinate of the fill region
+    #         upper left y coordinate of the fill region (omit if only additional regions or a mask are used)
     #     width:
-    #         width of the fill region
+    #         width of the fill region (omit if only additional regions or a mask are used)
     #     height:
-    #         height of the fill region
+    #         height of the fill region (omit if only additional regions or a mask are used)
+    #     additional_regions:
+    #         other rectangular regions to fill (e.g. for tiles with several damaged areas)
+    #     mask_path:
+    #         path of a tile sized mask image whose non-zero pixels identify additional areas to fill
     #     fill_intensity:
     #         intensity to apply to all pixels in the fill region that have intensities above the threshold
     #     intensity_threshold:
     #         replace pixels in the region with the fill intensity when their intensity is greater than this threshold
     """
     tile_indexes: list[int]
-    x: int
-    y: int
-    width: int
-    height: int
+    x: Optional[int] = None
+    y: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    additional_regions: list[FillRegion] = []
+    mask_path: Optional[Path] = None
     fill_intensity: int
     intensity_threshold: int
 
+    @model_validator(mode="after")
+    def check_region_is_complete(self) -> "FillInfo":
+        region_values = [self.x, self.y, self.width, self.height]
+        if any(value is None for value in region_values) and any(value is not None for value in region_values):
+            raise ValueError("x, y, width, and height must all be specified (or all be omitted) for a fill region")
+        return self
+
+    def get_regions(self) -> list[FillRegion]:
+        regions = []
+        if self.x is not None:
+            regions.append(FillRegion(x=self.x, y=self.y, width=self.width, height=self.height))
+        regions.extend(self.additional_regions)
+        return regions
+
+    def get_mask(self) -> Optional[np.ndarray]:
+        return None if self.mask_path is None else load_fill_mask(self.mask_path)
+
     def fill_region(self,
-                    pixel_array: np.ndarray) -> np.ndarray:
-        writable_pixel_array = pixel_array.copy()
+                    pixel_array: np.ndarray,
+                    in_place: bool = False) -> np.ndarray:
+        """
+        Replaces pixels in each fill region (and mask area) whose intensities are above the threshold
+        with the fill intensity.
+
+        Parameters
+        ----------
+        pixel_array : np.ndarray
+            2D (y, x) pixels to fill.
+
+        in_place : bool, default=False
+            modify the specified (writable) pixel array instead of a copy of it.
+
+        Returns
+        -------
+        np.ndarray
+            the filled pixel array.
+
+        Raises
+        ------
+        ValueError
+            if a fill region is completely outside of the pixel array (partially outside regions are clipped
+            with a warning) or if the fill mask shape differs from the pixel array shape.
+        """
+        writable_pixel_array = pixel_array if in_place else pixel_array.copy()
         filled_count = 0
-        for x in range(self.x, self.x + self.width):
-            for y in range(self.y, self.y + self.height):
-                if writable_pixel_array[y][x] > self.intensity_threshold:
-                    writable_pixel_array[y][x] = self.fill_intensity
-                    filled_count += 1
+
+        pixel_height, pixel_width = writable_pixel_array.shape
+        for region in self.get_regions():
+            if region.x >= pixel_width or region.y >= pixel_height or \
+                    region.x + region.width <= 0 or region.y + region.height <= 0:
+                raise ValueError(f"fill region {region} is outside of {pixel_width}x{pixel_height} pixel array")
+            if region.x < 0 or region.y < 0 or \
+                    region.x + region.width > pixel_width or region.y + region.height > pixel_height:
+                logger.warning(f"fill_region: clipping fill region {region} "
+                               f"to {pixel_width}x{pixel_height} pixel array")
+            region_view = writable_pixel_array[max(region.y, 0):region.y + region.height,
+                                               max(region.x, 0):region.x + region.width]
+            above_threshold = region_view > self.intensity_threshold
+            region_view[above_threshold] = self.fill_intensity
+            filled_count += int(np.count_nonzero(above_threshold))
+
+        mask = self.get_mask()
+        if mask is not None:
+            if mask.shape != writable_pixel_array.shape:
+                raise ValueError(f"fill mask {self.mask_path} shape {mask.shape} "
+                                 f"differs from pixel array shape {writable_pixel_array.shape}")
+            mask_above_threshold = np.logical_and(mask, writable_pixel_array > self.intensity_threshold)
+            writable_pixel_array[mask_above_threshold] = self.fill_intensity
+            filled_count += int(np.count_nonzero(mask_above_threshold))
 
         logger.info(f"fill_region: filled {filled_count} pixels that have intensities above {self.intensity_threshold} with value {self.fill_intensity}")
 
         return writable_pixel_array
 
 
+class H5StorageProfile(BaseModel):
+    """HDF5 chunking and compression settings for raw data sets.
+    #
+    # Attributes:
+    #     chunk_shape:       (rows, columns) chunk shape (dimensions larger than a tile are reduced to the tile size)
+    #     compression:       compression filter ('gzip', 'lzf', or omit for no compression)
+    #     compression_level: gzip compression level from 0 to 9 (omit to use the default level)
+    """
+    chunk_shape: tuple[int, int] = (512, 512)
+    compression: Optional[str] = "gzip"
+    compression_level: Optional[int] = None
+
+    def __str__(self):
+        level = "" if self.compression_level is None else f"-{self.compression_level}"
+        return f"{self.chunk_shape[0]}x{self.chunk_shape[1]}-{self.compression or 'none'}{level}"
+
+    def to_writer_kwargs(self) -> dict[str, Any]:
+        """
+        Returns
+        -------
+        dict[str, Any]
+            DatToH5Writer constructor arguments for this profile.
+        """
+        return {
+            "chunk_shape": self.chunk_shape,
+            "compression": self.compression,
+            "compression_opts": self.compression_level,
+        }
+
+
 class VolumeTransferInfo(BaseModel):
     """Information for managing the transfer of volume data from a scope to centralized storage.
     #
@@ -237,6 +368,8 @@ class VolumeTransferInfo(BaseModel):
     #         expected number of dats to be converted in one hour (omit to use default for conversion)
     #     number_of_preview_workers:
     #         number of Spark workers to use when generating preview exports (omit to use default)
+    #     raw_h5_storage:
+    #         chunking and compression settings for raw HDF5 data sets (omit to use 512x512 gzip chunks)
     #     parsed_from_path:
     #         path of file from which the transfer information was loaded or None if not loaded from a file
     """
@@ -251,6 +384,7 @@ class VolumeTransferInfo(BaseModel):
     cluster_job_project_for_billing: str = ""
     number_of_dats_converted_per_hour: Optional[int] = None
     number_of_preview_workers: Optional[int] = None
+    raw_h5_storage: Optional[H5StorageProfile] = None
     parsed_from_path: Optional[Path] = None
 
     def __str__(self):
@@ -299,6 +433,21 @@ class VolumeTransferInfo(BaseModel):
             h5_root = self.cluster_root_paths.align_h5
         return h5_root
 
+    def get_dat_name_index_path(self):
+        index_path = None
+        if self.cluster_root_paths is not None:
+            index_path = self.cluster_root_paths.dat_name_index
+        return index_path
+
+    def get_raw_h5_storage_profile(self) -> H5StorageProfile:
+        return H5StorageProfile() if self.raw_h5_storage is None else self.raw_h5_storage
+
+    def get_layer_manifest_path(self):
+        manifest_path = None
+        if self.cluster_root_paths is not None:
+            manifest_path = self.cluster_root_paths.layer_manifest
+        return manifest_path
+
     def get_dat_root_for_conversion(self):
         dat_root = None
         if self.cluster_root_paths is not None:
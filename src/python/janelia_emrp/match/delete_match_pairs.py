@@ -2,9 +2,11 @@ import argparse
 import logging
 import sys
 import traceback
+from pathlib import Path
 from typing import List
 
-from janelia_emrp.render.web_service_request import MatchRequest
+from janelia_emrp.match.match_transfer import MatchTransfer, filter_first_weight_below, DEFAULT_MAX_CONCURRENT_GROUPS
+from janelia_emrp.render.web_service_request import MatchRequest, DEFAULT_TIMEOUT_SECONDS
 from janelia_emrp.root_logger import init_logger
 
 
@@ -59,39 +61,52 @@ def main(arg_list: List[str]):
         action='store_true',
         default=False
     )
+    parser.add_argument(
+        "--max_concurrent_groups",
+        help="Maximum number of groups to process at once",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENT_GROUPS
+    )
+    parser.add_argument(
+        "--completed_groups_dir",
+        help="Directory for files recording completed groups for each collection so that "
+             "interrupted runs can be resumed (omit to process all groups)",
+    )
+    parser.add_argument(
+        "--read_timeout",
+        help="Seconds to wait for each web service response (omit to wait indefinitely)",
+        type=float
+    )
 
     args = parser.parse_args(args=arg_list)
 
-    action = "would delete" if args.explain else "deleted"
-
     for collection_name in args.match_collections:
         
         match_request = MatchRequest(host=args.render_host,
                                      owner=args.match_owner,
-                                     collection=collection_name)
+                                     collection=collection_name,
+                                     timeout=(DEFAULT_TIMEOUT_SECONDS[0], args.read_timeout))
 
         group_ids = sorted(match_request.get_p_group_ids(), key=float)
 
-        for group_id in group_ids:
-
-            if args.pair_type == "within":
-                match_pairs = match_request.get_match_pairs_within_group(group_id=group_id)
-            elif args.pair_type == "outside":
-                match_pairs = match_request.get_match_pairs_outside_group(group_id=group_id)
-            else:
-                raise ValueError(f"invalid pair type: {args.pair_type}")
-
-            count = 0
-            for pair in match_pairs:
-                if pair["matches"]["w"][0] < args.min_keep_weight:
-                    if not args.explain:
-                        match_request.delete_match_pair(p_group_id=pair["pGroupId"],
-                                                        p_id=pair["pId"],
-                                                        q_group_id=pair["qGroupId"],
-                                                        q_id=pair["qId"])
-                    count += 1
-
-            logger.info(f"{action} {count} pairs {args.pair_type} group {group_id}")
+        match_transfer = MatchTransfer(source=match_request,
+                                       target=None,
+                                       transforms=[filter_first_weight_below(args.min_keep_weight)],
+                                       pair_type=args.pair_type,
+                                       delete_from_source=True,
+                                       explain=args.explain)
+
+        completed_groups_path = None
+        if args.completed_groups_dir is not None:
+            completed_groups_path = Path(args.completed_groups_dir) / f"{collection_name}.{args.pair_type}.txt"
+
+        results = match_transfer.transfer_groups(group_ids=group_ids,
+                                                 max_concurrent_groups=args.max_concurrent_groups,
+                                                 completed_groups_path=completed_groups_path)
+
+        action = "would delete" if args.explain else "deleted"
+        deleted_count = sum([result.deleted_count for result in results])
+        logger.info(f"{action} {deleted_count} pairs {args.pair_type} {len(results)} groups in {collection_name}")
 
     logger.info("Done!")
 
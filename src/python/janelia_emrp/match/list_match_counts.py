@@ -1,7 +1,19 @@
+import argparse
+import sys
+from pathlib import Path
+
+from janelia_emrp.match.match_census import update_census, count_pairs_by_match_count
 from janelia_emrp.render.web_service_request import MatchRequest
 
 
-def main():
+def main(arg_list: list[str]):
+    parser = argparse.ArgumentParser(description="List the number of pairs in each match count range for collections.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Fetch counts for all groups instead of reusing the saved census")
+    parser.add_argument("--refresh_group_id", nargs="+",
+                        help="Fetch counts again for these (changed) groups")
+    args = parser.parse_args(arg_list)
+
     host = "em-services-1.int.janelia.org:8080"
     owner = "hess_wafer_53"
     collection_names = [
@@ -15,36 +27,22 @@ def main():
         25, 50, 100, 200, 400, 10000
     ]
 
+    census_dir = Path.home() / ".match_census"
+
     collection_name_to_counts = {}
 
     for collection_name in collection_names:
 
-        same_layer_match_counts = []
-        cross_layer_match_counts = []
-        for i in range(0, len(max_values)):
-            same_layer_match_counts.append(0)
-            cross_layer_match_counts.append(0)
-
         match_request = MatchRequest(host=host,
                                      owner=owner,
                                      collection=collection_name)
 
-        group_ids = sorted(match_request.get_p_group_ids(), key=float)
-
-        for group_id in group_ids:
-            match_pairs = match_request.get_pairs_with_match_counts_for_group(group_id)
-            for pair in match_pairs:
-                match_count = pair["matchCount"]
-                if pair["pGroupId"] == pair["qGroupId"]:
-                    for i in range(0, len(max_values)):
-                        if match_count < max_values[i]:
-                            same_layer_match_counts[i] += 1
-                            break
-                else:
-                    for i in range(0, len(max_values)):
-                        if match_count < max_values[i]:
-                            cross_layer_match_counts[i] += 1
-                            break
+        census = update_census(match_request, census_dir,
+                               force_full_refresh=args.refresh,
+                               refresh_group_ids=args.refresh_group_id)
+        counts_by_bin = count_pairs_by_match_count(census, max_values)
+        same_layer_match_counts = counts_by_bin["sameLayer"].tolist()
+        cross_layer_match_counts = counts_by_bin["crossLayer"].tolist()
 
         collection_name_to_counts[collection_name] = (same_layer_match_counts, cross_layer_match_counts)
 
@@ -63,4 +61,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    main(sys.argv[1:])
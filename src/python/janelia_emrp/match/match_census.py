@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Final, Optional
+
+import numpy as np
+import pandas as pd
+
+from janelia_emrp.render.web_service_request import MatchRequest, gather_with_concurrency, DEFAULT_MAX_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+CENSUS_COLUMNS: Final = ["pGroupId", "pId", "qGroupId", "qId", "matchCount"]
+CENSUS_FILE_SUFFIX: Final = ".match_census.npz"
+
+
+def get_census_path(census_dir: Path,
+                    match_request: MatchRequest) -> Path:
+    return census_dir / f"{match_request.owner}__{match_request.collection}{CENSUS_FILE_SUFFIX}"
+
+
+def pairs_to_data_frame(match_counts: list[dict]) -> pd.DataFrame:
+    return pd.DataFrame({
+        "pGroupId": [pair["pGroupId"] for pair in match_counts],
+        "pId": [pair["pId"] for pair in match_counts],
+        "qGroupId": [pair["qGroupId"] for pair in match_counts],
+        "qId": [pair["qId"] for pair in match_counts],
+        "matchCount": np.array([pair["matchCount"] for pair in match_counts], dtype=np.int32),
+    }, columns=CENSUS_COLUMNS)
+
+
+def save_census(census_path: Path,
+                census: pd.DataFrame) -> None:
+    """
+    Saves the census as a compressed NumPy table (one array per column).
+    """
+    census_path.parent.mkdir(parents=True, exist_ok=True)
+    saving_path = census_path.with_name(f"{census_path.name}.saving.npz")
+    np.savez_compressed(saving_path,
+                        **{column: census[column].to_numpy(dtype=np.int32 if column == "matchCount" else str)
+                           for column in CENSUS_COLUMNS})
+    saving_path.replace(census_path)
+
+
+def load_census(census_path: Path) -> Optional[pd.DataFrame]:
+    """
+    Returns
+    -------
+    Optional[pd.DataFrame]
+        The saved census or None if it does not exist.
+    """
+    if not census_path.exists():
+        return None
+    with np.load(census_path) as arrays:
+        return pd.DataFrame({column: arrays[column] for column in CENSUS_COLUMNS}, columns=CENSUS_COLUMNS)
+
+
+def fetch_census(match_request: MatchRequest,
+                 group_ids: list[str],
+                 max_concurrency: int) -> pd.DataFrame:
+    """
+    Returns
+    -------
+    pd.DataFrame
+        Match counts for all pairs in the specified groups, fetched with at most `max_concurrency` requests in flight.
+    """
+    logger.info(f"fetch_census: fetching match counts for {len(group_ids)} groups in {match_request.collection}")
+
+    async def fetch_all() -> list[list[dict]]:
+        return await gather_with_concurrency([match_request.get_pairs_with_match_counts_for_group_async(group_id)
+                                              for group_id in group_ids],
+                                             max_concurrency)
+
+    match_counts_per_group = asyncio.run(fetch_all())
+    return pairs_to_data_frame([pair for match_counts in match_counts_per_group for pair in match_counts])
+
+
+def update_census(match_request: MatchRequest,
+                  census_dir: Path,
+                  max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                  force_full_refresh: bool = False,
+                  refresh_group_ids: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Loads the match count census for a collection, fetching counts only for groups that need them.
+
+    Counts are fetched for groups that are not in the saved census (or are in `refresh_group_ids`)
+    and groups that are no longer in the collection are dropped.
+
+    Render does not report when a group's matches change and per-group pair totals can only be found by
+    fetching the group's counts, so changes to existing groups are not detected in general.
+    The collection's pair total is used as a cheap check: if it differs from the census pair total,
+    pairs were added to or removed from some unknown groups and counts are fetched for all groups.
+    Changes that keep the pair total the same (e.g. re-matching pairs that already existed) are only picked up
+    when the changed groups are listed in `refresh_group_ids` or when `force_full_refresh` is set.
+
+    Parameters
+    ----------
+    match_request : MatchRequest
+        request for the match collection.
+
+    census_dir : Path
+        directory where census files are saved.
+
+    max_concurrency : int, default=DEFAULT_MAX_CONCURRENCY
+        maximum number of count requests in flight.
+
+    force_full_refresh : bool, default=False
+        indicates whether the saved census should be ignored and counts fetched for all groups.
+
+    refresh_group_ids : Optional[list[str]], default=None
+        groups known to have changed whose counts should be fetched again.
+
+    Returns
+    -------
+    pd.DataFrame
+        The census with one row (pGroupId, pId, qGroupId, qId, matchCount) for each pair,
+        sorted by pGroupId (numerically).
+    """
+    start_time = time.time()
+    census_path = get_census_path(census_dir, match_request)
+
+    collection_pair_count = match_request.get_collection_pair_count()
+    group_ids = match_request.get_p_group_ids()
+
+    census = None if force_full_refresh else load_census(census_path)
+    changed = census is None
+
+    if census is not None:
+        stale_group_ids = set() if refresh_group_ids is None else set(refresh_group_ids)
+        keep = census["pGroupId"].isin(group_ids) & ~census["pGroupId"].isin(stale_group_ids)
+        changed = not keep.all()
+        census = census[keep]
+
+        known_group_ids = set(census["pGroupId"].unique())
+        new_group_ids = [group_id for group_id in group_ids if group_id not in known_group_ids]
+        if len(new_group_ids) > 0:
+            census = pd.concat([census, fetch_census(match_request, new_group_ids, max_concurrency)],
+                               ignore_index=True)
+            changed = True
+
+        if len(census) != collection_pair_count:
+            logger.info(f"update_census: census has {len(census)} pairs but {match_request.collection} "
+                        f"has {collection_pair_count}, changed groups are unknown so refreshing all groups")
+            census = None
+
+    if census is None:
+        census = fetch_census(match_request, group_ids, max_concurrency)
+        changed = True
+
+    if changed:
+        census = census.iloc[np.argsort(census["pGroupId"].astype(float).to_numpy(), kind="stable")]
+        census = census.reset_index(drop=True)
+        save_census(census_path, census)
+
+    logger.info(f"update_census: loaded {len(census)} pairs for {len(group_ids)} groups in "
+                f"{match_request.collection} in {time.time() - start_time:.1f} seconds")
+
+    return census
+
+
+def select_pairs(census: pd.DataFrame,
+                 p_id_pattern: Optional[re.Pattern] = None,
+                 q_id_pattern: Optional[re.Pattern] = None,
+                 delta_z: Optional[int] = None,
+                 min_p_z: Optional[float] = None,
+                 max_p_z: Optional[float] = None) -> pd.DataFrame:
+    """
+    Returns
+    -------
+    pd.DataFrame
+        Census rows with tile ids matching the patterns, with (integral) qGroupId - pGroupId equal to `delta_z`,
+        and with pGroupId in [`min_p_z`, `max_p_z`] (each criterion is skipped if None).
+    """
+    keep = np.ones(len(census), dtype=bool)
+    if p_id_pattern is not None:
+        keep &= census["pId"].str.match(p_id_pattern).to_numpy()
+    if q_id_pattern is not None:
+        keep &= census["qId"].str.match(q_id_pattern).to_numpy()
+
+    p_z = census["pGroupId"].astype(float).to_numpy()
+    if delta_z is not None:
+        q_z = census["qGroupId"].astype(float).to_numpy()
+        keep &= (q_z.astype(int) - p_z.astype(int)) == delta_z
+    if min_p_z is not None:
+        keep &= p_z >= min_p_z
+    if max_p_z is not None:
+        keep &= p_z <= max_p_z
+
+    return census[keep]
+
+
+def count_pairs_by_match_count(census: pd.DataFrame,
+                               max_values: list[int]) -> pd.DataFrame:
+    """
+    Returns
+    -------
+    pd.DataFrame
+        Number of same layer and cross layer pairs with match counts in each bin,
+        where bin i holds counts in [max_values[i-1], max_values[i]) and bin 0 starts at 0.
+        Pairs with counts of at least max_values[-1] are not counted.
+    """
+    bins = np.searchsorted(np.asarray(max_values), census["matchCount"].to_numpy(), side="right")
+    same_layer = (census["pGroupId"] == census["qGroupId"]).to_numpy()
+    in_range = bins < len(max_values)
+
+    return pd.DataFrame({
+        "maxValue": max_values,
+        "sameLayer": np.bincount(bins[in_range & same_layer], minlength=len(max_values)),
+        "crossLayer": np.bincount(bins[in_range & ~same_layer], minlength=len(max_values)),
+    })
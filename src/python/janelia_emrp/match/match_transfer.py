@@ -0,0 +1,270 @@
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Final, Optional
+
+from janelia_emrp.render.web_service_request import MatchRequest
+
+logger = logging.getLogger(__name__)
+
+
+# maximum number of pairs held in memory (and saved in one request) for each group transfer
+DEFAULT_PAIRS_PER_SAVE: Final = 1000
+DEFAULT_MAX_CONCURRENT_GROUPS: Final = 8
+
+# returns the (possibly modified) pair to keep or None to skip the pair
+MatchPairTransform = Callable[[dict[str, Any]], Optional[dict[str, Any]]]
+
+
+def offset_section_id(section_id: str,
+                      offset: int) -> str:
+    offset_section_value = float(section_id) + offset
+    return f"{offset_section_value:3.1f}"
+
+
+def offset_sections(section_offset: int) -> MatchPairTransform:
+    """
+    Returns
+    -------
+    MatchPairTransform
+        Transform that adds `section_offset` to the pGroupId and qGroupId of each pair.
+    """
+    def transform(pair: dict[str, Any]) -> dict[str, Any]:
+        pair["pGroupId"] = offset_section_id(pair["pGroupId"], section_offset)
+        pair["qGroupId"] = offset_section_id(pair["qGroupId"], section_offset)
+        return pair
+    return transform
+
+
+def remap_ids(id_map: dict[str, str]) -> MatchPairTransform:
+    """
+    Returns
+    -------
+    MatchPairTransform
+        Transform that replaces any group or tile ids found in `id_map`.
+    """
+    def transform(pair: dict[str, Any]) -> dict[str, Any]:
+        for key in ("pGroupId", "pId", "qGroupId", "qId"):
+            pair[key] = id_map.get(pair[key], pair[key])
+        return pair
+    return transform
+
+
+def filter_pairs(predicate: Callable[[dict[str, Any]], bool]) -> MatchPairTransform:
+    """
+    Returns
+    -------
+    MatchPairTransform
+        Transform that skips pairs for which `predicate` is False.
+    """
+    def transform(pair: dict[str, Any]) -> Optional[dict[str, Any]]:
+        return pair if predicate(pair) else None
+    return transform
+
+
+def filter_tile_ids(p_id_pattern: re.Pattern,
+                    q_id_pattern: re.Pattern) -> MatchPairTransform:
+    """
+    Returns
+    -------
+    MatchPairTransform
+        Transform that skips pairs with tile ids that do not match the patterns.
+    """
+    return filter_pairs(lambda pair: bool(p_id_pattern.match(pair["pId"]) and q_id_pattern.match(pair["qId"])))
+
+
+def filter_first_weight_below(max_weight: float) -> MatchPairTransform:
+    """
+    Returns
+    -------
+    MatchPairTransform
+        Transform that skips pairs where the first match point has a weight of at least `max_weight`.
+    """
+    return filter_pairs(lambda pair: pair["matches"]["w"][0] < max_weight)
+
+
+@dataclass
+class GroupTransferResult:
+    # Counts of pairs processed for one group.
+    group_id: str
+    read_count: int
+    saved_count: int
+    deleted_count: int
+    elapsed_seconds: float
+
+
+@dataclass
+class MatchTransfer:
+    """
+    Copies, moves, or deletes match pairs group by group.
+
+    Pairs are parsed as they are streamed from the source collection, passed through the transforms,
+    and then saved to the target collection in batches, so only `pairs_per_save` pairs for each group
+    are held in memory.  When `delete_from_source` is set, source pairs that pass the transforms are deleted
+    after all of the group's pairs have been saved (so an interrupted move leaves copies rather than losing pairs).
+
+    Attributes
+    ----------
+    source : MatchRequest
+        collection to read pairs from.
+
+    target : Optional[MatchRequest]
+        collection to save transformed pairs to or None to skip saving.
+
+    transforms : list[MatchPairTransform]
+        transforms applied in order to each pair (a pair is skipped as soon as a transform returns None).
+
+    pair_type : str
+        type of pairs to read for each group, see `MatchRequest.get_match_pairs_url`.
+
+    delete_from_source : bool
+        indicates whether pairs that pass the transforms should be deleted from the source collection.
+
+    explain : bool
+        if set, count pairs without saving or deleting them.
+
+    pairs_per_save : int
+        maximum number of pairs saved in one request.
+    """
+    source: MatchRequest
+    target: Optional[MatchRequest]
+    transforms: list[MatchPairTransform]
+    pair_type: str = "p_group"
+    delete_from_source: bool = False
+    explain: bool = False
+    pairs_per_save: int = DEFAULT_PAIRS_PER_SAVE
+
+    def transform_pair(self,
+                       pair: dict[str, Any]) -> Optional[dict[str, Any]]:
+        for transform in self.transforms:
+            pair = transform(pair)
+            if pair is None:
+                break
+        return pair
+
+    def transfer_group(self,
+                       group_id: str) -> GroupTransferResult:
+        start_time = time.time()
+        read_count = 0
+        saved_count = 0
+        pairs_to_save = []
+        pair_keys_to_delete = []
+
+        def save_pairs():
+            nonlocal saved_count
+            if self.target is not None and not self.explain:
+                self.target.save_match_pairs(group_id, pairs_to_save)
+            saved_count += len(pairs_to_save)
+            pairs_to_save.clear()
+
+        for pair in self.source.iter_match_pairs(group_id, self.pair_type):
+            read_count += 1
+            source_key = (pair["pGroupId"], pair["pId"], pair["qGroupId"], pair["qId"])
+            pair = self.transform_pair(pair)
+            if pair is None:
+                continue
+
+            if self.delete_from_source:
+                pair_keys_to_delete.append(source_key)
+
+            if self.target is not None:
+                pairs_to_save.append(pair)
+                if len(pairs_to_save) >= self.pairs_per_save:
+                    save_pairs()
+
+        if len(pairs_to_save) > 0:
+            save_pairs()
+
+        if not self.explain:
+            for p_group_id, p_id, q_group_id, q_id in pair_keys_to_delete:
+                self.source.delete_match_pair(p_group_id=p_group_id, p_id=p_id, q_group_id=q_group_id, q_id=q_id)
+
+        return GroupTransferResult(group_id=group_id,
+                                   read_count=read_count,
+                                   saved_count=saved_count,
+                                   deleted_count=len(pair_keys_to_delete),
+                                   elapsed_seconds=time.time() - start_time)
+
+    def transfer_groups(self,
+                        group_ids: list[str],
+                        max_concurrent_groups: int = DEFAULT_MAX_CONCURRENT_GROUPS,
+                        completed_groups_path: Optional[Path] = None) -> list[GroupTransferResult]:
+        """
+        Transfers pairs for the specified groups with at most `max_concurrent_groups` groups in flight.
+
+        Parameters
+        ----------
+        group_ids : list[str]
+            groups to transfer.
+
+        max_concurrent_groups : int
+            maximum number of groups transferred at once.
+
+        completed_groups_path : Optional[Path]
+            path of a file recording each completed group id so that an interrupted transfer can be resumed,
+            groups already in the file are skipped (omit to transfer all groups).
+
+        Returns
+        -------
+        list[GroupTransferResult]
+            Results for the groups transferred by this call (in completion order).
+
+        Raises
+        ------
+        ValueError
+            If any group transfer failed (after all other groups have been transferred).
+        """
+        completed_group_ids = read_completed_group_ids(completed_groups_path)
+        group_ids_to_transfer = [group_id for group_id in group_ids if group_id not in completed_group_ids]
+
+        action = "explaining" if self.explain else "transferring"
+        logger.info(f"transfer_groups: {action} {self.pair_type} pairs for {len(group_ids_to_transfer)} "
+                    f"of {len(group_ids)} groups from {self.source.collection}, "
+                    f"skipping {len(group_ids) - len(group_ids_to_transfer)} previously completed groups")
+
+        results = []
+        failed_group_ids = []
+        completed_file = None
+        if completed_groups_path is not None and not self.explain:
+            completed_groups_path.parent.mkdir(parents=True, exist_ok=True)
+            completed_file = open(completed_groups_path, "a")
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrent_groups, thread_name_prefix="match-transfer") as executor:
+                future_to_group_id = {executor.submit(self.transfer_group, group_id): group_id
+                                      for group_id in group_ids_to_transfer}
+                for future in as_completed(future_to_group_id):
+                    group_id = future_to_group_id[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"transfer_groups: failed to transfer group {group_id}, error was {e}")
+                        failed_group_ids.append(group_id)
+                        continue
+
+                    results.append(result)
+                    logger.info(f"transfer_groups: read {result.read_count}, saved {result.saved_count}, and "
+                                f"deleted {result.deleted_count} pairs for group {group_id} "
+                                f"in {result.elapsed_seconds:.1f} seconds ({len(results)} of "
+                                f"{len(group_ids_to_transfer)} groups done)")
+                    if completed_file is not None:
+                        completed_file.write(f"{group_id}\n")
+                        completed_file.flush()
+        finally:
+            if completed_file is not None:
+                completed_file.close()
+
+        if len(failed_group_ids) > 0:
+            raise ValueError(f"failed to transfer {len(failed_group_ids)} groups: {sorted(failed_group_ids)}")
+
+        return results
+
+
+def read_completed_group_ids(completed_groups_path: Optional[Path]) -> set[str]:
+    if completed_groups_path is None or not completed_groups_path.exists():
+        return set()
+    with open(completed_groups_path, "r") as completed_file:
+        return {line.strip() for line in completed_file if len(line.strip()) > 0}
@@ -1,5 +1,6 @@
 import re
 
+from janelia_emrp.match.match_transfer import MatchTransfer, filter_pairs, filter_tile_ids
 from janelia_emrp.render.web_service_request import MatchRequest
 
 
@@ -19,23 +20,15 @@ def main():
 
     group_ids = sorted(from_match_request.get_p_group_ids(), key=float)
 
-    for group_id in group_ids:
-
-        match_pairs = from_match_request.get_match_pairs_within_group(group_id)
-
-        for pair in match_pairs:
-
-            if pair["pGroupId"] == pair["qGroupId"] and \
-                    p_id_pattern.match(pair["pId"]) and \
-                    q_id_pattern.match(pair["qId"]):
-
-                to_match_request.save_match_pairs(group_id=pair["pGroupId"],
-                                                  match_pairs=[pair])
-
-                from_match_request.delete_match_pair(p_group_id=pair["pGroupId"],
-                                                     p_id=pair["pId"],
-                                                     q_group_id=pair["qGroupId"],
-                                                     q_id=pair["qId"])
+    match_transfer = MatchTransfer(source=from_match_request,
+                                   target=to_match_request,
+                                   transforms=[
+                                       filter_pairs(lambda pair: pair["pGroupId"] == pair["qGroupId"]),
+                                       filter_tile_ids(p_id_pattern, q_id_pattern)
+                                   ],
+                                   pair_type="within",
+                                   delete_from_source=True)
+    match_transfer.transfer_groups(group_ids=group_ids)
 
     print("Done!")
 
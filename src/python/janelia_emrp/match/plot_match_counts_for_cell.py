@@ -1,25 +1,39 @@
+import argparse
 import re
+import sys
+from pathlib import Path
 
 from bokeh.io import show
 from bokeh.models import Range1d, ColumnDataSource, TapTool, OpenURL
 from bokeh.plotting import figure
 
+from janelia_emrp.match.match_census import update_census, select_pairs
 from janelia_emrp.render.web_service_request import MatchRequest
 
 
-def main():
+def main(arg_list: list[str]):
+    parser = argparse.ArgumentParser(description="Plot cross layer 0-0-0 match counts for a collection.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Fetch counts for all groups instead of reusing the saved census")
+    parser.add_argument("--refresh_group_id", nargs="+",
+                        help="Fetch counts again for these (changed) groups")
+    args = parser.parse_args(arg_list)
+
     owner = "cellmap"
     project = "jrc_mus_liver_zon_3"
     stack = "v2_acquire"
     match_request = MatchRequest(host="em-services-1.int.janelia.org:8080",
                                  owner=owner,
                                  collection=f"{project}_v1")
+    census_dir = Path.home() / ".match_census"
 
     id_pattern = re.compile(r".*_.*_0-0-0\..*")  # "pId": "23-01-24_000020_0-0-0.1.0"
 
-    group_ids = []
-    for z in range(13500, 13799):
-        group_ids.append(f"{z}.0")
+    census = update_census(match_request, census_dir,
+                           force_full_refresh=args.refresh,
+                           refresh_group_ids=args.refresh_group_id)
+    cell_pairs = select_pairs(census, p_id_pattern=id_pattern, q_id_pattern=id_pattern, delta_z=1,
+                              min_p_z=13500, max_p_z=13798)
 
     plot_group_ids = []
     plot_counts = []
@@ -29,30 +43,22 @@ def main():
     max_count = 0
     bad_index = -1
 
-    for group_id in group_ids:
-        match_pairs = match_request.get_pairs_with_match_counts_for_group(group_id)
-        for pair in match_pairs:
-            delta_z = int(float(pair["qGroupId"])) - int(float(pair["pGroupId"]))
-            if delta_z == 1 and \
-                    id_pattern.match(pair["pId"]) and \
-                    id_pattern.match(pair["qId"]):
-
-                if pair["matchCount"] < 360:
-                    bad_index = 0
-                elif -1 < bad_index < 3:
-                    bad_index += 1
-                else:
-                    bad_index = -1
-
-                if bad_index > -1:
-                    plot_group_ids.append(pair["pGroupId"])
-
-                    match_count = pair["matchCount"]
-                    plot_counts.append(match_count)
-                    min_count = min(min_count, match_count)
-                    max_count = max(max_count, match_count)
-
-                    pair_parameters.append(f"pId={pair['pId']}&qId={pair['qId']}")
+    # include each low count pair and the 3 pairs that follow it
+    for p_group_id, p_id, q_id, match_count in zip(cell_pairs["pGroupId"], cell_pairs["pId"],
+                                                   cell_pairs["qId"], cell_pairs["matchCount"]):
+        if match_count < 360:
+            bad_index = 0
+        elif -1 < bad_index < 3:
+            bad_index += 1
+        else:
+            bad_index = -1
+
+        if bad_index > -1:
+            plot_group_ids.append(p_group_id)
+            plot_counts.append(match_count)
+            min_count = min(min_count, match_count)
+            max_count = max(max_count, match_count)
+            pair_parameters.append(f"pId={p_id}&qId={q_id}")
 
     tap_help = "to view matches"
     base_url = "http://renderer.int.janelia.org:8080/render-ws/view/tile-pair.html"
@@ -80,4 +86,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    main(sys.argv[1:])
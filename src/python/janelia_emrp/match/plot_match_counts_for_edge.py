@@ -1,47 +1,47 @@
+import argparse
 import re
+import sys
+from pathlib import Path
 
 from bokeh.io import show
 from bokeh.models import Range1d, ColumnDataSource, TapTool, OpenURL
 from bokeh.plotting import figure
 
+from janelia_emrp.match.match_census import update_census, select_pairs
 from janelia_emrp.render.web_service_request import MatchRequest
 
 
-def main():
+def main(arg_list: list[str]):
+    parser = argparse.ArgumentParser(description="Plot 0-0-0 to 0-0-1 match counts for a collection.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Fetch counts for all groups instead of reusing the saved census")
+    parser.add_argument("--refresh_group_id", nargs="+",
+                        help="Fetch counts again for these (changed) groups")
+    args = parser.parse_args(arg_list)
+
     owner = "cellmap"
     project = "jrc_zf_cardiac_1"
     stack = "v4_acquire"
     match_request = MatchRequest(host="em-services-1.int.janelia.org:8080",
                                  owner=owner,
                                  collection=f"{project}_v1")
+    census_dir = Path.home() / ".match_census"
 
     p_id_pattern = re.compile(r".*_.*_0-0-0\..*")  # "pId": "23-01-24_000020_0-0-0.1.0"
     q_id_pattern = re.compile(r".*_.*_0-0-1\..*")  # "qId": "23-01-24_000020_0-0-1.1.0"
 
-    group_ids = sorted(match_request.get_p_group_ids(), key=float)
-
-    plot_group_ids = []
-    plot_counts = []
-    pair_parameters = []
-
-    min_count = 999999
-    max_count = 0
-
-    for group_id in group_ids:
-        match_pairs = match_request.get_pairs_with_match_counts_for_group(group_id)
-        for pair in match_pairs:
-            if pair["pGroupId"] == pair["qGroupId"] and \
-                    p_id_pattern.match(pair["pId"]) and \
-                    q_id_pattern.match(pair["qId"]):
-
-                plot_group_ids.append(pair["pGroupId"])
+    census = update_census(match_request, census_dir,
+                           force_full_refresh=args.refresh,
+                           refresh_group_ids=args.refresh_group_id)
+    edge_pairs = select_pairs(census, p_id_pattern=p_id_pattern, q_id_pattern=q_id_pattern, delta_z=0)
+    edge_pairs = edge_pairs[edge_pairs["pGroupId"] == edge_pairs["qGroupId"]]
 
-                match_count = pair["matchCount"]
-                plot_counts.append(match_count)
-                min_count = min(min_count, match_count)
-                max_count = max(max_count, match_count)
+    plot_group_ids = edge_pairs["pGroupId"].tolist()
+    plot_counts = edge_pairs["matchCount"].tolist()
+    pair_parameters = ("pId=" + edge_pairs["pId"] + "&qId=" + edge_pairs["qId"]).tolist()
 
-                pair_parameters.append(f"pId={pair['pId']}&qId={pair['qId']}")
+    min_count = int(edge_pairs["matchCount"].min()) if len(edge_pairs) > 0 else 0
+    max_count = int(edge_pairs["matchCount"].max()) if len(edge_pairs) > 0 else 0
 
     tap_help = "to view matches"
     base_url = "http://renderer.int.janelia.org:8080/render-ws/view/tile-pair.html"
@@ -69,4 +69,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,148 @@
+import logging
+from pathlib import Path
+from typing import Final, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+FULL_IMAGE_COORDINATES_FILE_NAME: Final = "full_image_coordinates.txt"
+
+# SFOV image name stem: <slab>_<mfov>_<sfov>_<scan timestamp>, e.g. 020_000007_082_2022-04-03T0154134018404
+#   where d is any digit and all other characters must match exactly
+SFOV_NAME_TEMPLATE: Final = "ddd_dddddd_ddd_dddd-dd-ddTddddddddddddd"
+SFOV_INDEX_SLICE: Final = slice(11, 14)
+
+# stem character indexes that form the short sfov name, e.g. 020_000007_082_20220403_015413
+# (removes dashes, replaces T with an underscore, and drops the last 7 timestamp digits)
+SHORT_SFOV_NAME_INDEXES: Final = [*range(0, 19), 20, 21, 23, 24, 25, *range(26, 32)]
+SHORT_SFOV_NAME_UNDERSCORE_INDEX: Final = 23
+
+COORDINATE_FIELD_NAMES: Final = ["relative_path", "mfov", "sfov", "short_sfov_name", "stage_x", "stage_y"]
+
+
+def to_code_points(strings: np.ndarray,
+                   width: int) -> np.ndarray:
+    """
+    Returns
+    -------
+    np.ndarray
+        (len(strings), width) uint32 array of unicode code points (zero padded).
+    """
+    return strings.astype(f"U{width}").view(np.uint32).reshape(len(strings), width)
+
+
+def from_code_points(code_points: np.ndarray) -> np.ndarray:
+    """
+    Returns
+    -------
+    np.ndarray
+        Unicode string array for the rows of a 2D code point array (trailing zeros are dropped).
+    """
+    return np.ascontiguousarray(code_points, dtype=np.uint32).view(f"U{code_points.shape[1]}").ravel()
+
+
+def load_full_image_coordinates(full_image_coordinates_path: Path,
+                                image_suffix: Optional[str] = ".png") -> np.ndarray:
+    """
+    Loads a full_image_coordinates.txt file with one (vectorized) parse of all rows.
+    Image names are validated and split using fixed character positions (see SFOV_NAME_TEMPLATE)
+    on arrays of unicode code points instead of matching a regular expression for each row.
+
+    Each file row has a tab separated windows relative image path, stage x, stage y, and stage z, e.g.
+    000007\\020_000007_082_2022-04-03T0154134018404.png	2014641.659	915550.903	0
+
+    Parameters
+    ----------
+    full_image_coordinates_path : Path
+        path of the file to load.
+
+    image_suffix : Optional[str]
+        required suffix for all image paths or None to allow any suffix.
+
+    Returns
+    -------
+    np.ndarray
+        Structured array with one element (in file order) for each row, with fields:
+        relative_path (unix relative image path), mfov (e.g. 000007), sfov (sfov index name, e.g. 082),
+        short_sfov_name (e.g. 020_000007_082_20220403_015413), stage_x, and stage_y
+        (stage values are truncated to int64).
+
+    Raises
+    ------
+    RuntimeError
+        If any image path or stage location cannot be parsed.
+    """
+    try:
+        rows = pd.read_csv(full_image_coordinates_path,
+                           sep="\t",
+                           header=None,
+                           usecols=[0, 1, 2],
+                           names=["path", "x", "y"],
+                           dtype={"path": str, "x": np.float64, "y": np.float64})
+    except pd.errors.EmptyDataError:
+        return empty_full_image_coordinates()
+
+    if len(rows) == 0:
+        return empty_full_image_coordinates()
+
+    relative_paths = np.char.replace(rows["path"].to_numpy(dtype=str), "\\", "/")
+    mfov_names, _, image_names = np.char.partition(relative_paths, "/").T
+
+    # validate and split image names using fixed character positions of the name template
+    stem_length = len(SFOV_NAME_TEMPLATE)
+    name_width = max(stem_length + 1, int(np.char.str_len(image_names).max(initial=0)))
+    name_code_points = to_code_points(image_names, name_width)
+    stem_code_points = name_code_points[:, :stem_length]
+    suffixes = from_code_points(name_code_points[:, stem_length:])
+
+    template_code_points = np.array([ord(c) for c in SFOV_NAME_TEMPLATE], dtype=np.uint32)
+    is_digit_position = template_code_points == ord("d")
+    is_digit = (stem_code_points >= ord("0")) & (stem_code_points <= ord("9"))
+    stem_matches = np.where(is_digit_position, is_digit, stem_code_points == template_code_points).all(axis=1)
+
+    stage_x = rows["x"].to_numpy()
+    stage_y = rows["y"].to_numpy()
+
+    valid = np.char.isdigit(mfov_names) & stem_matches & np.char.startswith(suffixes, ".")
+    valid &= np.isfinite(stage_x) & np.isfinite(stage_y)
+    if image_suffix is None:
+        valid &= np.char.isalnum(np.char.lstrip(suffixes, "."))
+    else:
+        valid &= suffixes == image_suffix
+    if not valid.all():
+        raise RuntimeError(f"failed to parse row with unix_relative_image_path {relative_paths[~valid][0]} "
+                           f"in {full_image_coordinates_path}")
+
+    short_sfov_name_code_points = stem_code_points[:, SHORT_SFOV_NAME_INDEXES].copy()
+    short_sfov_name_code_points[:, SHORT_SFOV_NAME_UNDERSCORE_INDEX] = ord("_")
+
+    columns = [
+        relative_paths,
+        mfov_names.astype(f"U{max(1, int(np.char.str_len(mfov_names).max(initial=0)))}"),
+        from_code_points(stem_code_points[:, SFOV_INDEX_SLICE]),
+        from_code_points(short_sfov_name_code_points),
+        stage_x.astype(np.int64),  # truncates like int(float(x))
+        stage_y.astype(np.int64),
+    ]
+    coordinate_dtype = [(name, column.dtype) for name, column in zip(COORDINATE_FIELD_NAMES, columns)]
+    coordinates = np.empty(len(rows), dtype=coordinate_dtype)
+    for name, column in zip(COORDINATE_FIELD_NAMES, columns):
+        coordinates[name] = column
+
+    logger.debug(f"load_full_image_coordinates: loaded {len(coordinates)} rows from {full_image_coordinates_path}")
+
+    return coordinates
+
+
+def empty_full_image_coordinates() -> np.ndarray:
+    """
+    Returns
+    -------
+    np.ndarray
+        Structured array with the fields of `load_full_image_coordinates` and no elements.
+    """
+    return np.empty(0, dtype=[(name, np.int64 if name.startswith("stage_") else "U1")
+                              for name in COORDINATE_FIELD_NAMES])
@@ -18,8 +18,7 @@ from skimage.transform import EuclideanTransform
 from constant import FACTOR_THUMBNAIL, N_BEAMS
 from path import get_image_paths, get_slab_path
 from roi import get_mfovs
-from xdim import XDim
-from xvar import XVar
+from xlog_index import XlogIndex, get_xlog_index
 
 matplotlib.use("tkagg")
 
@@ -29,7 +28,7 @@ if TYPE_CHECKING:
     import xarray as xr
 
 
-def get_slab_rotation(xlog: xr.Dataset, scan: int, slab: int) -> float:
+def get_slab_rotation(xlog: xr.Dataset | XlogIndex, scan: int, slab: int) -> float:
     """Returns the rotation of a slab, in degrees.
 
     The slab rotation depends on the scan, because:
@@ -37,11 +36,14 @@ def get_slab_rotation(xlog: xr.Dataset, scan: int, slab: int) -> float:
         2. the coordinates exposed for downstream assembly hide low-level hardware artefacts
     The scan dependency is likely negligible, but it is conceptually correct.
     """
-    return 180 + xlog[XVar.ROTATION_SLAB].sel(scan=scan, slab=slab).values.item()
+    return get_xlog_index(xlog).get_slab_rotations(scan=scan, slabs=[slab])[0].item()
 
 
 def get_xy_slab(
-    xlog: xr.Dataset, scan: int, slab: int, mfovs: list[int] | np.ndarray | None = None
+    xlog: xr.Dataset | XlogIndex,
+    scan: int,
+    slab: int,
+    mfovs: list[int] | np.ndarray | None = None,
 ) -> np.ndarray:
     """Returns the coordinates of the SFOV centers of a slab, in full resolution pixels.
 
@@ -63,13 +65,7 @@ def get_xy_slab(
 
     If mfovs is None, then we use all the MFOVs of the slab.
     """
-    return (
-        xlog[[XVar.X, XVar.Y]]
-        .sel(scan=scan, slab=slab, mfov=mfovs if mfovs is not None else slice(0, None))
-        .dropna(XDim.MFOV, how="all")
-        .to_dataarray()
-        .values
-    )
+    return get_xlog_index(xlog).get_xy_slab(scan=scan, slab=slab, mfovs=mfovs)
 
 
 def open_sfovs(paths: list[Path], client: Client | None = None) -> np.ndarray:
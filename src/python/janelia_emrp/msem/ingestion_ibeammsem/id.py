@@ -8,33 +8,31 @@ import numpy as np
 
 from roi import get_n_slabs
 from xdim import XDim
+from xlog_index import XlogIndex, get_xlog_index
 from xvar import XVar
 
 if TYPE_CHECKING:
     import xarray as xr
 
 
-def get_all_magc_ids(xlog: xr.Dataset) -> np.ndarray:
+def get_all_magc_ids(xlog: xr.Dataset | XlogIndex) -> np.ndarray:
     """Gets all MagC IDs of the wafer."""
-    return xlog[XDim.SLAB].values
+    return get_xlog_index(xlog).labels(XDim.SLAB)
 
 
 def get_serial_ids(
-    xlog: xr.Dataset, magc_ids: list[int] | np.ndarray
+    xlog: xr.Dataset | XlogIndex, magc_ids: list[int] | np.ndarray
 ) -> int | None | list[int | None]:
     """Returns the serial IDs of slabs identified by their MagC IDs.
 
     If a magc_id does not have a serial ID, then returns None.
         e.g., a slab does not contain any tissue imaged during the experiment.
     """
-    return [
-        None if np.isnan(serial_id) else int(serial_id)
-        for serial_id in xlog[XVar.ID_SERIAL].sel(slab=magc_ids).load()
-    ]
+    return get_xlog_index(xlog).get_serial_ids(magc_ids=magc_ids)
 
 
 def get_magc_ids(
-    xlog: xr.Dataset, serial_ids: list[int] | np.ndarray
+    xlog: xr.Dataset | XlogIndex, serial_ids: list[int] | np.ndarray
 ) -> int | None | list[int | None]:
     """Returns the MagC IDs of slabs identified by their serial IDs.
 
@@ -45,18 +43,14 @@ def get_magc_ids(
         raise ValueError(
             f"a serial_id value provided is greater than the number of slabs {n_slabs}"
         )
-    serial_values = xlog[XVar.ID_SERIAL].values
+    serial_values = get_xlog_index(xlog).values(XVar.ID_SERIAL)
     sorter = np.argsort(serial_values)
     indices = sorter[np.searchsorted(serial_values, serial_ids, sorter=sorter)]
     return indices
 
 
 def get_region_ids(
-    xlog: xr.Dataset, slab: int, mfovs: list[int] | np.ndarray
+    xlog: xr.Dataset | XlogIndex, slab: int, mfovs: list[int] | np.ndarray
 ) -> list[int | None]:
     """Returns the region ID of MFOVs."""
-    _region_ids = xlog[XVar.ID_REGION_LAYOUT].sel(slab=slab, mfov=mfovs).values
-    return [
-        None if np.isnan(_region_id) or _region_id == -1 else int(_region_id)
-        for _region_id in _region_ids
-    ]
+    return get_xlog_index(xlog).get_region_ids(slab=slab, mfovs=mfovs)
@@ -5,47 +5,184 @@ from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING
 
+import dask.array as da
 import numpy as np
+import pandas as pd
+import xarray as xr
+
+from xdim import XDim
+from xlog_index import ALL_MFOVS, XlogIndex, get_xlog_index
 from xvar import XVar
 
 if TYPE_CHECKING:
-    import xarray as xr
+    from pathlib import Path
+
+DEFAULT_PERCENTILES = (1, 5, 50, 95, 99)
+"""intensity percentiles computed by get_histogram_metrics."""
+
+TABLE_COLUMN_DTYPES = {XDim.SCAN: np.int32, XDim.SLAB: np.int32, XDim.MFOV: np.int32}
+TABLE_COLUMN_DTYPES |= {XDim.SFOV: np.int32, "count": np.int64}
+"""metrics table column types. Metric columns are float32: intensities are 8-bit."""
 
 
 def get_raw_average(
-    xlog: xr.Dataset, scan: int, slab: int, mfov: int, sfov: int
+    xlog: xr.Dataset | XlogIndex, scan: int, slab: int, mfov: int, sfov: int
 ) -> float:
     """Returns the raw intensity average of all pixels of a SFOV.
 
     There is no pixel exclusion.
     """
-    histogram = (
-        xlog[XVar.HISTOGRAM].sel(scan=scan, slab=slab, mfov=mfov, sfov=sfov).values
+    return get_xlog_index(xlog).get_raw_averages(
+        scan=scan, slab=slab, mfovs=mfov, sfovs=sfov
     )
-    return np.sum(histogram * np.arange(256)) / np.sum(histogram)
 
 
 def get_raw_stdev(
-    xlog: xr.Dataset, scan: int, slab: int, mfov: int, sfov: int
+    xlog: xr.Dataset | XlogIndex, scan: int, slab: int, mfov: int, sfov: int
 ) -> float:
     """Returns the raw intensity stdev of all pixels of a SFOV.
 
     There is no pixel exclusion.
     """
-    selection = dict(scan=scan, slab=slab, mfov=mfov, sfov=sfov)
-    histogram = xlog[XVar.HISTOGRAM].sel(selection).values
-    return np.sqrt(
-        np.sum(
-            np.square(np.arange(256) - get_raw_average(**(selection | dict(xlog=xlog))))
-            * histogram
-        )
-        / np.sum(histogram)
+    return get_xlog_index(xlog).get_raw_stdevs(
+        scan=scan, slab=slab, mfovs=mfov, sfovs=sfov
     )
 
 
-def get_timestamp(xlog: xr.Dataset, scan: int, slab: int, mfov: int) -> datetime | None:
+def get_timestamp(
+    xlog: xr.Dataset | XlogIndex, scan: int, slab: int, mfov: int
+) -> datetime | None:
     """Returns the acquisition timestamp of an MFOV."""
-    _timestamp = (
-        xlog[XVar.ACQUISITION].sel(scan=scan, slab=slab, mfov=mfov).values.item()
+    return get_xlog_index(xlog).get_timestamps(scan=scan, slab=slab, mfovs=[mfov])[0]
+
+
+def get_histogram_metric_names(percentiles: tuple[float, ...]) -> list[str]:
+    """Returns the names of the metrics computed by compute_histogram_metrics."""
+    return [
+        "count",
+        "average",
+        "stdev",
+        *(f"percentile_{percentile:g}" for percentile in percentiles),
+        "fraction_black",
+        "fraction_saturated",
+    ]
+
+
+def compute_histogram_metrics(
+    histograms: np.ndarray, percentiles: tuple[float, ...] = DEFAULT_PERCENTILES
+) -> np.ndarray:
+    """Computes raw intensity metrics of many SFOVs in one pass over their histograms.
+
+    histograms has shape (..., 256): the last axis is the intensity bin.
+    Returns an array of shape (..., n_metrics), see get_histogram_metric_names:
+        count: number of pixels.
+        average, stdev: same values as get_raw_average and get_raw_stdev
+            (up to floating point rounding).
+        percentile_p: smallest intensity with at least p% of the pixels at or below it.
+        fraction_black, fraction_saturated: fractions of pixels at 0 and at 255.
+    Metrics of SFOVs without pixels (e.g., not acquired) are nan, except count.
+    """
+    histograms = np.asarray(histograms, dtype=np.float64)
+    intensities = np.arange(histograms.shape[-1])
+    count = histograms.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average = (histograms @ intensities) / count
+        # centered sum of squares: E[x^2] - E[x]^2 cancels badly for narrow histograms
+        deviations = intensities - average[..., np.newaxis]
+        stdev = np.sqrt(np.sum(histograms * np.square(deviations), axis=-1) / count)
+
+        cumulative = np.cumsum(histograms, axis=-1)
+        percentile_values = [
+            np.where(
+                count > 0,
+                np.sum(
+                    cumulative < (percentile / 100 * count)[..., np.newaxis], axis=-1
+                ),
+                np.nan,
+            )
+            for percentile in percentiles
+        ]
+        fraction_black = histograms[..., 0] / count
+        fraction_saturated = histograms[..., -1] / count
+
+    return np.stack(
+        [
+            count,
+            average,
+            stdev,
+            *percentile_values,
+            fraction_black,
+            fraction_saturated,
+        ],
+        axis=-1,
+    )
+
+
+def get_histogram_metrics(
+    xlog: xr.Dataset,
+    scan: int | None = None,
+    percentiles: tuple[float, ...] = DEFAULT_PERCENTILES,
+) -> xr.Dataset:
+    """Returns raw intensity metrics of every SFOV of a scan (or of the wafer).
+
+    If scan is None, then the metrics of all scans are returned.
+
+    The metrics are computed in one vectorized pass over the HISTOGRAM tensor.
+    If the xarray is dask-backed (e.g., opened with open_zarr),
+        then the metrics are reduced chunk by chunk,
+        so the tensor does not need to fit in memory.
+
+    Returns a dataset with one variable per metric (see compute_histogram_metrics)
+        over the scan (if scan is None), slab, mfov, and sfov dimensions.
+    """
+    selection = dict(mfov=ALL_MFOVS) | ({} if scan is None else dict(scan=scan))
+    histogram = xlog[XVar.HISTOGRAM].sel(selection)
+    histogram = histogram.transpose(
+        *(dim for dim in XDim if dim in histogram.dims and dim != XDim.BIN), XDim.BIN
+    )
+    metric_names = get_histogram_metric_names(percentiles)
+
+    if isinstance(histogram.data, da.Array):
+        metrics = histogram.data.rechunk({histogram.data.ndim - 1: -1}).map_blocks(
+            compute_histogram_metrics,
+            percentiles,
+            chunks=histogram.data.chunks[:-1] + ((len(metric_names),),),
+            dtype=np.float64,
+        )
+        metrics = metrics.compute()
+    else:
+        metrics = compute_histogram_metrics(histogram.values, percentiles)
+
+    dims = histogram.dims[:-1]
+    return xr.Dataset(
+        {name: (dims, metrics[..., index]) for index, name in enumerate(metric_names)},
+        coords={dim: histogram[dim].values for dim in dims},
+    )
+
+
+def histogram_metrics_to_table(metrics: xr.Dataset) -> pd.DataFrame:
+    """Returns one row per acquired SFOV (count > 0) of get_histogram_metrics."""
+    table = metrics.to_dataframe().reset_index()
+    return table[table["count"] > 0].reset_index(drop=True)
+
+
+def write_histogram_metrics_table(table: pd.DataFrame, path: Path) -> None:
+    """Writes a metrics table as a compressed NumPy archive, one array per column.
+
+    See TABLE_COLUMN_DTYPES for the stored column types.
+    """
+    np.savez_compressed(
+        path,
+        **{
+            column: table[column].to_numpy(
+                dtype=TABLE_COLUMN_DTYPES.get(column, np.float32)
+            )
+            for column in table.columns
+        },
     )
-    return None if np.isnan(_timestamp) else datetime.fromtimestamp(_timestamp)
+
+
+def read_histogram_metrics_table(path: Path) -> pd.DataFrame:
+    """Reads a table written by write_histogram_metrics_table."""
+    with np.load(path) as arrays:
+        return pd.DataFrame({column: arrays[column] for column in arrays.files})
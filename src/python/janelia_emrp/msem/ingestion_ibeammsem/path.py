@@ -6,13 +6,13 @@ from pathlib import Path
 from typing import TYPE_CHECKING
 
 from constant import N_BEAMS
-from xvar import XVar
+from xlog_index import XlogIndex, get_xlog_index
 
 if TYPE_CHECKING:
     import xarray as xr
 
 
-def get_slab_path(xlog: xr.Dataset, scan: int, slab: int) -> Path:
+def get_slab_path(xlog: xr.Dataset | XlogIndex, scan: int, slab: int) -> Path:
     """Gets the slab path.
 
     Slab paths are stored as UNC paths.
@@ -21,7 +21,7 @@ def get_slab_path(xlog: xr.Dataset, scan: int, slab: int) -> Path:
         instead of assuming that the root storage path
         stays the same throughout the wafer experiment.
     """
-    return Path(xlog[XVar.PATH].sel(scan=scan, slab=slab).values.item())
+    return get_xlog_index(xlog).get_slab_paths(scan=scan, slabs=[slab])[0]
 
 
 def get_mfov_path(slab_path: Path, mfov: int) -> Path:
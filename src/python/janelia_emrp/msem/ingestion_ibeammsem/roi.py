@@ -7,17 +7,22 @@ from typing import TYPE_CHECKING
 import matplotlib.pyplot as plt
 import numpy as np
 
-from constant import N_BEAMS
-from xdim import XDim
+from xlog_index import XlogIndex, get_xlog_index
 from xvar import XVar
 
 if TYPE_CHECKING:
     import xarray as xr
 
 
-def get_distance_to_roi(xlog: xr.Dataset, slab: int, mfov: int, sfov: int) -> float:
+def get_distance_to_roi(
+    xlog: xr.Dataset | XlogIndex, slab: int, mfov: int, sfov: int
+) -> float:
     """Returns the distance between an SFOV center and the nearest ROI boundary."""
-    return xlog[XVar.DISTANCE_ROI].sel(slab=slab, mfov=mfov, sfov=sfov).values.item()
+    return (
+        get_xlog_index(xlog)
+        .get_distances_to_roi(slab=slab, mfovs=mfov, sfovs=sfov)
+        .item()
+    )
 
 
 def plot_distance_roi(xlog: xr.Dataset, slab: int, mfov: int | None = None) -> None:
@@ -34,15 +39,14 @@ def plot_distance_roi(xlog: xr.Dataset, slab: int, mfov: int | None = None) -> N
 
 
 def get_roi_sfovs(
-    xlog: xr.Dataset, slab: int, mfov: int, dilation: float = 15
+    xlog: xr.Dataset | XlogIndex, slab: int, mfov: int, dilation: float = 15
 ) -> list[int]:
     """Returns SFOV IDs of an MFOV that are inside the dilated ROI boundaries.
 
     The boundary grows outwards with a positive dilation.
     The boundary grows inwards  with a negative dilation.
     """
-    mask = xlog[XVar.DISTANCE_ROI].sel(slab=slab, mfov=mfov) < dilation
-    return mask.where(mask).dropna(XDim.SFOV)[XDim.SFOV].astype(int).values
+    return get_xlog_index(xlog).get_roi_sfovs(slab=slab, mfov=mfov, dilation=dilation)
 
 
 def plot_tissue_sfovs(
@@ -67,44 +71,30 @@ def plot_tissue_sfovs(
     plt.show()
 
 
-def get_slabs(xlog: xr.Dataset, scan: int) -> np.ndarray:
+def get_slabs(xlog: xr.Dataset | XlogIndex, scan: int) -> np.ndarray:
     """Returns the IDs of effective slabs in a scan.
 
     The number of slabs in a scan can be smaller than the total number of slabs:
         1. some slabs do not have any tissue to be imaged
         2. some slabs have been entirely milled and they are not imaged any more
     """
-    return (
-        xlog[XVar.ACQUISITION]
-        .sel(scan=scan, mfov=slice(0, None))
-        .sum(XDim.MFOV, min_count=1)
-        .dropna(XDim.SLAB)[XDim.SLAB]
-        .values.astype(int)
-    )
+    return get_xlog_index(xlog).get_slabs(scan=scan)
 
 
-def get_n_slabs(xlog: xr.Dataset, scan: int) -> np.ndarray:
+def get_n_slabs(xlog: xr.Dataset | XlogIndex, scan: int) -> np.ndarray:
     """Returns the number of effective slabs in a scan. See get_slabs."""
-    return (
-        xlog[XVar.ACQUISITION]
-        .sel(scan=scan, mfov=slice(0, None))
-        .sum(XDim.MFOV, min_count=1)
-        .dropna(XDim.SLAB)[XDim.SLAB]
-        .size
-    )
+    return get_xlog_index(xlog).get_n_slabs(scan=scan)
 
 
-def get_n_mfovs(xlog: xr.Dataset, scan: int) -> int:
+def get_n_mfovs(xlog: xr.Dataset | XlogIndex, scan: int) -> int:
     """Returns the total number of MFOVs in a scan.
 
     We count how many MFOVs have a non-nan acquisition time.
     """
-    return (
-        xlog[XVar.ACQUISITION].sel(scan=scan, mfov=slice(0, None)).count().values.item()
-    )
+    return get_xlog_index(xlog).get_n_mfovs(scan=scan)
 
 
-def get_mfovs(xlog: xr.Dataset, slab: int) -> np.ndarray:
+def get_mfovs(xlog: xr.Dataset | XlogIndex, slab: int) -> np.ndarray:
     """Returns the effective MFOV IDs of a slab.
 
     A slab may have 12 MFOVs, and another may have 27 MFOVs.
@@ -121,25 +111,15 @@ def get_mfovs(xlog: xr.Dataset, slab: int) -> np.ndarray:
     To get the effective MFOV IDs of a slab,
         we exclude the MFOVs that lack metrics such as acquisition timestamp.
     """
-    return (
-        xlog[XVar.ACQUISITION]
-        .sel(scan=0, slab=slab, mfov=slice(0, None))
-        .dropna(XDim.MFOV)[XDim.MFOV]
-        .values
-    )
+    return get_xlog_index(xlog).get_mfovs(slab=slab)
 
 
-def get_percentage_tissue(xlog: xr.Dataset, scan: int, dilation: float = 15) -> float:
+def get_percentage_tissue(
+    xlog: xr.Dataset | XlogIndex, scan: int, dilation: float = 15
+) -> float:
     """Returns the percentage of all SFOVs that are inside the dilated ROIs.
 
     It gives an idea of how much process/storage can be avoided
         if we exclude the non-tissue SFOVs.
     """
-    return (
-        100
-        * (xlog[XVar.DISTANCE_ROI].sel(mfov=slice(0, None)) < dilation)
-        .sum()
-        .values.item()
-        / get_n_mfovs(xlog=xlog, scan=scan)
-        / N_BEAMS
-    )
+    return get_xlog_index(xlog).get_percentage_tissue(scan=scan, dilation=dilation)
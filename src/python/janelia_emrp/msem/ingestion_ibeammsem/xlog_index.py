@@ -0,0 +1,365 @@
+"""Indexed, cached access to the xarray variables used for data ingestion."""
+
+from __future__ import annotations
+
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from constant import N_BEAMS
+from xdim import XDim
+from xvar import XVar
+
+if TYPE_CHECKING:
+    import xarray as xr
+
+DEFAULT_MAX_CACHED_SLICES = 64
+"""default number of per-scan (or per-scan-slab) slices kept in memory."""
+
+ALL_MFOVS = slice(0, None)
+"""label slice of the effective MFOVs. Negative MFOV indexes are internal."""
+
+_xlog_id_to_index: dict[int, tuple[weakref.ref, XlogIndex]] = {}
+"""indexes keyed by id of their xarray (xarray datasets are not hashable).
+
+Each entry keeps a weak reference to its xarray:
+    the entry is only used if the reference still points to the requested xarray
+    and it is evicted when the xarray is garbage collected.
+"""
+
+
+def get_xlog_index(xlog: xr.Dataset | XlogIndex) -> XlogIndex:
+    """Returns the XlogIndex of an xarray, creating it on first use.
+
+    The index is reused by all subsequent calls with the same xarray,
+        so the helper functions of the neighbor modules
+        decode each zarr chunk at most once (subject to the slice LRU).
+    The cached index only holds a weak reference to the xarray,
+        so the index and its loaded arrays are released with the xarray.
+    Callers that want to control the lifetime of the loaded arrays
+        can create an XlogIndex and pass it instead of the xarray.
+    """
+    if isinstance(xlog, XlogIndex):
+        return xlog
+    key = id(xlog)
+    entry = _xlog_id_to_index.get(key)
+    if entry is not None and entry[0]() is xlog:
+        return entry[1]
+    index = XlogIndex(xlog, weak=True)
+    xlog_ref = weakref.ref(xlog, partial(_evict_xlog_index, key))
+    _xlog_id_to_index[key] = (xlog_ref, index)
+    return index
+
+
+def _evict_xlog_index(key: int, xlog_ref: weakref.ref) -> None:
+    """Removes the cached index of a garbage collected xarray."""
+    entry = _xlog_id_to_index.get(key)
+    if entry is not None and entry[0] is xlog_ref:
+        del _xlog_id_to_index[key]
+
+
+class XlogIndex:
+    """Dense NumPy view of the xarray variables used for data ingestion.
+
+    Variables are loaded lazily, at most once:
+        - variables with an SFOV dimension and a scan dimension (X, Y)
+            are loaded one scan at a time.
+        - variables with a bin dimension (HISTOGRAM)
+            are loaded one (scan, slab) at a time.
+        - all other variables (PATH, ROTATION_SLAB, ACQUISITION, DISTANCE_ROI, ...)
+            are loaded entirely on first use.
+    Scan and scan-slab slices are kept in an LRU of max_cached_slices entries.
+
+    Loaded arrays are transposed to the canonical dimension order
+        scan, slab, mfov, sfov, bin
+        and labels are converted to array positions with sorted searches,
+        so batch queries are plain NumPy indexing.
+
+    With weak=True, the index does not keep its xarray alive (see get_xlog_index).
+    """
+
+    def __init__(
+        self,
+        xlog: xr.Dataset,
+        max_cached_slices: int = DEFAULT_MAX_CACHED_SLICES,
+        *,
+        weak: bool = False,
+    ) -> None:
+        self._xlog = None if weak else xlog
+        self._xlog_ref = weakref.ref(xlog) if weak else None
+        self.max_cached_slices = max_cached_slices
+        self._labels: dict[XDim, np.ndarray] = {}
+        self._sorters: dict[XDim, np.ndarray] = {}
+        self._dims: dict[XVar, tuple[XDim, ...]] = {}
+        self._variables: dict[XVar, np.ndarray] = {}
+        self._slices: OrderedDict[tuple, np.ndarray] = OrderedDict()
+
+    @property
+    def xlog(self) -> xr.Dataset:
+        """Returns the indexed xarray.
+
+        Raises ReferenceError if a weakly referenced xarray has been garbage collected.
+        """
+        if self._xlog_ref is None:
+            return self._xlog
+        xlog = self._xlog_ref()
+        if xlog is None:
+            raise ReferenceError(
+                "the xarray of this XlogIndex has been garbage collected"
+            )
+        return xlog
+
+    def labels(self, dim: XDim) -> np.ndarray:
+        """Returns the coordinate labels of a dimension."""
+        if dim not in self._labels:
+            self._labels[dim] = self.xlog[dim].values
+            self._sorters[dim] = np.argsort(self._labels[dim], kind="stable")
+        return self._labels[dim]
+
+    def positions(
+        self, dim: XDim, labels: int | list[int] | np.ndarray | slice
+    ) -> int | np.ndarray:
+        """Returns the array positions of dimension labels.
+
+        A scalar label returns a scalar position.
+        A slice is a label slice (inclusive of both ends) like xarray sel.
+
+        Raises KeyError if a label does not exist.
+        """
+        dim_labels = self.labels(dim)
+        sorter = self._sorters[dim]
+        if isinstance(labels, slice):
+            sorted_labels = dim_labels[sorter]
+            start = (
+                0
+                if labels.start is None
+                else np.searchsorted(sorted_labels, labels.start, side="left")
+            )
+            stop = (
+                len(sorted_labels)
+                if labels.stop is None
+                else np.searchsorted(sorted_labels, labels.stop, side="right")
+            )
+            return np.sort(sorter[start:stop])
+
+        requested = np.asarray(labels)
+        found = np.searchsorted(dim_labels, requested, sorter=sorter)
+        found = sorter[np.minimum(found, len(sorter) - 1)]
+        missing = dim_labels[found] != requested
+        if np.any(missing):
+            raise KeyError(
+                f"{dim} labels not found: "
+                f"{np.atleast_1d(requested)[np.atleast_1d(missing)]}"
+            )
+        return found.item() if requested.ndim == 0 else found
+
+    def dims(self, var: XVar) -> tuple[XDim, ...]:
+        """Returns the dimensions of a variable in canonical order."""
+        if var not in self._dims:
+            variable_dims = self.xlog[var].dims
+            self._dims[var] = tuple(dim for dim in XDim if dim in variable_dims)
+        return self._dims[var]
+
+    def _load(self, var: XVar, **labels) -> np.ndarray:
+        """Loads a variable (or a selection of it) in canonical dimension order."""
+        data_array = self.xlog[var]
+        if labels:
+            data_array = data_array.sel(labels)
+        return data_array.transpose(
+            *(dim for dim in XDim if dim in data_array.dims)
+        ).values
+
+    def _cached_slice(self, key: tuple, var: XVar, **labels) -> np.ndarray:
+        """Loads a variable slice through the LRU."""
+        values = self._slices.get(key)
+        if values is None:
+            values = self._load(var, **labels)
+            self._slices[key] = values
+            while len(self._slices) > self.max_cached_slices:
+                self._slices.popitem(last=False)
+        else:
+            self._slices.move_to_end(key)
+        return values
+
+    def values(
+        self, var: XVar, **labels: int | list[int] | np.ndarray | slice
+    ) -> np.ndarray:
+        """Returns the values of a variable selected by labels, like xarray sel.
+
+        Scalar labels drop their dimension.
+        Variables that are sliced per scan (or per scan and slab)
+            require scalar scan (and slab) labels.
+        """
+        dims = self.dims(var)
+        unknown_dims = set(labels) - set(dims)
+        if unknown_dims:
+            raise ValueError(f"{var} does not have dimensions {unknown_dims}")
+
+        block_dims = [XDim.SCAN] if XDim.SCAN in dims and XDim.SFOV in dims else []
+        if XDim.BIN in dims:
+            block_dims = [dim for dim in (XDim.SCAN, XDim.SLAB) if dim in dims]
+
+        if block_dims:
+            block_labels = {dim: labels.pop(dim, None) for dim in block_dims}
+            if any(not np.isscalar(label) for label in block_labels.values()):
+                raise ValueError(f"{var} requires scalar {block_dims} labels")
+            block = self._cached_slice(
+                (var, *block_labels.values()), var, **block_labels
+            )
+        else:
+            if var not in self._variables:
+                self._variables[var] = self._load(var)
+            block = self._variables[var]
+
+        axis = 0
+        for dim in (dim for dim in dims if dim not in block_dims):
+            if dim not in labels:
+                axis += 1
+                continue
+            position = self.positions(dim, labels[dim])
+            block = np.take(block, position, axis=axis)
+            if not np.isscalar(position):
+                axis += 1
+        return block
+
+    def get_serial_ids(self, magc_ids: list[int] | np.ndarray) -> list[int | None]:
+        """Returns the serial IDs of slabs identified by their MagC IDs."""
+        return [
+            None if np.isnan(serial_id) else int(serial_id)
+            for serial_id in np.atleast_1d(self.values(XVar.ID_SERIAL, slab=magc_ids))
+        ]
+
+    def get_region_ids(
+        self, slab: int, mfovs: list[int] | np.ndarray
+    ) -> list[int | None]:
+        """Returns the region ID of MFOVs."""
+        return [
+            None if np.isnan(_region_id) or _region_id == -1 else int(_region_id)
+            for _region_id in self.values(XVar.ID_REGION_LAYOUT, slab=slab, mfov=mfovs)
+        ]
+
+    def get_slab_paths(self, scan: int, slabs: list[int] | np.ndarray) -> list[Path]:
+        """Returns the paths of slabs in a scan."""
+        return [Path(path) for path in self.values(XVar.PATH, scan=scan, slab=slabs)]
+
+    def get_slab_rotations(
+        self, scan: int, slabs: list[int] | np.ndarray
+    ) -> np.ndarray:
+        """Returns the rotations of slabs in a scan, in degrees."""
+        return 180 + self.values(XVar.ROTATION_SLAB, scan=scan, slab=slabs)
+
+    def get_xy_slab(
+        self, scan: int, slab: int, mfovs: list[int] | np.ndarray | None = None
+    ) -> np.ndarray:
+        """Returns the (2, n_mfovs, N_BEAMS) coordinates of the SFOV centers of a slab.
+
+        MFOVs without any coordinates are dropped. See assembly.get_xy_slab.
+        """
+        mfov = mfovs if mfovs is not None else ALL_MFOVS
+        xy = np.stack(
+            [
+                self.values(XVar.X, scan=scan, slab=slab, mfov=mfov),
+                self.values(XVar.Y, scan=scan, slab=slab, mfov=mfov),
+            ]
+        )
+        return xy[:, ~np.isnan(xy).all(axis=(0, 2))]
+
+    def get_histograms(
+        self,
+        scan: int,
+        slab: int,
+        mfovs: int | list[int] | np.ndarray | slice = ALL_MFOVS,
+        sfovs: int | list[int] | np.ndarray | slice = slice(None),
+    ) -> np.ndarray:
+        """Returns SFOV histograms of a slab with a trailing bin dimension."""
+        return self.values(XVar.HISTOGRAM, scan=scan, slab=slab, mfov=mfovs, sfov=sfovs)
+
+    def get_raw_averages(
+        self,
+        scan: int,
+        slab: int,
+        mfovs: int | list[int] | np.ndarray | slice = ALL_MFOVS,
+        sfovs: int | list[int] | np.ndarray | slice = slice(None),
+    ) -> np.ndarray:
+        """Returns the raw intensity averages of SFOVs of a slab."""
+        histograms = self.get_histograms(scan=scan, slab=slab, mfovs=mfovs, sfovs=sfovs)
+        return np.sum(histograms * np.arange(256), axis=-1) / np.sum(
+            histograms, axis=-1
+        )
+
+    def get_raw_stdevs(
+        self,
+        scan: int,
+        slab: int,
+        mfovs: int | list[int] | np.ndarray | slice = ALL_MFOVS,
+        sfovs: int | list[int] | np.ndarray | slice = slice(None),
+    ) -> np.ndarray:
+        """Returns the raw intensity stdevs of SFOVs of a slab."""
+        histograms = self.get_histograms(scan=scan, slab=slab, mfovs=mfovs, sfovs=sfovs)
+        averages = np.sum(histograms * np.arange(256), axis=-1) / np.sum(
+            histograms, axis=-1
+        )
+        return np.sqrt(
+            np.sum(
+                np.square(np.arange(256) - averages[..., np.newaxis]) * histograms,
+                axis=-1,
+            )
+            / np.sum(histograms, axis=-1)
+        )
+
+    def get_timestamps(
+        self, scan: int, slab: int, mfovs: list[int] | np.ndarray
+    ) -> list[datetime | None]:
+        """Returns the acquisition timestamps of MFOVs."""
+        return [
+            None if np.isnan(_timestamp) else datetime.fromtimestamp(_timestamp)
+            for _timestamp in self.values(
+                XVar.ACQUISITION, scan=scan, slab=slab, mfov=mfovs
+            )
+        ]
+
+    def get_distances_to_roi(
+        self,
+        slab: int,
+        mfovs: int | list[int] | np.ndarray | slice = ALL_MFOVS,
+        sfovs: int | list[int] | np.ndarray | slice = slice(None),
+    ) -> np.ndarray:
+        """Returns the distances between SFOV centers and the nearest ROI boundary."""
+        return self.values(XVar.DISTANCE_ROI, slab=slab, mfov=mfovs, sfov=sfovs)
+
+    def get_roi_sfovs(self, slab: int, mfov: int, dilation: float = 15) -> np.ndarray:
+        """Returns SFOV IDs of an MFOV that are inside the dilated ROI boundaries."""
+        mask = self.get_distances_to_roi(slab=slab, mfovs=mfov) < dilation
+        return self.labels(XDim.SFOV)[mask].astype(int)
+
+    def get_slabs(self, scan: int) -> np.ndarray:
+        """Returns the IDs of effective slabs in a scan. See roi.get_slabs."""
+        acquisition = self.values(XVar.ACQUISITION, scan=scan, mfov=ALL_MFOVS)
+        return self.labels(XDim.SLAB)[~np.isnan(acquisition).all(axis=1)].astype(int)
+
+    def get_n_slabs(self, scan: int) -> int:
+        """Returns the number of effective slabs in a scan."""
+        return self.get_slabs(scan=scan).size
+
+    def get_n_mfovs(self, scan: int) -> int:
+        """Returns the total number of MFOVs with an acquisition time in a scan."""
+        acquisition = self.values(XVar.ACQUISITION, scan=scan, mfov=ALL_MFOVS)
+        return int(np.count_nonzero(~np.isnan(acquisition)))
+
+    def get_mfovs(self, slab: int) -> np.ndarray:
+        """Returns the effective MFOV IDs of a slab. See roi.get_mfovs."""
+        acquisition = self.values(XVar.ACQUISITION, scan=0, slab=slab, mfov=ALL_MFOVS)
+        mfov_labels = self.labels(XDim.MFOV)[self.positions(XDim.MFOV, ALL_MFOVS)]
+        return mfov_labels[~np.isnan(acquisition)]
+
+    def get_percentage_tissue(self, scan: int, dilation: float = 15) -> float:
+        """Returns the percentage of all SFOVs that are inside the dilated ROIs."""
+        n_tissue = np.count_nonzero(
+            self.values(XVar.DISTANCE_ROI, mfov=ALL_MFOVS) < dilation
+        )
+        return 100 * int(n_tissue) / self.get_n_mfovs(scan=scan) / N_BEAMS
@@ -1,23 +1,29 @@
 import argparse
-import csv
 import logging
-import re
 import sys
 import time
 import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Any, Optional
+from typing import List, Any, Optional, Final
 
+import numpy as np
 import renderapi
-from PIL import Image
 from renderapi import Render
 from renderapi.errors import RenderError
 
 from janelia_emrp.fibsem.render_api import RenderApi
+from janelia_emrp.fibsem.render_bulk_uploader import RenderBulkUploader, DEFAULT_MAX_CONCURRENT_BATCHES, \
+    DEFAULT_GZIP_LEVEL
 from janelia_emrp.fibsem.volume_transfer_info import params_to_render_connect
 from janelia_emrp.msem.field_of_view_layout \
     import NINETY_ONE_SFOV_NAME_TO_ROW_COL, FieldOfViewLayout, NINETEEN_MFOV_COLUMN_GROUPS
+from janelia_emrp.msem.full_image_coordinates import FULL_IMAGE_COORDINATES_FILE_NAME, \
+    load_full_image_coordinates, empty_full_image_coordinates
 from janelia_emrp.msem.scan_fit_parameters import load_scan_fit_parameters, ScanFitParameters
+from janelia_emrp.msem.sfov_metadata import get_scan_sfov_dimensions, validate_sfov_dimensions
 from janelia_emrp.msem.wafer_info import load_wafer_info, WaferInfo, build_wafer_info_parent_parser
 from janelia_emrp.root_logger import init_logger
 
@@ -27,6 +33,11 @@ logger = logging.getLogger(__name__)
 
 WAFER_53_LAYOUT = FieldOfViewLayout(NINETEEN_MFOV_COLUMN_GROUPS, NINETY_ONE_SFOV_NAME_TO_ROW_COL)
 
+DEFAULT_MAX_BUILD_WORKERS: Final = 8
+
+# number of slab scans parsed ahead of the uploads for each build worker (bounds memory for built tile data)
+BUILD_QUEUE_DEPTH_PER_WORKER: Final = 4
+
 
 def build_tile_spec(image_path: Path,
                     stage_x: int,
@@ -74,78 +85,87 @@ def build_tile_spec(image_path: Path,
     return tile_spec
 
 
-# unix_relative_image_path: 000003/002_000003_001_2022-04-01T1723012239596.png
-unix_relative_image_path_pattern = re.compile(r"(^\d+)/(\d{3}_\d{6}_(\d{3})_\d{4}-\d{2}-\d{2}T\d{13}).png$")
-
-
-def build_tile_specs_for_slab_scan(slab_scan_path: Path,
-                                   stage_z: int) -> list[dict[str, Any]]:
-
+@dataclass
+class SlabScanTiles:
+    # Tile locations parsed from one slab scan's full_image_coordinates.txt, independent of the scan's z.
+    slab_scan_path: Path
+    scan_fit_parameters: ScanFitParameters
+    tile_width: Optional[int]
+    tile_height: Optional[int]
+    min_x: Optional[int]
+    min_y: Optional[int]
+    # full image coordinates (see load_full_image_coordinates) sorted by short_sfov_name
+    tile_data: np.ndarray
+
+    def to_tile_specs(self,
+                      stage_z: int) -> list[dict[str, Any]]:
+        return [
+            build_tile_spec(image_path=Path(self.slab_scan_path, relative_path),
+                            stage_x=stage_x,
+                            stage_y=stage_y,
+                            stage_z=stage_z,
+                            tile_id=f"{short_sfov_name}.{stage_z}.0",
+                            tile_width=self.tile_width,
+                            tile_height=self.tile_height,
+                            mfov_name=mfov_name,
+                            sfov_index_name=sfov_index_name,
+                            min_x=self.min_x,
+                            min_y=self.min_y,
+                            scan_fit_parameters=self.scan_fit_parameters,
+                            margin=400)
+            # tolist converts values to python types (needed for JSON serialization)
+            for (relative_path, mfov_name, sfov_index_name, short_sfov_name, stage_x, stage_y)
+            in self.tile_data.tolist()
+        ]
+
+
+def load_slab_scan_tiles(slab_scan_path: Path,
+                         validate_sfov_headers: bool = False) -> SlabScanTiles:
+    """
+    Parses tile locations for one slab scan (this does all of the file system work needed to build its tile specs).
+
+    Tile dimensions are read from the PNG header of the first SFOV image in each scan and reused for all of
+    the scan's slabs.  If `validate_sfov_headers` is set, the headers of all the slab scan's SFOV images are
+    read (in parallel) to check that they share those dimensions.
+    """
     scan_fit_parameters = load_scan_fit_parameters(slab_scan_path)
 
-    tile_data = []
     tile_width = None
     tile_height = None
     min_x = None
     min_y = None
-    full_image_coordinates_path = Path(slab_scan_path, "full_image_coordinates.txt")
+    full_image_coordinates_path = Path(slab_scan_path, FULL_IMAGE_COORDINATES_FILE_NAME)
 
     if full_image_coordinates_path.exists():
-        with open(full_image_coordinates_path, 'r') as data_file:
-            # 000007\020_000007_082_2022-04-03T0154134018404.png	2014641.659	915550.903	0
-            for row in csv.reader(data_file, delimiter="\t"):
-                unix_relative_image_path = row[0].replace('\\', '/')
-                stage_x = int(float(row[1]))
-                stage_y = int(float(row[2]))
-                image_path = Path(slab_scan_path, unix_relative_image_path)
-
-                unix_relative_image_path_match = unix_relative_image_path_pattern.match(unix_relative_image_path)
-                if not unix_relative_image_path_match:
-                    raise RuntimeError(f"failed to parse unix_relative_image_path {unix_relative_image_path} "
-                                       f"in {full_image_coordinates_path}")
-
-                mfov_name = unix_relative_image_path_match.group(1)
-
-                # Slightly shorten/simplify tile id so that it works better with web UIs.
-                # Technically, scan timestamp could be completely removed because stage_z gets appended to tile_id.
-                # Decided to keep scan time with truncated microseconds in the id because it is nice context to have.
-                # Example shortening: 020_000007_082_2022-04-03T0154134018404 => 020_000007_082_20220403_015413
-                short_sfov_name = unix_relative_image_path_match.group(2).replace("-", "").replace("T", "_")[:-7]
-                tile_id = f"{short_sfov_name}.{stage_z}.0"
-
-                sfov_index_name = unix_relative_image_path_match.group(3)
-
-                if not tile_width:
-                    image = Image.open(image_path)
-                    tile_width = image.width
-                    tile_height = image.height
-                    min_x = stage_x
-                    min_y = stage_y
-                else:
-                    min_x = min(min_x, stage_x)
-                    min_y = min(min_y, stage_y)
-
-                tile_data.append(
-                    (tile_id, mfov_name, sfov_index_name, image_path, stage_x, stage_y))
+        tile_data = np.sort(load_full_image_coordinates(full_image_coordinates_path),
+                            order=["short_sfov_name", "mfov", "sfov"])
     else:
         logger.warning(f'{full_image_coordinates_path} not found')
+        tile_data = empty_full_image_coordinates()
+
+    if len(tile_data) > 0:
+        min_x = int(tile_data["stage_x"].min())
+        min_y = int(tile_data["stage_y"].min())
+        sfov_paths = [Path(slab_scan_path, relative_path) for relative_path in tile_data["relative_path"]]
+        tile_width, tile_height = get_scan_sfov_dimensions(scan_path=slab_scan_path.parent,
+                                                           sfov_path=sfov_paths[0])
+        if validate_sfov_headers:
+            validate_sfov_dimensions(sfov_paths=sfov_paths,
+                                     expected_dimensions=(tile_width, tile_height))
+
+    return SlabScanTiles(slab_scan_path=slab_scan_path,
+                         scan_fit_parameters=scan_fit_parameters,
+                         tile_width=tile_width,
+                         tile_height=tile_height,
+                         min_x=min_x,
+                         min_y=min_y,
+                         tile_data=tile_data)
+
+
+def build_tile_specs_for_slab_scan(slab_scan_path: Path,
+                                   stage_z: int) -> list[dict[str, Any]]:
 
-    tile_specs = [
-        build_tile_spec(image_path=image_path,
-                        stage_x=stage_x,
-                        stage_y=stage_y,
-                        stage_z=stage_z,
-                        tile_id=tile_id,
-                        tile_width=tile_width,
-                        tile_height=tile_height,
-                        mfov_name=mfov_name,
-                        sfov_index_name=sfov_index_name,
-                        min_x=min_x,
-                        min_y=min_y,
-                        scan_fit_parameters=scan_fit_parameters,
-                        margin=400)
-        for (tile_id, mfov_name, sfov_index_name, image_path, stage_x, stage_y) in sorted(tile_data)
-    ]
+    tile_specs = load_slab_scan_tiles(slab_scan_path).to_tile_specs(stage_z)
 
     logger.info(f'build_tile_specs_for_slab_scan: loaded {len(tile_specs)} tile specs from {slab_scan_path}')
 
@@ -162,14 +182,41 @@ def get_stack_metadata_or_none(render: Render,
     return stack_metadata
 
 
-def import_slab_stacks_for_wafer(render_ws_host: str,
-                                 render_owner: str,
-                                 wafer_info: WaferInfo,
-                                 import_scan_name_list: list[str],
-                                 import_project_name_list: list[str]):
+@dataclass
+class SlabStackImport:
+    # The slab scans to import into one stack, in z order.
+    render: Render
+    render_api: RenderApi
+    stack: str
+    slab_scan_paths: list[Path]
 
-    func_name = "import_slab_stacks_for_wafer"
 
+@dataclass
+class PendingStackCompletion:
+    # A stack with uploads still in flight that should be completed once they finish.
+    render: Render
+    stack: str
+    upload_futures: list[Future]
+
+    def is_done(self) -> bool:
+        return all(future.done() for future in self.upload_futures)
+
+    def complete(self) -> None:
+        for future in self.upload_futures:
+            future.result()
+        renderapi.stack.set_stack_state(self.stack, 'COMPLETE', render=self.render)
+        logger.info(f"complete: set stack {self.stack} to COMPLETE")
+
+
+def build_slab_stack_imports(render_ws_host: str,
+                             render_owner: str,
+                             wafer_info: WaferInfo,
+                             import_scan_name_list: list[str],
+                             import_project_name_list: list[str]) -> list[SlabStackImport]:
+
+    func_name = "build_slab_stack_imports"
+
+    slab_stack_imports = []
     for slab_group in wafer_info.slab_group_list:
         project_name = slab_group.to_render_project_name()
 
@@ -195,38 +242,130 @@ def import_slab_stacks_for_wafer(render_ws_host: str,
                                render_connect=params_to_render_connect(render_connect_params))
 
         for slab_info in slab_group.ordered_slabs:
-            stack = slab_info.stack_name
-            stack_is_in_loading_state = False
-            z = 1
-
+            slab_scan_paths = []
             for scan_path in wafer_info.scan_paths:
                 # scan_path: /nrs/hess/render/raw/wafer_53/imaging/msem/scan_003/wafer_53_scan_003_20220501_08-46-34
                 if len(import_scan_name_list) == 0 or scan_path.parent.name in import_scan_name_list:
-                    slab_scan_path = Path(scan_path, slab_info.dir_name)
-                    tile_specs = build_tile_specs_for_slab_scan(slab_scan_path, z)
-
-                    if len(tile_specs) > 0:
-
-                        if not stack_is_in_loading_state:
-                            ensure_stack_is_in_loading_state(render=render,
-                                                             stack=stack,
-                                                             wafer_info=wafer_info)
-                            stack_is_in_loading_state = True
-
-                        tile_id_range = f'{tile_specs[0]["tileId"]} to {tile_specs[-1]["tileId"]}'
-                        logger.info(f"{func_name}: saving tiles {tile_id_range} in stack {stack}")
-                        render_api.save_tile_specs(stack=stack,
-                                                   tile_specs=tile_specs,
-                                                   derive_data=True)
-                        z += 1
-                    else:
-                        logger.debug(f'{func_name}: no tile specs in {scan_path.name} for stack {stack}')
+                    slab_scan_paths.append(Path(scan_path, slab_info.dir_name))
+                else:
+                    logger.debug(f'{func_name}: ignoring {scan_path.name} for stack {slab_info.stack_name}')
+
+            slab_stack_imports.append(SlabStackImport(render=render,
+                                                      render_api=render_api,
+                                                      stack=slab_info.stack_name,
+                                                      slab_scan_paths=slab_scan_paths))
+
+    return slab_stack_imports
+
 
+def import_slab_stacks_for_wafer(render_ws_host: str,
+                                 render_owner: str,
+                                 wafer_info: WaferInfo,
+                                 import_scan_name_list: list[str],
+                                 import_project_name_list: list[str],
+                                 max_build_workers: int = DEFAULT_MAX_BUILD_WORKERS,
+                                 max_concurrent_uploads: int = DEFAULT_MAX_CONCURRENT_BATCHES,
+                                 validate_sfov_headers: bool = False,
+                                 gzip_level: Optional[int] = DEFAULT_GZIP_LEVEL):
+    """
+    Imports tile specs for all slab scans of the wafer.
+
+    Slab scan coordinates are parsed on a process pool (at most `max_build_workers` * BUILD_QUEUE_DEPTH_PER_WORKER
+    slab scans are parsed ahead of the uploads) while previously built tile specs are uploaded with at most
+    `max_concurrent_uploads` uploads in flight.  Results are consumed in stack and scan order, so each stack's
+    z values are assigned exactly as a serial import would assign them.  Each stack is set to LOADING once before
+    its first upload and set to COMPLETE once after all of its uploads have finished.
+    If `validate_sfov_headers` is set, the dimensions of every SFOV image are checked before import.
+    Upload request bodies are gzip compressed only if a `gzip_level` is specified.
+    """
+    func_name = "import_slab_stacks_for_wafer"
+    start_time = time.time()
+
+    slab_stack_imports = build_slab_stack_imports(render_ws_host=render_ws_host,
+                                                  render_owner=render_owner,
+                                                  wafer_info=wafer_info,
+                                                  import_scan_name_list=import_scan_name_list,
+                                                  import_project_name_list=import_project_name_list)
+
+    stack_and_slab_scan_paths = [(slab_stack_import, slab_scan_path)
+                                 for slab_stack_import in slab_stack_imports
+                                 for slab_scan_path in slab_stack_import.slab_scan_paths]
+    logger.info(f"{func_name}: importing {len(stack_and_slab_scan_paths)} slab scans "
+                f"into {len(slab_stack_imports)} stacks")
+
+    max_queued_builds = max_build_workers * BUILD_QUEUE_DEPTH_PER_WORKER
+    pending_completions: list[PendingStackCompletion] = []
+    tile_spec_count = 0
+
+    def complete_finished_stacks(wait_for_all: bool):
+        for pending_completion in list(pending_completions):
+            if wait_for_all or pending_completion.is_done():
+                pending_completion.complete()
+                pending_completions.remove(pending_completion)
+
+    with ProcessPoolExecutor(max_workers=max_build_workers) as build_executor, \
+            RenderBulkUploader(max_concurrent_batches=max_concurrent_uploads,
+                               gzip_level=gzip_level) as uploader:
+
+        # submit builds in stack and scan order, keeping a bounded number queued ahead of the uploads
+        queued_builds: deque[Future] = deque()
+        slab_scan_paths_to_submit = iter(stack_and_slab_scan_paths)
+
+        def queue_builds():
+            while len(queued_builds) < max_queued_builds:
+                next_stack_and_path = next(slab_scan_paths_to_submit, None)
+                if next_stack_and_path is None:
+                    break
+                queued_builds.append(build_executor.submit(load_slab_scan_tiles,
+                                                           next_stack_and_path[1],
+                                                           validate_sfov_headers))
+
+        queue_builds()
+
+        build_index = 0
+        for slab_stack_import in slab_stack_imports:
+            stack = slab_stack_import.stack
+            stack_url = slab_stack_import.render_api.get_stack_url(stack)
+            upload_futures = []
+            z = 1
+
+            for _ in slab_stack_import.slab_scan_paths:
+                slab_scan_tiles: SlabScanTiles = queued_builds.popleft().result()
+                build_index += 1
+                queue_builds()
+
+                tile_specs = slab_scan_tiles.to_tile_specs(z)
+
+                if len(tile_specs) > 0:
+
+                    if len(upload_futures) == 0:
+                        ensure_stack_is_in_loading_state(render=slab_stack_import.render,
+                                                         stack=stack,
+                                                         wafer_info=wafer_info)
+
+                    tile_id_range = f'{tile_specs[0]["tileId"]} to {tile_specs[-1]["tileId"]}'
+                    logger.info(f"{func_name}: saving tiles {tile_id_range} in stack {stack} "
+                                f"({build_index} of {len(stack_and_slab_scan_paths)} slab scans built)")
+                    resolved_tiles = {"tileIdToSpecMap": {tile_spec["tileId"]: tile_spec for tile_spec in tile_specs}}
+                    upload_futures.extend(uploader.save_resolved_tiles(stack_url=stack_url,
+                                                                       resolved_tiles=resolved_tiles,
+                                                                       derive_data=True))
+                    tile_spec_count += len(tile_specs)
+                    z += 1
                 else:
-                    logger.debug(f'{func_name}: ignoring {scan_path.name} for stack {stack}')
+                    logger.debug(f'{func_name}: no tile specs in {slab_scan_tiles.slab_scan_path} for stack {stack}')
+
+            if len(upload_futures) > 0:
+                pending_completions.append(PendingStackCompletion(render=slab_stack_import.render,
+                                                                  stack=stack,
+                                                                  upload_futures=upload_futures))
+            complete_finished_stacks(wait_for_all=False)
+
+        uploader.wait()
+        complete_finished_stacks(wait_for_all=True)
 
-            if stack_is_in_loading_state:
-                renderapi.stack.set_stack_state(stack, 'COMPLETE', render=render)
+    logger.info(f"{func_name}: imported {tile_spec_count} tile specs into {len(slab_stack_imports)} stacks "
+                f"in {time.time() - start_time:.1f} seconds")
 
 
 def ensure_stack_is_in_loading_state(render: Render,
@@ -277,6 +416,30 @@ def main(arg_list: List[str]):
         nargs='+',
         default=[]
     )
+    parser.add_argument(
+        "--max_build_workers",
+        help="Maximum number of processes parsing slab scan coordinates concurrently",
+        type=int,
+        default=DEFAULT_MAX_BUILD_WORKERS
+    )
+    parser.add_argument(
+        "--max_concurrent_uploads",
+        help="Maximum number of tile spec uploads in flight at once",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENT_BATCHES
+    )
+    parser.add_argument(
+        "--validate_sfov_headers",
+        help="Read the PNG header of every SFOV image to verify that all SFOVs in a scan have the same dimensions "
+             "(by default, only the first SFOV header in each scan is read)",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--gzip_level",
+        help="If specified, gzip compress tile spec upload request bodies with this level (e.g. 1), "
+             "only use for render web services that decompress request bodies",
+        type=int
+    )
     args = parser.parse_args(args=arg_list)
 
     wafer_info = load_wafer_info(wafer_base_path=Path(args.wafer_base_path),
@@ -289,7 +452,11 @@ def main(arg_list: List[str]):
                                  render_owner=args.render_owner,
                                  wafer_info=wafer_info,
                                  import_scan_name_list=args.import_scan_name,
-                                 import_project_name_list=args.import_project_name)
+                                 import_project_name_list=args.import_project_name,
+                                 max_build_workers=args.max_build_workers,
+                                 max_concurrent_uploads=args.max_concurrent_uploads,
+                                 validate_sfov_headers=args.validate_sfov_headers,
+                                 gzip_level=args.gzip_level)
 
 
 if __name__ == '__main__':
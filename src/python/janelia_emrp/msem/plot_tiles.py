@@ -1,30 +1,27 @@
-import csv
+from pathlib import Path
 
 from bokeh.io import output_file
 from bokeh.models import ColumnDataSource, CategoricalColorMapper, BasicTickFormatter, Legend
 from bokeh.palettes import d3
 from bokeh.plotting import figure, show
 
+from janelia_emrp.msem.full_image_coordinates import load_full_image_coordinates
+
 
 def plot_section(section_name,
                  full_image_coordinates_path,
                  output_dir_path=None):
 
+    # 000007\008_000007_055_2021-05-25T2146499297643.bmp      -372876.505     -123997.579     0
+    coordinates = load_full_image_coordinates(Path(full_image_coordinates_path), image_suffix=None)
+
     data = {
-        'mFOV': [],
-        'sFOV': [],
-        'x': [],
-        'y': []
+        'mFOV': coordinates["mfov"].tolist(),
+        'sFOV': coordinates["sfov"].tolist(),
+        'x': coordinates["stage_x"].tolist(),
+        'y': coordinates["stage_y"].tolist()
     }
 
-    with open(full_image_coordinates_path, 'r') as data_file:
-        # 000007\008_000007_055_2021-05-25T2146499297643.bmp      -372876.505     -123997.579     0
-        for row in csv.reader(data_file, delimiter="\t"):
-            data['mFOV'].append(row[0][11:17])
-            data['sFOV'].append(row[0][18:21])
-            data['x'].append(int(float(row[1])))
-            data['y'].append(int(float(row[2])))
-
     tooltips = [("mFOV", "@mFOV"), ("sFOV", "@sFOV"), ("x", "@x"), ("y", "@y")]
 
     source = ColumnDataSource(data=data)
@@ -1,6 +1,7 @@
 import re
 import sys
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 
@@ -25,16 +26,16 @@ class ScanFitParameters:
 slab_scan_path_pattern = re.compile(r"^(.*)/imaging/msem/scan.*/wafer_\d+_scan_(\d+)_\d{8}_\d{2}-\d{2}-\d{2}/\d+_$")
 
 
-def load_scan_fit_parameters(slab_scan_path: Path) -> ScanFitParameters:
-
-    slab_scan_path_match = slab_scan_path_pattern.match(str(slab_scan_path))
-    if not slab_scan_path_match:
-        raise RuntimeError(f"failed to parse slab_scan_path {slab_scan_path}")
-
-    wafer_base_path = Path(slab_scan_path_match.group(1))
-    scan_name = slab_scan_path_match.group(2)
-    scan_index = int(scan_name)
+@lru_cache(maxsize=None)
+def load_average_fit_values(wafer_base_path: Path) -> tuple[Path, tuple[float, ...]]:
+    """
+    Reads the wafer's average fit parameters once (the same values are used for every slab scan in the wafer).
 
+    Returns
+    -------
+    tuple[Path, tuple[float, ...]]
+        The fit parameters file path and its values.
+    """
     fit_parameters_path = Path(wafer_base_path, f"sfov_correction/average_fit_parameters_for_all_scans.txt")
 
     if not fit_parameters_path.exists():
@@ -48,6 +49,21 @@ def load_scan_fit_parameters(slab_scan_path: Path) -> ScanFitParameters:
     if len(values) < 3:
         raise RuntimeError(f"expected at least 3 lines but found {len(values)} lines in {fit_parameters_path}")
 
+    return fit_parameters_path, tuple(values)
+
+
+def load_scan_fit_parameters(slab_scan_path: Path) -> ScanFitParameters:
+
+    slab_scan_path_match = slab_scan_path_pattern.match(str(slab_scan_path))
+    if not slab_scan_path_match:
+        raise RuntimeError(f"failed to parse slab_scan_path {slab_scan_path}")
+
+    wafer_base_path = Path(slab_scan_path_match.group(1))
+    scan_name = slab_scan_path_match.group(2)
+    scan_index = int(scan_name)
+
+    fit_parameters_path, values = load_average_fit_values(wafer_base_path)
+
     return ScanFitParameters(path=fit_parameters_path,
                              scan_name=scan_name,
                              scan_index=scan_index,
@@ -0,0 +1,102 @@
+import logging
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Final
+
+logger = logging.getLogger(__name__)
+
+
+PNG_SIGNATURE: Final = b"\x89PNG\r\n\x1a\n"
+
+# signature (8 bytes) + IHDR chunk length (4 bytes) + chunk type (4 bytes) + width (4 bytes) + height (4 bytes)
+#   + bit depth (1 byte)
+PNG_HEADER_LENGTH: Final = 25
+
+# tile specs use an intensity range of 0 to 255
+EXPECTED_SFOV_BIT_DEPTH: Final = 8
+
+DEFAULT_MAX_VALIDATION_THREADS: Final = 16
+
+
+def read_png_header(png_path: Path) -> tuple[int, int, int]:
+    """
+    Reads an image's dimensions and bit depth from its PNG IHDR chunk without decoding anything else.
+
+    Returns
+    -------
+    tuple[int, int, int]
+        The (width, height, bit depth) of the image.
+
+    Raises
+    ------
+    ValueError
+        If the file does not start with a PNG signature followed by an IHDR chunk.
+    """
+    with open(png_path, "rb") as png_file:
+        header = png_file.read(PNG_HEADER_LENGTH)
+
+    if len(header) < PNG_HEADER_LENGTH or header[:8] != PNG_SIGNATURE or header[12:16] != b"IHDR":
+        raise ValueError(f"{png_path} does not have a valid PNG header")
+
+    width, height, bit_depth = struct.unpack(">IIB", header[16:25])
+    return width, height, bit_depth
+
+
+def read_png_dimensions(png_path: Path) -> tuple[int, int]:
+    """
+    Returns
+    -------
+    tuple[int, int]
+        The (width, height) of the image read from its PNG IHDR chunk (see `read_png_header`).
+    """
+    width, height, _ = read_png_header(png_path)
+    return width, height
+
+
+# scan path to (width, height) of the scan's SFOV images
+_scan_path_to_sfov_dimensions: dict[Path, tuple[int, int]] = {}
+
+
+def get_scan_sfov_dimensions(scan_path: Path,
+                             sfov_path: Path) -> tuple[int, int]:
+    """
+    Returns
+    -------
+    tuple[int, int]
+        The (width, height) of all SFOV images in the scan, read from the first `sfov_path` requested for the scan.
+        All SFOVs in a scan are assumed to have the same dimensions (see `validate_sfov_dimensions`).
+    """
+    dimensions = _scan_path_to_sfov_dimensions.get(scan_path)
+    if dimensions is None:
+        width, height, bit_depth = read_png_header(sfov_path)
+        if bit_depth != EXPECTED_SFOV_BIT_DEPTH:
+            logger.warning(f"get_scan_sfov_dimensions: {sfov_path} has bit depth {bit_depth} "
+                           f"but tile specs assume {EXPECTED_SFOV_BIT_DEPTH}")
+        dimensions = (width, height)
+        _scan_path_to_sfov_dimensions[scan_path] = dimensions
+        logger.debug(f"get_scan_sfov_dimensions: using {dimensions} from {sfov_path} for {scan_path}")
+    return dimensions
+
+
+def validate_sfov_dimensions(sfov_paths: list[Path],
+                             expected_dimensions: tuple[int, int],
+                             max_threads: int = DEFAULT_MAX_VALIDATION_THREADS) -> None:
+    """
+    Reads the PNG header of every SFOV image in parallel and checks that all have the expected dimensions.
+
+    Raises
+    ------
+    ValueError
+        If any image does not have the expected dimensions or does not have a valid PNG header.
+    """
+    with ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="sfov-header") as executor:
+        all_dimensions = list(executor.map(read_png_dimensions, sfov_paths))
+
+    mismatched = [(sfov_path, dimensions) for sfov_path, dimensions in zip(sfov_paths, all_dimensions)
+                  if dimensions != expected_dimensions]
+    if len(mismatched) > 0:
+        raise ValueError(f"{len(mismatched)} of {len(sfov_paths)} SFOV images do not have expected dimensions "
+                         f"{expected_dimensions}, first mismatch is {mismatched[0][0]} with {mismatched[0][1]}")
+
+    logger.info(f"validate_sfov_dimensions: all {len(sfov_paths)} SFOV images have dimensions {expected_dimensions}")
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+from janelia_emrp.fibsem.render_bulk_uploader import RenderBulkUploader
 from janelia_emrp.render.web_service_request import RenderRequest
 
 
@@ -14,17 +15,20 @@ def main():
                                    owner='hess_wafer_53d',
                                    project='slab_120_to_129')
     stack = "s127_m232_align_mi_ic_test1_with_mask10"
+    gzip_level = None  # set to 1 to gzip request bodies if the render web services decompress them
 
     z_layers_to_patch = render_request.get_z_values(stack)
 
     render_request.set_stack_state_to_loading(stack)
     
-    for z in z_layers_to_patch:
-        resolved_tiles = render_request.get_resolved_tiles_for_z(stack, z)
-        for tile_id in resolved_tiles["tileIdToSpecMap"]:
-            tile_spec = resolved_tiles["tileIdToSpecMap"][tile_id]
-            add_mask(tile_spec)
-        render_request.save_resolved_tiles(stack, resolved_tiles)
+    # upload patched layers in the background while the next layers are retrieved
+    with RenderBulkUploader(gzip_level=gzip_level) as uploader:
+        for z in z_layers_to_patch:
+            resolved_tiles = render_request.get_resolved_tiles_for_z(stack, z)
+            for tile_id in resolved_tiles["tileIdToSpecMap"]:
+                tile_spec = resolved_tiles["tileIdToSpecMap"][tile_id]
+                add_mask(tile_spec)
+            uploader.save_resolved_tiles(render_request.stack_url(stack), resolved_tiles)
 
     render_request.set_stack_state_to_complete(stack)
 
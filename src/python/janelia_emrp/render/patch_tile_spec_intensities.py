@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+from janelia_emrp.fibsem.render_bulk_uploader import RenderBulkUploader
 from janelia_emrp.render.web_service_request import RenderRequest
 
 
@@ -29,20 +30,23 @@ def main():
                                    project='jrc_zf_cardiac_2')
     stack = "v4_acquire_align_ic_try4"
     additive_offset = -4.0 / 256.0  # need to divide by intensity range for 8-bit!
+    gzip_level = None  # set to 1 to gzip request bodies if the render web services decompress them
     z_layers_to_patch = [12983, 12984, 12985, 12986, 12987, 12988, 12989,
                          12990, 12991, 12992, 12993, 12994, 12995, 12996]
 
     render_request.set_stack_state_to_loading(stack)
     
-    for z in z_layers_to_patch:
-        resolved_tiles = render_request.get_resolved_tiles_for_z(stack, z)
-        for tile_id in resolved_tiles["tileIdToSpecMap"]:
-            tile_spec = resolved_tiles["tileIdToSpecMap"][tile_id]
-            patched_data_string = \
-                patch_filter_data_string(data_string=tile_spec["filterSpec"]["parameters"]["dataString"],
-                                         additive_offset=additive_offset)
-            tile_spec["filterSpec"]["parameters"]["dataString"] = patched_data_string
-        render_request.save_resolved_tiles(stack, resolved_tiles)
+    # upload patched layers in the background while the next layers are retrieved
+    with RenderBulkUploader(gzip_level=gzip_level) as uploader:
+        for z in z_layers_to_patch:
+            resolved_tiles = render_request.get_resolved_tiles_for_z(stack, z)
+            for tile_id in resolved_tiles["tileIdToSpecMap"]:
+                tile_spec = resolved_tiles["tileIdToSpecMap"][tile_id]
+                patched_data_string = \
+                    patch_filter_data_string(data_string=tile_spec["filterSpec"]["parameters"]["dataString"],
+                                             additive_offset=additive_offset)
+                tile_spec["filterSpec"]["parameters"]["dataString"] = patched_data_string
+            uploader.save_resolved_tiles(render_request.stack_url(stack), resolved_tiles)
 
     render_request.set_stack_state_to_complete(stack)
 
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+from janelia_emrp.fibsem.render_bulk_uploader import RenderBulkUploader
 from janelia_emrp.render.web_service_request import RenderRequest
 
 
@@ -37,6 +38,7 @@ def main():
                                    project='jrc_mus_thymus_1')
     stack = "v2_acquire_align_bgic_gauss"
     base_path = "file:///nrs/cellmap/data/jrc_mus-thymus-1/tiles/jrc_mus_thymus_1/v2_acquire_align/20231130_160900"
+    gzip_level = None  # set to 1 to gzip request bodies if the render web services decompress them
 
     # TODO: delete mipmap builder from stack metadata after replacing h5s with bg corrected tiffs
 
@@ -45,12 +47,14 @@ def main():
 
     render_request.set_stack_state_to_loading(stack)
     
-    for z in z_layers_to_patch:
-        resolved_tiles = render_request.get_resolved_tiles_for_z(stack, z)
-        for tile_id in resolved_tiles["tileIdToSpecMap"]:
-            tile_spec = resolved_tiles["tileIdToSpecMap"][tile_id]
-            update_thymus_source_path(tile_spec, base_path)
-        render_request.save_resolved_tiles(stack, resolved_tiles)
+    # upload patched layers in the background while the next layers are retrieved
+    with RenderBulkUploader(gzip_level=gzip_level) as uploader:
+        for z in z_layers_to_patch:
+            resolved_tiles = render_request.get_resolved_tiles_for_z(stack, z)
+            for tile_id in resolved_tiles["tileIdToSpecMap"]:
+                tile_spec = resolved_tiles["tileIdToSpecMap"][tile_id]
+                update_thymus_source_path(tile_spec, base_path)
+            uploader.save_resolved_tiles(render_request.stack_url(stack), resolved_tiles)
 
     render_request.set_stack_state_to_complete(stack)
 
@@ -1,49 +1,305 @@
+import asyncio
+import codecs
+import json
+import logging
+import os
+import threading
 from dataclasses import dataclass
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, Final, Awaitable, Iterable, Iterator, TypeVar
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeouts for each request, a None read timeout waits for slow responses indefinitely
+Timeout = tuple[float, Optional[float]]
+DEFAULT_TIMEOUT_SECONDS: Final[Timeout] = (30.0, None)
+
+# retries for connection errors and transient (502, 503, 504) responses, POST requests are not retried
+DEFAULT_MAX_RETRIES: Final = 3
+RETRY_BACKOFF_FACTOR: Final = 1.0
+RETRY_STATUS_CODES: Final = (502, 503, 504)
+RETRY_METHODS: Final = frozenset({"GET", "PUT", "DELETE"})
+
+# number of kept-alive connections per host, should be at least the async concurrency
+DEFAULT_POOL_SIZE: Final = 16
+DEFAULT_MAX_CONCURRENCY: Final = 8
+
+# size of response chunks read when streaming large JSON arrays
+STREAM_CHUNK_BYTES: Final = 1024 * 1024
+
+# iter_json_array parse states
+ARRAY_START: Final = "array start"
+FIRST_ELEMENT_OR_END: Final = "first element or end"
+ELEMENT: Final = "element"
+SEPARATOR_OR_END: Final = "separator or end"
+ARRAY_FINISHED: Final = "array finished"
+
+JSON_WHITESPACE: Final = " \t\r\n"
+JSON_NUMBER_CHARACTERS: Final = frozenset("0123456789+-.eE")
+
+T = TypeVar("T")
+
+_shared_sessions: dict[tuple[int, int], requests.Session] = {}
+_shared_sessions_lock = threading.Lock()
+
+
+def get_shared_session(max_retries: int = DEFAULT_MAX_RETRIES) -> requests.Session:
+    """
+    Returns
+    -------
+    requests.Session
+        A connection pooling session (with keep-alive and retries) shared by all requests in this process.
+        Sessions are not shared across processes, so forked dask workers create their own.
+    """
+    key = (os.getpid(), max_retries)
+    with _shared_sessions_lock:
+        session = _shared_sessions.get(key)
+        if session is None:
+            retry = Retry(total=max_retries,
+                          backoff_factor=RETRY_BACKOFF_FACTOR,
+                          status_forcelist=RETRY_STATUS_CODES,
+                          allowed_methods=RETRY_METHODS,
+                          raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=DEFAULT_POOL_SIZE,
+                                  pool_maxsize=DEFAULT_POOL_SIZE,
+                                  max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _shared_sessions[key] = session
+        return session
 
 
 def submit_get(url: str,
-               context: Optional[str] = None) -> Union[dict[str, Any], list[dict[str, Any]], list[str]]:
+               context: Optional[str] = None,
+               session: Optional[requests.Session] = None,
+               timeout: Timeout = DEFAULT_TIMEOUT_SECONDS) -> Union[dict[str, Any], list[dict[str, Any]], list[str]]:
     extra_context = "" if context is None else f" {context}"
-    print(f"submitting GET {url}{extra_context}")
-    response = requests.get(url)
+    logger.debug(f"submitting GET {url}{extra_context}")
+    session = get_shared_session() if session is None else session
+    response = session.get(url, timeout=timeout)
     response.raise_for_status()
     return response.json()
 
 
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Parses a JSON array incrementally from byte chunks, yielding each element as soon as it is complete
+    so that huge arrays do not need to fit in memory.
+
+    Raises
+    ------
+    ValueError
+        If the chunks do not contain exactly one valid JSON array.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    chunk_iterator = iter(chunks)
+    buffer = ""
+    position = 0
+    exhausted = False
+    expecting = ARRAY_START
+
+    while True:
+        while position < len(buffer) and buffer[position] in JSON_WHITESPACE:
+            position += 1
+
+        if position < len(buffer):
+            character = buffer[position]
+            if expecting == ARRAY_START:
+                if character != "[":
+                    raise ValueError(f"expected JSON array but found '{character}'")
+                expecting = FIRST_ELEMENT_OR_END
+                position += 1
+                continue
+            if expecting == ARRAY_FINISHED:
+                raise ValueError(f"found '{character}' after end of JSON array")
+            if expecting == SEPARATOR_OR_END:
+                if character not in ",]":
+                    raise ValueError(f"expected ',' or ']' after JSON array element but found '{character}'")
+                expecting = ELEMENT if character == "," else ARRAY_FINISHED
+                position += 1
+                continue
+            if character == "]" and expecting == FIRST_ELEMENT_OR_END:
+                expecting = ARRAY_FINISHED
+                position += 1
+                continue
+            if character in ",]":
+                raise ValueError(f"expected JSON array element but found '{character}'")
+
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                element, end = None, None
+
+            # a number at the end of the buffer (e.g. 12 or 1.5e) may continue in the next chunk
+            if end is not None and (exhausted or not is_possibly_partial_number(element, buffer, end)):
+                yield element
+                position = end
+                expecting = SEPARATOR_OR_END
+                continue
+
+            if exhausted:
+                raise ValueError("invalid or truncated JSON array element")
+
+        elif exhausted:
+            if expecting != ARRAY_FINISHED:
+                raise ValueError("truncated JSON array")
+            return
+
+        # need more data: drop parsed text and read the next chunk
+        buffer = buffer[position:]
+        position = 0
+        chunk = next(chunk_iterator, None)
+        if chunk is None:
+            exhausted = True
+            buffer += text_decoder.decode(b"", final=True)
+        else:
+            buffer += text_decoder.decode(chunk)
+
+
+def is_possibly_partial_number(element: Any,
+                               buffer: str,
+                               end: int) -> bool:
+    """
+    Returns
+    -------
+    bool
+        True if the decoded element is a number and the rest of the buffer could still be part of it.
+    """
+    return type(element) in (int, float) and \
+        all(buffer[index] in JSON_NUMBER_CHARACTERS for index in range(end, len(buffer)))
+
+
+def submit_get_streaming_array(url: str,
+                               context: Optional[str] = None,
+                               session: Optional[requests.Session] = None,
+                               timeout: Timeout = DEFAULT_TIMEOUT_SECONDS) -> Iterator[Any]:
+    """
+    Returns
+    -------
+    Iterator[Any]
+        Elements of the JSON array returned by the GET request, parsed as the response is streamed.
+    """
+    extra_context = "" if context is None else f" {context}"
+    logger.debug(f"submitting streaming GET {url}{extra_context}")
+    session = get_shared_session() if session is None else session
+    with session.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        yield from iter_json_array(response.iter_content(chunk_size=STREAM_CHUNK_BYTES))
+
+
 def submit_post(url: str,
                 json: Optional[Union[dict[str, Any], list[dict[str, Any]]]],
-                context: Optional[str] = None) -> None:
+                context: Optional[str] = None,
+                session: Optional[requests.Session] = None,
+                timeout: Timeout = DEFAULT_TIMEOUT_SECONDS) -> None:
     extra_context = "" if context is None else f" {context}"
-    print(f"submitting POST {url}{extra_context}")
-    response = requests.post(url, json=json)
+    logger.debug(f"submitting POST {url}{extra_context}")
+    session = get_shared_session() if session is None else session
+    response = session.post(url, json=json, timeout=timeout)
     response.raise_for_status()
 
 
 def submit_put(url: str,
                json: Optional[Union[dict[str, Any], list[dict[str, Any]]]],
-               context: Optional[str] = None) -> None:
+               context: Optional[str] = None,
+               session: Optional[requests.Session] = None,
+               timeout: Timeout = DEFAULT_TIMEOUT_SECONDS) -> None:
     extra_context = "" if context is None else f" {context}"
-    print(f"submitting PUT {url}{extra_context}")
-    response = requests.put(url, json=json)
+    logger.debug(f"submitting PUT {url}{extra_context}")
+    session = get_shared_session() if session is None else session
+    response = session.put(url, json=json, timeout=timeout)
     response.raise_for_status()
 
 
 def submit_delete(url: str,
-                  context: Optional[str] = None) -> None:
+                  context: Optional[str] = None,
+                  session: Optional[requests.Session] = None,
+                  timeout: Timeout = DEFAULT_TIMEOUT_SECONDS) -> None:
     extra_context = "" if context is None else f" {context}"
-    print(f"submitting DELETE {url}{extra_context}")
-    response = requests.delete(url)
+    logger.debug(f"submitting DELETE {url}{extra_context}")
+    session = get_shared_session() if session is None else session
+    response = session.delete(url, timeout=timeout)
     response.raise_for_status()
 
 
+async def gather_with_concurrency(awaitables: Iterable[Awaitable[T]],
+                                  max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> list[T]:
+    """
+    Awaits all of the awaitables with at most `max_concurrency` running at once.
+
+    Returns
+    -------
+    list[T]
+        The results in the same order as the awaitables.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_bounded(awaitable: Awaitable[T]) -> T:
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*[run_bounded(awaitable) for awaitable in awaitables])
+
+
+class WebServiceRequest:
+    # Base for web service client dataclasses (which must define timeout and max_retries fields),
+    # all requests share one pooled session per process.
+    timeout: Timeout
+    max_retries: int
+
+    def submit_get(self,
+                   url: str,
+                   context: Optional[str] = None) -> Union[dict[str, Any], list[dict[str, Any]], list[str]]:
+        return submit_get(url, context, session=get_shared_session(self.max_retries), timeout=self.timeout)
+
+    def submit_post(self,
+                    url: str,
+                    json: Optional[Union[dict[str, Any], list[dict[str, Any]]]],
+                    context: Optional[str] = None) -> None:
+        submit_post(url, json, context, session=get_shared_session(self.max_retries), timeout=self.timeout)
+
+    def submit_put(self,
+                   url: str,
+                   json: Optional[Union[dict[str, Any], list[dict[str, Any]]]],
+                   context: Optional[str] = None) -> None:
+        submit_put(url, json, context, session=get_shared_session(self.max_retries), timeout=self.timeout)
+
+    def submit_delete(self,
+                      url: str,
+                      context: Optional[str] = None) -> None:
+        submit_delete(url, context, session=get_shared_session(self.max_retries), timeout=self.timeout)
+
+    def submit_get_streaming_array(self,
+                                   url: str,
+                                   context: Optional[str] = None) -> Iterator[Any]:
+        return submit_get_streaming_array(url, context,
+                                          session=get_shared_session(self.max_retries), timeout=self.timeout)
+
+    async def submit_get_async(self,
+                               url: str,
+                               context: Optional[str] = None) -> Union[dict[str, Any], list[dict[str, Any]], list[str]]:
+        # requests are blocking, so run them on the default executor's threads (sharing the pooled session)
+        return await asyncio.to_thread(self.submit_get, url, context)
+
+    async def submit_put_async(self,
+                               url: str,
+                               json: Optional[Union[dict[str, Any], list[dict[str, Any]]]],
+                               context: Optional[str] = None) -> None:
+        await asyncio.to_thread(self.submit_put, url, json, context)
+
+
 @dataclass
-class RenderRequest:
+class RenderRequest(WebServiceRequest):
     host: str
     owner: str
     project: str
+    timeout: Timeout = DEFAULT_TIMEOUT_SECONDS
+    max_retries: int = DEFAULT_MAX_RETRIES
 
     def project_url(self) -> str:
         # noinspection HttpUrlsUsage
@@ -55,56 +311,75 @@ class RenderRequest:
         return f"{self.project_url()}/stack/{stack}"
 
     def get_stack_ids(self) -> list[dict[str, Any]]:
-        return submit_get(f'{self.project_url()}/stackIds')
+        return self.submit_get(f'{self.project_url()}/stackIds')
 
     def get_stack_metadata(self,
                            stack: str) -> dict[str, Any]:
-        return submit_get(f'{self.stack_url(stack)}')
+        return self.submit_get(f'{self.stack_url(stack)}')
 
     def get_z_values(self,
                      stack: str) -> list[str]:
-        return submit_get(f'{self.stack_url(stack)}/zValues')
+        return self.submit_get(f'{self.stack_url(stack)}/zValues')
 
     def get_tile_bounds_for_z(self,
                               stack: str,
                               z: float | int | str) -> list[dict[str, Any]]:
-        return submit_get(f'{self.stack_url(stack)}/z/{z}/tileBounds')
+        return self.submit_get(f'{self.stack_url(stack)}/z/{z}/tileBounds')
 
     def get_tile_ids_with_pattern(self,
                                   stack: str,
                                   match_pattern: str) -> list[str]:
-        return submit_get(f'{self.stack_url(stack)}/tileIds?matchPattern={match_pattern}')
+        return self.submit_get(f'{self.stack_url(stack)}/tileIds?matchPattern={match_pattern}')
 
     def get_tile_spec(self,
                       stack: str,
                       tile_id: str) -> dict[str, Any]:
-        return submit_get(f'{self.stack_url(stack)}/tile/{tile_id}')
+        return self.submit_get(f'{self.stack_url(stack)}/tile/{tile_id}')
 
     def delete_tile_spec(self,
                          stack: str,
                          tile_id: str):
-        submit_delete(f'{self.stack_url(stack)}/tile/{tile_id}')
+        self.submit_delete(f'{self.stack_url(stack)}/tile/{tile_id}')
 
     def get_resolved_tiles_for_z(self,
                                  stack: str,
                                  z: float | int | str) -> dict[str, Any]:
-        return submit_get(f'{self.stack_url(stack)}/z/{z}/resolvedTiles')
+        return self.submit_get(f'{self.stack_url(stack)}/z/{z}/resolvedTiles')
 
     def get_resolved_tiles_for_z_range(self,
                                        stack: str,
                                        min_z: float | int | str,
                                        max_z: float | int | str) -> dict[str, Any]:
-        return submit_get(f'{self.stack_url(stack)}/resolvedTiles?minZ={min_z}&maxZ={max_z}')
+        return self.submit_get(f'{self.stack_url(stack)}/resolvedTiles?minZ={min_z}&maxZ={max_z}')
+
+    async def get_resolved_tiles_for_z_async(self,
+                                             stack: str,
+                                             z: float | int | str) -> dict[str, Any]:
+        return await self.submit_get_async(f'{self.stack_url(stack)}/z/{z}/resolvedTiles')
+
+    async def get_resolved_tiles_for_z_values_async(self,
+                                                    stack: str,
+                                                    z_values: list[float | int | str],
+                                                    max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> list[dict[str, Any]]:
+        """
+        Returns
+        -------
+        list[dict[str, Any]]
+            Resolved tiles for each z value (in the same order), fetched with at most `max_concurrency` requests
+            in flight.
+        """
+        return await gather_with_concurrency([self.get_resolved_tiles_for_z_async(stack, z) for z in z_values],
+                                             max_concurrency)
 
     def get_resolved_restart_tiles(self,
                                    stack: str) -> dict[str, Any]:
-        return submit_get(f'{self.stack_url(stack)}/resolvedTiles?groupId=restart')
+        return self.submit_get(f'{self.stack_url(stack)}/resolvedTiles?groupId=restart')
 
     def set_stack_state(self,
                         stack: str,
                         state: str):
         url = f'{self.stack_url(stack)}/state/{state}'
-        submit_put(url=url, json=None, context=None)
+        self.submit_put(url=url, json=None, context=None)
 
     def set_stack_state_to_loading(self,
                                    stack: str):
@@ -120,24 +395,26 @@ class RenderRequest:
                             derive_data: bool = False):
         query_params = "?deriveData=true" if derive_data else ""
         url = f'{self.stack_url(stack)}/resolvedTiles{query_params}'
-        submit_put(url=url,
-                   json=resolved_tiles,
-                   context=f'for {len(resolved_tiles["tileIdToSpecMap"])} tile specs')
+        self.submit_put(url=url,
+                        json=resolved_tiles,
+                        context=f'for {len(resolved_tiles["tileIdToSpecMap"])} tile specs')
 
     def create_stack(self,
                      stack: str,
                      stack_version: dict[str, Any]):
         url = f'{self.stack_url(stack)}'
 
-        submit_post(url=url,
-                    json=stack_version)
+        self.submit_post(url=url,
+                         json=stack_version)
 
 
 @dataclass
-class MatchRequest:
+class MatchRequest(WebServiceRequest):
     host: str
     owner: str
     collection: str
+    timeout: Timeout = DEFAULT_TIMEOUT_SECONDS
+    max_retries: int = DEFAULT_MAX_RETRIES
 
     def owner_url(self) -> str:
         # noinspection HttpUrlsUsage
@@ -148,12 +425,12 @@ class MatchRequest:
         return f"{self.owner_url()}/matchCollection/{self.collection}"
 
     def get_all_match_collections_for_owner(self) -> list[dict[str, Any]]:
-        return submit_get(f'{self.owner_url()}/matchCollections')
+        return self.submit_get(f'{self.owner_url()}/matchCollections')
 
     def get_p_group_ids(self) -> list[str]:
         url = f"{self.collection_url()}/pGroupIds"
-        p_group_ids = submit_get(url)
-        print(f"retrieved {len(p_group_ids)} pGroupId values for the {self.collection} collection")
+        p_group_ids = self.submit_get(url)
+        logger.info(f"retrieved {len(p_group_ids)} pGroupId values for the {self.collection} collection")
 
         return p_group_ids
 
@@ -169,27 +446,72 @@ class MatchRequest:
     def get_pairs_with_match_counts_for_group(self,
                                               group_id: str) -> list[dict[str, Any]]:
         url = f"{self.collection_url()}/pGroup/{group_id}/matchCounts"
-        match_counts = submit_get(url)
-        print(f"retrieved {len(match_counts)} {self.collection} pairs for groupId {group_id}")
+        match_counts = self.submit_get(url)
+        logger.info(f"retrieved {len(match_counts)} {self.collection} pairs for groupId {group_id}")
         return match_counts
 
+    async def get_pairs_with_match_counts_for_group_async(self,
+                                                          group_id: str) -> list[dict[str, Any]]:
+        url = f"{self.collection_url()}/pGroup/{group_id}/matchCounts"
+        match_counts = await self.submit_get_async(url)
+        logger.info(f"retrieved {len(match_counts)} {self.collection} pairs for groupId {group_id}")
+        return match_counts
+
+    def get_collection_pair_count(self) -> int:
+        for collection in self.get_all_match_collections_for_owner():
+            if collection["collectionId"]["name"] == self.collection:
+                return collection["pairCount"]
+        raise ValueError(f"match collection {self.collection} not found for owner {self.owner}")
+
     def get_match_pairs_for_group(self,
                                   group_id: str,
                                   exclude_match_details: bool = False) -> list[dict[str, Any]]:
         query = "?excludeMatchDetails=true" if exclude_match_details else ""
         url = f"{self.collection_url()}/pGroup/{group_id}/matches{query}"
-        match_pairs = submit_get(url)
-        print(f"retrieved {len(match_pairs)} {self.collection} pairs for groupId {group_id}")
+        match_pairs = self.submit_get(url)
+        logger.info(f"retrieved {len(match_pairs)} {self.collection} pairs for groupId {group_id}")
 
         return match_pairs
 
+    def get_match_pairs_url(self,
+                            group_id: str,
+                            pair_type: str = "p_group",
+                            exclude_match_details: bool = False) -> str:
+        """
+        Returns
+        -------
+        str
+            URL for matches with `group_id` as the pGroupId ("p_group"), for matches within the group ("within"),
+            or for matches between the group and other groups ("outside").
+        """
+        query = "?excludeMatchDetails=true" if exclude_match_details else ""
+        if pair_type == "p_group":
+            return f"{self.collection_url()}/pGroup/{group_id}/matches{query}"
+        elif pair_type == "within":
+            return f"{self.collection_url()}/group/{group_id}/matchesWithinGroup{query}"
+        elif pair_type == "outside":
+            return f"{self.collection_url()}/group/{group_id}/matchesOutsideGroup{query}"
+        raise ValueError(f"invalid pair type: {pair_type}")
+
+    def iter_match_pairs(self,
+                         group_id: str,
+                         pair_type: str = "p_group",
+                         exclude_match_details: bool = False) -> Iterator[dict[str, Any]]:
+        """
+        Returns
+        -------
+        Iterator[dict[str, Any]]
+            Match pairs for the group (see `get_match_pairs_url` for pair types), parsed as they are streamed.
+        """
+        return self.submit_get_streaming_array(self.get_match_pairs_url(group_id, pair_type, exclude_match_details))
+
     def get_match_pairs_within_group(self,
                                      group_id: str,
                                      exclude_match_details: bool = False) -> list[dict[str, Any]]:
         query = "?excludeMatchDetails=true" if exclude_match_details else ""
         url = f"{self.collection_url()}/group/{group_id}/matchesWithinGroup{query}"
-        match_pairs = submit_get(url)
-        print(f"retrieved {len(match_pairs)} {self.collection} pairs for groupId {group_id}")
+        match_pairs = self.submit_get(url)
+        logger.info(f"retrieved {len(match_pairs)} {self.collection} pairs for groupId {group_id}")
 
         return match_pairs
 
@@ -198,26 +520,59 @@ class MatchRequest:
                                       exclude_match_details: bool = False) -> list[dict[str, Any]]:
         query = "?excludeMatchDetails=true" if exclude_match_details else ""
         url = f"{self.collection_url()}/group/{group_id}/matchesOutsideGroup{query}"
-        match_pairs = submit_get(url)
-        print(f"retrieved {len(match_pairs)} {self.collection} pairs for groupId {group_id}")
+        match_pairs = self.submit_get(url)
+        logger.info(f"retrieved {len(match_pairs)} {self.collection} pairs for groupId {group_id}")
+
+        return match_pairs
+
+    async def get_match_pairs_for_group_async(self,
+                                              group_id: str,
+                                              exclude_match_details: bool = False) -> list[dict[str, Any]]:
+        query = "?excludeMatchDetails=true" if exclude_match_details else ""
+        url = f"{self.collection_url()}/pGroup/{group_id}/matches{query}"
+        match_pairs = await self.submit_get_async(url)
+        logger.info(f"retrieved {len(match_pairs)} {self.collection} pairs for groupId {group_id}")
 
         return match_pairs
 
+    async def get_match_pairs_for_groups_async(self,
+                                               group_ids: list[str],
+                                               exclude_match_details: bool = False,
+                                               max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> list[list[dict[str, Any]]]:
+        """
+        Returns
+        -------
+        list[list[dict[str, Any]]]
+            Match pairs for each group (in the same order), fetched with at most `max_concurrency` requests in flight.
+        """
+        return await gather_with_concurrency([self.get_match_pairs_for_group_async(group_id, exclude_match_details)
+                                              for group_id in group_ids],
+                                             max_concurrency)
+
+    async def save_match_pairs_async(self,
+                                     group_id: str,
+                                     match_pairs: list[dict[str, Any]]):
+        if len(match_pairs) > 0:
+            url = f"{self.collection_url()}/matches"
+            await self.submit_put_async(url=url,
+                                        json=match_pairs,
+                                        context=f"for {len(match_pairs)} pairs with groupId {group_id}")
+
     def save_match_pairs(self,
                          group_id: str,
                          match_pairs: list[dict[str, Any]]):
         if len(match_pairs) > 0:
             url = f"{self.collection_url()}/matches"
-            submit_put(url=url,
-                       json=match_pairs,
-                       context=f"for {len(match_pairs)} pairs with groupId {group_id}")
+            self.submit_put(url=url,
+                            json=match_pairs,
+                            context=f"for {len(match_pairs)} pairs with groupId {group_id}")
 
     def delete_match_pair(self,
                           p_group_id: str,
                           p_id: str,
                           q_group_id: str,
                           q_id: str):
-        submit_delete(f"{self.collection_url()}/group/{p_group_id}/id/{p_id}/matchesWith/{q_group_id}/id/{q_id}")
+        self.submit_delete(f"{self.collection_url()}/group/{p_group_id}/id/{p_id}/matchesWith/{q_group_id}/id/{q_id}")
 
     def delete_collection(self):
-        submit_delete(f"{self.collection_url()}")
+        self.submit_delete(f"{self.collection_url()}")
@@ -1,5 +1,11 @@
+import gzip
+import json
 import logging
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from typing import Any
 
 import pytest
 from _pytest.tmpdir import TempPathFactory
@@ -11,12 +17,12 @@ logger = logging.getLogger(__name__)
 
 
 @pytest.fixture
-def volume_transfer_info(tmpdir_factory: TempPathFactory) -> VolumeTransferInfo:
-    # see https://docs.pytest.org/en/6.2.x/tmpdir.html
-    h5_archive_storage_root: Path = tmpdir_factory.mktemp(basename='raw')
+def volume_transfer_info(tmp_path_factory: TempPathFactory) -> VolumeTransferInfo:
+    # see https://docs.pytest.org/en/stable/how-to/tmp_path.html
+    h5_archive_storage_root: Path = tmp_path_factory.mktemp(basename='raw')
     logger.debug(f"volume_transfer_info: created {str(h5_archive_storage_root)}")
 
-    h5_align_storage_root: Path = tmpdir_factory.mktemp(basename='align')
+    h5_align_storage_root: Path = tmp_path_factory.mktemp(basename='align')
     logger.debug(f"volume_transfer_info: created {str(h5_align_storage_root)}")
 
     return VolumeTransferInfo(
@@ -77,3 +83,61 @@ def small_raw_path() -> Path:
 @pytest.fixture
 def small_uint8_path() -> Path:
     return fibsem_path("small_21-07-31_152727.uint8.h5")
+
+
+@dataclass
+class StubRequest:
+    method: str
+    path: str
+    headers: dict[str, str]
+    body: Any
+
+
+@dataclass
+class StubRenderServer:
+    # Records requests sent to a local HTTP server and fails the first `failures_to_inject` of them with 502.
+    url: str
+    requests: list[StubRequest] = field(default_factory=list)
+    failures_to_inject: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+@pytest.fixture
+def stub_render_server():
+    server_state = StubRenderServer(url="")
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def handle_request(self):
+            content_length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(content_length) if content_length > 0 else None
+            if body is not None and self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+
+            with server_state.lock:
+                inject_failure = server_state.failures_to_inject > 0
+                if inject_failure:
+                    server_state.failures_to_inject -= 1
+                else:
+                    server_state.requests.append(StubRequest(method=self.command,
+                                                             path=self.path,
+                                                             headers=dict(self.headers),
+                                                             body=None if body is None else json.loads(body)))
+
+            self.send_response(502 if inject_failure else 200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        do_GET = do_PUT = do_POST = do_DELETE = handle_request
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server_state.url = f"http://127.0.0.1:{server.server_address[1]}"
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+
+    yield server_state
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,23 @@
+import numpy as np
+from fibsem_tools.io import read
+
+from janelia_emrp.fibsem.cyx_dat import CYXDat, new_cyx_dat
+from janelia_emrp.fibsem.dat_path import new_dat_path
+
+
+def test_new_cyx_dat(small_dat_path):
+    cyx_dat: CYXDat = new_cyx_dat(new_dat_path(small_dat_path))
+
+    dat_record = read(small_dat_path)
+    expected_pixels = np.rollaxis(dat_record, 2)
+
+    assert cyx_dat.pixels.shape == expected_pixels.shape, "pixel shape differs from fibsem_tools result"
+    assert np.array_equal(cyx_dat.pixels, expected_pixels), "pixels differ from fibsem_tools result"
+    assert cyx_dat.header == dat_record.attrs.__dict__, "header differs from fibsem_tools result"
+
+    assert not cyx_dat.pixels.flags.writeable, "pixels should be a read-only view of the dat file"
+
+    yxc_pixel_bytes = np.moveaxis(cyx_dat.pixels, 0, -1).tobytes()
+    restored_bytes = cyx_dat.header_bytes + yxc_pixel_bytes + cyx_dat.footer_bytes
+
+    assert restored_bytes == small_dat_path.read_bytes(), "header, pixel, and footer bytes do not rebuild dat file"
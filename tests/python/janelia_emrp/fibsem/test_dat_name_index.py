@@ -0,0 +1,121 @@
+import os
+import time
+from pathlib import Path
+
+from janelia_emrp.fibsem.dat_name_index import DatNameIndex, IndexedH5File
+
+
+def test_names_for_h5_dir(tmp_path: Path):
+    h5_dir = tmp_path / "raw" / "Merlin-6284" / "2021" / "07" / "31"
+    hour_dir = h5_dir / "15"
+    hour_dir.mkdir(parents=True)
+
+    h5_path_to_names = {
+        hour_dir / "Merlin-6284_21-07-31_152727.raw-archive.h5": ["Merlin-6284_21-07-31_152727_0-0-0.dat",
+                                                                 "Merlin-6284_21-07-31_152727_0-0-1.dat"],
+        hour_dir / "Merlin-6284_21-07-31_152838.raw-archive.h5": ["Merlin-6284_21-07-31_152838_0-0-0.dat"],
+    }
+    an_hour_ago = time.time() - 3600
+    for h5_path in h5_path_to_names.keys():
+        h5_path.touch()
+        os.utime(h5_path, (an_hour_ago, an_hour_ago))
+
+    read_paths: list[Path] = []
+
+    def read_dat_names(h5_list: list[Path]) -> list[list[str]]:
+        read_paths.extend(h5_list)
+        return [h5_path_to_names[h5_path] for h5_path in h5_list]
+
+    index_path = tmp_path / "dat_name_index.sqlite"
+    h5_paths = sorted(h5_path_to_names.keys())
+    expected_names = [name for h5_path in h5_paths for name in h5_path_to_names[h5_path]]
+
+    with DatNameIndex(index_path) as dat_name_index:
+        assert dat_name_index.names_for_h5_dir(h5_dir, h5_paths, read_dat_names) == expected_names, \
+            "incorrect names for new files"
+    assert read_paths == h5_paths, "new files should be read"
+
+    read_paths.clear()
+    with DatNameIndex(index_path) as dat_name_index:
+        assert dat_name_index.names_for_h5_dir(h5_dir, h5_paths, read_dat_names) == expected_names, \
+            "incorrect names for indexed files"
+    assert read_paths == [], "unchanged indexed files should not be read"
+
+    # modified file is read again, recently modified file is read but not indexed, removed file is forgotten
+    modified_path = h5_paths[0]
+    h5_path_to_names[modified_path] = ["Merlin-6284_21-07-31_152727_0-0-0.dat"]
+    os.utime(modified_path, (an_hour_ago + 60, an_hour_ago + 60))
+
+    recent_path = hour_dir / "Merlin-6284_21-07-31_152949.raw.h5"
+    recent_path.touch()
+    h5_path_to_names[recent_path] = ["Merlin-6284_21-07-31_152949_0-0-0.dat"]
+
+    h5_paths = [modified_path, recent_path]
+
+    read_paths.clear()
+    with DatNameIndex(index_path) as dat_name_index:
+        names = dat_name_index.names_for_h5_dir(h5_dir, h5_paths, read_dat_names)
+        indexed_paths = sorted(dat_name_index.indexed_mtimes(h5_dir).keys())
+
+    assert names == ["Merlin-6284_21-07-31_152727_0-0-0.dat", "Merlin-6284_21-07-31_152949_0-0-0.dat"], \
+        "incorrect names after changes"
+    assert read_paths == h5_paths, "modified and new files should be read"
+    assert indexed_paths == [str(modified_path)], "recent file should not be indexed and removed file should be forgotten"
+
+
+def test_record_h5_files(tmp_path: Path):
+    hour_dir = tmp_path / "raw" / "Merlin-6284" / "2021" / "07" / "31" / "15"
+    raw_path = hour_dir / "Merlin-6284_21-07-31_152727.raw.h5"
+    archive_path = hour_dir / "Merlin-6284_21-07-31_152727.raw-archive.h5"
+    dat_names = ["Merlin-6284_21-07-31_152727_0-0-0.dat", "Merlin-6284_21-07-31_152727_0-0-1.dat"]
+
+    index_path = tmp_path / "dat_name_index.sqlite"
+    with DatNameIndex(index_path) as dat_name_index:
+        dat_name_index.record_h5_file(h5_path=raw_path, dat_names=dat_names, mtime=1.0)
+        dat_name_index.record_h5_files([IndexedH5File(h5_path=archive_path,
+                                                      dat_names=dat_names,
+                                                      mtime=2.0,
+                                                      replaced_h5_path=raw_path)])
+
+    with DatNameIndex(index_path) as dat_name_index:
+        assert dat_name_index.indexed_mtimes(hour_dir.parent) == {str(archive_path): 2.0}, \
+            "replaced file should be forgotten"
+        assert dat_name_index.indexed_dat_names(hour_dir.parent) == {str(archive_path): dat_names}, \
+            "incorrect names for recorded file"
+
+
+def test_read_only_names_for_h5_dir(tmp_path: Path):
+    hour_dir = tmp_path / "raw" / "Merlin-6284" / "2021" / "07" / "31" / "15"
+    hour_dir.mkdir(parents=True)
+    indexed_path = hour_dir / "Merlin-6284_21-07-31_152727.raw-archive.h5"
+    unindexed_path = hour_dir / "Merlin-6284_21-07-31_152838.raw-archive.h5"
+    h5_path_to_names = {
+        indexed_path: ["Merlin-6284_21-07-31_152727_0-0-0.dat"],
+        unindexed_path: ["Merlin-6284_21-07-31_152838_0-0-0.dat"],
+    }
+    an_hour_ago = time.time() - 3600
+    for h5_path in h5_path_to_names.keys():
+        h5_path.touch()
+        os.utime(h5_path, (an_hour_ago, an_hour_ago))
+
+    index_path = tmp_path / "dat_name_index.sqlite"
+    with DatNameIndex(index_path) as dat_name_index:
+        dat_name_index.record_h5_file(h5_path=indexed_path, dat_names=h5_path_to_names[indexed_path])
+        dat_name_index.record_h5_file(h5_path=hour_dir / "removed.raw-archive.h5", dat_names=["removed.dat"],
+                                      mtime=an_hour_ago)
+    index_bytes = index_path.read_bytes()
+
+    read_paths: list[Path] = []
+
+    def read_dat_names(h5_list: list[Path]) -> list[list[str]]:
+        read_paths.extend(h5_list)
+        return [h5_path_to_names[h5_path] for h5_path in h5_list]
+
+    h5_paths = [indexed_path, unindexed_path]
+    with DatNameIndex(index_path, read_only=True) as dat_name_index:
+        assert dat_name_index.names_for_h5_dir(hour_dir.parent, h5_paths, read_dat_names) == \
+               ["Merlin-6284_21-07-31_152727_0-0-0.dat", "Merlin-6284_21-07-31_152838_0-0-0.dat"], \
+               "incorrect names from read only index"
+
+    assert read_paths == [unindexed_path], "only the unindexed file should be read"
+    assert index_path.read_bytes() == index_bytes, "read only index should not be changed"
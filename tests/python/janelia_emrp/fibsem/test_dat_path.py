@@ -66,7 +66,8 @@ def test_rename_dat_files(tmp_path: Path):
     target_dir.mkdir()
 
     rename_dat_files(source_dir=source_dir,
-                     target_dir=target_dir)
+                     target_dir=target_dir,
+                     num_workers=2)
 
     expected_dir = target_dir / "2022/07/21/01"
     assert expected_dir.is_dir(), f"{expected_dir} does not exist"
@@ -1,3 +1,5 @@
+import hashlib
+
 import h5py
 import numpy as np
 
@@ -5,6 +7,7 @@ from janelia_emrp.fibsem.cyx_dat import CYXDat, new_cyx_dat
 from janelia_emrp.fibsem.dat_converter import DatConverter
 from janelia_emrp.fibsem.dat_path import new_dat_path, new_dat_layer
 from janelia_emrp.fibsem.dat_to_h5_writer import DatToH5Writer, ELEMENT_SIZE_UM_KEY
+from janelia_emrp.fibsem.h5_raw_audit import audit_h5_file
 
 
 def test_create_and_add_mipmap_data_sets(volume_transfer_info,
@@ -56,3 +59,26 @@ def test_create_and_add_mipmap_data_sets(volume_transfer_info,
         actual_pixels = np.array(data_set[:])
 
         assert np.array_equal(actual_pixels, expected_pixels), f"{data_set_name} pixels do not match expected result"
+
+
+def test_create_and_add_raw_data_group_checksum(small_dat_path,
+                                                tmp_path):
+    raw_writer = DatToH5Writer(chunk_shape=(20, 20))
+    cyx_dat: CYXDat = new_cyx_dat(new_dat_path(small_dat_path))
+
+    raw_path = tmp_path / "test.raw.h5"
+    with raw_writer.open_h5_file(str(raw_path)) as raw_file:
+        raw_writer.create_and_add_raw_data_group(cyx_dat=cyx_dat, to_h5_file=raw_file)
+
+    expected_checksum = hashlib.sha256(small_dat_path.read_bytes()).hexdigest()
+
+    audit_list = audit_h5_file(raw_path)
+    assert len(audit_list) == 1, "incorrect number of audited groups"
+    assert audit_list[0].recorded_checksum == expected_checksum, "recorded checksum differs from dat file checksum"
+    assert audit_list[0].status() == "match", f"unexpected audit result {audit_list[0]}"
+
+    with h5py.File(name=str(raw_path), mode="a") as raw_file:
+        raw_file[f"{audit_list[0].group_name}/c0"][10, 10] += 1
+
+    audit_list = audit_h5_file(raw_path)
+    assert audit_list[0].status() == "mismatch", "changed pixel should fail audit"
@@ -0,0 +1,65 @@
+import h5py
+import numpy as np
+
+from janelia_emrp.fibsem.cyx_dat import CYXDat, new_cyx_dat
+from janelia_emrp.fibsem.dat_path import new_dat_path
+from janelia_emrp.fibsem.dat_to_scheffer_8_bit_layer import EightBitLookupTable, LayerIntensityStatistics, \
+    compress_compute_layer, float_convert
+
+
+def test_layer_intensity_statistics():
+    rng = np.random.default_rng(seed=42)
+    tiles = [
+        rng.normal(loc=-1200.0, scale=3000.0, size=(300, 400)).clip(-32768, 32767).astype(">i2"),
+        rng.normal(loc=900.0, scale=2500.0, size=(200, 500)).clip(-32768, 32767).astype(">i2"),
+        np.full((10, 20), 32767, dtype=">i2"),  # saturated tile
+    ]
+
+    layer_statistics = LayerIntensityStatistics()
+    for tile in tiles:
+        layer_statistics.add_tile(tile)
+
+    min_intensity = -32765.0
+    max_intensity = 32764.0
+    count, mean, std_dev = layer_statistics.mean_and_std_dev(min_intensity=min_intensity,
+                                                             max_intensity=max_intensity)
+
+    stacked_pixels = np.concatenate([tile.reshape(-1) for tile in tiles])
+    unsaturated_pixels = stacked_pixels[np.logical_and(stacked_pixels >= min_intensity,
+                                                       stacked_pixels < max_intensity)]
+
+    assert layer_statistics.total_count() == stacked_pixels.size, "incorrect total count"
+    assert count == unsaturated_pixels.size, "incorrect unsaturated count"
+    assert np.isclose(mean, np.mean(unsaturated_pixels), rtol=1e-12), "incorrect mean"
+    assert np.isclose(std_dev, np.std(unsaturated_pixels), rtol=1e-12), "incorrect standard deviation"
+
+
+def test_compress_compute_layer(small_dat_path,
+                                small_uint8_path):
+    cyx_dat: CYXDat = new_cyx_dat(new_dat_path(small_dat_path))
+
+    compressed_data_list = compress_compute_layer([cyx_dat.pixels], channel_num=0, fill_info=None)
+
+    with h5py.File(name=str(small_uint8_path), mode="r") as expected_align_file:
+        expected_pixels = np.array(expected_align_file.get("0-0-1").get("mipmap.0")[:])
+
+    assert len(compressed_data_list) == 1, "incorrect number of compressed tiles"
+    assert np.array_equal(compressed_data_list[0], expected_pixels), "compressed pixels do not match expected result"
+
+
+def test_eight_bit_lookup_table():
+    rng = np.random.default_rng(seed=7)
+    pixel_array = rng.integers(low=-32768, high=32768, size=(250, 300)).astype(">i2")
+
+    layer_statistics = LayerIntensityStatistics()
+    tile_counts = layer_statistics.add_tile(pixel_array)
+
+    low = 4000.0   # low and high are swapped by the compression algorithm, so span is negative
+    span = -9000.0
+    lookup_table = EightBitLookupTable(low=low, span=span)
+
+    expected_pixels, expected_too_low_count, expected_too_high_count = float_convert(pixel_array, low, span)
+
+    assert np.array_equal(lookup_table.convert(pixel_array), expected_pixels), "8-bit pixels differ from float path"
+    assert lookup_table.clipped_counts(tile_counts) == (expected_too_low_count, expected_too_high_count), \
+        "clip counts differ from float path"
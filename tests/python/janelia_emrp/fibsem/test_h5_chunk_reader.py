@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from janelia_emrp.fibsem.h5_chunk_reader import read_rows, can_decode_chunks
+
+
+def test_read_rows(tmp_path: Path):
+    rng = np.random.default_rng(seed=42)
+    pixels_2d = rng.integers(-1000, 1000, size=(20, 13), dtype=np.int16)
+    pixels_3d = rng.integers(0, 255, size=(3, 20, 13), dtype=np.uint8)
+
+    h5_path = tmp_path / "test.h5"
+    with h5py.File(name=str(h5_path), mode="w") as h5_file:
+        h5_file.create_dataset("gzip", data=pixels_2d, chunks=(7, 5), compression="gzip")
+        h5_file.create_dataset("none", data=pixels_2d, chunks=(7, 5))
+        h5_file.create_dataset("shuffle", data=pixels_2d, chunks=(7, 5), compression="gzip", shuffle=True)
+        h5_file.create_dataset("gzip_3d", data=pixels_3d, chunks=(1, 8, 8), compression="gzip")
+
+    with h5py.File(name=str(h5_path), mode="r") as h5_file:
+        assert can_decode_chunks(h5_file["gzip"]), "gzip chunks should be decoded in threads"
+        assert not can_decode_chunks(h5_file["shuffle"]), "shuffled chunks should be read with h5py"
+
+        for data_set_name in ("gzip", "none", "shuffle"):
+            data_set = h5_file[data_set_name]
+            assert np.array_equal(read_rows(data_set, max_workers=3), pixels_2d), \
+                f"incorrect {data_set_name} pixels"
+            assert np.array_equal(read_rows(data_set, first_row=7, stop_row=17, max_workers=3), pixels_2d[7:17]), \
+                f"incorrect {data_set_name} row subset"
+            assert np.array_equal(read_rows(data_set, first_row=3, stop_row=9, max_workers=3), pixels_2d[3:9]), \
+                f"incorrect unaligned {data_set_name} row subset"
+
+        assert np.array_equal(read_rows(h5_file["gzip_3d"], max_workers=3), pixels_3d), "incorrect 3D pixels"
+
+
+def test_read_rows_with_unwritten_chunks(tmp_path: Path):
+    h5_path = tmp_path / "partial.h5"
+    with h5py.File(name=str(h5_path), mode="w") as h5_file:
+        data_set = h5_file.create_dataset("gzip", shape=(10, 4), chunks=(1, 4), dtype=np.int16, compression="gzip")
+        data_set[0:3] = 7
+        data_set[5:10] = 7
+
+    expected_pixels = np.zeros((10, 4), dtype=np.int16)
+    expected_pixels[0:3] = 7
+    expected_pixels[5:10] = 7
+
+    with h5py.File(name=str(h5_path), mode="r") as h5_file:
+        data_set = h5_file["gzip"]
+        assert np.array_equal(read_rows(data_set, 0, 8, max_workers=4), expected_pixels[0:8]), \
+            "unwritten chunks should be filled"
+        assert np.array_equal(read_rows(data_set, 2, 6, max_workers=4), expected_pixels[2:6]), \
+            "unwritten chunks within a partial read should be filled"
+        assert np.array_equal(read_rows(data_set, 5, 10, max_workers=4), expected_pixels[5:10]), \
+            "incorrect pixels for written chunks"
@@ -1,4 +1,12 @@
-from janelia_emrp.fibsem.h5_to_dat import validate_original_dat_bytes_match
+import hashlib
+import shutil
+
+import h5py
+import pytest
+
+from janelia_emrp.fibsem.dat_to_h5_writer import DAT_FILE_NAME_KEY
+from janelia_emrp.fibsem.h5_to_dat import validate_original_dat_bytes_match, compute_restored_dat_checksum, \
+    restore_dat_files
 
 
 def test_validate_original_dat_bytes_match(small_dat_path,
@@ -11,3 +19,59 @@ def test_validate_original_dat_bytes_match(small_dat_path,
         assert False, f"caught exception: {ve}"
 
     assert len(matched_dat_file_paths) == 1, "restored dat bytes do not match"
+
+
+def test_validate_original_dat_bytes_mismatch(small_dat_path,
+                                              small_raw_path,
+                                              tmp_path):
+    with h5py.File(name=str(small_raw_path), mode="r") as h5_file:
+        dat_file_name = h5_file.get(sorted(h5_file.keys())[0]).attrs[DAT_FILE_NAME_KEY]
+
+    dat_bytes = small_dat_path.read_bytes()
+    for changed_byte_offset in (5, 1024 + 3001, len(dat_bytes) - 2):  # header, pixels, and footer
+        changed_dat_bytes = bytearray(dat_bytes)
+        changed_dat_bytes[changed_byte_offset] ^= 0xFF
+        (tmp_path / dat_file_name).write_bytes(changed_dat_bytes)
+
+        with pytest.raises(ValueError, match=f"byte {changed_byte_offset} differs"):
+            validate_original_dat_bytes_match(h5_path=small_raw_path, dat_parent_path=tmp_path)
+
+
+def test_restored_dat_checksum(small_dat_path,
+                               small_raw_path,
+                               tmp_path):
+    with h5py.File(name=str(small_raw_path), mode="r") as h5_file:
+        data_set = h5_file.get(sorted(h5_file.keys())[0])
+        dat_file_name = data_set.attrs[DAT_FILE_NAME_KEY]
+        restored_checksum = compute_restored_dat_checksum(small_raw_path, data_set)
+
+    shutil.copyfile(small_dat_path, tmp_path / dat_file_name)
+
+    checksums = {}
+    validate_original_dat_bytes_match(h5_path=small_raw_path, dat_parent_path=tmp_path, checksums=checksums)
+
+    expected_checksum = hashlib.sha256(small_dat_path.read_bytes()).hexdigest()
+    assert restored_checksum == expected_checksum, "checksum of restored dat differs from dat file checksum"
+    assert checksums == {dat_file_name: expected_checksum}, "validation checksum differs from dat file checksum"
+
+
+def test_restore_dat_files(small_dat_path,
+                           small_raw_path,
+                           tmp_path):
+    with h5py.File(name=str(small_raw_path), mode="r") as h5_file:
+        dat_file_name = h5_file.get(sorted(h5_file.keys())[0]).attrs[DAT_FILE_NAME_KEY]
+
+    completed_file_path = tmp_path / "restored_h5.txt"
+    dat_dir = tmp_path / "dat"
+    dat_dir.mkdir()
+
+    restore_dat_files(h5_path_list=[small_raw_path], to_path=dat_dir, completed_file_path=completed_file_path)
+
+    restored_dat_path = dat_dir / dat_file_name
+    assert restored_dat_path.read_bytes() == small_dat_path.read_bytes(), "restored dat bytes differ"
+    assert completed_file_path.read_text() == f"{small_raw_path}\n", "restored h5 file should be recorded"
+
+    # resumed restore should skip recorded h5 file instead of failing because the dat file exists
+    restored_dat_path.unlink()
+    restore_dat_files(h5_path_list=[small_raw_path], to_path=dat_dir, completed_file_path=completed_file_path)
+    assert not restored_dat_path.exists(), "recorded h5 file should not be restored again"
@@ -1,6 +1,11 @@
+import shutil
+import threading
 from pathlib import Path
 
-from janelia_emrp.fibsem.h5_to_render import build_tile_spec, build_layers, FIBSEM_CORRECTION_TRANSFORM_ID
+from janelia_emrp.fibsem import h5_to_render
+from janelia_emrp.fibsem.dat_to_h5_writer import DAT_FILE_NAME_KEY
+from janelia_emrp.fibsem.h5_to_render import build_tile_spec, build_layers, FIBSEM_CORRECTION_TRANSFORM_ID, \
+    harvest_tile_headers, LayerInfo, read_tile_headers, build_all_tile_specs, save_import_state, load_import_state
 
 
 def test_build_tile_spec():
@@ -33,3 +38,113 @@ def test_build_tile_spec():
     expected_suffix = "small_21-07-31_152727.uint8.h5?dataSet=/0-0-1/mipmap.0&z=0"
     assert image_url is not None, "mipmapLevels 0 imageUrl missing from tile spec"
     assert image_url.endswith(expected_suffix), f"imageUrl '{image_url}' does not end with '{expected_suffix}'"
+
+
+def test_harvest_tile_headers(small_uint8_path, tmp_path, monkeypatch):
+    cache_path = tmp_path / "tile_headers.db"
+
+    path_to_headers = harvest_tile_headers(h5_paths=[small_uint8_path],
+                                           dask_client=None,
+                                           tile_header_cache_path=cache_path)
+
+    harvested_layer = LayerInfo(small_uint8_path, path_to_headers[small_uint8_path])
+    built_layer = build_layers(split_h5_paths=[small_uint8_path])[0]
+
+    assert harvested_layer.dat_paths == built_layer.dat_paths, "dat paths differ"
+    assert harvested_layer.retained_headers == built_layer.retained_headers, "retained headers differ"
+
+    def fail_read(h5_path):
+        raise AssertionError(f"{h5_path} should have been served from the cache")
+
+    monkeypatch.setattr(h5_to_render, "read_tile_headers", fail_read)
+
+    cached_path_to_headers = harvest_tile_headers(h5_paths=[small_uint8_path],
+                                                  dask_client=None,
+                                                  tile_header_cache_path=cache_path)
+
+    assert cached_path_to_headers == path_to_headers, "cached headers differ"
+
+
+def test_harvest_tile_headers_with_threads(small_uint8_path, tmp_path, monkeypatch):
+    h5_paths = []
+    for i in range(12):
+        h5_path = tmp_path / f"copy_{i:02d}.uint8.h5"
+        shutil.copyfile(small_uint8_path, h5_path)
+        h5_paths.append(h5_path)
+
+    read_thread_names = set()
+    original_read_tile_headers = h5_to_render.read_tile_headers
+
+    def recording_read(h5_path):
+        read_thread_names.add(threading.current_thread().name)
+        return original_read_tile_headers(h5_path)
+
+    monkeypatch.setattr(h5_to_render, "read_tile_headers", recording_read)
+
+    path_to_headers = harvest_tile_headers(h5_paths=h5_paths,
+                                           dask_client=None,
+                                           tile_header_cache_path=tmp_path / "tile_headers.db")
+
+    expected_headers = original_read_tile_headers(small_uint8_path)
+    assert sorted(path_to_headers.keys()) == h5_paths, "headers should be harvested for every file"
+    assert all(tile_headers == expected_headers for tile_headers in path_to_headers.values()), \
+        "incorrect harvested headers"
+    assert all(name.startswith("harvest") for name in read_thread_names), "headers should be read by pool threads"
+
+
+def build_test_layers(small_uint8_path: Path) -> list[LayerInfo]:
+    tile_headers = read_tile_headers(small_uint8_path)
+
+    # acquire a layer each minute except for a 20 minute delay (restart) before the fifth layer
+    layers = []
+    for minute in [0, 1, 2, 3, 23, 24]:
+        layer_tile_headers = []
+        for tile_header in tile_headers:
+            dat_name = Path(tile_header[DAT_FILE_NAME_KEY]).name.replace("_152727_", f"_15{minute + 10:02d}27_")
+            layer_tile_headers.append({**tile_header, DAT_FILE_NAME_KEY: dat_name})
+        layers.append(LayerInfo(small_uint8_path.parent / f"layer_{minute:02d}.uint8.h5", layer_tile_headers))
+    return layers
+
+
+def map_by_tile_id(tile_specs: list[dict]) -> dict[str, dict]:
+    return {tile_spec["tileId"]: tile_spec for tile_spec in tile_specs}
+
+
+def test_incremental_tile_specs(small_uint8_path, tmp_path):
+    full_tile_specs, full_restart_tile_specs = build_all_tile_specs(all_layers=build_test_layers(small_uint8_path),
+                                                                    restart_context_layer_count=1,
+                                                                    mask_builder=None,
+                                                                    tile_overlap_in_microns=2,
+                                                                    pre_stage_transform_ids=[])
+
+    assert len(full_restart_tile_specs) > 0, "test layers should include a restart"
+
+    # import the first four layers (the last is regrouped by the restart) and then the rest using saved state
+    layers = build_test_layers(small_uint8_path)
+    import_state_path = tmp_path / "import_state.json"
+
+    tile_specs, restart_tile_specs = build_all_tile_specs(all_layers=layers[0:4],
+                                                          restart_context_layer_count=1,
+                                                          mask_builder=None,
+                                                          tile_overlap_in_microns=2,
+                                                          pre_stage_transform_ids=[])
+    save_import_state(import_state_path, "test_stack", layers[0:4], first_z=1, restart_context_layer_count=1)
+
+    import_state = load_import_state(import_state_path, "test_stack")
+    imported_layers = [imported_layer.to_layer_info() for imported_layer in import_state.recent_layers]
+
+    assert len(imported_layers) == 3, "state should only retain layers needed for restart context"
+
+    new_tile_specs, new_restart_tile_specs = \
+        build_all_tile_specs(all_layers=imported_layers + layers[4:],
+                             restart_context_layer_count=1,
+                             mask_builder=None,
+                             tile_overlap_in_microns=2,
+                             pre_stage_transform_ids=[],
+                             first_z=import_state.recent_layers[0].z,
+                             imported_layer_count=len(imported_layers))
+
+    assert map_by_tile_id(tile_specs + new_tile_specs) == map_by_tile_id(full_tile_specs), \
+        "incremental tile specs differ"
+    assert map_by_tile_id(restart_tile_specs + new_restart_tile_specs) == map_by_tile_id(full_restart_tile_specs), \
+        "incremental restart tile specs differ"
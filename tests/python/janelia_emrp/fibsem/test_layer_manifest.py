@@ -0,0 +1,143 @@
+from pathlib import Path
+from typing import Optional
+
+import janelia_emrp.fibsem.layer_manifest as layer_manifest_module
+from janelia_emrp.fibsem.dat_converter import get_layers_for_run as get_dat_layers_for_run
+from janelia_emrp.fibsem.dat_path import new_dat_layer, new_dat_path
+from janelia_emrp.fibsem.h5_raw_to_align import get_layers_for_run
+from janelia_emrp.fibsem.layer_manifest import LayerManifest, DAT_HOUR_DIRECTORY_DEPTH, find_hour_dirs
+from janelia_emrp.fibsem.volume_transfer_info import VolumeTransferInfo, VolumeTransferTask
+
+
+def add_dat(dat_root: Path,
+            hour_dir: str,
+            dat_name: str) -> Path:
+    dat_path = dat_root / hour_dir / dat_name
+    dat_path.parent.mkdir(parents=True, exist_ok=True)
+    dat_path.touch()
+    return dat_path
+
+
+def test_layer_manifest(tmp_path: Path):
+    dat_root = tmp_path / "dat"
+    dat_paths = [
+        add_dat(dat_root, "2021/07/30/23", "Merlin-6284_21-07-30_235959_0-0-0.dat"),
+        add_dat(dat_root, "2021/07/31/15", "Merlin-6284_21-07-31_152727_0-0-0.dat"),
+        add_dat(dat_root, "2021/07/31/15", "Merlin-6284_21-07-31_152727_0-0-1.dat"),
+    ]
+
+    assert find_hour_dirs(dat_root, DAT_HOUR_DIRECTORY_DEPTH, "2021/07/31/00") == ["2021/07/31/15"], \
+        "hours before checkpoint should be skipped"
+
+    manifest_path = tmp_path / "layer_manifest.sqlite"
+    with LayerManifest(manifest_path) as layer_manifest:
+        assert layer_manifest.scan_file_paths(dat_root, "*.dat", DAT_HOUR_DIRECTORY_DEPTH) == dat_paths, \
+            "incorrect paths after first scan"
+
+    # files added before the checkpoint hour are not seen until the next full scan
+    late_dat_path = add_dat(dat_root, "2021/07/30/23", "Merlin-6284_21-07-30_235959_0-0-1.dat")
+    dat_paths.append(add_dat(dat_root, "2021/07/31/15", "Merlin-6284_21-07-31_152838_0-0-0.dat"))
+    dat_paths.append(add_dat(dat_root, "2021/08/01/00", "Merlin-6284_21-08-01_000101_0-0-0.dat"))
+
+    with LayerManifest(manifest_path) as layer_manifest:
+        assert layer_manifest.scan_file_paths(dat_root, "*.dat", DAT_HOUR_DIRECTORY_DEPTH) == dat_paths, \
+            "incorrect paths after incremental scan"
+
+        layer_manifest.record_converted_layers("test", {"Merlin-6284_21-07-30_235959": [late_dat_path]})
+
+    with LayerManifest(manifest_path) as layer_manifest:
+        layer_manifest.scan(dat_root, "*.dat", DAT_HOUR_DIRECTORY_DEPTH, force_full_scan=True)
+        assert layer_manifest.file_paths(dat_root, "*.dat") == sorted(dat_paths + [late_dat_path]), \
+            "incorrect paths after full scan"
+        assert layer_manifest.converted_layer_ids("test") == {"Merlin-6284_21-07-30_235959"}, \
+            "incorrect converted layers"
+
+
+def test_removed_output_is_converted_again(tmp_path: Path,
+                                           volume_transfer_info: VolumeTransferInfo,
+                                           monkeypatch):
+    h5_raw_root = tmp_path / "raw"
+    raw_path = add_dat(h5_raw_root, "Merlin-6284/2021/07/31/15", "Merlin-6284_21-07-31_152727.raw-archive.h5")
+
+    volume_transfer_info.cluster_root_paths.layer_manifest = tmp_path / "layer_manifest.sqlite"
+    volume_transfer_info.transfer_tasks = [VolumeTransferTask.GENERATE_CLUSTER_H5_ALIGN]
+    align_path = add_dat(volume_transfer_info.get_align_h5_root_for_conversion(),
+                         "Merlin-6284/2021/07/31/15", "Merlin-6284_21-07-31_152727.uint8.h5")
+
+    def get_layer_raw_paths(forget_layer_ids: Optional[list[str]] = None) -> list[Path]:
+        return [layer.raw_path for layer in get_layers_for_run(h5_raw_root=h5_raw_root,
+                                                               first_h5_path=None,
+                                                               last_h5_path=None,
+                                                               skip_existing=True,
+                                                               volume_transfer_info=volume_transfer_info,
+                                                               forget_layer_ids=forget_layer_ids)]
+
+    def get_converted_layer_ids() -> set[str]:
+        with LayerManifest(volume_transfer_info.get_layer_manifest_path()) as layer_manifest:
+            return layer_manifest.converted_layer_ids(f"align:{volume_transfer_info.get_align_h5_root_for_conversion()}")
+
+    assert get_layer_raw_paths() == [], "converted layer should be skipped"
+    assert get_converted_layer_ids() == {raw_path.name}, "converted layer should be recorded"
+
+    # recorded layers are skipped without checking their output until the next full scan
+    align_path.unlink()
+    assert get_layer_raw_paths() == [], "recorded converted layer should be skipped"
+
+    assert get_layer_raw_paths(forget_layer_ids=[raw_path.name]) == [raw_path], \
+        "forgotten layer with removed output should be converted again"
+    assert get_converted_layer_ids() == set(), "forgotten layer should not be recorded"
+
+    add_dat(align_path.parent, "", align_path.name)
+    assert get_layer_raw_paths() == [], "converted layer should be skipped"
+    assert get_converted_layer_ids() == {raw_path.name}, "converted layer should be recorded again"
+
+    align_path.unlink()
+    monkeypatch.setattr(layer_manifest_module, "FULL_SCAN_INTERVAL_SECONDS", -1)
+    assert get_layer_raw_paths() == [raw_path], "layer with removed output should be converted after full scan"
+    assert get_converted_layer_ids() == set(), "layer with removed output should be forgotten after full scan"
+
+
+def test_recorded_dat_layers_are_skipped(tmp_path: Path,
+                                         volume_transfer_info: VolumeTransferInfo,
+                                         monkeypatch):
+    dat_root = tmp_path / "dat"
+    dat_paths = [
+        add_dat(dat_root, "2021/07/31/15", "Merlin-6284_21-07-31_152727_0-0-0.dat"),
+        add_dat(dat_root, "2021/07/31/15", "Merlin-6284_21-07-31_152838_0-0-0.dat"),
+        add_dat(dat_root, "2021/07/31/15", "Merlin-6284_21-07-31_152949_0-0-0.dat"),
+    ]
+    converted_layer = new_dat_layer(new_dat_path(dat_paths[0]))
+
+    volume_transfer_info.cluster_root_paths.layer_manifest = tmp_path / "layer_manifest.sqlite"
+    volume_transfer_info.transfer_tasks = [VolumeTransferTask.GENERATE_ARCHIVE_H5_RAW,
+                                           VolumeTransferTask.GENERATE_CLUSTER_H5_ALIGN]
+    output_paths = [
+        converted_layer.get_h5_path(volume_transfer_info.get_raw_h5_root_for_conversion(), source_type="raw"),
+        converted_layer.get_h5_path(volume_transfer_info.get_align_h5_root_for_conversion(), source_type="uint8"),
+    ]
+    for output_path in output_paths:
+        add_dat(output_path.parent, "", output_path.name)
+
+    def get_layer_ids() -> list[str]:
+        return [layer.get_layer_id() for layer in get_dat_layers_for_run(dat_root=dat_root,
+                                                                         first_dat=None,
+                                                                         last_dat=None,
+                                                                         skip_existing=True,
+                                                                         volume_transfer_info=volume_transfer_info)]
+
+    unconverted_layer_ids = get_layer_ids()
+    assert converted_layer.get_layer_id() not in unconverted_layer_ids, "converted layer should be skipped"
+
+    # recorded layer is skipped without checking its output (or dat) files
+    output_paths[1].unlink()
+    original_exists = Path.exists
+    checked_paths = []
+
+    def recording_exists(path: Path) -> bool:
+        checked_paths.append(path)
+        return original_exists(path)
+
+    monkeypatch.setattr(Path, "exists", recording_exists)
+    assert get_layer_ids() == unconverted_layer_ids, "recorded layer should be skipped"
+    assert not any(path in checked_paths for path in [dat_paths[0]] + output_paths), \
+        "recorded layer files should not be checked"
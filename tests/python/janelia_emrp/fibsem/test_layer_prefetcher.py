@@ -0,0 +1,99 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from janelia_emrp.fibsem.cyx_dat import new_cyx_dat
+from janelia_emrp.fibsem.dat_converter import DatConverter, get_layer_batch_id
+from janelia_emrp.fibsem.dat_path import split_into_layers
+from janelia_emrp.fibsem.dat_to_h5_writer import DatToH5Writer
+from janelia_emrp.fibsem.layer_prefetcher import LayerPrefetcher
+from janelia_emrp.fibsem.layer_task_scheduler import split_into_batches
+from janelia_emrp.fibsem.volume_transfer_info import VolumeTransferInfo, VolumeTransferTask
+
+
+def copy_small_dat_layers(small_dat_path: Path,
+                          dat_dir: Path) -> None:
+    dat_dir.mkdir()
+    for dat_name in ["Merlin-6284_21-07-31_152727_0-0-0.dat",
+                     "Merlin-6284_21-07-31_152727_0-0-1.dat",
+                     "Merlin-6284_21-07-31_152838_0-0-0.dat",
+                     "Merlin-6284_21-07-31_152949_0-0-0.dat"]:
+        shutil.copyfile(small_dat_path, dat_dir / dat_name)
+
+
+def test_layer_prefetcher(small_dat_path,
+                          tmp_path):
+    dat_dir = tmp_path / "dat"
+    copy_small_dat_layers(small_dat_path, dat_dir)
+
+    dat_layer_list = split_into_layers(path_list=[dat_dir])
+    skipped_layer_id = dat_layer_list[1].get_layer_id()
+
+    # ceiling smaller than one layer still allows one layer at a time to be read
+    with LayerPrefetcher(dat_layer_list=dat_layer_list,
+                         queue_depth=2,
+                         max_bytes=small_dat_path.stat().st_size,
+                         should_read=lambda layer: layer.get_layer_id() != skipped_layer_id) as prefetcher:
+        prefetched_layers = list(prefetcher)
+
+    assert [layer.dat_paths_for_layer for layer in prefetched_layers] == dat_layer_list, "layers out of order"
+    assert prefetched_layers[1].cyx_dat_list is None, "skipped layer should not be read"
+
+    expected_pixels = new_cyx_dat(dat_layer_list[0].dat_paths[0]).pixels
+    for prefetched_layer in [prefetched_layers[0], prefetched_layers[2]]:
+        assert prefetched_layer.error is None, f"unexpected error {prefetched_layer.error}"
+        assert len(prefetched_layer.cyx_dat_list) == len(prefetched_layer.dat_paths_for_layer.dat_paths), \
+            "incorrect number of dats read for layer"
+        for cyx_dat in prefetched_layer.cyx_dat_list:
+            assert np.array_equal(cyx_dat.pixels, expected_pixels), "prefetched pixels differ from dat file"
+            assert cyx_dat.pixels.flags.writeable, "prefetched pixels should be copied into memory"
+
+    assert prefetcher._held_bytes == 0, "all reserved bytes should be released after iteration"
+
+
+def test_layer_prefetcher_read_error(small_dat_path,
+                                     tmp_path):
+    dat_dir = tmp_path / "dat"
+    copy_small_dat_layers(small_dat_path, dat_dir)
+
+    dat_layer_list = split_into_layers(path_list=[dat_dir])
+    dat_layer_list[0].dat_paths[0].file_path.unlink()
+
+    with LayerPrefetcher(dat_layer_list=dat_layer_list, queue_depth=1) as prefetcher:
+        prefetched_layers = list(prefetcher)
+
+    assert isinstance(prefetched_layers[0].error, FileNotFoundError), "missing dat error should be kept for layer"
+    assert all(layer.error is None for layer in prefetched_layers[1:]), "read error should not affect other layers"
+
+
+def test_convert_layer_batch_for_volume(small_dat_path,
+                                        tmp_path,
+                                        volume_transfer_info: VolumeTransferInfo):
+    dat_dir = tmp_path / "dat"
+    copy_small_dat_layers(small_dat_path, dat_dir)
+
+    dat_layer_list = split_into_layers(path_list=[dat_dir])
+    failed_layer_id = dat_layer_list[1].get_layer_id()
+    dat_layer_list[1].dat_paths[0].file_path.unlink()
+
+    layer_batches = split_into_batches(dat_layer_list, 4)
+    assert layer_batches == [dat_layer_list], "all layers should fit in one batch"
+    assert get_layer_batch_id(dat_layer_list) == \
+           f"{dat_layer_list[0].get_layer_id()}..{dat_layer_list[-1].get_layer_id()}", "incorrect batch id"
+
+    volume_transfer_info.transfer_tasks = [VolumeTransferTask.GENERATE_CLUSTER_H5_ALIGN]
+    volume_transfer_info.max_mipmap_level = 1
+    converter = DatConverter(volume_transfer_info=volume_transfer_info,
+                             align_writer=DatToH5Writer(chunk_shape=(1, 512, 512)),
+                             prefetch_layer_count=1)
+
+    with pytest.raises(RuntimeError, match=f"failed to convert 1 of 3 layers in batch: \\['{failed_layer_id}'\\]"):
+        converter.convert_layer_batch_for_volume(dat_layer_list)
+
+    align_h5_root = volume_transfer_info.get_align_h5_root_for_conversion()
+    for layer in dat_layer_list:
+        converted = layer.h5_exists(h5_root_path=align_h5_root, source_type="uint8")
+        assert converted == (layer.get_layer_id() != failed_layer_id), \
+            f"incorrect conversion state for layer {layer.get_layer_id()}"
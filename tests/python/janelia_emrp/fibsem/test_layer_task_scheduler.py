@@ -0,0 +1,48 @@
+import functools
+from pathlib import Path
+
+from distributed import Client, LocalCluster
+
+from janelia_emrp.fibsem.layer_task_scheduler import convert_layers_with_dask
+
+
+def convert_test_layer(output_dir: Path,
+                       layer: str):
+    attempt_path = output_dir / f"{layer}.attempt"
+    if layer == "fails-once" and not attempt_path.exists():
+        attempt_path.touch()
+        raise ValueError(f"first attempt to convert {layer} failed")
+    if layer == "always-fails":
+        raise ValueError(f"{layer} failed")
+    (output_dir / f"{layer}.done").touch()
+    return f"{layer}-value"
+
+
+def test_convert_layers_with_dask(tmp_path: Path):
+    layers = ["z0", "fails-once", "z2", "always-fails", "z4"]
+    with LocalCluster(n_workers=2, threads_per_worker=1, processes=False,
+                      dashboard_address=None) as dask_cluster, Client(dask_cluster) as dask_client:
+        results = convert_layers_with_dask(dask_client=dask_client,
+                                           layers=layers,
+                                           convert_layer=functools.partial(convert_test_layer, tmp_path),
+                                           get_layer_id=lambda layer: layer,
+                                           max_tasks_in_flight=2,
+                                           max_attempts=2)
+
+    assert [result.layer_id for result in results] == layers, "results should be in layer order"
+
+    layer_to_result = {result.layer_id: result for result in results}
+    for layer in ["z0", "fails-once", "z2", "z4"]:
+        assert layer_to_result[layer].error is None, f"{layer} should be converted"
+        assert layer_to_result[layer].elapsed_seconds is not None, f"{layer} should be timed"
+        assert (tmp_path / f"{layer}.done").exists(), f"{layer} output missing"
+        assert layer_to_result[layer].value == f"{layer}-value", f"{layer} value should be returned to client"
+
+    assert layer_to_result["z0"].attempts == 1, "z0 should be converted on first attempt"
+    assert layer_to_result["fails-once"].attempts == 2, "fails-once should be retried"
+    assert len(layer_to_result["fails-once"].failed_workers) == 1, "failed worker should be recorded"
+
+    always_fails = layer_to_result["always-fails"]
+    assert always_fails.attempts == 2, "always-fails should be tried max_attempts times"
+    assert "always-fails failed" in always_fails.error, "last error should be recorded"
+    assert always_fails.value is None, "failed layer should not have a value"
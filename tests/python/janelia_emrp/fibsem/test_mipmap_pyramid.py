@@ -0,0 +1,36 @@
+import h5py
+import numpy as np
+from xarray_multiscale import multiscale
+from xarray_multiscale.reducers import windowed_mean
+
+from janelia_emrp.fibsem.mipmap_pyramid import build_mipmap_pyramid, build_mipmap_pyramids
+
+
+def test_build_mipmap_pyramid_matches_multiscale():
+    rng = np.random.default_rng(seed=11)
+    level_zero_pixels = rng.integers(low=0, high=256, size=(1, 203, 317), dtype=np.uint8)
+
+    expected_levels = multiscale(level_zero_pixels, windowed_mean, (1, 2, 2), chained=False)
+    pyramid = build_mipmap_pyramid(level_zero_pixels, max_mipmap_level=20)
+
+    assert len(pyramid) == 7, "incorrect number of levels"  # 203 => 101 => 50 => 25 => 12 => 6 => 3 => 1
+    for level, pixels in enumerate(pyramid[:len(expected_levels) - 1], start=1):
+        expected_pixels = expected_levels[level].to_numpy()
+        assert pixels.dtype == np.uint8, f"level {level} has incorrect dtype {pixels.dtype}"
+        assert np.array_equal(pixels, expected_pixels), f"level {level} pixels do not match multiscale result"
+
+    assert len(build_mipmap_pyramid(level_zero_pixels, max_mipmap_level=3)) == 3, "max level not honored"
+
+
+def test_build_mipmap_pyramids(small_uint8_path):
+    with h5py.File(name=str(small_uint8_path), mode="r") as expected_align_file:
+        group = expected_align_file.get("0-0-1")
+        expected_levels = [np.array(group.get(f"mipmap.{level}")[:]) for level in range(len(group.keys()))]
+
+    level_zero_list = [expected_levels[0], np.flip(expected_levels[0], axis=2)]
+    pyramids = build_mipmap_pyramids(level_zero_list, max_mipmap_level=7, max_workers=2)
+
+    assert len(pyramids) == 2, "incorrect number of pyramids"
+    assert len(pyramids[0]) == len(expected_levels) - 1, "incorrect number of levels"
+    for level, pixels in enumerate(pyramids[0], start=1):
+        assert np.array_equal(pixels, expected_levels[level]), f"level {level} pixels do not match expected result"
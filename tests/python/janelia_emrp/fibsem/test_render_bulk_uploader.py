@@ -0,0 +1,64 @@
+from urllib.parse import urlparse
+
+import pytest
+
+from janelia_emrp.fibsem.render_api import RenderApi
+from janelia_emrp.fibsem.render_bulk_uploader import RenderBulkUploader
+from janelia_emrp.fibsem.volume_transfer_info import RenderConnect
+
+
+def build_resolved_tiles(tile_count: int) -> dict:
+    return {
+        "transformIdToSpecMap": {"t": {"id": "t"}},
+        "tileIdToSpecMap": {f"tile-{i}": {"tileId": f"tile-{i}", "z": 1} for i in range(tile_count)}
+    }
+
+
+def test_save_resolved_tiles(stub_render_server):
+    stub_render_server.failures_to_inject = 2
+    stack_url = f"{stub_render_server.url}/render-ws/v1/owner/o/project/p/stack/s"
+
+    with RenderBulkUploader(max_concurrent_batches=2, backoff_seconds=0.01, gzip_level=1) as uploader:
+        uploader.save_resolved_tiles(stack_url=stack_url,
+                                     resolved_tiles=build_resolved_tiles(12),
+                                     derive_data=True,
+                                     tiles_per_batch=5)
+
+    saved_requests = stub_render_server.requests
+    assert len(saved_requests) == 3, "failed batches should have been retried"
+
+    saved_tile_ids = set()
+    for request in saved_requests:
+        assert request.method == "PUT", "invalid method"
+        assert request.path == "/render-ws/v1/owner/o/project/p/stack/s/resolvedTiles?deriveData=true", \
+            "invalid path"
+        assert request.headers["Content-Encoding"] == "gzip", "body should be compressed"
+        assert "t" in request.body["transformIdToSpecMap"], "each batch should include transforms"
+        saved_tile_ids.update(request.body["tileIdToSpecMap"].keys())
+
+    assert saved_tile_ids == {f"tile-{i}" for i in range(12)}, "all tile specs should be saved"
+
+
+def test_save_resolved_tiles_failure(stub_render_server):
+    stub_render_server.failures_to_inject = 100
+    stack_url = f"{stub_render_server.url}/render-ws/v1/owner/o/project/p/stack/s"
+
+    with pytest.raises(RuntimeError, match="1 tile spec batches failed"):
+        with RenderBulkUploader(max_attempts=2, backoff_seconds=0.01) as uploader:
+            uploader.save_resolved_tiles(stack_url=stack_url, resolved_tiles=build_resolved_tiles(3))
+
+    assert stub_render_server.failures_to_inject == 98, "each batch should be attempted max_attempts times"
+
+
+def test_render_api_uncompressed_by_default(stub_render_server):
+    stub_url = urlparse(stub_render_server.url)
+    render_connect = RenderConnect(host=stub_url.hostname, port=stub_url.port, web_only=True, validate_client=False,
+                                   client_scripts="/groups/flyTEM/flyTEM/render/bin", memGB="1G")
+    render_api = RenderApi(render_owner="o", render_project="p", render_connect=render_connect)
+
+    render_api.save_resolved_tiles(stack="s", resolved_tiles=build_resolved_tiles(3))
+
+    saved_requests = stub_render_server.requests
+    assert len(saved_requests) == 1, "tiles should be saved in one batch"
+    assert "Content-Encoding" not in saved_requests[0].headers, "body should not be compressed"
+    assert len(saved_requests[0].body["tileIdToSpecMap"]) == 3, "all tile specs should be saved"
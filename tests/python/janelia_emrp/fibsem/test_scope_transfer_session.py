@@ -0,0 +1,56 @@
+import datetime
+from pathlib import Path
+
+from janelia_emrp.fibsem.dat_copier import copy_dat_files_in_batches
+from janelia_emrp.fibsem.dat_keep_file import build_keep_file
+from janelia_emrp.fibsem.dat_path import dat_to_target_path
+from janelia_emrp.fibsem.scope_transfer_session import ScopeTransferSession
+
+
+def test_local_scope_transfer_session(tmp_path: Path):
+    scope_root = tmp_path / "scope" / "Images" / "Mouse"
+    keep_root = tmp_path / "scope" / "UploadFlags"
+    keep_root.mkdir(parents=True)
+
+    scope_dat_paths = [
+        scope_root / "Y2022" / "M07" / "D21" / "Merlin-6281_22-07-21_014518_0-0-0.dat",
+        scope_root / "Y2022" / "M07" / "D21" / "Merlin-6281_22-07-21_014314_0-0-1.dat",
+        scope_root / "Y2022" / "M07" / "D21" / "Merlin-6281_22-07-21_014314_0-0-0.dat",
+        scope_root / "Y2022" / "M07" / "D31" / "Merlin-6281_22-07-31_235959_0-0-0.dat",
+        scope_root / "Y2022" / "M08" / "D01" / "Merlin-6281_22-08-01_000101_0-0-0.dat",
+        scope_root / "Y2022" / "M08" / "D03" / "Merlin-6281_22-08-03_101010_0-0-0.dat",  # after listed range
+    ]
+    keep_files = []
+    for scope_dat_path in scope_dat_paths:
+        scope_dat_path.parent.mkdir(parents=True, exist_ok=True)
+        scope_dat_path.write_bytes(scope_dat_path.name.encode("utf-8"))
+        keep_name = f"test^E^^{'^'.join(scope_dat_path.relative_to(scope_root).parts)}^keep"
+        (keep_root / keep_name).touch()
+        keep_files.append(build_keep_file("", str(keep_root), keep_name))
+
+    with ScopeTransferSession(host=None, max_concurrent_transfers=3) as session:
+        assert len(session.list_directory(keep_root)) == len(scope_dat_paths), "incorrect keep file listing"
+
+        day_to_dat_paths = session.list_dats_by_day(dat_storage_root=scope_root,
+                                                    first_day=datetime.datetime(2022, 7, 21, 1, 30),
+                                                    last_day=datetime.datetime(2022, 8, 2, 23, 59))
+        assert day_to_dat_paths == {
+            datetime.date(2022, 7, 21): sorted(scope_dat_paths[0:3], key=lambda p: p.name),
+            datetime.date(2022, 7, 31): [scope_dat_paths[3]],
+            datetime.date(2022, 8, 1): [scope_dat_paths[4]],
+        }, "incorrect dats listed by day"
+
+        dat_storage_root = tmp_path / "dat"
+        copy_count = copy_dat_files_in_batches(session=session,
+                                               scope_dat_paths=scope_dat_paths,
+                                               dat_storage_root=dat_storage_root,
+                                               max_transfer_seconds=None,
+                                               start_time=0,
+                                               keep_files=keep_files)
+
+    assert copy_count == len(scope_dat_paths), "incorrect copy count"
+    for scope_dat_path in scope_dat_paths:
+        target_path = dat_to_target_path(scope_dat_path, dat_storage_root)
+        assert target_path.read_bytes() == scope_dat_path.read_bytes(), f"{target_path} not copied"
+
+    assert list(keep_root.iterdir()) == [], "keep files should be removed after copy"
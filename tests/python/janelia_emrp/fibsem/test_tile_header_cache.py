@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from janelia_emrp.fibsem import tile_header_cache
+from janelia_emrp.fibsem.tile_header_cache import TileHeaderCache
+
+
+def test_get_headers(tmp_path: Path,
+                     monkeypatch):
+    # use small query batches so that lookups span more than one batch
+    monkeypatch.setattr(tile_header_cache, "PATHS_PER_QUERY", 2)
+
+    h5_paths = [tmp_path / f"Merlin-6284_21-07-31_15{second:04d}.uint8.h5" for second in range(5)]
+    cache_path = tmp_path / "tile_header_cache.sqlite"
+
+    with TileHeaderCache(cache_path) as cache:
+        for index, h5_path in enumerate(h5_paths):
+            cache.put_headers(h5_path, mtime=float(index), headers=[{"tile": index}])
+
+    with TileHeaderCache(cache_path) as cache:
+        requested_paths = [h5_paths[0], h5_paths[2], h5_paths[3], h5_paths[4], tmp_path / "missing.uint8.h5"]
+        path_to_headers = cache.get_headers(requested_paths, [0.0, 2.0, 99.0, None, 5.0])
+
+    assert path_to_headers == {h5_paths[0]: [{"tile": 0}], h5_paths[2]: [{"tile": 2}]}, \
+        "only requested files with matching modification times should be returned"
@@ -1,6 +1,11 @@
 import json
 
-from janelia_emrp.fibsem.volume_transfer_info import VolumeTransferInfo
+import numpy as np
+import pytest
+from PIL import Image
+from pydantic import ValidationError
+
+from janelia_emrp.fibsem.volume_transfer_info import VolumeTransferInfo, FillInfo, FillRegion
 
 
 def test_json(volume_transfer_info):
@@ -39,3 +44,65 @@ def test_json(volume_transfer_info):
     assert parsed_info.scope_data_set.last_dat_name is None, "failed to parse null last_dat_name value"
     assert parsed_info.render_data_set is None, "failed to parse missing render_data_set value"
 
+
+def test_fill_region(tmp_path):
+    rng = np.random.default_rng(seed=3)
+    pixel_array = rng.integers(low=-2000, high=2000, size=(60, 80)).astype(np.int16)
+
+    fill_info = FillInfo(tile_indexes=[0], x=5, y=10, width=30, height=20,
+                         additional_regions=[FillRegion(x=50, y=40, width=10, height=15)],
+                         fill_intensity=-1000, intensity_threshold=0)
+
+    expected_pixel_array = pixel_array.copy()
+    for region in fill_info.get_regions():
+        for x in range(region.x, region.x + region.width):
+            for y in range(region.y, region.y + region.height):
+                if expected_pixel_array[y][x] > fill_info.intensity_threshold:
+                    expected_pixel_array[y][x] = fill_info.fill_intensity
+
+    filled_pixel_array = fill_info.fill_region(pixel_array)
+
+    assert np.array_equal(filled_pixel_array, expected_pixel_array), "filled pixels differ from expected result"
+    assert not np.array_equal(pixel_array, expected_pixel_array), "source pixels should not be modified"
+
+    in_place_pixel_array = pixel_array.copy()
+    assert fill_info.fill_region(in_place_pixel_array, in_place=True) is in_place_pixel_array, \
+        "in place fill should return source array"
+    assert np.array_equal(in_place_pixel_array, expected_pixel_array), "in place pixels differ from expected result"
+
+    mask = np.zeros(pixel_array.shape, dtype=np.uint8)
+    mask[0:3, 70:80] = 255
+    mask_path = tmp_path / "fill_mask.png"
+    Image.fromarray(mask).save(mask_path)
+
+    mask_fill_info = FillInfo(tile_indexes=[0], mask_path=mask_path, fill_intensity=-1000, intensity_threshold=0)
+
+    expected_pixel_array = pixel_array.copy()
+    expected_pixel_array[np.logical_and(mask > 0, pixel_array > 0)] = -1000
+
+    assert np.array_equal(mask_fill_info.fill_region(pixel_array), expected_pixel_array), \
+        "mask filled pixels differ from expected result"
+
+
+def test_partial_fill_region_is_rejected():
+    with pytest.raises(ValidationError, match="must all be specified"):
+        FillInfo(tile_indexes=[0], x=5, y=10, width=30, fill_intensity=-1000, intensity_threshold=0)
+
+
+def test_fill_region_outside_pixels(caplog):
+    pixel_array = np.full((60, 80), 100, dtype=np.int16)
+
+    clipped_fill_info = FillInfo(tile_indexes=[0], x=70, y=50, width=30, height=20,
+                                 fill_intensity=-1000, intensity_threshold=0)
+    expected_pixel_array = pixel_array.copy()
+    expected_pixel_array[50:60, 70:80] = -1000
+
+    assert np.array_equal(clipped_fill_info.fill_region(pixel_array), expected_pixel_array), \
+        "partially outside region should be clipped"
+    assert "clipping fill region" in caplog.text, "clipped region should be logged"
+
+    outside_fill_info = FillInfo(tile_indexes=[0], x=5, y=10, width=30, height=20,
+                                 additional_regions=[FillRegion(x=80, y=0, width=10, height=10)],
+                                 fill_intensity=-1000, intensity_threshold=0)
+    with pytest.raises(ValueError, match="is outside of"):
+        outside_fill_info.fill_region(pixel_array)
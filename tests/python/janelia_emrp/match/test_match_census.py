@@ -0,0 +1,113 @@
+from typing import Any
+
+import pandas as pd
+
+from janelia_emrp.match import list_match_counts
+from janelia_emrp.match.match_census import count_pairs_by_match_count, pairs_to_data_frame, update_census, \
+    get_census_path, load_census
+
+
+def build_match_counts(group_id: str,
+                       match_counts: list[int]) -> list[dict[str, Any]]:
+    # alternate same layer and cross layer pairs
+    return [{"pGroupId": group_id, "pId": f"{group_id}-p{index}",
+             "qGroupId": group_id if index % 2 == 0 else f"{float(group_id) + 1:.1f}", "qId": f"{group_id}-q{index}",
+             "matchCount": match_count}
+            for index, match_count in enumerate(match_counts)]
+
+
+class FakeMatchRequest:
+    # Stands in for MatchRequest, serving match counts for groups and recording which groups were fetched.
+    def __init__(self,
+                 group_id_to_match_counts: dict[str, list[dict[str, Any]]]):
+        self.owner = "o"
+        self.collection = "c"
+        self.group_id_to_match_counts = group_id_to_match_counts
+        self.fetched_group_ids = []
+        self.reported_pair_count = None
+
+    def get_collection_pair_count(self) -> int:
+        if self.reported_pair_count is not None:
+            return self.reported_pair_count
+        return sum([len(match_counts) for match_counts in self.group_id_to_match_counts.values()])
+
+    def get_p_group_ids(self) -> list[str]:
+        return list(self.group_id_to_match_counts.keys())
+
+    async def get_pairs_with_match_counts_for_group_async(self,
+                                                          group_id: str) -> list[dict[str, Any]]:
+        self.fetched_group_ids.append(group_id)
+        return self.group_id_to_match_counts[group_id]
+
+
+def test_count_pairs_by_match_count():
+    census = pairs_to_data_frame(build_match_counts("1.0", [0, 24, 25, 26, 49, 50, 99, 100, 101, 5000]))
+
+    # bins are [0, 25), [25, 50), [50, 100) so counts equal to a max value go in the next bin
+    counts_by_bin = count_pairs_by_match_count(census, [25, 50, 100])
+
+    assert counts_by_bin["maxValue"].tolist() == [25, 50, 100], "invalid max values"
+    assert counts_by_bin["sameLayer"].tolist() == [1, 2, 1], "invalid same layer counts for 0, 25, 49, 99"
+    assert counts_by_bin["crossLayer"].tolist() == [1, 1, 1], "invalid cross layer counts for 24, 26, 50"
+    assert counts_by_bin[["sameLayer", "crossLayer"]].to_numpy().sum() == 7, \
+        "counts of at least the last max value should not be counted"
+
+
+def test_update_census_fetches_new_groups(tmp_path):
+    match_request = FakeMatchRequest({"2.0": build_match_counts("2.0", [3, 4]),
+                                      "10.0": build_match_counts("10.0", [5])})
+
+    census = update_census(match_request, tmp_path)
+    assert match_request.fetched_group_ids == ["2.0", "10.0"], "all groups should be fetched for a new census"
+    assert census["pGroupId"].tolist() == ["2.0", "2.0", "10.0"], "census should be sorted numerically by group"
+
+    # add a group and drop a group
+    match_request.group_id_to_match_counts["1.0"] = build_match_counts("1.0", [6, 7, 8])
+    del match_request.group_id_to_match_counts["10.0"]
+    match_request.fetched_group_ids.clear()
+
+    census = update_census(match_request, tmp_path)
+    assert match_request.fetched_group_ids == ["1.0"], "only the new group should be fetched"
+    assert census["pGroupId"].tolist() == ["1.0"] * 3 + ["2.0"] * 2, "invalid groups after update"
+    pd.testing.assert_frame_equal(load_census(get_census_path(tmp_path, match_request)), census,
+                                  check_dtype=False)
+
+    match_request.fetched_group_ids.clear()
+    update_census(match_request, tmp_path)
+    assert match_request.fetched_group_ids == [], "nothing should be fetched for an unchanged collection"
+
+
+def test_update_census_full_refresh_on_pair_total_mismatch(tmp_path):
+    match_request = FakeMatchRequest({"1.0": build_match_counts("1.0", [3, 4]),
+                                      "2.0": build_match_counts("2.0", [5])})
+    update_census(match_request, tmp_path)
+
+    # pairs added to an existing group are only detected through the collection pair total
+    match_request.group_id_to_match_counts["2.0"] = build_match_counts("2.0", [5, 9])
+    match_request.fetched_group_ids.clear()
+
+    census = update_census(match_request, tmp_path)
+    assert sorted(match_request.fetched_group_ids) == ["1.0", "2.0"], "all groups should be fetched"
+    assert census["matchCount"].tolist() == [3, 4, 5, 9], "census should include the added pair"
+
+
+def test_refresh_group_id_argument(tmp_path, monkeypatch):
+    match_request = FakeMatchRequest({"1.0": build_match_counts("1.0", [3, 4]),
+                                      "2.0": build_match_counts("2.0", [5])})
+    monkeypatch.setattr(list_match_counts, "MatchRequest", lambda host, owner, collection: match_request)
+    monkeypatch.setattr(list_match_counts.Path, "home", lambda: tmp_path)
+
+    list_match_counts.main([])
+    assert sorted(match_request.fetched_group_ids) == ["1.0", "2.0"], "all groups should be fetched for a new census"
+
+    # re-matched pairs keep the pair total so they are only picked up when the group is listed
+    match_request.group_id_to_match_counts["2.0"] = build_match_counts("2.0", [50])
+    match_request.fetched_group_ids.clear()
+
+    list_match_counts.main([])
+    assert match_request.fetched_group_ids == [], "unlisted changed groups should not be fetched"
+
+    list_match_counts.main(["--refresh_group_id", "2.0"])
+    assert match_request.fetched_group_ids == ["2.0"], "only the listed group should be fetched"
+    census = load_census(get_census_path(tmp_path / ".match_census", match_request))
+    assert census["matchCount"].tolist() == [3, 4, 50], "census should include the refreshed counts"
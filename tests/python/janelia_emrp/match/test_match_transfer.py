@@ -0,0 +1,137 @@
+import threading
+from typing import Any, Iterator
+
+import pytest
+
+from janelia_emrp.match.match_transfer import MatchTransfer, offset_sections, filter_first_weight_below
+
+
+def build_pair(group_id: str,
+               index: int,
+               weight: float = 1.0) -> dict[str, Any]:
+    return {"pGroupId": group_id, "pId": f"p-{index}", "qGroupId": group_id, "qId": f"q-{index}",
+            "matches": {"w": [weight]}}
+
+
+class FakeMatchRequest:
+    # Stands in for MatchRequest, recording saves and deletes (in order) in a shared event list.
+    def __init__(self,
+                 collection: str,
+                 group_id_to_pairs: dict[str, list[dict[str, Any]]],
+                 events: list[tuple],
+                 failing_save_group_ids: frozenset[str] = frozenset()):
+        self.collection = collection
+        self.group_id_to_pairs = group_id_to_pairs
+        self.events = events
+        self.failing_save_group_ids = failing_save_group_ids
+        self.read_group_ids = []
+        self._lock = threading.Lock()
+
+    def iter_match_pairs(self,
+                         group_id: str,
+                         pair_type: str = "p_group",
+                         exclude_match_details: bool = False) -> Iterator[dict[str, Any]]:
+        with self._lock:
+            self.read_group_ids.append(group_id)
+        for pair in self.group_id_to_pairs.get(group_id, []):
+            yield dict(pair)
+
+    def save_match_pairs(self,
+                         group_id: str,
+                         match_pairs: list[dict[str, Any]]):
+        if group_id in self.failing_save_group_ids:
+            raise RuntimeError(f"failed to save pairs for {group_id}")
+        with self._lock:
+            self.events.append(("save", self.collection, group_id, [dict(pair) for pair in match_pairs]))
+
+    def delete_match_pair(self,
+                          p_group_id: str,
+                          p_id: str,
+                          q_group_id: str,
+                          q_id: str):
+        with self._lock:
+            self.events.append(("delete", self.collection, p_group_id, p_id, q_group_id, q_id))
+
+
+def test_transform_applied():
+    events = []
+    source = FakeMatchRequest("from", {"1.0": [build_pair("1.0", 0), build_pair("1.0", 1, weight=0.05)]}, events)
+    target = FakeMatchRequest("to", {}, events)
+
+    match_transfer = MatchTransfer(source=source,
+                                   target=target,
+                                   transforms=[filter_first_weight_below(0.5), offset_sections(10)])
+    result = match_transfer.transfer_group("1.0")
+
+    assert (result.read_count, result.saved_count, result.deleted_count) == (2, 1, 0), "invalid counts"
+    assert len(events) == 1, "one batch should be saved"
+    saved_pairs = events[0][3]
+    assert [(pair["pId"], pair["pGroupId"], pair["qGroupId"]) for pair in saved_pairs] == [("p-1", "11.0", "11.0")], \
+        "only the filtered pair should be saved with offset group ids"
+
+
+def test_delete_after_save():
+    events = []
+    pairs = [build_pair("1.0", index) for index in range(5)]
+    source = FakeMatchRequest("from", {"1.0": pairs}, events)
+    target = FakeMatchRequest("to", {}, events)
+
+    match_transfer = MatchTransfer(source=source, target=target, transforms=[], delete_from_source=True,
+                                   pairs_per_save=2)
+    result = match_transfer.transfer_group("1.0")
+
+    assert (result.saved_count, result.deleted_count) == (5, 5), "all pairs should be moved"
+    event_types = [event[0] for event in events]
+    assert event_types == ["save"] * 3 + ["delete"] * 5, "pairs should only be deleted after all saves"
+    assert [event[3] for event in events[3:]] == [f"p-{index}" for index in range(5)], "invalid deleted pairs"
+
+    # a failed save should leave every source pair in place
+    events.clear()
+    failing_target = FakeMatchRequest("to", {}, events, failing_save_group_ids=frozenset({"1.0"}))
+    match_transfer = MatchTransfer(source=source, target=failing_target, transforms=[], delete_from_source=True)
+    with pytest.raises(RuntimeError, match="failed to save"):
+        match_transfer.transfer_group("1.0")
+    assert events == [], "nothing should be deleted when a save fails"
+
+
+def test_batches_flush_at_limit_and_end():
+    events = []
+    source = FakeMatchRequest("from", {"1.0": [build_pair("1.0", index) for index in range(2500)]}, events)
+    target = FakeMatchRequest("to", {}, events)
+
+    result = MatchTransfer(source=source, target=target, transforms=[]).transfer_group("1.0")
+
+    assert result.saved_count == 2500, "all pairs should be saved"
+    assert [len(event[3]) for event in events] == [1000, 1000, 500], \
+        "batches should be saved every 1000 pairs and for the remaining pairs at the end"
+
+    events.clear()
+    explain_result = MatchTransfer(source=source, target=target, transforms=[], delete_from_source=True,
+                                   explain=True).transfer_group("1.0")
+    assert (explain_result.saved_count, explain_result.deleted_count) == (2500, 2500), "invalid explain counts"
+    assert events == [], "explain should not save or delete"
+
+
+def test_restart_skips_completed_groups(tmp_path):
+    events = []
+    group_ids = ["1.0", "2.0", "3.0"]
+    source = FakeMatchRequest("from", {group_id: [build_pair(group_id, 0)] for group_id in group_ids}, events)
+    target = FakeMatchRequest("to", {}, events, failing_save_group_ids=frozenset({"2.0"}))
+    completed_groups_path = tmp_path / "completed" / "from.p_group.txt"
+
+    match_transfer = MatchTransfer(source=source, target=target, transforms=[], delete_from_source=True)
+    with pytest.raises(ValueError, match=r"failed to transfer 1 groups: \['2.0'\]"):
+        match_transfer.transfer_groups(group_ids, max_concurrent_groups=2,
+                                       completed_groups_path=completed_groups_path)
+    assert set(completed_groups_path.read_text().split()) == {"1.0", "3.0"}, "completed groups should be recorded"
+
+    # restart after the failure is fixed
+    events.clear()
+    source.read_group_ids.clear()
+    match_transfer.target = FakeMatchRequest("to", {}, events)
+    results = match_transfer.transfer_groups(group_ids, completed_groups_path=completed_groups_path)
+
+    assert [result.group_id for result in results] == ["2.0"], "only the failed group should be transferred"
+    assert source.read_group_ids == ["2.0"], "completed groups should not be read"
+    assert [event[0] for event in events] == ["save", "delete"], "invalid events for restarted group"
+    assert set(completed_groups_path.read_text().split()) == set(group_ids), "all groups should be recorded"
@@ -0,0 +1,62 @@
+import sys
+
+import numpy as np
+import pytest
+import xarray as xr
+
+import janelia_emrp.msem.ingestion_ibeammsem as ingestion_ibeammsem
+
+# ingestion_ibeammsem modules import their siblings as top level modules
+sys.path.insert(0, ingestion_ibeammsem.__path__[0])
+
+from constant import N_BEAMS  # noqa: E402
+from xvar import XVar  # noqa: E402
+
+SCANS = [0, 1]
+SLABS = [5, 2, 9]  # MagC ids are neither contiguous nor sorted
+MFOVS = [-1, 0, 1, 2]  # negative MFOVs are internal
+BINS = 256
+
+
+def build_xlog() -> xr.Dataset:
+    """Returns a small dask-backed xlog with some variables stored in non-canonical dimension order."""
+    rng = np.random.default_rng(53)
+    n_scans, n_slabs, n_mfovs = len(SCANS), len(SLABS), len(MFOVS)
+
+    xy_shape = (N_BEAMS, n_mfovs, n_slabs, n_scans)
+    x = rng.uniform(-1e5, 1e5, xy_shape)
+    y = rng.uniform(-1e5, 1e5, xy_shape)
+    x[:, 3, 1, :] = np.nan  # slab 2 has no MFOV 2
+    y[:, 3, 1, :] = np.nan
+
+    acquisition = rng.uniform(1.6e9, 1.7e9, (n_scans, n_slabs, n_mfovs))
+    acquisition[:, 1, 3] = np.nan
+    acquisition[1, 2, :] = np.nan  # slab 9 is not imaged in scan 1
+
+    histogram = rng.integers(0, 50, (BINS, N_BEAMS, n_mfovs, n_slabs, n_scans))
+    histogram[:, :, 3, 1, :] = 0  # no pixels for the missing MFOV
+    histogram[:, 5, 1, 0, 0] = 0
+    histogram[255, 5, 1, 0, 0] = 1000  # saturated SFOV
+
+    xlog = xr.Dataset(
+        {
+            XVar.PATH: (("scan", "slab"), np.array([[f"//scope/scan_{scan}/slab_{slab}" for slab in SLABS]
+                                                     for scan in SCANS])),
+            XVar.X: (("sfov", "mfov", "slab", "scan"), x),
+            XVar.Y: (("sfov", "mfov", "slab", "scan"), y),
+            XVar.ROTATION_SLAB: (("slab", "scan"), rng.uniform(-180, 180, (n_slabs, n_scans))),
+            XVar.ID_SERIAL: (("slab",), np.array([1.0, 0.0, np.nan])),
+            XVar.ID_REGION_LAYOUT: (("slab", "mfov"), np.array([[-1, 0, 0, 1], [-1, 0, 1, np.nan], [-1, 0, 0, 0]],
+                                                              dtype=float)),
+            XVar.ACQUISITION: (("scan", "slab", "mfov"), acquisition),
+            XVar.DISTANCE_ROI: (("slab", "mfov", "sfov"), rng.uniform(-40, 40, (n_slabs, n_mfovs, N_BEAMS))),
+            XVar.HISTOGRAM: (("bin", "sfov", "mfov", "slab", "scan"), histogram),
+        },
+        coords={"scan": SCANS, "slab": SLABS, "mfov": MFOVS, "sfov": np.arange(N_BEAMS), "bin": np.arange(BINS)},
+    )
+    return xlog.chunk({"scan": 1, "slab": 1})
+
+
+@pytest.fixture
+def xlog() -> xr.Dataset:
+    return build_xlog()
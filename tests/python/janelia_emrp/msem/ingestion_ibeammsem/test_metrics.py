@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import metrics  # noqa: E402
+from metrics import DEFAULT_PERCENTILES, compute_histogram_metrics, get_histogram_metric_names, \
+    get_histogram_metrics, histogram_metrics_to_table, read_histogram_metrics_table, \
+    write_histogram_metrics_table  # noqa: E402
+from xdim import XDim  # noqa: E402
+from xvar import XVar  # noqa: E402
+
+
+def metric_values(metrics_array: np.ndarray,
+                  percentiles=DEFAULT_PERCENTILES) -> dict[str, float]:
+    return dict(zip(get_histogram_metric_names(percentiles), metrics_array.tolist()))
+
+
+def test_compute_histogram_metrics_matches_pixel_statistics():
+    rng = np.random.default_rng(25)
+    pixel_arrays = [
+        rng.integers(0, 256, 5000),
+        np.clip(rng.normal(200, 3, 4000), 0, 255).astype(int),
+        np.concatenate([np.zeros(10, dtype=int), np.full(30, 255)]),
+        np.array([17]),
+    ]
+    histograms = np.stack([np.bincount(pixels, minlength=256) for pixels in pixel_arrays])
+
+    all_metrics = compute_histogram_metrics(histograms)
+    assert all_metrics.shape == (len(pixel_arrays), len(get_histogram_metric_names(DEFAULT_PERCENTILES))), \
+        "invalid metrics shape"
+
+    for pixels, sfov_metrics in zip(pixel_arrays, all_metrics):
+        values = metric_values(sfov_metrics)
+        assert values["count"] == pixels.size, "invalid count"
+        assert values["average"] == pytest.approx(np.mean(pixels)), "invalid average"
+        assert values["stdev"] == pytest.approx(np.sqrt(np.var(pixels)), abs=1e-9), "invalid stdev"
+        for percentile in DEFAULT_PERCENTILES:
+            assert values[f"percentile_{percentile:g}"] == np.percentile(pixels, percentile, method="inverted_cdf"), \
+                f"invalid percentile {percentile}"
+        assert values["fraction_black"] == pytest.approx(np.mean(pixels == 0)), "invalid black fraction"
+        assert values["fraction_saturated"] == pytest.approx(np.mean(pixels == 255)), "invalid saturated fraction"
+
+
+def test_compute_histogram_metrics_narrow_and_empty_histograms():
+    histograms = np.zeros((3, 256))
+    histograms[0, 255] = 1e12  # constant image with many pixels
+    histograms[1, 200] = 1e12  # one differing pixel among many
+    histograms[1, 201] = 1
+
+    narrow_metrics = compute_histogram_metrics(histograms)
+
+    assert metric_values(narrow_metrics[0])["stdev"] == 0, "constant image should have zero stdev"
+    expected_variance = (1e12 * 1) / (1e12 + 1) ** 2  # variance of a Bernoulli scaled count
+    assert metric_values(narrow_metrics[1])["stdev"] == pytest.approx(np.sqrt(expected_variance), rel=1e-6), \
+        "narrow histogram stdev should not be lost to cancellation"
+
+    empty_values = metric_values(narrow_metrics[2])
+    assert empty_values["count"] == 0, "empty histogram should have zero count"
+    assert all(np.isnan(value) for name, value in empty_values.items() if name != "count"), \
+        "empty histogram metrics should be nan"
+
+
+def test_get_histogram_metrics(xlog):
+    scan_metrics = get_histogram_metrics(xlog, scan=1)
+    in_memory_metrics = get_histogram_metrics(xlog.compute(), scan=1)
+    for name in get_histogram_metric_names(DEFAULT_PERCENTILES):
+        np.testing.assert_array_equal(scan_metrics[name].values, in_memory_metrics[name].values,
+                                      err_msg=f"dask and in-memory {name} should match")
+
+    histogram = xlog[XVar.HISTOGRAM].sel(scan=1, slab=2, mfov=1, sfov=7).values
+    pixels = np.repeat(np.arange(256), histogram)
+    sfov_metrics = scan_metrics.sel(slab=2, mfov=1, sfov=7)
+    assert sfov_metrics["average"].item() == pytest.approx(np.mean(pixels)), "invalid average"
+    assert sfov_metrics["stdev"].item() == pytest.approx(np.std(pixels)), "invalid stdev"
+    assert sfov_metrics["stdev"].item() == pytest.approx(metrics.get_raw_stdev(xlog, scan=1, slab=2, mfov=1, sfov=7)), \
+        "stdev should match get_raw_stdev"
+    assert -1 not in scan_metrics[XDim.MFOV].values, "internal MFOVs should be excluded"
+
+    wafer_metrics = get_histogram_metrics(xlog)
+    assert wafer_metrics["count"].dims[0] == XDim.SCAN, "wafer metrics should have a scan dimension"
+
+
+def test_metrics_table_round_trip(xlog, tmp_path):
+    table = histogram_metrics_to_table(get_histogram_metrics(xlog))
+    assert (table["count"] > 0).all(), "only acquired SFOVs should be in the table"
+    assert len(table) < xlog[XVar.HISTOGRAM].sel(mfov=slice(0, None)).sum("bin").size, \
+        "SFOVs without pixels should be dropped"
+
+    table_path = tmp_path / "metrics.npz"
+    write_histogram_metrics_table(table, table_path)
+    read_table = read_histogram_metrics_table(table_path)
+
+    assert list(read_table.columns) == list(table.columns), "columns should be kept in order"
+    assert read_table[XDim.SLAB].dtype == np.int32 and read_table["count"].dtype == np.int64, \
+        "invalid id and count types"
+    assert read_table["stdev"].dtype == np.float32, "metrics should be stored as float32"
+    pd.testing.assert_frame_equal(read_table, table, check_dtype=False, rtol=1e-6)
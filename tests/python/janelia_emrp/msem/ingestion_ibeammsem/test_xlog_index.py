@@ -0,0 +1,176 @@
+import gc
+import itertools
+import weakref
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from .conftest import SCANS, SLABS, build_xlog
+
+import id as xlog_id  # noqa: E402
+import metrics  # noqa: E402
+import path  # noqa: E402
+import roi  # noqa: E402
+import xlog_index  # noqa: E402
+from constant import N_BEAMS  # noqa: E402
+from xdim import XDim  # noqa: E402
+from xlog_index import XlogIndex, get_xlog_index  # noqa: E402
+from xvar import XVar  # noqa: E402
+
+
+# plain xarray selections used by the helpers before they were wrapped around XlogIndex
+
+def xarray_serial_ids(xlog, magc_ids):
+    return [None if np.isnan(serial_id) else int(serial_id)
+            for serial_id in xlog[XVar.ID_SERIAL].sel(slab=magc_ids).load()]
+
+
+def xarray_region_ids(xlog, slab, mfovs):
+    return [None if np.isnan(region_id) or region_id == -1 else int(region_id)
+            for region_id in xlog[XVar.ID_REGION_LAYOUT].sel(slab=slab, mfov=mfovs).values]
+
+
+def xarray_slab_path(xlog, scan, slab):
+    return Path(xlog[XVar.PATH].sel(scan=scan, slab=slab).values.item())
+
+
+def xarray_distance_to_roi(xlog, slab, mfov, sfov):
+    return xlog[XVar.DISTANCE_ROI].sel(slab=slab, mfov=mfov, sfov=sfov).values.item()
+
+
+def xarray_roi_sfovs(xlog, slab, mfov, dilation):
+    mask = xlog[XVar.DISTANCE_ROI].sel(slab=slab, mfov=mfov) < dilation
+    return mask.where(mask).dropna(XDim.SFOV)[XDim.SFOV].astype(int).values
+
+
+def xarray_acquisition(xlog, **selection):
+    return xlog[XVar.ACQUISITION].sel(**selection)
+
+
+def xarray_slabs(xlog, scan):
+    return (xarray_acquisition(xlog, scan=scan, mfov=slice(0, None))
+            .sum(XDim.MFOV, min_count=1).dropna(XDim.SLAB)[XDim.SLAB].values.astype(int))
+
+
+def xarray_n_mfovs(xlog, scan):
+    return xarray_acquisition(xlog, scan=scan, mfov=slice(0, None)).count().values.item()
+
+
+def xarray_mfovs(xlog, slab):
+    return xarray_acquisition(xlog, scan=0, slab=slab, mfov=slice(0, None)).dropna(XDim.MFOV)[XDim.MFOV].values
+
+
+def xarray_percentage_tissue(xlog, scan, dilation):
+    n_tissue = (xlog[XVar.DISTANCE_ROI].sel(mfov=slice(0, None)) < dilation).sum().values.item()
+    return 100 * n_tissue / xarray_n_mfovs(xlog, scan) / N_BEAMS
+
+
+def xarray_raw_average(xlog, scan, slab, mfov, sfov):
+    histogram = xlog[XVar.HISTOGRAM].sel(scan=scan, slab=slab, mfov=mfov, sfov=sfov).values
+    return np.sum(histogram * np.arange(256)) / np.sum(histogram)
+
+
+def xarray_raw_stdev(xlog, scan, slab, mfov, sfov):
+    histogram = xlog[XVar.HISTOGRAM].sel(scan=scan, slab=slab, mfov=mfov, sfov=sfov).values
+    average = xarray_raw_average(xlog, scan, slab, mfov, sfov)
+    return np.sqrt(np.sum(np.square(np.arange(256) - average) * histogram) / np.sum(histogram))
+
+
+def xarray_timestamp(xlog, scan, slab, mfov):
+    timestamp = xarray_acquisition(xlog, scan=scan, slab=slab, mfov=mfov).values.item()
+    return None if np.isnan(timestamp) else datetime.fromtimestamp(timestamp)
+
+
+def xarray_xy_slab(xlog, scan, slab, mfovs):
+    # transposed to the documented (2, n_mfovs, N_BEAMS) shape since the test xlog stores sfov before mfov
+    return (xlog[[XVar.X, XVar.Y]].sel(scan=scan, slab=slab, mfov=mfovs if mfovs is not None else slice(0, None))
+            .dropna(XDim.MFOV, how="all").to_dataarray().transpose(..., XDim.MFOV, XDim.SFOV).values)
+
+
+def test_id_and_path_wrappers(xlog):
+    assert np.array_equal(xlog_id.get_all_magc_ids(xlog), xlog[XDim.SLAB].values), "invalid MagC ids"
+    assert xlog_id.get_serial_ids(xlog, magc_ids=SLABS) == xarray_serial_ids(xlog, SLABS), "invalid serial ids"
+    assert xlog_id.get_serial_ids(xlog, magc_ids=[9, 5]) == [None, 1], "invalid serial ids in request order"
+    for slab in SLABS:
+        assert xlog_id.get_region_ids(xlog, slab=slab, mfovs=[0, 1, 2]) == \
+               xarray_region_ids(xlog, slab, [0, 1, 2]), f"invalid region ids for slab {slab}"
+    for scan, slab in itertools.product(SCANS, SLABS):
+        assert path.get_slab_path(xlog, scan=scan, slab=slab) == xarray_slab_path(xlog, scan, slab), \
+            f"invalid path for scan {scan} slab {slab}"
+
+    with pytest.raises(KeyError):
+        xlog_id.get_serial_ids(xlog, magc_ids=[3])
+
+
+def test_roi_wrappers(xlog):
+    for slab, mfov in itertools.product(SLABS, [0, 1, 2]):
+        for sfov in (0, 45, N_BEAMS - 1):
+            assert roi.get_distance_to_roi(xlog, slab=slab, mfov=mfov, sfov=sfov) == \
+                   xarray_distance_to_roi(xlog, slab, mfov, sfov), "invalid distance to ROI"
+        for dilation in (-15, 0, 15):
+            assert np.array_equal(roi.get_roi_sfovs(xlog, slab=slab, mfov=mfov, dilation=dilation),
+                                  xarray_roi_sfovs(xlog, slab, mfov, dilation)), "invalid ROI SFOVs"
+
+    for scan in SCANS:
+        assert np.array_equal(roi.get_slabs(xlog, scan=scan), xarray_slabs(xlog, scan)), "invalid slabs"
+        assert roi.get_n_slabs(xlog, scan=scan) == xarray_slabs(xlog, scan).size, "invalid slab count"
+        assert roi.get_n_mfovs(xlog, scan=scan) == xarray_n_mfovs(xlog, scan), "invalid MFOV count"
+        assert roi.get_percentage_tissue(xlog, scan=scan) == pytest.approx(xarray_percentage_tissue(xlog, scan, 15)), \
+            "invalid tissue percentage"
+    for slab in SLABS:
+        assert np.array_equal(roi.get_mfovs(xlog, slab=slab), xarray_mfovs(xlog, slab)), "invalid MFOVs"
+
+
+def test_metrics_and_assembly_wrappers(xlog):
+    for scan, slab, mfov in itertools.product(SCANS, SLABS, [0, 1]):
+        assert metrics.get_timestamp(xlog, scan=scan, slab=slab, mfov=mfov) == \
+               xarray_timestamp(xlog, scan, slab, mfov), "invalid timestamp"
+        for sfov in (0, 5, N_BEAMS - 1):
+            selection = dict(scan=scan, slab=slab, mfov=mfov, sfov=sfov)
+            assert metrics.get_raw_average(xlog, **selection) == pytest.approx(xarray_raw_average(xlog, **selection)), \
+                f"invalid average for {selection}"
+            assert metrics.get_raw_stdev(xlog, **selection) == pytest.approx(xarray_raw_stdev(xlog, **selection)), \
+                f"invalid stdev for {selection}"
+
+    index = get_xlog_index(xlog)
+    for scan, slab in itertools.product(SCANS, SLABS):
+        assert index.get_slab_rotations(scan=scan, slabs=[slab])[0] == \
+               180 + xlog[XVar.ROTATION_SLAB].sel(scan=scan, slab=slab).values.item(), "invalid rotation"
+        for mfovs in (None, [0, 2]):
+            assert np.array_equal(index.get_xy_slab(scan=scan, slab=slab, mfovs=mfovs),
+                                  xarray_xy_slab(xlog, scan, slab, mfovs)), f"invalid xy for slab {slab}"
+
+
+def test_index_is_shared_and_evicted():
+    xlog = build_xlog()
+    other_xlog = build_xlog()
+    index = get_xlog_index(xlog)
+    assert get_xlog_index(xlog) is index, "index should be reused for the same xarray"
+    assert get_xlog_index(index) is index, "an index should be returned as is"
+    other_index = get_xlog_index(other_xlog)
+    assert other_index is not index, "another xarray should get its own index"
+
+    index.get_slab_paths(scan=0, slabs=SLABS)
+    index_ref = weakref.ref(index)
+    del index
+    del xlog
+    gc.collect()
+
+    assert index_ref() is None, "index should be released with its xarray"
+    cached_indexes = [entry[1] for entry in xlog_index._xlog_id_to_index.values()]
+    assert cached_indexes == [other_index], "only the index of the remaining xarray should be cached"
+    assert get_xlog_index(other_xlog) is other_index, "remaining index should still be reused"
+
+
+def test_owned_index_keeps_xarray():
+    index = XlogIndex(build_xlog())
+    gc.collect()
+    assert index.get_slab_paths(scan=1, slabs=[2])[0] == Path("//scope/scan_1/slab_2"), \
+        "an index created by the caller should keep its xarray alive"
+
+    weak_index = XlogIndex(build_xlog(), weak=True)
+    gc.collect()
+    with pytest.raises(ReferenceError):
+        weak_index.get_slab_paths(scan=1, slabs=[2])
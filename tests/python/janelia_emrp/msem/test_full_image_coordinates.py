@@ -0,0 +1,97 @@
+import csv
+import re
+from pathlib import Path
+
+import pytest
+
+from janelia_emrp.msem.full_image_coordinates import load_full_image_coordinates, COORDINATE_FIELD_NAMES
+
+# regular expression used by the row by row parser that load_full_image_coordinates replaced
+unix_relative_image_path_pattern = re.compile(r"(^\d+)/(\d{3}_\d{6}_(\d{3})_\d{4}-\d{2}-\d{2}T\d{13}).png$")
+
+VALID_ROWS = [
+    "000007\\020_000007_082_2022-04-03T0154134018404.png\t2014641.659\t915550.903\t0",
+    "000007\\020_000007_001_2022-04-03T0154134018404.png\t-372876.505\t-123997.579\t0",
+    "12\\020_000012_091_1999-12-31T2359599999999.png\t-0.7\t0.7\t0",
+    "000100\\020_000100_010_2022-04-03T0201000000001.png\t1.5e3\t-2E2\t0\textra",
+    "000100/020_000100_011_2022-04-03T0201000000001.png\t9007199254740.9\t-9007199254740.9\t0",
+]
+
+
+def load_with_regex(full_image_coordinates_path: Path) -> list[tuple]:
+    rows = []
+    with open(full_image_coordinates_path, 'r') as data_file:
+        for row in csv.reader(data_file, delimiter="\t"):
+            unix_relative_image_path = row[0].replace('\\', '/')
+            stage_x = int(float(row[1]))
+            stage_y = int(float(row[2]))
+            unix_relative_image_path_match = unix_relative_image_path_pattern.match(unix_relative_image_path)
+            if not unix_relative_image_path_match:
+                raise RuntimeError(f"failed to parse unix_relative_image_path {unix_relative_image_path}")
+            short_sfov_name = unix_relative_image_path_match.group(2).replace("-", "").replace("T", "_")[:-7]
+            rows.append((unix_relative_image_path, unix_relative_image_path_match.group(1),
+                         unix_relative_image_path_match.group(3), short_sfov_name, stage_x, stage_y))
+    return rows
+
+
+def write_coordinates(tmp_path: Path,
+                      rows: list[str]) -> Path:
+    full_image_coordinates_path = tmp_path / "full_image_coordinates.txt"
+    full_image_coordinates_path.write_text("".join(f"{row}\n" for row in rows))
+    return full_image_coordinates_path
+
+
+def test_matches_regex_parser(tmp_path):
+    full_image_coordinates_path = write_coordinates(tmp_path, VALID_ROWS)
+
+    coordinates = load_full_image_coordinates(full_image_coordinates_path)
+    parsed_rows = [tuple(row) for row in coordinates[COORDINATE_FIELD_NAMES].tolist()]
+
+    assert parsed_rows == load_with_regex(full_image_coordinates_path), "parsed rows should match regex parser"
+    assert parsed_rows[2][4:] == (0, 0), "stage values should be truncated toward zero"
+
+
+@pytest.mark.parametrize("malformed_row", [
+    "000007\\020_000007_82_2022-04-03T0154134018404.png\t1\t2\t0",       # short sfov index
+    "000007\\020_000007_082_2022-04-03T015413401840.png\t1\t2\t0",       # short timestamp
+    "000007\\020_000007_082_2022-04-03T01541340184045.png\t1\t2\t0",     # long timestamp
+    "000007\\020_000007_082_2022-04-03 0154134018404.png\t1\t2\t0",      # missing T
+    "000007\\020_00000a_082_2022-04-03T0154134018404.png\t1\t2\t0",      # non-digit mfov in name
+    "00000a\\020_000007_082_2022-04-03T0154134018404.png\t1\t2\t0",      # non-digit mfov directory
+    "020_000007_082_2022-04-03T0154134018404.png\t1\t2\t0",              # missing mfov directory
+    "000007\\020_000007_082_2022-04-03T0154134018404.bmp\t1\t2\t0",      # wrong suffix
+    "000007\\020_000007_082_2022-04-03T0154134018404.png.bak\t1\t2\t0",  # extra suffix
+    "000007\\020_000007_082_2022-04-03T0154134018404.png\tx\t2\t0",      # non-numeric stage x
+    "000007\\020_000007_082_2022-04-03T0154134018404.png\t1\tnan\t0",    # non-finite stage y
+    "000007\\020_000007_082_2022-04-03T0154134018404.png\t1",            # missing stage y
+])
+def test_rejects_malformed_rows_like_regex_parser(tmp_path, malformed_row):
+    # put the malformed row after a valid row so that a partial parse is not mistaken for success
+    full_image_coordinates_path = write_coordinates(tmp_path, [VALID_ROWS[0], malformed_row])
+
+    with pytest.raises(Exception):
+        load_with_regex(full_image_coordinates_path)
+    with pytest.raises((RuntimeError, ValueError)):
+        load_full_image_coordinates(full_image_coordinates_path)
+
+
+@pytest.mark.parametrize("stricter_row", [
+    "000007\\020_000007_082_2022-04-03T0154134018404xpng\t1\t2\t0",                   # '.' matched any character
+    "000007\\020_000007_082_2022-04-03T015413401840\N{ARABIC-INDIC DIGIT FOUR}.png\t1\t2\t0",  # non-ASCII digit
+])
+def test_stricter_than_regex_parser(tmp_path, stricter_row):
+    # the regex accepted these rows by accident, the fixed position parser only accepts ASCII names with '.png'
+    full_image_coordinates_path = write_coordinates(tmp_path, [stricter_row])
+
+    assert len(load_with_regex(full_image_coordinates_path)) == 1, "regex parser should accept row"
+    with pytest.raises(RuntimeError, match="failed to parse row"):
+        load_full_image_coordinates(full_image_coordinates_path)
+
+
+def test_empty_file_and_other_suffixes(tmp_path):
+    assert len(load_full_image_coordinates(write_coordinates(tmp_path, []))) == 0, "empty file should have no rows"
+
+    bmp_path = write_coordinates(tmp_path, ["000007\\008_000007_055_2021-05-25T2146499297643.bmp\t-1.5\t2.5\t0"])
+    coordinates = load_full_image_coordinates(bmp_path, image_suffix=None)
+    assert coordinates[["mfov", "sfov", "short_sfov_name", "stage_x", "stage_y"]].tolist() == \
+           [("000007", "055", "008_000007_055_20210525_214649", -1, 2)], "invalid bmp row"
@@ -0,0 +1,132 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from janelia_emrp.msem import msem_to_render
+from janelia_emrp.msem.msem_to_render import SlabStackImport, import_slab_stacks_for_wafer
+
+
+@dataclass
+class FakeSlabScanTiles:
+    # Stands in for SlabScanTiles with one tile per SFOV name.
+    slab_scan_path: Path
+    sfov_names: list[str]
+
+    def to_tile_specs(self,
+                      stage_z: int) -> list[dict[str, Any]]:
+        return [{"tileId": f"{sfov_name}.{stage_z}.0", "z": stage_z} for sfov_name in self.sfov_names]
+
+
+def build_slab_scan_path(scan_index: int,
+                         empty: bool = False) -> Path:
+    return Path("/wafer", "empty" if empty else "scan", f"scan_{scan_index}")
+
+
+def load_fake_slab_scan_tiles(slab_scan_path: Path,
+                              validate_sfov_headers: bool) -> FakeSlabScanTiles:
+    # later scans finish building first (scans named "empty" have no tiles)
+    time.sleep(0.02 * (10 - int(slab_scan_path.name.split("_")[-1])))
+    sfov_names = [] if slab_scan_path.parent.name == "empty" else \
+        [f"{slab_scan_path.name}_a", f"{slab_scan_path.name}_b"]
+    return FakeSlabScanTiles(slab_scan_path=slab_scan_path, sfov_names=sfov_names)
+
+
+class FakeRenderApi:
+    def get_stack_url(self,
+                      stack: str) -> str:
+        return f"http://render/stack/{stack}"
+
+
+class FakeUploader:
+    # Stands in for RenderBulkUploader, completing uploads after random delays and recording each event.
+    def __init__(self,
+                 record: Callable[..., None]):
+        self.record = record
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.random = random.Random(1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.executor.shutdown(wait=True)
+
+    def upload(self,
+               stack: str,
+               z_values: list[int],
+               delay: float):
+        time.sleep(delay)
+        self.record("uploaded", stack, z_values)
+
+    def save_resolved_tiles(self,
+                            stack_url: str,
+                            resolved_tiles: dict[str, Any],
+                            derive_data: bool = False):
+        stack = stack_url.split("/")[-1]
+        z_values = [tile_spec["z"] for tile_spec in resolved_tiles["tileIdToSpecMap"].values()]
+        self.record("submitted", stack, list(resolved_tiles["tileIdToSpecMap"].keys()))
+        return [self.executor.submit(self.upload, stack, z_values, self.random.uniform(0, 0.05))]
+
+    def wait(self):
+        pass
+
+
+def test_import_slab_stacks_for_wafer_order(monkeypatch):
+    events = []
+    events_lock = threading.Lock()
+
+    def record(*event):
+        with events_lock:
+            events.append(event)
+
+    stack_to_scan_paths = {
+        "s001": [build_slab_scan_path(scan_index) for scan_index in range(4)],
+        "s002": [build_slab_scan_path(4), build_slab_scan_path(5, empty=True), build_slab_scan_path(6)],
+        "s003": [build_slab_scan_path(7, empty=True)],
+        "s004": [build_slab_scan_path(8), build_slab_scan_path(9)],
+    }
+    slab_stack_imports = [SlabStackImport(render=None, render_api=FakeRenderApi(), stack=stack,
+                                          slab_scan_paths=scan_paths)
+                          for stack, scan_paths in stack_to_scan_paths.items()]
+
+    monkeypatch.setattr(msem_to_render, "build_slab_stack_imports", lambda **kwargs: slab_stack_imports)
+    monkeypatch.setattr(msem_to_render, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(msem_to_render, "load_slab_scan_tiles", load_fake_slab_scan_tiles)
+    monkeypatch.setattr(msem_to_render, "RenderBulkUploader", lambda **kwargs: FakeUploader(record))
+    monkeypatch.setattr(msem_to_render, "ensure_stack_is_in_loading_state",
+                        lambda render, stack, wafer_info: record("LOADING", stack))
+    monkeypatch.setattr(msem_to_render.renderapi.stack, "set_stack_state",
+                        lambda stack, state, render: record(state, stack))
+
+    import_slab_stacks_for_wafer(render_ws_host="render",
+                                 render_owner="o",
+                                 wafer_info=None,
+                                 import_scan_name_list=[],
+                                 import_project_name_list=[],
+                                 max_build_workers=3,
+                                 max_concurrent_uploads=2)
+
+    submitted = [(event[1], event[2]) for event in events if event[0] == "submitted"]
+    assert submitted == [
+        ("s001", ["scan_0_a.1.0", "scan_0_b.1.0"]),
+        ("s001", ["scan_1_a.2.0", "scan_1_b.2.0"]),
+        ("s001", ["scan_2_a.3.0", "scan_2_b.3.0"]),
+        ("s001", ["scan_3_a.4.0", "scan_3_b.4.0"]),
+        ("s002", ["scan_4_a.1.0", "scan_4_b.1.0"]),
+        ("s002", ["scan_6_a.2.0", "scan_6_b.2.0"]),
+        ("s004", ["scan_8_a.1.0", "scan_8_b.1.0"]),
+        ("s004", ["scan_9_a.2.0", "scan_9_b.2.0"]),
+    ], "z values should be contiguous and in scan order for each stack"
+
+    for stack in ("s001", "s002", "s004"):
+        stack_events = [event for event in events if event[1] == stack]
+        states = [event[0] for event in stack_events if event[0] in ("LOADING", "COMPLETE")]
+        assert states == ["LOADING", "COMPLETE"], f"stack {stack} should be loaded and completed exactly once"
+        assert stack_events[0][0] == "LOADING", f"stack {stack} should be loading before its first upload"
+        assert stack_events[-1][0] == "COMPLETE", f"stack {stack} should be completed after all of its uploads"
+
+    assert [event for event in events if event[1] == "s003"] == [], "stack without tiles should not be changed"
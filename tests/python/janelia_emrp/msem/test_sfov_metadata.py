@@ -0,0 +1,107 @@
+import struct
+import zlib
+from pathlib import Path
+
+import pytest
+
+from janelia_emrp.msem import sfov_metadata
+from janelia_emrp.msem.msem_to_render import load_slab_scan_tiles
+from janelia_emrp.msem.scan_fit_parameters import load_scan_fit_parameters
+from janelia_emrp.msem.sfov_metadata import read_png_header, read_png_dimensions, validate_sfov_dimensions
+
+
+def png_chunk(chunk_type: bytes,
+              data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def write_png(png_path: Path,
+              width: int,
+              height: int,
+              bit_depth: int = 8):
+    # grayscale image with all zero pixels
+    row_bytes = (width * bit_depth + 7) // 8
+    pixel_data = b"".join(b"\x00" + bytes(row_bytes) for _ in range(height))
+    png_path.parent.mkdir(parents=True, exist_ok=True)
+    png_path.write_bytes(sfov_metadata.PNG_SIGNATURE +
+                         png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, 0, 0, 0, 0)) +
+                         png_chunk(b"IDAT", zlib.compress(pixel_data)) +
+                         png_chunk(b"IEND", b""))
+
+
+def test_read_png_header(tmp_path):
+    png_path = tmp_path / "sfov.png"
+
+    write_png(png_path, width=7, height=3)
+    assert read_png_header(png_path) == (7, 3, 8), "invalid 8-bit header"
+    assert read_png_dimensions(png_path) == (7, 3), "invalid dimensions"
+
+    write_png(png_path, width=70000, height=2, bit_depth=16)
+    assert read_png_header(png_path) == (70000, 2, 16), "invalid 16-bit header with width over 65535"
+
+
+def test_read_png_header_invalid(tmp_path):
+    png_path = tmp_path / "sfov.png"
+    write_png(png_path, width=7, height=3)
+    png_bytes = png_path.read_bytes()
+
+    truncated_path = tmp_path / "truncated.png"
+    truncated_path.write_bytes(png_bytes[:20])
+    with pytest.raises(ValueError, match="does not have a valid PNG header"):
+        read_png_header(truncated_path)
+
+    not_png_path = tmp_path / "not_png.png"
+    not_png_path.write_bytes(b"GIF89a" + bytes(30))
+    with pytest.raises(ValueError, match="does not have a valid PNG header"):
+        read_png_header(not_png_path)
+
+    missing_ihdr_path = tmp_path / "missing_ihdr.png"
+    missing_ihdr_path.write_bytes(png_bytes[:12] + b"IDAT" + png_bytes[16:])
+    with pytest.raises(ValueError, match="does not have a valid PNG header"):
+        read_png_header(missing_ihdr_path)
+
+    with pytest.raises(ValueError, match="not_png.png does not have a valid PNG header"):
+        validate_sfov_dimensions([png_path, not_png_path], expected_dimensions=(7, 3))
+
+
+def build_slab_scan(wafer_base_path: Path,
+                    sfov_dimensions: list[tuple[int, int]]) -> Path:
+    fit_parameters_path = wafer_base_path / "sfov_correction" / "average_fit_parameters_for_all_scans.txt"
+    fit_parameters_path.parent.mkdir(parents=True)
+    fit_parameters_path.write_text("1.5\n-2.0\n3.25\n")
+
+    slab_scan_path = wafer_base_path / "imaging/msem/scan_001/wafer_53_scan_001_20220427_23-16-30/002_"
+    rows = []
+    for index, (width, height) in enumerate(sfov_dimensions):
+        image_name = f"002_000007_{index + 1:03}_2022-04-27T2316304018404.png"
+        write_png(slab_scan_path / "000007" / image_name, width=width, height=height)
+        rows.append(f"000007\\{image_name}\t{1000.5 + index * 100}\t{2000.5 + index * 50}\t0\n")
+    (slab_scan_path / "full_image_coordinates.txt").write_text("".join(rows))
+
+    return slab_scan_path
+
+
+def test_load_scan_fit_parameters(tmp_path):
+    slab_scan_path = build_slab_scan(tmp_path / "wafer_53", [(7, 3)])
+
+    scan_fit_parameters = load_scan_fit_parameters(slab_scan_path)
+    assert (scan_fit_parameters.scan_name, scan_fit_parameters.scan_index) == ("001", 1), "invalid scan"
+    assert (scan_fit_parameters.a, scan_fit_parameters.b, scan_fit_parameters.c) == (1.5, -2.0, 3.25), \
+        "invalid fit values"
+    assert scan_fit_parameters.to_transform_spec()["dataString"] == "1.5,-2.0,3.25,0", "invalid transform"
+
+    with pytest.raises(RuntimeError, match="failed to parse slab_scan_path"):
+        load_scan_fit_parameters(tmp_path / "not_a_slab_scan")
+
+
+def test_validate_sfov_headers(tmp_path, monkeypatch):
+    monkeypatch.setattr(sfov_metadata, "_scan_path_to_sfov_dimensions", {})
+    slab_scan_path = build_slab_scan(tmp_path / "wafer_53", [(7, 3), (7, 3), (8, 3)])
+
+    slab_scan_tiles = load_slab_scan_tiles(slab_scan_path)
+    assert (slab_scan_tiles.tile_width, slab_scan_tiles.tile_height) == (7, 3), \
+        "dimensions should be read from the first SFOV"
+    assert (slab_scan_tiles.min_x, slab_scan_tiles.min_y) == (1000, 2000), "invalid minimum stage location"
+
+    with pytest.raises(ValueError, match=r"1 of 3 SFOV images do not have expected dimensions \(7, 3\)"):
+        load_slab_scan_tiles(slab_scan_path, validate_sfov_headers=True)
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from janelia_emrp.render import web_service_request
+from janelia_emrp.render.web_service_request import iter_json_array, get_shared_session, MatchRequest, \
+    RenderRequest, DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT_SECONDS, RETRY_STATUS_CODES
+
+
+class RecordingAdapter(BaseAdapter):
+    # Returns a JSON response built from each request's URL and records each request's timeout.
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+        self.timeouts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        with self._lock:
+            self.urls.append(request.url)
+            self.timeouts.append(timeout)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.05)  # hold the request so that concurrent requests overlap
+        with self._lock:
+            self.in_flight -= 1
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response._content = json.dumps({"url": request.url}).encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def recording_adapter(monkeypatch):
+    adapter = RecordingAdapter()
+    session = requests.Session()
+    session.mount("http://", adapter)
+    monkeypatch.setattr(web_service_request, "get_shared_session", lambda max_retries=DEFAULT_MAX_RETRIES: session)
+    return adapter
+
+
+def split_into_chunks(data: bytes,
+                      chunk_size: int) -> list[bytes]:
+    return [data[index:index + chunk_size] for index in range(0, len(data), chunk_size)]
+
+
+def test_iter_json_array_chunk_boundaries():
+    elements = [
+        {"pId": "23-01-24_000020_0-0-0.1.0", "matchCount": 36, "label": "café 漢字 \U0001f52c"},
+        -12.5e-3,
+        1234567,
+        "éé",
+        [1, [2, 3], {}],
+        True,
+        None,
+        0,
+    ]
+    data = json.dumps(elements, ensure_ascii=False).encode("utf-8")
+
+    for chunk_size in range(1, len(data) + 1):
+        assert list(iter_json_array(split_into_chunks(data, chunk_size))) == elements, \
+            f"incorrect elements for chunk size {chunk_size}"
+
+    # numbers split between chunks (including after an exponent marker) should not be cut short
+    assert list(iter_json_array([b"[1", b"2, 1.5e", b"10, -", b"7]"])) == [12, 1.5e10, -7], \
+        "incorrect split numbers"
+    assert list(iter_json_array([b"[12", b"]"])) == [12], "incorrect number split before end of array"
+
+
+def test_iter_json_array_empty():
+    assert list(iter_json_array([b"[]"])) == [], "empty array should have no elements"
+    assert list(iter_json_array([b" \n[", b" ", b"]\n "])) == [], "whitespace should be ignored"
+
+
+@pytest.mark.parametrize("chunks", [
+    [],
+    [b""],
+    [b"[1, 2"],
+    [b"[1,"],
+    [b'[{"a": 1'],
+    [b'["abc'],
+    [b"[\xe6\xbc"],
+])
+def test_iter_json_array_truncated(chunks):
+    with pytest.raises(ValueError):
+        list(iter_json_array(chunks))
+
+
+@pytest.mark.parametrize("text", [
+    "[1,,2]",
+    "[1 2]",
+    "[,1]",
+    "[1,]",
+    "[1]]",
+    "[1] 2",
+    "{}",
+    "1",
+    "[tru]",
+    "[1x]",
+])
+def test_iter_json_array_malformed(text: str):
+    for chunk_size in (1, len(text)):
+        with pytest.raises(ValueError):
+            list(iter_json_array(split_into_chunks(text.encode("utf-8"), chunk_size)))
+
+
+def test_get_shared_session_per_process(monkeypatch):
+    monkeypatch.setattr(web_service_request, "_shared_sessions", {})
+
+    session = get_shared_session()
+    assert get_shared_session() is session, "session should be shared within a process"
+    assert get_shared_session(max_retries=0) is not session, "sessions should differ for different retry counts"
+
+    monkeypatch.setattr(web_service_request.os, "getpid", lambda: -1)
+    assert get_shared_session() is not session, "session should not be shared with a forked process"
+
+
+def test_shared_session_retries(monkeypatch):
+    monkeypatch.setattr(web_service_request, "_shared_sessions", {})
+
+    retry = get_shared_session().get_adapter("http://render:8080").max_retries
+    assert retry.total == DEFAULT_MAX_RETRIES, "invalid retry count"
+    assert set(retry.status_forcelist) == set(RETRY_STATUS_CODES), "invalid retry status codes"
+    for method in ("GET", "PUT", "DELETE"):
+        for status in RETRY_STATUS_CODES:
+            assert retry.is_retry(method, status), f"{method} {status} response should be retried"
+        assert not retry.is_retry(method, 500), f"{method} 500 response should not be retried"
+    assert not retry.is_retry("POST", 503), "POST requests should not be retried"
+
+
+def test_request_timeout(recording_adapter):
+    render_request = RenderRequest(host="render:8080", owner="o", project="p")
+    render_request.get_stack_metadata("s")
+
+    match_request = MatchRequest(host="render:8080", owner="o", collection="c", timeout=(5.0, 60.0))
+    match_request.delete_collection()
+
+    assert recording_adapter.timeouts == [DEFAULT_TIMEOUT_SECONDS, (5.0, 60.0)], "invalid timeouts"
+    assert DEFAULT_TIMEOUT_SECONDS[1] is None, "responses should be awaited without a read timeout by default"
+
+
+def test_async_fan_out(recording_adapter):
+    render_request = RenderRequest(host="render:8080", owner="o", project="p")
+    z_values = list(range(12))
+    resolved_tiles_list = asyncio.run(render_request.get_resolved_tiles_for_z_values_async("s", z_values,
+                                                                                           max_concurrency=3))
+
+    assert [resolved_tiles["url"] for resolved_tiles in resolved_tiles_list] == \
+           [f"{render_request.stack_url('s')}/z/{z}/resolvedTiles" for z in z_values], \
+           "results should be in z order"
+    assert 1 < recording_adapter.max_in_flight <= 3, "requests should run concurrently up to the limit"
+
+    match_request = MatchRequest(host="render:8080", owner="o", collection="c")
+    match_pairs_list = asyncio.run(match_request.get_match_pairs_for_groups_async(["1.0", "2.0"],
+                                                                                  exclude_match_details=True))
+    assert [match_pairs["url"] for match_pairs in match_pairs_list] == \
+           [f"{match_request.collection_url()}/pGroup/{group_id}/matches?excludeMatchDetails=true"
+            for group_id in ["1.0", "2.0"]], "results should be in group order"